@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the cost of rendering the configuration of many nodes.
+
+Renders the configuration file and the default configuration dictionary
+of every node, spread over all the datastores and a few flavors, once the
+way it used to be done (selecting the template and parsing the output for
+every node) and once with the cached templates and default configurations.
+
+    tools/benchmark-config-templates.py [--nodes N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import time
+import uuid
+
+from trove.common import template
+
+DatastoreVersion = collections.namedtuple(
+    'DatastoreVersion', ['datastore_name', 'manager', 'name'])
+
+DATASTORES = [DatastoreVersion(manager, manager, 'bench')
+              for manager in sorted(template.SERVICE_PARSERS)]
+
+FLAVORS = [{'id': str(i), 'ram': 1024 * 2 ** i, 'vcpus': 2 ** i}
+           for i in range(4)]
+
+
+def uncached(config):
+    names = ['{name}/{version}/{template_name}',
+             '{name}/{template_name}',
+             '{manager}/{template_name}']
+    context = dict(config.datastore_dict,
+                   template_name=config.template_name)
+    kwargs = {'flavor': config.flavor_dict,
+              'datastore': config.datastore_dict,
+              'server_id': config._calculate_unique_id()}
+    parser = template.SERVICE_PARSERS[config.datastore_version.manager]
+    for _ in range(2):
+        selected = template.ENV.select_template(
+            [name.format(**context) for name in names])
+        contents = selected.render(**kwargs)
+    return contents, parser(contents).parse()
+
+
+def cached(config):
+    return config.render(), config.render_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=1000,
+                        help='Number of nodes to render.')
+    args = parser.parse_args()
+
+    nodes = [(DATASTORES[i % len(DATASTORES)], FLAVORS[i % len(FLAVORS)],
+              str(uuid.uuid4())) for i in range(args.nodes)]
+    print('%d nodes, %d datastores, %d flavors'
+          % (args.nodes, len(DATASTORES), len(FLAVORS)))
+    for name, render in (('per node', uncached), ('cached', cached)):
+        start = time.time()
+        for datastore, flavor, instance_id in nodes:
+            render(template.SingleInstanceConfigTemplate(
+                datastore, flavor, instance_id))
+        elapsed = time.time() - start
+        print('  %-10s %8.3f s  %8.1f us/node'
+              % (name, elapsed, elapsed / args.nodes * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the cost of validating API request bodies.
+
+Compares building a jsonschema validator for every request, which is what
+the API used to do, with the validators cached by the controllers and,
+when fastjsonschema is installed, the generated validators.
+
+    tools/benchmark-schema-validation.py [--number N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import functools
+import timeit
+
+import jsonschema
+
+from trove.common import apischema
+from trove.common import cfg
+from trove.common import wsgi
+
+CONF = cfg.CONF
+
+INSTANCE_CREATE = {
+    'instance': {
+        'name': 'bench-instance',
+        'flavorRef': '7',
+        'volume': {'size': 10, 'type': 'ssd'},
+        'datastore': {'type': 'mysql', 'version': '5.7'},
+        'databases': [{'name': 'db%d' % i} for i in range(5)],
+        'users': [{'name': 'user%d' % i, 'password': 'secret',
+                   'databases': [{'name': 'db%d' % i}]} for i in range(5)],
+        'nics': [{'net-id': 'c6b2a9b8-3a4d-4b5e-9f10-7a3b2c1d0e9f'}],
+        'availability_zone': 'nova',
+    }
+}
+
+USER_CREATE = {
+    'users': [{'name': 'user%d' % i, 'password': 'secret', 'host': '%',
+               'databases': [{'name': 'db%d' % (i % 10)}]}
+              for i in range(100)]
+}
+
+CASES = [
+    ('instance create', apischema.instance['create'], INSTANCE_CREATE),
+    ('user create (100 users)', apischema.user['create'], USER_CREATE),
+]
+
+
+def uncached(schema, body):
+    validator = jsonschema.Draft4Validator(schema)
+    if not validator.is_valid(body):
+        sorted(validator.iter_errors(body), key=lambda e: e.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=2000,
+                        help='Number of validations per measurement.')
+    args = parser.parse_args()
+
+    backends = [('jsonschema, per request', None),
+                ('jsonschema, cached', False)]
+    if wsgi.fastjsonschema:
+        backends.append(('fastjsonschema, cached', True))
+
+    for name, schema, body in CASES:
+        print(name)
+        for backend, fast in backends:
+            if fast is None:
+                check = functools.partial(uncached, schema)
+            else:
+                CONF.set_override('api_fast_schema_validation', fast)
+                check = wsgi.SchemaValidator(schema).errors
+            elapsed = min(timeit.repeat(functools.partial(check, body),
+                                        number=args.number, repeat=3))
+            print('  %-26s %8.1f us/request'
+                  % (backend, elapsed / args.number * 1e6))
+    CONF.clear_override('api_fast_schema_validation')
+
+
+if __name__ == '__main__':
+    main()
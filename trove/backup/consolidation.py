@@ -0,0 +1,192 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Merge an InnoBackupEx incremental chain into a synthetic full backup."""
+
+import os
+import shutil
+
+from oslo_log import log as logging
+
+from trove.common import cfg
+from trove.common.i18n import _
+from trove.common import utils
+from trove.guestagent.strategies.backup import base as backup_base
+from trove.guestagent.strategies.restore import base as restore_base
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+# Metadata keys that tie an incremental backup to its parent.
+PARENT_METADATA = ('parent_location', 'parent_checksum')
+# The guest restores a synthetic backup like a regular full backup.
+CONSOLIDATED_BACKUP_TYPE = 'InnoBackupEx'
+# Percona XtraBackup commands run on the Task Manager host.
+REQUIRED_COMMANDS = ('innobackupex', 'xtrabackup', 'xbstream')
+
+
+class ConsolidationError(Exception):
+    """Error merging a chain of backups."""
+
+
+def _find_command(command):
+    for path in os.environ.get('PATH', os.defpath).split(os.pathsep):
+        candidate = os.path.join(path, command)
+        if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+            return candidate
+    return None
+
+
+def check_commands():
+    """Make sure the XtraBackup tools are installed on this host."""
+    missing = [command for command in REQUIRED_COMMANDS
+               if not _find_command(command)]
+    if missing:
+        raise ConsolidationError(
+            _("Cannot consolidate backups: %(commands)s not found on the "
+              "Task Manager host. Install Percona XtraBackup there to "
+              "enable backup consolidation.") %
+            {'commands': ', '.join(missing)})
+
+
+class ChainLinkUnpack(restore_base.RestoreRunner):
+    """Unpack one backup of the chain into a workspace directory."""
+    __strategy_name__ = 'chain_link_unpack'
+    base_restore_cmd = 'xbstream -x -C %(restore_location)s'
+
+
+class ConsolidatedBackup(backup_base.BackupRunner):
+    """Stream a prepared backup directory back out as an xbstream."""
+    __strategy_name__ = 'consolidated_backup'
+
+    def __init__(self, filename, **kwargs):
+        self.lsn = kwargs.get('lsn')
+        self.bytes_read = 0
+        super(ConsolidatedBackup, self).__init__(filename, **kwargs)
+
+    @property
+    def backup_type(self):
+        return CONSOLIDATED_BACKUP_TYPE
+
+    @property
+    def cmd(self):
+        cmd = ('cd %(base_dir)s && find . -type f -print0 | '
+               'xargs -0 xbstream -c')
+        return cmd + self.zip_cmd + self.encrypt_cmd
+
+    @property
+    def filename(self):
+        return '%s.xbstream' % self.base_filename
+
+    def metadata(self):
+        return {'lsn': self.lsn} if self.lsn else {}
+
+    def read(self, chunk_size):
+        chunk = super(ConsolidatedBackup, self).read(chunk_size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class ChainConsolidator(object):
+    """Apply a full backup and its incrementals in a scratch workspace.
+
+    The full backup and every incremental are prepared with '--redo-only',
+    exactly like the first steps of an incremental restore, and the result
+    is uploaded as a new full backup.  The final '--apply-log' is left to
+    the restore so that incrementals taken after the chain can still be
+    applied on top of the synthetic backup.
+    """
+
+    prepare_cmd = ('innobackupex'
+                   ' --defaults-file=%(base_dir)s/backup-my.cnf'
+                   ' --ibbackup=xtrabackup'
+                   ' --apply-log'
+                   ' --redo-only'
+                   ' %(base_dir)s'
+                   ' %(incremental_args)s'
+                   ' 2>%(log_file)s')
+
+    def __init__(self, storage, backup_id):
+        self.storage = storage
+        self.backup_id = backup_id
+        self.workspace = os.path.join(CONF.backup_consolidation_workspace,
+                                      backup_id)
+        self.base_dir = os.path.join(self.workspace, 'base')
+        self.incremental_dir = os.path.join(self.workspace, 'incremental')
+        self.log_file = os.path.join(self.workspace, 'prepare.log')
+
+    def _prepare(self, incremental_dir=None):
+        incremental_args = ('--incremental-dir=%s' % incremental_dir
+                            if incremental_dir else '')
+        cmd = self.prepare_cmd % {'base_dir': self.base_dir,
+                                  'incremental_args': incremental_args,
+                                  'log_file': self.log_file}
+        LOG.debug("Running innobackupex prepare: %s.", cmd)
+        utils.execute_with_timeout(cmd, shell=True,
+                                   timeout=CONF.restore_usage_timeout)
+
+    def _apply(self, link, first):
+        target_dir = self.base_dir if first else self.incremental_dir
+        os.makedirs(target_dir)
+        LOG.debug("Unpacking backup %(id)s into %(dir)s.",
+                  {'id': link.id, 'dir': target_dir})
+        ChainLinkUnpack(self.storage, location=link.location,
+                        checksum=link.checksum,
+                        restore_location=target_dir).restore()
+        if first:
+            self._prepare()
+        else:
+            self._prepare(self.incremental_dir)
+            shutil.rmtree(self.incremental_dir)
+
+    def consolidate(self, chain):
+        """Merge the chain (full backup first) into a new full backup.
+
+        :returns: the checksum, location and size (in GB) of the
+                  synthetic backup.
+        """
+        check_commands()
+        last = chain[-1]
+        metadata = self.storage.load_metadata(last.location, last.checksum)
+        for key in PARENT_METADATA:
+            metadata.pop(key, None)
+        lsn = metadata.pop('lsn', None)
+
+        try:
+            for number, link in enumerate(chain):
+                self._apply(link, number == 0)
+            with ConsolidatedBackup(self.backup_id, base_dir=self.base_dir,
+                                    lsn=lsn) as bkup:
+                success, note, checksum, location = self.storage.save(
+                    bkup.manifest, bkup, metadata=metadata)
+                size = utils.to_gb(bkup.bytes_read)
+            if not success:
+                raise ConsolidationError(note)
+        finally:
+            shutil.rmtree(self.workspace, ignore_errors=True)
+
+        LOG.info(_("Merged %(count)d backups into %(location)s."),
+                 {'count': len(chain), 'location': location})
+        return checksum, location, size
+
+    def reparent(self, backup, location, checksum):
+        """Point an incremental backup's stored metadata at a new parent."""
+        metadata = self.storage.load_metadata(backup.location,
+                                              backup.checksum)
+        metadata.update({'parent_location': location,
+                         'parent_checksum': checksum})
+        # Swift replaces all object metadata on update, so write it whole.
+        self.storage.save_metadata(backup.location, metadata)
@@ -33,6 +33,9 @@ from trove.taskmanager import api
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+# Backup types that can be merged into a synthetic full backup.
+CONSOLIDATION_BACKUP_TYPES = ['InnoBackupEx', 'InnoBackupExIncremental']
+
 
 class Backup(object):
 
@@ -241,6 +244,31 @@ class Backup(object):
 
         return last_backup
 
+    @classmethod
+    def get_restore_base(cls, context, instance_id, restore_time):
+        """
+        returns the most recent completed full backup of the instance
+        taken at or before the given time, the base a point-in-time
+        recovery to that time starts from
+        :param cls:
+        :param instance_id:
+        :param restore_time: naive UTC datetime of the restore point
+        :return:
+        """
+        query = DBBackup.query()
+        query = query.filter_by(instance_id=instance_id,
+                                state=BackupState.COMPLETED,
+                                parent_id=None,
+                                deleted=False)
+        if not context.is_admin:
+            query = query.filter_by(tenant_id=context.tenant)
+        query = query.filter(DBBackup.updated <= restore_time)
+        backup = query.order_by(desc(DBBackup.updated)).first()
+        if not backup:
+            raise exception.RestorePointBackupNotFound(
+                instance_id=instance_id, restore_point=restore_time)
+        return backup
+
     @classmethod
     def fail_for_instance(cls, instance_id):
         query = DBBackup.query()
@@ -279,6 +307,75 @@ class Backup(object):
                                {'backups': -1},
                                _delete_resources)
 
+    @classmethod
+    def get_chain(cls, context, backup_id):
+        """
+        returns the backups needed to restore the given backup, starting
+        with the full backup the chain is based on
+        :param cls:
+        :param context: tenant_id included
+        :param backup_id: Id of the last backup of the chain
+        :return:
+        """
+        chain = [cls.get_by_id(context, backup_id)]
+        while chain[0].parent_id:
+            chain.insert(0, cls.get_by_id(context, chain[0].parent_id))
+        return chain
+
+    @classmethod
+    def consolidate(cls, context, backup_id, name=None, description=None):
+        """
+        create db record for a synthetic full backup merging the given
+        incremental backup with all of its parents
+        :param cls:
+        :param context: tenant_id included
+        :param backup_id: Id of the last backup of the chain
+        :param name:
+        :param description:
+        :return:
+        """
+
+        def _create_resources():
+            chain = cls.get_chain(context, backup_id)
+            last = chain[-1]
+            if len(chain) < 2:
+                raise exception.UnprocessableEntity(
+                    _("Backup %s is not an incremental backup.") % backup_id)
+            for link in chain:
+                if link.state != BackupState.COMPLETED:
+                    raise exception.UnprocessableEntity(
+                        _("Backup %(id)s of the chain is in state "
+                          "%(state)s.") % {'id': link.id,
+                                           'state': link.state})
+                if link.backup_type not in CONSOLIDATION_BACKUP_TYPES:
+                    raise exception.UnprocessableEntity(
+                        _("Backup %(id)s of type %(type)s cannot be "
+                          "consolidated.") % {'id': link.id,
+                                              'type': link.backup_type})
+            cls.verify_swift_auth_token(context)
+
+            try:
+                db_info = DBBackup.create(
+                    name=name or '%s-consolidated' % last.name,
+                    description=description,
+                    tenant_id=context.tenant,
+                    state=BackupState.NEW,
+                    instance_id=last.instance_id,
+                    parent_id=None,
+                    datastore_version_id=last.datastore_version_id,
+                    deleted=False)
+            except exception.InvalidModelError as ex:
+                LOG.exception(_("Unable to create consolidated backup "
+                                "record for backup: %s"), backup_id)
+                raise exception.BackupCreationError(str(ex))
+
+            api.API(context).consolidate_backup(
+                db_info.id, [link.id for link in chain])
+            return db_info
+        return run_with_quotas(context.tenant,
+                               {'backups': 1},
+                               _create_resources)
+
     @classmethod
     def verify_swift_auth_token(cls, context):
         try:
@@ -291,7 +388,8 @@ class Backup(object):
 
 
 def persisted_models():
-    return {'backups': DBBackup}
+    return {'backups': DBBackup,
+            'backup_retention_policies': DBBackupRetentionPolicy}
 
 
 class DBBackup(DatabaseModelBase):
@@ -361,3 +459,12 @@ class DBBackup(DatabaseModelBase):
                 return False
             else:
                 raise exception.SwiftAuthError(tenant_id=context.tenant)
+
+
+class DBBackupRetentionPolicy(DatabaseModelBase):
+    """A table for the backup retention policies of tenants and instances.
+
+    A policy with an instance_id overrides the policy of its tenant.
+    """
+    _data_fields = ['id', 'tenant_id', 'instance_id', 'keep_daily',
+                    'keep_weekly', 'created', 'updated']
@@ -0,0 +1,311 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Backup retention policies and the engine that enforces them."""
+
+import collections
+import json
+import re
+
+import eventlet
+from eventlet import pools
+from oslo_log import log as logging
+from six.moves.urllib.parse import quote
+from six.moves.urllib.parse import unquote
+
+from trove.backup.models import DBBackup
+from trove.backup.models import DBBackupRetentionPolicy
+from trove.backup.state import BackupState
+from trove.common import cfg
+from trove.common.context import TroveContext
+from trove.common import exception
+from trove.common.i18n import _
+from trove.common.remote import create_swift_client
+from trove.common import timeutils
+from trove.quota.quota import run_with_quotas
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+# Names of the segments of a Swift static large object, see StreamReader.
+SEGMENT_NAME = re.compile(r'^(?P<base>.+)_\d{8}$')
+# Number of ids in a single 'IN' clause when updating backup rows.
+UPDATE_BATCH_SIZE = 500
+
+
+class RetentionPolicy(object):
+    """Manage the retention policies of tenants and instances."""
+
+    @classmethod
+    def update(cls, tenant_id, keep_daily, keep_weekly, instance_id=None):
+        keep_daily = int(keep_daily)
+        keep_weekly = int(keep_weekly)
+        if keep_daily < 0 or keep_weekly < 0 or not (keep_daily or
+                                                     keep_weekly):
+            raise exception.BadRequest(
+                _("A retention policy has to keep at least one daily or "
+                  "weekly backup."))
+        try:
+            policy = DBBackupRetentionPolicy.find_by(
+                tenant_id=tenant_id, instance_id=instance_id)
+            policy.update(keep_daily=keep_daily, keep_weekly=keep_weekly)
+        except exception.ModelNotFoundError:
+            policy = DBBackupRetentionPolicy.create(
+                tenant_id=tenant_id, instance_id=instance_id,
+                keep_daily=keep_daily, keep_weekly=keep_weekly)
+        return policy
+
+    @classmethod
+    def delete(cls, tenant_id, instance_id=None):
+        DBBackupRetentionPolicy.find_by(tenant_id=tenant_id,
+                                        instance_id=instance_id).delete()
+
+    @classmethod
+    def load_all(cls, tenant_id=None):
+        """Return the policies as {tenant_id: {instance_id: policy}}.
+
+        The policy of the tenant itself is stored under the instance_id None.
+        """
+        query = DBBackupRetentionPolicy.query()
+        if tenant_id:
+            query = query.filter_by(tenant_id=tenant_id)
+        policies = collections.defaultdict(dict)
+        for policy in query.all():
+            policies[policy.tenant_id][policy.instance_id] = policy
+        return policies
+
+
+def check_config():
+    """Make sure the expired backups can be deleted.
+
+    They are deleted from the Swift account of their tenant, which is only
+    known from swift_url: the service catalog of an admin context points
+    at the account of the admin tenant.
+    """
+    if not CONF.swift_url:
+        raise exception.TroveError(
+            _("The backup retention policies can only be enforced when "
+              "swift_url is set."))
+
+
+def select_expired(backups, keep_daily, keep_weekly):
+    """Return the backups of one instance that the policy does not keep.
+
+    The newest completed backup of each of the last 'keep_daily' days and
+    of each of the last 'keep_weekly' ISO weeks that have backups is kept.
+    Backups that are still running are never expired.  The retention is
+    chain aware: all the parents of a kept backup are kept as well, since
+    an incremental backup cannot be restored without them.
+    """
+    days = set()
+    weeks = set()
+    keep = set()
+    for backup in sorted(backups, key=lambda backup: backup.created,
+                         reverse=True):
+        if backup.state in BackupState.RUNNING_STATES:
+            keep.add(backup.id)
+            continue
+        if backup.state != BackupState.COMPLETED:
+            continue
+        day = backup.created.date()
+        week = backup.created.isocalendar()[:2]
+        if day not in days and len(days) < keep_daily:
+            days.add(day)
+            keep.add(backup.id)
+        if week not in weeks and len(weeks) < keep_weekly:
+            weeks.add(week)
+            keep.add(backup.id)
+
+    parents = dict((backup.id, backup.parent_id) for backup in backups)
+    for backup_id in list(keep):
+        parent_id = parents.get(backup_id)
+        while parent_id and parent_id not in keep:
+            keep.add(parent_id)
+            parent_id = parents.get(parent_id)
+    return [backup for backup in backups if backup.id not in keep]
+
+
+class BackupRetention(object):
+    """Apply the retention policies to all the backups of the tenants.
+
+    The live backups of every tenant are read with a single query and the
+    expired ones are removed from the storage with Swift bulk delete
+    requests sent over a pool of connections.  The database rows are then
+    marked as deleted in bulk.
+
+    The context has to be allowed to access the Swift account of each
+    tenant, i.e. it should carry a reseller admin token.  The URL of the
+    accounts is built from swift_url, which has to be set.
+    """
+
+    def __init__(self, context, dry_run=False):
+        if not dry_run:
+            check_config()
+        self.context = context
+        self.dry_run = dry_run
+        self.batch_size = CONF.backup_retention_delete_batch_size
+        self.workers = CONF.backup_retention_delete_workers
+
+    def _live_backups(self, tenant_id):
+        return DBBackup.query().with_entities(
+            DBBackup.id, DBBackup.instance_id, DBBackup.parent_id,
+            DBBackup.state, DBBackup.created, DBBackup.location).filter(
+            DBBackup.tenant_id == tenant_id,
+            DBBackup.deleted == 0).all()
+
+    def expired(self, tenant_id, policies):
+        """Return the expired backups of the tenant."""
+        by_instance = collections.defaultdict(list)
+        for backup in self._live_backups(tenant_id):
+            by_instance[backup.instance_id].append(backup)
+
+        expired = []
+        for instance_id, backups in by_instance.items():
+            policy = policies.get(instance_id, policies.get(None))
+            if policy:
+                expired.extend(select_expired(backups, policy.keep_daily,
+                                              policy.keep_weekly))
+        return expired
+
+    def run(self, tenant_id=None):
+        """Enforce the retention policies.
+
+        :param tenant_id: only enforce the policies of this tenant.
+        :returns: a report with the expired backups of every tenant and, if
+                  this is not a dry run, the ones that could not be deleted.
+        """
+        report = []
+        for tenant, policies in RetentionPolicy.load_all(tenant_id).items():
+            expired = self.expired(tenant, policies)
+            LOG.info(_("%(count)d backups of tenant %(tenant)s expired."),
+                     {'count': len(expired), 'tenant': tenant})
+            failed = []
+            if expired and not self.dry_run:
+                failed = self._delete(tenant, expired)
+            report.append({'tenant_id': tenant,
+                           'expired': [{'id': backup.id,
+                                        'instance_id': backup.instance_id,
+                                        'parent_id': backup.parent_id,
+                                        'created': backup.created}
+                                       for backup in expired],
+                           'failed': failed})
+        return report
+
+    def _delete(self, tenant_id, backups):
+        context = TroveContext(user=self.context.user,
+                               auth_token=self.context.auth_token,
+                               tenant=tenant_id,
+                               is_admin=True)
+        try:
+            failed = self._delete_objects(context, backups)
+        except Exception:
+            LOG.exception(_("Error deleting the expired backups of tenant "
+                            "%s."), tenant_id)
+            return [backup.id for backup in backups]
+        deleted = [backup.id for backup in backups
+                   if backup.id not in failed]
+        if deleted:
+            self._mark_deleted(tenant_id, deleted)
+        return sorted(failed)
+
+    def _object_names(self, client, backups):
+        """Map every object of the backups to the backup it belongs to.
+
+        The containers are listed instead of looking at each backup, since
+        a listing returns thousands of objects per request.
+        """
+        backup_ids = set(backup.id for backup in backups)
+        containers = set(backup.location.split('/')[-2]
+                         for backup in backups if backup.location)
+        names = {}
+        for container in containers:
+            headers, objects = client.get_container(container,
+                                                    full_listing=True)
+            for obj in objects:
+                base = obj['name'].split('.')[0]
+                match = SEGMENT_NAME.match(base)
+                if base not in backup_ids and match:
+                    base = match.group('base')
+                if base in backup_ids:
+                    names['/%s/%s' % (container, obj['name'])] = base
+        return names
+
+    def _bulk_delete(self, client_pool, names):
+        body = '\n'.join(quote(name) for name in names)
+        with client_pool.item() as client:
+            headers, resp = client.post_account(
+                headers={'Accept': 'application/json',
+                         'Content-Type': 'text/plain'},
+                query_string='bulk-delete', data=body)
+        result = json.loads(resp)
+        processed = (result.get('Number Deleted', 0) +
+                     result.get('Number Not Found', 0))
+        if (not result.get('Response Status', '').startswith('2') or
+                processed != len(names)):
+            # An aborted batch does not list the objects it did not get to.
+            LOG.warning(_("Bulk delete of %(count)d objects ended with "
+                          "%(status)s after %(processed)d objects."),
+                        {'count': len(names), 'processed': processed,
+                         'status': result.get('Response Status')})
+            return list(names)
+        # Objects that are already gone do not keep a backup alive.
+        return [unquote(name) for name, status in result.get('Errors', [])
+                if not status.startswith('404')]
+
+    def _delete_objects(self, context, backups):
+        """Delete the objects of the backups from Swift.
+
+        :returns: the ids of the backups that could not be fully deleted.
+        """
+        client_pool = pools.Pool(max_size=self.workers,
+                                 create=lambda: create_swift_client(context))
+        with client_pool.item() as client:
+            names = self._object_names(client, backups)
+        LOG.debug("Deleting %(objects)d objects of %(backups)d backups.",
+                  {'objects': len(names), 'backups': len(backups)})
+
+        ordered = sorted(names)
+        batches = [ordered[pos:pos + self.batch_size]
+                   for pos in range(0, len(ordered), self.batch_size)]
+        failed = set()
+
+        def _delete_batch(batch):
+            try:
+                return self._bulk_delete(client_pool, batch)
+            except Exception:
+                LOG.exception(_("Error in bulk delete of %d objects."),
+                              len(batch))
+                return batch
+
+        pool = eventlet.GreenPool(self.workers)
+        for errors in pool.imap(_delete_batch, batches):
+            failed.update(names[name] for name in errors if name in names)
+        return failed
+
+    def _mark_deleted(self, tenant_id, backup_ids):
+        def _update_rows():
+            now = timeutils.utcnow()
+            for pos in range(0, len(backup_ids), UPDATE_BATCH_SIZE):
+                DBBackup.query().filter(
+                    DBBackup.id.in_(backup_ids[pos:pos + UPDATE_BATCH_SIZE])
+                ).update({'deleted': True, 'deleted_at': now,
+                          'updated': now}, synchronize_session=False)
+
+        run_with_quotas(tenant_id, {'backups': -len(backup_ids)},
+                        _update_rows)
+        LOG.info(_("Deleted %(count)d expired backups of tenant "
+                   "%(tenant)s."), {'count': len(backup_ids),
+                                    'tenant': tenant_id})
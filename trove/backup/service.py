@@ -76,6 +76,24 @@ class BackupController(wsgi.Controller):
                                    parent_id=parent, incremental=incremental)
         return wsgi.Result(views.BackupView(backup).data(), 202)
 
+    def action(self, req, body, tenant_id, id):
+        LOG.info(_("Consolidating backup chain for tenant %(tenant_id)s "
+                   "ending with backup %(backup_id)s"),
+                 {'tenant_id': tenant_id, 'backup_id': id})
+        context = req.environ[wsgi.CONTEXT_KEY]
+        backup = Backup.get_by_id(context, id)
+        policy.authorize_on_target(context, 'backup:consolidate',
+                                   {'tenant': backup.tenant_id})
+        data = body['consolidate']
+        name = data.get('name')
+        desc = data.get('description')
+        context.notification = notification.DBaaSBackupConsolidate(
+            context, request=req)
+        with StartNotification(context, backup_id=id, name=name):
+            consolidated = Backup.consolidate(context, id, name=name,
+                                              description=desc)
+        return wsgi.Result(views.BackupView(consolidated).data(), 202)
+
     def delete(self, req, tenant_id, id):
         LOG.info(_('Deleting backup for tenant %(tenant_id)s '
                    'ID: %(backup_id)s'),
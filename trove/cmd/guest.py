@@ -62,11 +62,13 @@ def main():
     rpc.init(CONF)
 
     from trove.common.rpc import service as rpc_service
+    from trove.guestagent import concurrency
     server = rpc_service.RpcService(
         key=CONF.instance_rpc_encr_key,
         topic="guestagent.%s" % CONF.guest_id,
         manager=manager, host=CONF.guest_id,
-        rpc_api_version=guest_api.API.API_LATEST_VERSION)
+        rpc_api_version=guest_api.API.API_LATEST_VERSION,
+        endpoint_wrapper=concurrency.LimitedEndpoint)
 
     launcher = openstack_service.launch(CONF, server)
     launcher.wait()
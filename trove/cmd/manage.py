@@ -23,13 +23,16 @@ gettext.install('trove', unicode=1)
 
 from oslo_log import log as logging
 
+from trove.backup import retention
 from trove.common import cfg
+from trove.common.context import TroveContext
 from trove.common import exception
 from trove.common.i18n import _
 from trove.common import utils
 from trove.configuration import models as config_models
 from trove.datastore import models as datastore_models
 from trove.db import get_db_api
+from trove.taskmanager import pool as guest_pool
 
 
 CONF = cfg.CONF
@@ -162,6 +165,78 @@ class Commands(object):
         except exception.DatastoreVersionNotFound as e:
             print(e)
 
+    def backup_retention_policy_update(self, tenant_id, keep_daily,
+                                       keep_weekly, instance_id=None):
+        """Sets the backup retention policy of a tenant or instance."""
+        try:
+            retention.RetentionPolicy.update(tenant_id, keep_daily,
+                                             keep_weekly,
+                                             instance_id=instance_id)
+            print("Backup retention policy of '%s' updated."
+                  % (instance_id or tenant_id))
+        except exception.BadRequest as e:
+            print(e)
+
+    def backup_retention_policy_delete(self, tenant_id, instance_id=None):
+        """Removes the backup retention policy of a tenant or instance."""
+        try:
+            retention.RetentionPolicy.delete(tenant_id,
+                                             instance_id=instance_id)
+            print("Backup retention policy of '%s' deleted."
+                  % (instance_id or tenant_id))
+        except exception.ModelNotFoundError as e:
+            print(e)
+
+    def backup_retention_run(self, tenant_id=None, dry_run=False):
+        """Deletes the backups expired by the retention policies."""
+        context = TroveContext(user=CONF.nova_proxy_admin_user,
+                               auth_token=CONF.nova_proxy_admin_pass,
+                               tenant=CONF.nova_proxy_admin_tenant_id)
+        report = retention.BackupRetention(context, dry_run=dry_run).run(
+            tenant_id=tenant_id)
+        for tenant in report:
+            for backup in tenant['expired']:
+                print("Tenant: %s, Instance: %s, Backup: %s, Created: %s%s" %
+                      (tenant['tenant_id'], backup['instance_id'],
+                       backup['id'], backup['created'],
+                       ' (failed)' if backup['id'] in tenant['failed']
+                       else ''))
+        print("%s %d expired backups." %
+              ("Found" if dry_run else "Deleted",
+               sum(len(tenant['expired']) - len(tenant['failed'])
+                   for tenant in report)))
+
+    def guest_pool_update(self, datastore, datastore_version, flavor_id,
+                          size, volume_size=None, volume_type=None,
+                          idle_timeout=0):
+        """Adds or resizes the guest pool of a datastore version/flavor."""
+        try:
+            pool = guest_pool.GuestPools.update(
+                datastore, datastore_version, flavor_id, size,
+                volume_size=volume_size, volume_type=volume_type,
+                idle_timeout=idle_timeout)
+            print("Guest pool '%s' updated." % pool.id)
+        except (exception.BadRequest,
+                exception.DatastoreVersionNotFound) as e:
+            print(e)
+
+    def guest_pool_delete(self, pool_id):
+        """Deletes an empty guest pool."""
+        try:
+            guest_pool.GuestPools.delete(pool_id)
+            print("Guest pool '%s' deleted." % pool_id)
+        except (exception.BadRequest, exception.ModelNotFoundError) as e:
+            print(e)
+
+    def guest_pool_list(self):
+        """Lists the guest pools and their instances."""
+        for pool in guest_pool.GuestPools.load_all():
+            print("Pool: %(id)s, Datastore Version: "
+                  "%(datastore_version_id)s, Flavor: %(flavor_id)s, "
+                  "Volume: %(volume_size)s %(volume_type)s, Size: %(size)d, "
+                  "Ready: %(ready)d, Building: %(building)d, "
+                  "Claimed: %(claimed)d, Missed: %(missed)d" % pool)
+
     def params_of(self, command_name):
         if Commands.has(command_name):
             return utils.MethodInspector(getattr(self, command_name))
@@ -278,6 +353,59 @@ def main():
         parser.add_argument('datastore_name', help='Name of the datastore.')
         parser.add_argument('datastore_version_name', help='Name of the '
                             'datastore version.')
+
+        parser = subparser.add_parser(
+            'backup_retention_policy_update', help='Adds or updates the '
+            'backup retention policy of a tenant or of one of its '
+            'instances. The policy of an instance overrides the policy of '
+            'its tenant.')
+        parser.add_argument('tenant_id', help='ID of the tenant.')
+        parser.add_argument('keep_daily', help='Number of days for which '
+                            'the newest backup is kept.')
+        parser.add_argument('keep_weekly', help='Number of weeks for which '
+                            'the newest backup is kept.')
+        parser.add_argument('--instance_id', help='ID of the instance the '
+                            'policy applies to.')
+
+        parser = subparser.add_parser(
+            'backup_retention_policy_delete', help='Deletes the backup '
+            'retention policy of a tenant or of one of its instances.')
+        parser.add_argument('tenant_id', help='ID of the tenant.')
+        parser.add_argument('--instance_id', help='ID of the instance the '
+                            'policy applies to.')
+
+        parser = subparser.add_parser(
+            'backup_retention_run', help='Deletes the backups expired by '
+            'the backup retention policies.')
+        parser.add_argument('--tenant_id', help='Only apply the policies '
+                            'of this tenant.')
+        parser.add_argument('--dry_run', action='store_true', help='Only '
+                            'report the expired backups.')
+
+        parser = subparser.add_parser(
+            'guest_pool_update', help='Adds or resizes the pool of booted '
+            'instances kept for a datastore version, flavor and volume.')
+        parser.add_argument('datastore', help='Name of the datastore.')
+        parser.add_argument('datastore_version', help='Name of the '
+                            'datastore version.')
+        parser.add_argument('flavor_id', help='ID of the flavor.')
+        parser.add_argument('size', help='Number of instances to keep '
+                            'ready, 0 to drain the pool.')
+        parser.add_argument('--volume_size', help='Size (in GB) of the '
+                            'volume of the instances.')
+        parser.add_argument('--volume_type', help='Volume type of the '
+                            'instances.')
+        parser.add_argument('--idle_timeout', default=0, help='Time (in '
+                            'seconds) after which an unused instance is '
+                            'replaced, 0 to keep it.')
+
+        parser = subparser.add_parser(
+            'guest_pool_delete', help='Deletes a guest pool that has no '
+            'instances left.')
+        parser.add_argument('pool_id', help='ID of the guest pool.')
+
+        subparser.add_parser('guest_pool_list', help='Lists the guest '
+                             'pools.')
     cfg.custom_parser('action', actions)
     cfg.parse_args(sys.argv)
 
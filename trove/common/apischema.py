@@ -193,6 +193,21 @@ users_list = {
     }
 }
 
+grants_list = {
+    "type": "array",
+    "minItems": 0,
+    "items": {
+        "type": "object",
+        "required": ["name", "databases"],
+        "additionalProperties": True,
+        "properties": {
+            "name": name_string,
+            "host": host_string,
+            "databases": databases_ref_list_required
+        }
+    }
+}
+
 null_configuration_id = {
     "type": "null"
 }
@@ -349,10 +364,15 @@ instance = {
                     "users": users_list,
                     "restorePoint": {
                         "type": "object",
-                        "required": ["backupRef"],
                         "additionalProperties": True,
                         "properties": {
-                            "backupRef": uuid
+                            "backupRef": uuid,
+                            "instanceRef": uuid,
+                            "timestamp": {
+                                "type": "string",
+                                "format": "date-time"
+                            },
+                            "position": non_empty_string
                         }
                     },
                     "availability_zone": non_empty_string,
@@ -433,6 +453,21 @@ instance = {
                     "type": "object"
                 }
             }
+        },
+        "log_archive": {
+            "type": "object",
+            "required": ["log_archive"],
+            "additionalProperties": True,
+            "properties": {
+                "log_archive": {
+                    "type": "object",
+                    "required": ["enable"],
+                    "additionalProperties": False,
+                    "properties": {
+                        "enable": boolean_string
+                    }
+                }
+            }
         }
     }
 }
@@ -514,6 +549,17 @@ user = {
         "properties": {
             "user": user_attributes
         }
+    },
+    "provision": {
+        "name": "users:provision",
+        "type": "object",
+        "minProperties": 1,
+        "additionalProperties": False,
+        "properties": {
+            "databases": databases_def,
+            "users": users_list,
+            "grants": grants_list
+        }
     }
 }
 
@@ -546,6 +592,20 @@ backup = {
                 }
             }
         }
+    },
+    "action": {
+        "name": "backup:action",
+        "type": "object",
+        "required": ["consolidate"],
+        "properties": {
+            "consolidate": {
+                "type": "object",
+                "properties": {
+                    "name": non_empty_string,
+                    "description": non_empty_string
+                }
+            }
+        }
     }
 }
 
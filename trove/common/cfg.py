@@ -157,11 +157,56 @@ common_opts = [
     cfg.IntOpt('agent_call_high_timeout', default=60 * 10,
                help="Maximum time (in seconds) to wait for Guest Agent 'slow' "
                     "requests (such as restarting the database)."),
+    cfg.IntOpt('guest_fanout_concurrency', default=16,
+               help='Maximum number of Guest Agent calls that the Task '
+               'Manager runs at the same time when it calls the guests of '
+               'many instances, e.g. the members of a cluster.'),
     cfg.IntOpt('agent_replication_snapshot_timeout', default=36000,
                help='Maximum time (in seconds) to wait for taking a Guest '
                     'Agent replication snapshot.'),
     # The guest_id opt definition must match the one in cmd/guest.py
     cfg.StrOpt('guest_id', default=None, help="ID of the Guest Instance."),
+    cfg.ListOpt('guest_rpc_long_io_methods',
+                default=['create_backup', 'guest_log_action',
+                         'log_archive_action', 'module_apply', 'prepare',
+                         'get_replication_snapshot', 'attach_replica',
+                         'attach_replication_slave', 'wait_for_txn',
+                         'cluster_migrate_slots'],
+                help='Guest Agent RPC methods that do long I/O (backups, '
+                     'log publishing, modules, replica seeding). They run '
+                     'in their own worker pool so they do not hold up the '
+                     'other calls. Lifecycle operations such as restarts '
+                     'and volume changes are better left in the admin '
+                     'pool, where they do not wait for a backup to end.'),
+    cfg.ListOpt('guest_rpc_liveness_methods',
+                default=['rpc_ping', 'get_diagnostics',
+                         'get_filesystem_stats', 'get_hwinfo',
+                         'get_metrics'],
+                help='Guest Agent RPC methods that report whether the guest '
+                     'is alive. They run in their own worker pool; every '
+                     'other method runs in the admin pool.'),
+    cfg.IntOpt('guest_rpc_long_io_workers', default=2,
+               help='Number of long I/O calls the Guest Agent runs at the '
+                    'same time.'),
+    cfg.IntOpt('guest_rpc_long_io_queue', default=16,
+               help='Number of long I/O calls that may wait for a worker; '
+                    'the Guest Agent rejects the calls beyond it '
+                    '(0 means no limit).'),
+    cfg.IntOpt('guest_rpc_admin_workers', default=8,
+               help='Number of admin calls (users, databases, '
+                    'configuration) the Guest Agent runs at the same time.'),
+    cfg.IntOpt('guest_rpc_admin_queue', default=24,
+               help='Number of admin calls that may wait for a worker; the '
+                    'Guest Agent rejects the calls beyond it (0 means no '
+                    'limit).'),
+    cfg.IntOpt('guest_rpc_liveness_workers', default=4,
+               help='Number of liveness calls the Guest Agent runs at the '
+                    'same time.'),
+    cfg.IntOpt('guest_rpc_liveness_queue', default=8,
+               help='Number of liveness calls that may wait for a worker; '
+                    'the Guest Agent rejects the calls beyond it (0 means no '
+                    'limit). The workers and queues of all the pools should '
+                    'fit in executor_thread_pool_size.'),
     cfg.IntOpt('state_change_wait_time', default=60 * 10,
                help='Maximum time (in seconds) to wait for a state change.'),
     cfg.IntOpt('state_change_poll_time', default=3,
@@ -184,6 +229,13 @@ common_opts = [
                help='Maximum time (in seconds) to wait for a volume format.'),
     cfg.StrOpt('mount_options', default='defaults,noatime',
                help='Options to use when mounting a volume.'),
+    cfg.IntOpt('volume_migration_workers', default=4,
+               help='Number of rsync processes used to copy the data of a '
+                    'datastore onto a new volume. The files are split into '
+                    'work units of about the same size and finished units '
+                    'are checkpointed on the new volume, so that a failed '
+                    'migration can be resumed. Set to 1 to use a single '
+                    'rsync of the whole directory.'),
     cfg.IntOpt('max_instances_per_tenant',
                default=10,
                help='Default maximum number of instances per tenant.',
@@ -206,6 +258,27 @@ common_opts = [
     cfg.IntOpt('trove_conductor_workers',
                help='Number of workers for the Conductor service. The default '
                'will be the number of CPUs available.'),
+    cfg.IntOpt('trove_taskmanager_workers', default=1,
+               help='Number of Task Manager processes started by one '
+               'trove-taskmanager service. More than one requires '
+               'taskmanager_task_leases.'),
+    cfg.BoolOpt('taskmanager_task_leases', default=False,
+                help='Record the long running Task Manager tasks (instance '
+                'creation, volume resizes, cluster grows and module '
+                'reapplies) in the database and run them under a lease that '
+                'the worker renews. The task of a worker that stops renewing '
+                'its lease is taken over by another Task Manager, so several '
+                'Task Managers can share one queue.'),
+    cfg.IntOpt('taskmanager_task_lease_time', default=60,
+               help='Time (in seconds) after which the lease of a task that '
+               'was not renewed expires and the task can be taken over.'),
+    cfg.IntOpt('taskmanager_max_concurrent_tasks', default=20,
+               help='Maximum number of leased tasks a Task Manager runs at '
+               'the same time. Further tasks wait in the database for a '
+               'free worker.'),
+    cfg.IntOpt('taskmanager_task_max_attempts', default=3,
+               help='Number of times a leased task is started before it is '
+               'given up.'),
     cfg.BoolOpt('use_nova_server_config_drive', default=True,
                 help='Use config drive for file injection when booting '
                 'instance.'),
@@ -265,6 +338,11 @@ common_opts = [
     cfg.IntOpt('trove_api_workers',
                help='Number of workers for the API service. The default will '
                'be the number of CPUs available.'),
+    cfg.BoolOpt('api_fast_schema_validation', default=False,
+                help='Check request bodies with validators generated by the '
+                     'fastjsonschema library, when it is installed. The '
+                     'jsonschema library is still used to describe the '
+                     'errors of invalid requests.'),
     cfg.IntOpt('usage_sleep_time', default=5,
                help='Time to sleep during the check for an active Guest.'),
     cfg.StrOpt('region', default='LOCAL_DEV',
@@ -302,6 +380,97 @@ common_opts = [
     cfg.IntOpt('backup_segment_max_size', default=2 * (1024 ** 3),
                help='Maximum size (in bytes) of each segment of the backup '
                'file.'),
+    cfg.IntOpt('log_archive_interval', default=60,
+               help='Interval (in seconds) between passes of the '
+               'transaction log archiver on the Guest Agent. Closed binlog '
+               'or WAL segments are shipped to the backup storage at most '
+               'this long after they are closed.'),
+    cfg.IntOpt('log_archive_batch_size', default=16,
+               help='Maximum number of closed transaction log segments '
+               'compressed into a single archive object.'),
+    cfg.IntOpt('log_archive_queue_size', default=4,
+               help='Maximum number of archive batches waiting to be '
+               'uploaded. The archiver stops scanning for new segments '
+               'while the queue is full.'),
+    cfg.IntOpt('log_archive_upload_workers', default=2,
+               help='Number of concurrent archive batch uploads.'),
+    cfg.IntOpt('logical_backup_jobs', default=4,
+               help='Number of tables the parallel logical backup '
+               'strategies (MySQLParallelDump, PgParallelDump) dump, and '
+               'their restores load, at the same time.'),
+    cfg.BoolOpt('logical_restore_defer_indexes', default=True,
+                help='Create the secondary indexes of the tables restored '
+                'from a MySQLParallelDump backup after their data is '
+                'loaded (myloader --innodb-optimize-keys, mydumper 0.12 '
+                'or later). PgParallelDump restores always build the '
+                'indexes after the data.'),
+    cfg.PortOpt('replica_seed_port', default=7780,
+                help='Port the master listens on while streaming its data '
+                'to a new replica (replica_seeding = direct). It must be '
+                'open between the instances (see tcp_ports).'),
+    cfg.IntOpt('replica_seed_timeout', default=3600,
+               help='Time (in seconds) the master waits for a new replica '
+               'to connect, or reconnect, to get its data.'),
+    cfg.IntOpt('replica_seed_resume_window', default=64 * (1024 ** 2),
+               help='Number of bytes of the stream sent to a new replica '
+               'the master keeps, for the replica to resume from after '
+               'losing the connection.'),
+    cfg.IntOpt('replica_seed_retries', default=5,
+               help='Number of times in a row a new replica tries to '
+               'reconnect to its master after losing the connection.'),
+    cfg.IntOpt('guest_metrics_interval', default=10,
+               help='Interval (in seconds) between two samples of the '
+               'datastore performance metrics by the Guest Agent. Set to 0 '
+               'to disable the metrics.'),
+    cfg.IntOpt('guest_metrics_buffer_size', default=360,
+               help='Number of metrics samples kept by the Guest Agent. '
+               'Windows longer than this many sampling intervals are cut '
+               'to the samples kept.'),
+    cfg.FloatOpt('guest_metrics_max_overhead', default=0.05,
+                 help='Maximum share of the sampling interval the Guest '
+                 'Agent spends collecting the metrics. Samples are skipped '
+                 'while collecting takes longer.'),
+    cfg.IntOpt('guest_metrics_push_interval', default=0,
+               help='Interval (in seconds) between two pushes of the '
+               'metrics aggregated since the previous push to the '
+               'conductor, which emits them as trove.instance.metrics '
+               'notifications. Set to 0 to only serve the metrics on '
+               'request.'),
+    cfg.StrOpt('backup_consolidation_workspace',
+               default='/var/lib/trove/backup_consolidation',
+               help='Scratch directory on the Task Manager host where '
+               'incremental backup chains are unpacked and merged into '
+               'synthetic full backups. It needs room for an uncompressed '
+               'copy of the full backup and its largest incremental.'),
+    cfg.IntOpt('backup_retention_interval', default=0,
+               help='Interval (in seconds) between runs of the backup '
+               'retention policies by the Task Manager. Set to 0 to only '
+               'run them through trove-manage. Enforcing the policies '
+               'requires swift_url to be set, the expired backups are '
+               'deleted from the Swift account of each tenant.'),
+    cfg.IntOpt('backup_retention_delete_batch_size', default=1000,
+               help='Maximum number of objects removed from the backup '
+               'storage in one bulk delete request. It must not be larger '
+               'than the max_deletes_per_request of the Swift bulk '
+               'middleware.'),
+    cfg.IntOpt('backup_retention_delete_workers', default=4,
+               help='Number of concurrent bulk delete requests sent by the '
+               'backup retention engine.'),
+    cfg.IntOpt('guest_pool_interval', default=0,
+               help='Interval (in seconds) between the runs of the Task '
+               'Manager that replenish the guest pools and reap their idle '
+               'instances. Set to 0 to disable the guest pools. Pooled '
+               'instances are booted with the Task Manager credentials and '
+               'handed over to other tenants, so the pools are meant for '
+               'deployments that run all compute resources in a single '
+               'service tenant.'),
+    cfg.IntOpt('guest_pool_build_batch', default=5,
+               help='Maximum number of instances a guest pool starts '
+               'building in one run.'),
+    cfg.IntOpt('guest_pool_build_timeout', default=60 * 15,
+               help='Maximum time (in seconds) for a pooled instance to '
+               'boot and answer a ping from its guest agent before it is '
+               'deleted.'),
     cfg.StrOpt('remote_dns_client',
                default='trove.common.remote.dns_client',
                help='Client to send DNS calls to.'),
@@ -326,6 +495,25 @@ common_opts = [
     cfg.StrOpt('remote_glance_client',
                default='trove.common.glance_remote.glance_client',
                help='Client to send Glance calls to.'),
+    cfg.IntOpt('remote_client_cache_size', default=64,
+               help='Maximum number of Nova, Cinder and Neutron clients '
+               'kept for reuse by the calls with the same token and '
+               'endpoint, so they share their HTTP connections. Set to 0 '
+               'to create a client for every call.'),
+    cfg.IntOpt('remote_client_cache_ttl', default=300,
+               help='Time (in seconds) after which a cached client is '
+               'dropped. It should be well below the lifetime of the '
+               'tokens.'),
+    cfg.IntOpt('server_list_cache_ttl', default=5,
+               help='Time (in seconds) during which the instance lists use '
+               'the servers listed from Nova by a previous request of the '
+               'same tenant (or of an admin). Older lists are still used, '
+               'while they are refreshed in the background, for as long '
+               'again. Set to 0 to list the servers for every request.'),
+    cfg.IntOpt('server_list_cache_full_refresh', default=300,
+               help='Time (in seconds) after which the cached server lists '
+               'are listed again in full rather than updated with the '
+               'servers changed since the previous listing.'),
     cfg.StrOpt('exists_notification_transformer',
                help='Transformer for exists notifications.'),
     cfg.IntOpt('exists_notification_interval', default=3600,
@@ -425,6 +613,15 @@ common_opts = [
     cfg.IntOpt('module_reapply_min_batch_delay', default=2,
                help='The minimum delay (in seconds) between subsequent '
                     'module batch reapply executions.'),
+    cfg.IntOpt('module_storage_min_size', default=0,
+               help='Modules with contents of at least this many bytes are '
+                    'stored once in object storage, keyed by their MD5, and '
+                    'the guests download them instead of receiving them in '
+                    'the RPC messages. Set to 0 to always send the contents '
+                    'inline.'),
+    cfg.StrOpt('module_storage_container', default='trove_modules',
+               help='Container of the tenants that stores the contents of '
+                    'the modules.'),
     cfg.StrOpt('guest_log_container_name',
                default='database_logs',
                help='Name of container that stores guest log components.'),
@@ -528,6 +725,14 @@ mysql_opts = [
     cfg.StrOpt('replication_namespace',
                default='trove.guestagent.strategies.replication.mysql_gtid',
                help='Namespace to load replication strategies from.'),
+    cfg.StrOpt('replica_seeding', default='storage',
+               choices=('storage', 'direct'),
+               help='How new replicas get the data of their master. With '
+               'storage, the master takes a backup to the backup storage, '
+               'which the replica restores. With direct, the backup is '
+               'streamed from the master to the replica (see '
+               'replica_seed_port); the backup storage is used if the '
+               'master cannot stream it.'),
     cfg.StrOpt('mount_point', default='/var/lib/mysql',
                help="Filesystem path for mounting "
                     "volumes if volume support is enabled."),
@@ -585,6 +790,11 @@ mysql_opts = [
                help='Character length of generated passwords.',
                deprecated_name='default_password_length',
                deprecated_group='DEFAULT'),
+    cfg.StrOpt('log_archive_strategy', default='MySqlBinlogArchiver',
+               help='Default strategy for continuous binlog archiving.'),
+    cfg.StrOpt('log_archive_namespace',
+               default='trove.guestagent.strategies.archive.mysql_impl',
+               help='Namespace to load log archive strategies from.'),
 ]
 
 # Percona
@@ -611,6 +821,14 @@ percona_opts = [
     cfg.StrOpt('replication_namespace',
                default='trove.guestagent.strategies.replication.mysql_gtid',
                help='Namespace to load replication strategies from.'),
+    cfg.StrOpt('replica_seeding', default='storage',
+               choices=('storage', 'direct'),
+               help='How new replicas get the data of their master. With '
+               'storage, the master takes a backup to the backup storage, '
+               'which the replica restores. With direct, the backup is '
+               'streamed from the master to the replica (see '
+               'replica_seed_port); the backup storage is used if the '
+               'master cannot stream it.'),
     cfg.StrOpt('replication_user', default='slave_user',
                help='Userid for replication slave.'),
     cfg.StrOpt('replication_password', default='NETOU7897NNLOU',
@@ -698,6 +916,14 @@ pxc_opts = [
     cfg.StrOpt('replication_namespace',
                default='trove.guestagent.strategies.replication.mysql_gtid',
                help='Namespace to load replication strategies from.'),
+    cfg.StrOpt('replica_seeding', default='storage',
+               choices=('storage', 'direct'),
+               help='How new replicas get the data of their master. With '
+               'storage, the master takes a backup to the backup storage, '
+               'which the replica restores. With direct, the backup is '
+               'streamed from the master to the replica (see '
+               'replica_seed_port); the backup storage is used if the '
+               'master cannot stream it.'),
     cfg.StrOpt('replication_user', default='slave_user',
                help='Userid for replication slave.'),
     cfg.StrOpt('mount_point', default='/var/lib/mysql',
@@ -845,6 +1071,17 @@ redis_opts = [
                help='Character length of generated passwords.',
                deprecated_name='default_password_length',
                deprecated_group='DEFAULT'),
+    cfg.IntOpt('slot_migration_batch_size', default=100,
+               help='Number of keys moved by each MIGRATE command when hash '
+                    'slots are moved between the nodes of a cluster.'),
+    cfg.IntOpt('slot_migration_max_bandwidth', default=0,
+               help='Maximum rate (in KB/s) at which a node sends the keys '
+                    'of its hash slots to another node of the cluster '
+                    '(0 means no limit).'),
+    cfg.IntOpt('slot_migration_slots_per_call', default=64,
+               help='Number of hash slots moved by each Guest Agent call '
+                    'when a cluster is rebalanced. Progress is logged after '
+                    'each call.'),
 ]
 
 # Cassandra
@@ -1126,6 +1363,9 @@ postgresql_opts = [
                      'if trove_security_groups_support is True).'),
     cfg.PortOpt('postgresql_port', default=5432,
                 help='The TCP port the server listens on.'),
+    cfg.IntOpt('connection_pool_size', default=4,
+               help='Number of idle connections to the server the guest '
+               'agent keeps open for the next statements.'),
     cfg.StrOpt('backup_strategy', default='PgBaseBackup',
                help='Default strategy to perform backups.'),
     cfg.DictOpt('backup_incremental_strategy',
@@ -1183,6 +1423,12 @@ postgresql_opts = [
                help='Character length of generated passwords.',
                deprecated_name='default_password_length',
                deprecated_group='DEFAULT'),
+    cfg.StrOpt('log_archive_strategy', default='PgWalArchiver',
+               help='Default strategy for continuous WAL archiving.'),
+    cfg.StrOpt('log_archive_namespace',
+               default='trove.guestagent.strategies.archive.experimental.'
+               'postgresql_impl',
+               help='Namespace to load log archive strategies from.'),
 ]
 
 # Apache CouchDB
@@ -1403,6 +1649,14 @@ mariadb_opts = [
                default='trove.guestagent.strategies.replication.experimental'
                '.mariadb_gtid',
                help='Namespace to load replication strategies from.'),
+    cfg.StrOpt('replica_seeding', default='storage',
+               choices=('storage', 'direct'),
+               help='How new replicas get the data of their master. With '
+               'storage, the master takes a backup to the backup storage, '
+               'which the replica restores. With direct, the backup is '
+               'streamed from the master to the replica (see '
+               'replica_seed_port); the backup storage is used if the '
+               'master cannot stream it.'),
     cfg.StrOpt('mount_point', default='/var/lib/mysql',
                help="Filesystem path for mounting "
                     "volumes if volume support is enabled."),
@@ -1484,6 +1738,43 @@ mariadb_opts = [
                deprecated_group='DEFAULT'),
 ]
 
+# Backup throttling, registered in each datastore group.
+backup_throttle_opts = [
+    cfg.IntOpt('backup_rate_limit', default=0, min=0,
+               help='Maximum rate (in bytes per second) the backup stream '
+               'is read and uploaded at. The backup process blocks on its '
+               'output when it is read slower, so this also bounds the '
+               'rate it reads the datastore files at (for compressible '
+               'data, by a multiple of this rate). 0 means no limit.'),
+    cfg.StrOpt('backup_ionice_class', default=None,
+               choices=('best-effort', 'idle'),
+               help='I/O scheduling class the backup process is run in '
+               '(see ionice). With idle, the backup only gets disk time '
+               'when no other process asks for it.'),
+    cfg.IntOpt('backup_ionice_priority', default=7, min=0, max=7,
+               help='I/O priority of the backup process within the '
+               'best-effort class, 0 being the highest.'),
+    cfg.StrOpt('backup_cgroup', default=None,
+               help='Control group the backup process is placed in, in the '
+               '<controllers>:<path> form of cgexec (for instance '
+               '\'blkio,cpu:trove/backup\'). The group must exist.'),
+    cfg.BoolOpt('backup_adaptive_throttling', default=False,
+                help='Slow the backup down while the datastore answers '
+                'slower than usual. The time the datastore takes to '
+                'answer the metrics collection (see '
+                'guest_metrics_interval) is compared to the lowest one '
+                'seen since the backup started; the backup rate is halved '
+                'when it exceeds backup_adaptive_latency_factor times that '
+                'and raised back gradually once it does not.'),
+    cfg.FloatOpt('backup_adaptive_latency_factor', default=2.0, min=1.0,
+                 help='Rise of the datastore latency over its lowest value '
+                 'above which the adaptive throttling slows the backup '
+                 'down.'),
+    cfg.IntOpt('backup_adaptive_min_rate', default=1024 ** 2, min=1,
+               help='Rate (in bytes per second) the adaptive throttling '
+               'never slows the backup down below.'),
+]
+
 # RPC version groups
 upgrade_levels = cfg.OptGroup(
     'upgrade_levels',
@@ -1536,6 +1827,12 @@ CONF.register_opts(vertica_opts, vertica_group)
 CONF.register_opts(db2_opts, db2_group)
 CONF.register_opts(mariadb_opts, mariadb_group)
 
+for datastore_group in (mysql_group, percona_group, pxc_group, redis_group,
+                        cassandra_group, couchbase_group, mongodb_group,
+                        postgresql_group, couchdb_group, vertica_group,
+                        db2_group, mariadb_group):
+    CONF.register_opts(backup_throttle_opts, datastore_group)
+
 CONF.register_opts(rpcapi_cap_opts, upgrade_levels)
 
 profiler.set_defaults(CONF)
@@ -227,6 +227,12 @@ class GuestTimeout(TroveError):
     message = _("Timeout trying to connect to the Guest Agent.")
 
 
+class GuestAgentBusy(TroveError):
+
+    message = _("The Guest Agent has too many %(concurrency_class)s calls "
+                "waiting to run %(method)s.")
+
+
 class BadRequest(TroveError):
 
     message = _("The server could not comply with the request since it is "
@@ -430,6 +436,11 @@ class BackupFileNotFound(NotFound):
                 "storage.")
 
 
+class RestorePointBackupNotFound(NotFound):
+    message = _("No completed full backup of instance %(instance_id)s was "
+                "found at or before %(restore_point)s.")
+
+
 class BackupDatastoreMismatchError(TroveError):
     message = _("The datastore from which the backup was taken, "
                 "%(datastore1)s, does not match the destination"
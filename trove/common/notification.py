@@ -687,6 +687,21 @@ class DBaaSBackupDelete(DBaaSAPINotification):
         return ['backup_id']
 
 
+class DBaaSBackupConsolidate(DBaaSAPINotification):
+
+    @abc.abstractmethod
+    def event_type(self):
+        return 'backup_consolidate'
+
+    @abc.abstractmethod
+    def required_start_traits(self):
+        return ['backup_id', 'name']
+
+    @abc.abstractmethod
+    def required_end_traits(self):
+        return ['consolidated_backup_id']
+
+
 class DBaaSDatabaseCreate(DBaaSAPINotification):
 
     @abc.abstractmethod
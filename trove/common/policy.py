@@ -65,6 +65,8 @@ instance_rules = [
         'instance:promote_to_replica_source', 'rule:admin_or_owner'),
     policy.RuleDefault(
         'instance:eject_replica_source', 'rule:admin_or_owner'),
+    policy.RuleDefault(
+        'instance:log_archive', 'rule:admin_or_owner'),
     policy.RuleDefault(
         'instance:configuration', 'rule:admin_or_owner'),
     policy.RuleDefault(
@@ -138,6 +140,8 @@ instance_rules = [
     policy.RuleDefault(
         'cluster:extension:root:index', 'rule:admin_or_owner'),
 
+    policy.RuleDefault(
+        'backup:consolidate', 'rule:admin_or_owner'),
     policy.RuleDefault(
         'backup:create', 'rule:admin_or_owner'),
     policy.RuleDefault(
@@ -13,6 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import time
+
+from oslo_log import log as logging
 from oslo_utils.importutils import import_class
 
 from trove.common import cfg
@@ -25,6 +29,68 @@ from novaclient.client import Client
 from swiftclient.client import Connection
 
 CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+
+class ClientCache(object):
+    """Clients shared by the calls with the same credentials and endpoint.
+
+    The least recently used clients are dropped when there are more than
+    remote_client_cache_size of them, and every client is dropped once it
+    is remote_client_cache_ttl seconds old.  The key holds the token, so a
+    new token gets new clients and the ones of the old token age out.
+    """
+
+    def __init__(self):
+        self._clients = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, create):
+        """Return the client of the key, calling create() if needed."""
+        size = CONF.remote_client_cache_size
+        if not size:
+            return create()
+        now = time.time()
+        entry = self._clients.pop(key, None)
+        if entry and now - entry[0] < CONF.remote_client_cache_ttl:
+            self._clients[key] = entry
+            self.hits += 1
+            return entry[1]
+        if entry:
+            self.evictions += 1
+        self.misses += 1
+        client = create()
+        self._clients[key] = (now, client)
+        while len(self._clients) > size:
+            self._clients.popitem(last=False)
+            self.evictions += 1
+        LOG.debug("Created a %(service)s client, the client cache has "
+                  "%(hits)d hits, %(misses)d misses and %(evictions)d "
+                  "evictions.", dict(self.stats(), service=key[0]))
+        return client
+
+    def invalidate(self, auth_token):
+        """Drop the clients of a token, e.g. once it was rejected."""
+        for key in [key for key in self._clients if key[1] == auth_token]:
+            del self._clients[key]
+            self.evictions += 1
+
+    def clear(self):
+        self._clients.clear()
+
+    def stats(self):
+        return {'size': len(self._clients), 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+
+client_cache = ClientCache()
+
+
+def _client_key(service, context, url):
+    return (service, context.auth_token, context.tenant, context.user,
+            context.project_domain_name, url)
 
 
 def normalize_url(url):
@@ -94,16 +160,19 @@ def nova_client(context, region_name=None):
                            endpoint_region=region_name or CONF.os_region_name,
                            endpoint_type=CONF.nova_compute_endpoint_type)
 
-    client = Client(CONF.nova_client_version,
-                    username=context.user,
-                    bypass_url=url,
-                    tenant_id=context.tenant,
-                    project_domain_name=context.project_domain_name,
-                    auth_url=CONF.trove_auth_url,
-                    auth_token=context.auth_token)
-    client.client.auth_token = context.auth_token
-    client.client.management_url = url
-    return client
+    def _create():
+        client = Client(CONF.nova_client_version,
+                        username=context.user,
+                        bypass_url=url,
+                        tenant_id=context.tenant,
+                        project_domain_name=context.project_domain_name,
+                        auth_url=CONF.trove_auth_url,
+                        auth_token=context.auth_token)
+        client.client.auth_token = context.auth_token
+        client.client.management_url = url
+        return client
+
+    return client_cache.get(_client_key('compute', context, url), _create)
 
 
 def create_admin_nova_client(context):
@@ -126,12 +195,15 @@ def cinder_client(context, region_name=None):
                            endpoint_region=region_name or CONF.os_region_name,
                            endpoint_type=CONF.cinder_endpoint_type)
 
-    client = CinderClient.Client(context.user, context.auth_token,
-                                 project_id=context.tenant,
-                                 auth_url=CONF.trove_auth_url)
-    client.client.auth_token = context.auth_token
-    client.client.management_url = url
-    return client
+    def _create():
+        client = CinderClient.Client(context.user, context.auth_token,
+                                     project_id=context.tenant,
+                                     auth_url=CONF.trove_auth_url)
+        client.client.auth_token = context.auth_token
+        client.client.management_url = url
+        return client
+
+    return client_cache.get(_client_key('volume', context, url), _create)
 
 
 def swift_client(context, region_name=None):
@@ -163,9 +235,10 @@ def neutron_client(context, region_name=None):
                            endpoint_region=region_name or CONF.os_region_name,
                            endpoint_type=CONF.neutron_endpoint_type)
 
-    client = NeutronClient.Client(token=context.auth_token,
-                                  endpoint_url=url)
-    return client
+    return client_cache.get(
+        _client_key('network', context, url),
+        lambda: NeutronClient.Client(token=context.auth_token,
+                                     endpoint_url=url))
 
 
 create_dns_client = import_class(CONF.remote_dns_client)
@@ -40,7 +40,8 @@ LOG = logging.getLogger(__name__)
 class RpcService(service.Service):
 
     def __init__(self, key, host=None, binary=None, topic=None, manager=None,
-                 rpc_api_version=None, secure_serializer=ssz.SecureSerializer):
+                 rpc_api_version=None, secure_serializer=ssz.SecureSerializer,
+                 endpoint_wrapper=None):
         super(RpcService, self).__init__()
         self.key = key
         self.host = host or CONF.host
@@ -51,6 +52,7 @@ class RpcService(service.Service):
         self.rpc_api_version = rpc_api_version or \
             self.manager_impl.RPC_API_VERSION
         self.secure_serializer = secure_serializer
+        self.endpoint_wrapper = endpoint_wrapper
         profile.setup_profiler(self.binary, self.host)
 
     def start(self):
@@ -62,7 +64,10 @@ class RpcService(service.Service):
         if not hasattr(self.manager_impl, 'target'):
             self.manager_impl.target = target
 
-        endpoints = [self.manager_impl]
+        endpoint = self.manager_impl
+        if self.endpoint_wrapper:
+            endpoint = self.endpoint_wrapper(endpoint)
+        endpoints = [endpoint]
         self.rpcserver = rpc.get_server(
             target, endpoints, key=self.key,
             secure_serializer=self.secure_serializer)
@@ -20,6 +20,7 @@ from trove.common.remote import normalize_url
 from cinderclient.v2 import client as CinderClient
 from neutronclient.v2_0 import client as NeutronClient
 from novaclient.v1_1.client import Client as NovaClient
+from swiftclient.client import Connection
 
 CONF = cfg.CONF
 
@@ -37,6 +38,7 @@ trove_auth_url =
 nova_compute_service_type =
 nova_compute_url =
 cinder_service_type =
+swift_url =
 os_region_name =
 
 remote_nova_client = \
@@ -45,6 +47,8 @@ remote_cinder_client = \
  trove.common.single_tenant_remote.cinder_client_trove_admin
 remote_neutron_client = \
  trove.common.single_tenant_remote.neutron_client_trove_admin
+remote_swift_client = \
+ trove.common.single_tenant_remote.swift_client_trove_admin
 ...
 
 """
@@ -116,3 +120,24 @@ def neutron_client_trove_admin(context=None):
         client.management_url = CONF.neutron_url
 
     return client
+
+
+def swift_client_trove_admin(context, region_name=None):
+    """
+    Returns a swift client object with the trove admin credentials, to the
+    account of the tenant of the context (from swift_url). The client gets
+    a new token whenever its token expires.
+    :param context: original context from user request
+    :type context: trove.common.context.TroveContext
+    :return swiftclient: swiftclient with trove admin credentials
+    """
+    return Connection(authurl=CONF.trove_auth_url,
+                      user=CONF.nova_proxy_admin_user,
+                      key=CONF.nova_proxy_admin_pass,
+                      tenant_name=CONF.nova_proxy_admin_tenant_name,
+                      auth_version='2.0',
+                      os_options={
+                          'object_storage_url': '%s%s' % (CONF.swift_url,
+                                                          context.tenant),
+                          'region_name': region_name or CONF.os_region_name},
+                      snet=CONF.backup_use_snet)
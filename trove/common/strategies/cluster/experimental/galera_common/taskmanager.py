@@ -86,8 +86,6 @@ class GaleraCommonClusterTasks(task_models.ClusterTasks):
                          in instance_ids]
 
             cluster_ips = [self.get_ip(instance) for instance in instances]
-            instance_guests = [self.get_guest(instance)
-                               for instance in instances]
 
             # Create replication user and password for synchronizing the
             # galera cluster
@@ -108,8 +106,8 @@ class GaleraCommonClusterTasks(task_models.ClusterTasks):
                 # password in the my.cnf will be wrong after the joiner
                 # instances syncs with the donor instance.
                 admin_password = str(utils.generate_random_password())
-                for guest in instance_guests:
-                    guest.reset_admin_password(admin_password)
+                self.call_guests(context, instances, 'reset_admin_password',
+                                 {'admin_password': admin_password})
 
                 bootstrap = True
                 for instance in instances:
@@ -130,8 +128,7 @@ class GaleraCommonClusterTasks(task_models.ClusterTasks):
                     bootstrap = False
 
                 LOG.debug("Finalizing cluster configuration.")
-                for guest in instance_guests:
-                    guest.cluster_complete()
+                self.call_guests(context, instances, 'cluster_complete')
             except Exception:
                 LOG.exception(_("Error creating cluster."))
                 self.update_statuses_on_failure(cluster_id)
@@ -222,21 +219,19 @@ class GaleraCommonClusterTasks(task_models.ClusterTasks):
                                          new_instances)
 
             # apply the new config to all instances
-            for instance in existing_instances + new_instances:
-                guest = self.get_guest(instance)
+            def _overrides(instance):
                 # render the conf.d/cluster.cnf configuration
-                cluster_configuration = self._render_cluster_config(
+                return {'cluster_configuration': self._render_cluster_config(
                     context,
                     instance,
                     ",".join(existing_cluster_ips + new_cluster_ips),
                     cluster_context['cluster_name'],
-                    cluster_context['replication_user'])
-                guest.write_cluster_configuration_overrides(
-                    cluster_configuration)
+                    cluster_context['replication_user'])}
 
-            for instance in new_instances:
-                guest = self.get_guest(instance)
-                guest.cluster_complete()
+            self.call_guests(context, existing_instances + new_instances,
+                             'write_cluster_configuration_overrides',
+                             _overrides)
+            self.call_guests(context, new_instances, 'cluster_complete')
 
         timeout = Timeout(CONF.cluster_usage_timeout)
         try:
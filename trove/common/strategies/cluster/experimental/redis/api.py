@@ -14,7 +14,6 @@
 from oslo_log import log as logging
 
 from trove.cluster import models
-from trove.cluster.models import Cluster
 from trove.cluster.tasks import ClusterTasks
 from trove.cluster.views import ClusterView
 from trove.common import cfg
@@ -146,44 +145,27 @@ class RedisCluster(models.Cluster):
 
         self.validate_cluster_available()
 
+        removal_insts = [inst_models.Instance.load(self.context, inst_id)
+                         for inst_id in removal_ids]
+        db_instances = inst_models.DBInstance.find_all(
+            cluster_id=self.id, deleted=False).all()
+        if len(db_instances) - len(removal_insts) < 1:
+            raise exception.ClusterShrinkMustNotLeaveClusterEmpty()
+
+        # The hash slots of the removed nodes are moved to the others
+        # before they are removed, which is left to the task manager.
         cluster_info = self.db_info
         cluster_info.update(task_status=ClusterTasks.SHRINKING_CLUSTER)
         try:
-            removal_insts = [inst_models.Instance.load(self.context, inst_id)
-                             for inst_id in removal_ids]
-            node_ids = []
-            error_ids = []
-            for instance in removal_insts:
-                node_id = Cluster.get_guest(instance).get_node_id_for_removal()
-                if node_id:
-                    node_ids.append(node_id)
-                else:
-                    error_ids.append(instance.id)
-            if error_ids:
-                raise exception.ClusterShrinkInstanceInUse(
-                    id=error_ids,
-                    reason="Nodes cannot be removed. Check slots."
-                )
-
-            all_instances = (
-                inst_models.DBInstance.find_all(cluster_id=self.id,
-                                                deleted=False).all())
-            remain_insts = [inst_models.Instance.load(self.context, inst.id)
-                            for inst in all_instances
-                            if inst.id not in removal_ids]
-
-            for inst in remain_insts:
-                guest = Cluster.get_guest(inst)
-                guest.remove_nodes(node_ids)
-            for inst in removal_insts:
-                inst.update_db(cluster_id=None)
-            for inst in removal_insts:
-                inst_models.Instance.delete(inst)
-
-            return RedisCluster(self.context, cluster_info,
-                                self.ds, self.ds_version)
-        finally:
+            task_api.load(self.context, self.ds_version.manager
+                          ).shrink_cluster(self.id,
+                                           [inst.id for inst in removal_insts])
+        except Exception:
             cluster_info.update(task_status=ClusterTasks.NONE)
+            raise
+
+        return RedisCluster(self.context, cluster_info,
+                            self.ds, self.ds_version)
 
 
 class RedisClusterView(ClusterView):
@@ -47,6 +47,22 @@ class RedisGuestAgentAPI(guest_api.API):
                           guest_api.AGENT_HIGH_TIMEOUT,
                           version=version)
 
+    def get_node_id(self):
+        LOG.debug("Retrieve the cluster id of node.")
+        version = guest_api.API.API_BASE_VERSION
+
+        return self._call("get_node_id",
+                          guest_api.AGENT_LOW_TIMEOUT,
+                          version=version)
+
+    def get_cluster_nodes(self):
+        LOG.debug("Retrieve the nodes of the cluster.")
+        version = guest_api.API.API_BASE_VERSION
+
+        return self._call("get_cluster_nodes",
+                          guest_api.AGENT_LOW_TIMEOUT,
+                          version=version)
+
     def get_node_id_for_removal(self):
         LOG.debug("Validating cluster node removal.")
         version = guest_api.API.API_BASE_VERSION
@@ -84,3 +100,30 @@ class RedisGuestAgentAPI(guest_api.API):
 
         return self._call("cluster_complete", guest_api.AGENT_HIGH_TIMEOUT,
                           version=version)
+
+    def cluster_import_slots(self, slots, source_id):
+        LOG.debug("Importing %s slots from node %s.", len(slots), source_id)
+        version = guest_api.API.API_BASE_VERSION
+
+        return self._call("cluster_import_slots",
+                          guest_api.AGENT_HIGH_TIMEOUT,
+                          version=version,
+                          slots=slots, source_id=source_id)
+
+    def cluster_migrate_slots(self, slots, target_id, ip, port):
+        LOG.debug("Migrating %s slots to node %s.", len(slots), target_id)
+        version = guest_api.API.API_BASE_VERSION
+
+        return self._call("cluster_migrate_slots",
+                          guest_api.AGENT_HIGH_TIMEOUT,
+                          version=version,
+                          slots=slots, target_id=target_id, ip=ip, port=port)
+
+    def cluster_set_slots_node(self, slots, node_id):
+        LOG.debug("Assigning %s slots to node %s.", len(slots), node_id)
+        version = guest_api.API.API_BASE_VERSION
+
+        return self._call("cluster_set_slots_node",
+                          guest_api.AGENT_HIGH_TIMEOUT,
+                          version=version,
+                          slots=slots, node_id=node_id)
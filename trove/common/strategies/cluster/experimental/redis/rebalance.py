@@ -0,0 +1,143 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Spread the hash slots of a Redis cluster evenly over its masters.
+
+The slots are moved live: the node receiving a slot is set IMPORTING, the
+node giving it away MIGRATING, the keys of the slot are moved with MIGRATE
+and the slot is then assigned to the receiving node.  Clients keep using
+the cluster meanwhile, being redirected for the keys already moved.
+"""
+
+from oslo_log import log as logging
+
+from trove.common import cfg
+from trove.common.i18n import _
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+TOTAL_SLOTS = 16384
+
+
+def slot_counts(node_ids, slot_map=None):
+    """Return the number of slots each node should own.
+
+    Every node gets an equal share; the few slots left over go to the
+    nodes already owning the most slots, so that fewer slots are moved.
+    """
+    slot_map = slot_map or {}
+    share, leftover = divmod(TOTAL_SLOTS, len(node_ids))
+    ordered = sorted(node_ids,
+                     key=lambda node_id: -len(slot_map.get(node_id, ())))
+    return dict((node_id, share + (1 if index < leftover else 0))
+                for index, node_id in enumerate(ordered))
+
+
+def slot_ranges(node_ids):
+    """Return the [first, last] slot range of each node of a new cluster,
+    in the order of node_ids.
+    """
+    counts = slot_counts(node_ids)
+    ranges = []
+    first_slot = 0
+    for node_id in node_ids:
+        ranges.append([first_slot, first_slot + counts[node_id] - 1])
+        first_slot += counts[node_id]
+    return ranges
+
+
+def plan_moves(slot_map, node_ids):
+    """Return the (source, target, slots) moves evening out the slots of
+    slot_map (the slots of each node, by id) over the nodes node_ids.
+
+    The nodes of slot_map not in node_ids give away all their slots.  The
+    other nodes give away only the slots above their share, the highest
+    ones, so their slot ranges stay contiguous.
+    """
+    counts = slot_counts(node_ids, slot_map)
+    surplus = []
+    for node_id in sorted(slot_map):
+        slots = sorted(slot_map[node_id])
+        extra = len(slots) - counts.get(node_id, 0)
+        if extra > 0:
+            surplus.append((node_id, slots[-extra:]))
+
+    moves = []
+    for target in node_ids:
+        missing = counts[target] - len(slot_map.get(target, ()))
+        while missing > 0 and surplus:
+            source, slots = surplus[0]
+            taken = slots[:missing]
+            del slots[:missing]
+            if not slots:
+                surplus.pop(0)
+            moves.append((source, target, taken))
+            missing -= len(taken)
+    return moves
+
+
+def to_slot_map(cluster_nodes):
+    """Return the slots owned by each master, from the nodes returned by
+    the get_cluster_nodes Guest Agent call.
+    """
+    return dict((node_id, [slot for first, last in node['slots']
+                           for slot in range(first, last + 1)])
+                for node_id, node in cluster_nodes.items()
+                if 'master' in node['flags'])
+
+
+class SlotMigration(object):
+    """Moves slots between the masters of a cluster.
+
+    :param nodes: the guest and the ip and port of each master, by node
+                  id.
+    """
+
+    def __init__(self, cluster_id, nodes):
+        self.cluster_id = cluster_id
+        self.nodes = nodes
+        self.slots_moved = 0
+        self.keys_moved = 0
+
+    def run(self, moves):
+        """Make the moves returned by plan_moves, a few slots per call,
+        and log the progress after each call.
+        """
+        total = sum(len(slots) for _, _, slots in moves)
+        per_call = CONF.redis.slot_migration_slots_per_call
+        LOG.info(_("Moving %(total)d hash slots of cluster %(cluster)s."),
+                 {'total': total, 'cluster': self.cluster_id})
+        for source, target, slots in moves:
+            for start in range(0, len(slots), per_call):
+                self._move(source, target, slots[start:start + per_call])
+                LOG.info(_("Moved %(moved)d of %(total)d hash slots "
+                           "(%(keys)d keys) of cluster %(cluster)s."),
+                         {'moved': self.slots_moved, 'total': total,
+                          'keys': self.keys_moved,
+                          'cluster': self.cluster_id})
+
+    def _move(self, source, target, slots):
+        source_guest = self.nodes[source][0]
+        target_guest, target_ip, target_port = self.nodes[target]
+        target_guest.cluster_import_slots(slots, source)
+        self.keys_moved += source_guest.cluster_migrate_slots(
+            slots, target, target_ip, target_port)
+        # The receiving node is told first, so that it claims the slots
+        # before the clients are sent to it.
+        target_guest.cluster_set_slots_node(slots, target)
+        source_guest.cluster_set_slots_node(slots, target)
+        self.slots_moved += len(slots)
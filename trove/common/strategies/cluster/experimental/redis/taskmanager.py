@@ -18,8 +18,11 @@ from trove.common import cfg
 from trove.common.exception import TroveError
 from trove.common.i18n import _
 from trove.common.strategies.cluster import base
+from trove.common.strategies.cluster.experimental.redis import rebalance
+from trove.common import utils
 from trove.instance.models import DBInstance
 from trove.instance.models import Instance
+from trove.instance import tasks as inst_tasks
 from trove.taskmanager import api as task_api
 import trove.taskmanager.models as task_models
 
@@ -68,19 +71,10 @@ class RedisClusterTasks(task_models.ClusterTasks):
                 for guest in guests[1:]:
                     guest.cluster_meet(cluster_head_ip, cluster_head_port)
 
-                num_nodes = len(instances)
-                total_slots = 16384
-                slots_per_node = total_slots / num_nodes
-                leftover_slots = total_slots % num_nodes
-                first_slot = 0
-                for guest in guests:
-                    last_slot = first_slot + slots_per_node
-                    if leftover_slots > 0:
-                        leftover_slots -= 1
-                    else:
-                        last_slot -= 1
+                slot_ranges = rebalance.slot_ranges(list(range(len(guests))))
+                for guest, (first_slot, last_slot) in zip(guests,
+                                                          slot_ranges):
                     guest.cluster_addslots(first_slot, last_slot)
-                    first_slot = last_slot + 1
 
                 for guest in guests:
                     guest.cluster_complete()
@@ -125,12 +119,20 @@ class RedisClusterTasks(task_models.ClusterTasks):
             LOG.debug("All members ready, proceeding for cluster setup.")
             new_insts = [Instance.load(context, instance_id)
                          for instance_id in new_instance_ids]
-            new_guests = map(self.get_guest, new_insts)
+            new_guests = [self.get_guest(inst) for inst in new_insts]
 
             # Connect nodes to the cluster head
             for guest in new_guests:
                 guest.cluster_meet(cluster_head_ip, cluster_head_port)
 
+            # Give the new nodes their share of the hash slots.
+            insts = [Instance.load(context, db_inst.id)
+                     for db_inst in db_instances
+                     if db_inst.id not in new_instance_ids] + new_insts
+            nodes = self._cluster_nodes(insts)
+            self._wait_for_nodes(nodes)
+            self._rebalance(cluster_id, nodes, list(nodes))
+
             for guest in new_guests:
                 guest.cluster_complete()
 
@@ -151,6 +153,90 @@ class RedisClusterTasks(task_models.ClusterTasks):
 
         LOG.debug("End grow_cluster for id: %s.", cluster_id)
 
+    def shrink_cluster(self, context, cluster_id, removal_instance_ids):
+        LOG.debug("Begin shrink_cluster for id: %s.", cluster_id)
+
+        def _shrink_cluster():
+            db_instances = DBInstance.find_all(cluster_id=cluster_id,
+                                               deleted=False).all()
+            insts = [Instance.load(context, db_inst.id)
+                     for db_inst in db_instances]
+            removal_insts = [inst for inst in insts
+                             if inst.id in removal_instance_ids]
+            remain_nodes = self._cluster_nodes(
+                [inst for inst in insts
+                 if inst.id not in removal_instance_ids])
+            removal_nodes = self._cluster_nodes(removal_insts)
+
+            # Move the hash slots of the removed nodes to the others.
+            nodes = dict(remain_nodes)
+            nodes.update(removal_nodes)
+            self._rebalance(cluster_id, nodes, list(remain_nodes))
+
+            error_ids = [inst.id for inst in removal_insts
+                         if not self.get_guest(
+                             inst).get_node_id_for_removal()]
+            if error_ids:
+                raise TroveError(_("Nodes of instances %s still own hash "
+                                   "slots.") % error_ids)
+
+            for guest, _ip, _port in remain_nodes.values():
+                guest.remove_nodes(list(removal_nodes))
+            for inst in removal_insts:
+                inst.update_db(cluster_id=None)
+            for inst in removal_insts:
+                Instance.delete(inst)
+
+        timeout = Timeout(CONF.cluster_usage_timeout)
+        try:
+            _shrink_cluster()
+            self.reset_task()
+        except Timeout as t:
+            if t is not timeout:
+                raise  # not my timeout
+            LOG.exception(_("Timeout for shrinking cluster."))
+            self.update_statuses_on_failure(
+                cluster_id, status=inst_tasks.InstanceTasks.SHRINKING_ERROR)
+        except Exception:
+            LOG.exception(_("Error shrinking cluster %s."), cluster_id)
+            self.update_statuses_on_failure(
+                cluster_id, status=inst_tasks.InstanceTasks.SHRINKING_ERROR)
+        finally:
+            timeout.cancel()
+
+        LOG.debug("End shrink_cluster for id: %s.", cluster_id)
+
+    def _cluster_nodes(self, instances):
+        """Return the guest, ip and port of the cluster node of each
+        instance, by node id.
+        """
+        nodes = {}
+        for instance in instances:
+            guest = self.get_guest(instance)
+            ip, port = guest.get_node_ip()
+            nodes[guest.get_node_id()] = (guest, ip, port)
+        return nodes
+
+    def _wait_for_nodes(self, nodes):
+        """Wait for the nodes to all know each other, as slots can only be
+        moved between nodes that do.
+        """
+        node_ids = set(nodes)
+
+        def _all_nodes_known():
+            return all(node_ids <= set(node[0].get_cluster_nodes())
+                       for node in nodes.values())
+
+        utils.poll_until(_all_nodes_known, sleep_time=2,
+                         time_out=CONF.cluster_usage_timeout)
+
+    def _rebalance(self, cluster_id, nodes, node_ids):
+        """Spread the hash slots evenly over the nodes node_ids."""
+        slot_map = rebalance.to_slot_map(
+            nodes[node_ids[0]][0].get_cluster_nodes())
+        moves = rebalance.plan_moves(slot_map, node_ids)
+        rebalance.SlotMigration(cluster_id, nodes).run(moves)
+
 
 class RedisTaskManagerAPI(task_api.API):
 
@@ -252,7 +252,7 @@ class SwiftStorage(base.Storage):
         headers, info = self.connection.get_object(container, filename,
                                                    resp_chunk_size=CHUNK_SIZE)
 
-        if CONF.verify_swift_checksum_on_restore:
+        if CONF.verify_swift_checksum_on_restore and backup_checksum:
             self._verify_checksum(headers.get('etag', ''), backup_checksum)
 
         return info
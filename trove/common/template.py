@@ -14,6 +14,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+
 from oslo_config import cfg as oslo_config
 from oslo_log import log as logging
 
@@ -40,6 +42,22 @@ SERVICE_PARSERS = {
     'db2': configurations.DB2ConfParser,
 }
 
+# Rendered in place of the server id in the cached default configurations.
+SERVER_ID_PLACEHOLDER = '__trove_server_id__'
+
+# The templates selected for (template name, manager, datastore, version)
+# and the parsed default configurations for those plus the flavor RAM and
+# vCPUs.  An entry is dropped when the file of its template changes.
+_templates = {}
+_default_configs = {}
+
+
+def _flavor_value(flavor, name):
+    try:
+        return flavor[name]
+    except (KeyError, TypeError):
+        return getattr(flavor, name, None)
+
 
 class SingleInstanceConfigTemplate(object):
     """This class selects a single configuration file by database type for
@@ -72,14 +90,30 @@ class SingleInstanceConfigTemplate(object):
         }
         self.instance_id = instance_id
 
+    def _template_key(self):
+        return (self.template_name, self.datastore_dict['manager'],
+                self.datastore_dict['name'], self.datastore_dict['version'])
+
     def get_template(self):
+        """Return the compiled template of the datastore version.
+
+        The selection is cached; a template whose file changed is loaded
+        again, but a new, more specific template file is only picked up
+        after a restart.
+        """
+        key = self._template_key()
+        template = _templates.get(key)
+        if template is not None and template.is_up_to_date:
+            return template
         patterns = ['{name}/{version}/{template_name}',
                     '{name}/{template_name}',
                     '{manager}/{template_name}']
         context = self.datastore_dict.copy()
         context['template_name'] = self.template_name
         names = [name.format(**context) for name in patterns]
-        return ENV.select_template(names)
+        template = ENV.select_template(names)
+        _templates[key] = template
+        return template
 
     def render(self, **kwargs):
         """Renders the jinja template
@@ -100,12 +134,25 @@ class SingleInstanceConfigTemplate(object):
         Renders the default configuration template file as a dictionary
         to apply the default configuration dynamically.
         """
-        config = self.render()
         cfg_parser = SERVICE_PARSERS.get(self.datastore_version.manager)
         if not cfg_parser:
             raise exception.NoConfigParserFound(
                 datastore_manager=self.datastore_version.manager)
-        return cfg_parser(config).parse()
+        template = self.get_template()
+        key = self._template_key() + (
+            _flavor_value(self.flavor_dict, 'ram'),
+            _flavor_value(self.flavor_dict, 'vcpus'))
+        cached = _default_configs.get(key)
+        if cached is None or cached[0] is not template:
+            config = template.render(flavor=self.flavor_dict,
+                                     datastore=self.datastore_dict,
+                                     server_id=SERVER_ID_PLACEHOLDER)
+            cached = (template, list(cfg_parser(config).parse()))
+            _default_configs[key] = cached
+        server_id = self._calculate_unique_id()
+        return [(name, server_id if value == SERVER_ID_PLACEHOLDER
+                 else copy.deepcopy(value))
+                for name, value in cached[1]]
 
     def _calculate_unique_id(self):
         """
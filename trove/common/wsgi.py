@@ -39,6 +39,11 @@ from trove.common.i18n import _
 from trove.common import pastedeploy
 from trove.common import utils
 
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
 CONTEXT_KEY = 'trove.context'
 Router = base_wsgi.Router
 Debug = base_wsgi.Debug
@@ -263,6 +268,13 @@ class Resource(base_wsgi.Resource):
             LOG.debug(traceback.format_exc())
             return Fault(http_error)
         except Exception as error:
+            if (getattr(error, 'code', None) == 401 or
+                    getattr(error, 'http_status', None) == 401):
+                # The token was rejected, do not reuse its clients.
+                from trove.common import remote
+                context = request.environ.get(CONTEXT_KEY)
+                if context:
+                    remote.client_cache.invalidate(context.auth_token)
             exception_uuid = str(uuid.uuid4())
             LOG.exception(exception_uuid + ": " + str(error))
             return Fault(webob.exc.HTTPInternalServerError(
@@ -343,6 +355,7 @@ class Controller(object):
             exception.DatabaseNotFound,
             exception.QuotaResourceUnknown,
             exception.BackupFileNotFound,
+            exception.RestorePointBackupNotFound,
             exception.ClusterNotFound,
             exception.DatastoreNotFound,
             exception.SwiftNotFound,
@@ -371,17 +384,42 @@ class Controller(object):
     }
 
     schemas = {}
+    # Validators shared by all the controllers, keyed by id(schema).
+    _validators = {}
 
     @classmethod
     def get_schema(cls, action, body):
-        LOG.debug("Getting schema for %(name)s:%(action)s",
-                  {'name': cls.__class__.__name__, 'action': action})
         if cls.schemas:
-            matching_schema = cls.schemas.get(action, {})
-            if matching_schema:
-                LOG.debug("Found Schema: %s",
-                          matching_schema.get("name", matching_schema))
-            return matching_schema
+            return cls.schemas.get(action, {})
+
+    @classmethod
+    def get_validator(cls, schema):
+        """Return the validator of the schema, building it the first time.
+
+        The schemas are module level constants, so the validator is kept
+        with a reference to its schema to make sure the id is not reused.
+        """
+        entry = Controller._validators.get(id(schema))
+        if entry is None or entry[0] is not schema:
+            entry = (schema, SchemaValidator(schema))
+            Controller._validators[id(schema)] = entry
+        return entry[1]
+
+    @classmethod
+    def build_validators(cls):
+        """Build the validators of all the schemas of the controller."""
+        def _build(schema):
+            if not isinstance(schema, dict):
+                return
+            if 'type' in schema:
+                cls.get_validator(schema)
+            else:
+                # A mapping of sub-actions to their schemas.
+                for sub_schema in schema.values():
+                    _build(sub_schema)
+
+        for schema in (cls.schemas or {}).values():
+            _build(schema)
 
     @staticmethod
     def format_validation_msg(errors):
@@ -401,15 +439,14 @@ class Controller(object):
         body = action_args.get('body', {})
         schema = self.get_schema(action, body)
         if schema:
-            validator = jsonschema.Draft4Validator(schema)
-            if not validator.is_valid(body):
-                errors = sorted(validator.iter_errors(body),
-                                key=lambda e: e.path)
+            errors = self.get_validator(schema).errors(body)
+            if errors:
                 error_msg = self.format_validation_msg(errors)
                 LOG.info(error_msg)
                 raise exception.BadRequest(message=error_msg)
 
     def create_resource(self):
+        self.build_validators()
         return Resource(
             self,
             RequestDeserializer(),
@@ -421,6 +458,43 @@ class Controller(object):
                 if key in ["limit", "marker"]}
 
 
+DRAFT4_SCHEMA = 'http://json-schema.org/draft-04/schema#'
+
+
+class SchemaValidator(object):
+    """Validate request bodies against one JSON schema.
+
+    With api_fast_schema_validation the body is first checked with code
+    generated from the schema by fastjsonschema; jsonschema is then only
+    needed to describe the errors of the bodies that are not valid.
+    """
+
+    def __init__(self, schema):
+        self.validator = jsonschema.Draft4Validator(schema)
+        self.fast_validate = None
+        if CONF.api_fast_schema_validation and fastjsonschema:
+            try:
+                # The API schemas follow draft 4, fastjsonschema would
+                # otherwise assume the latest draft.
+                self.fast_validate = fastjsonschema.compile(
+                    dict(schema, **{'$schema': DRAFT4_SCHEMA}))
+            except fastjsonschema.JsonSchemaDefinitionException as e:
+                LOG.warning(_("Could not generate a validator for schema "
+                              "%(name)s: %(error)s"),
+                            {'name': schema.get('name', schema),
+                             'error': e})
+
+    def errors(self, body):
+        """Return the validation errors of the body, sorted by path."""
+        if self.fast_validate:
+            try:
+                self.fast_validate(body)
+                return []
+            except fastjsonschema.JsonSchemaException:
+                pass
+        return sorted(self.validator.iter_errors(body), key=lambda e: e.path)
+
+
 class TroveResponseSerializer(base_wsgi.ResponseSerializer):
     def serialize_body(self, response, data, content_type, action):
         """Overrides body serialization in base_wsgi.ResponseSerializer.
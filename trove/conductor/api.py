@@ -101,6 +101,25 @@ class API(object):
                    instance_id=instance_id,
                    user=user)
 
+    def report_metrics(self, instance_id, metrics, sent=None):
+        LOG.debug("Making async call to cast report_metrics for instance: "
+                  "%s", instance_id)
+        version = self.API_BASE_VERSION
+        cctxt = self.client.prepare(version=version)
+        cctxt.cast(self.context, "report_metrics",
+                   instance_id=instance_id,
+                   metrics=metrics,
+                   sent=sent)
+
+    def report_log_archive(self, instance_id, error):
+        LOG.debug("Making async call to cast report_log_archive for "
+                  "instance: %s", instance_id)
+        version = self.API_BASE_VERSION
+        cctxt = self.client.prepare(version=version)
+        cctxt.cast(self.context, "report_log_archive",
+                   instance_id=instance_id,
+                   error=error)
+
     def notify_end(self, **notification_args):
         LOG.debug("Making async call to cast end notification")
         version = self.API_BASE_VERSION
@@ -26,6 +26,7 @@ from trove.common.serializable_notification import SerializableNotification
 from trove.conductor.models import LastSeen
 from trove.extensions.mysql import models as mysql_models
 from trove.instance import models as inst_models
+from trove import rpc
 
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
@@ -139,6 +140,22 @@ class Manager(periodic_task.PeriodicTasks):
     def report_root(self, context, instance_id, user):
         mysql_models.RootHistory.create(context, instance_id, user)
 
+    def report_metrics(self, context, instance_id, metrics, sent=None):
+        if self._message_too_old(instance_id, 'report_metrics', sent):
+            return
+        payload = dict(metrics, instance_id=instance_id)
+        notifier = rpc.get_notifier(service='conductor',
+                                    publisher_id=instance_id)
+        notifier.info(context, 'trove.instance.metrics', payload)
+
+    def report_log_archive(self, context, instance_id, error):
+        LOG.error(_("Log archiving failed on instance %(instance)s: "
+                    "%(error)s"), {'instance': instance_id, 'error': error})
+        notifier = rpc.get_notifier(service='conductor',
+                                    publisher_id=instance_id)
+        notifier.error(context, 'trove.instance.log_archive',
+                       {'instance_id': instance_id, 'error': error})
+
     def notify_end(self, context, serialized_notification, notification_args):
         notification = SerializableNotification.deserialize(
             context, serialized_notification)
@@ -28,6 +28,8 @@ def map(engine, models):
     orm.mapper(models['instance'], Table('instances', meta, autoload=True))
     orm.mapper(models['instance_faults'],
                Table('instance_faults', meta, autoload=True))
+    orm.mapper(models['instance_task_history'],
+               Table('instance_task_history', meta, autoload=True))
     orm.mapper(models['root_enabled_history'],
                Table('root_enabled_history', meta, autoload=True))
     orm.mapper(models['datastore'],
@@ -42,6 +44,12 @@ def map(engine, models):
                Table('capability_overrides', meta, autoload=True))
     orm.mapper(models['service_statuses'],
                Table('service_statuses', meta, autoload=True))
+    orm.mapper(models['guest_pools'],
+               Table('guest_pools', meta, autoload=True))
+    orm.mapper(models['guest_pool_members'],
+               Table('guest_pool_members', meta, autoload=True))
+    orm.mapper(models['task_leases'],
+               Table('task_leases', meta, autoload=True))
     orm.mapper(models['dns_records'],
                Table('dns_records', meta, autoload=True))
     orm.mapper(models['agent_heartbeats'],
@@ -54,6 +62,8 @@ def map(engine, models):
                Table('reservations', meta, autoload=True))
     orm.mapper(models['backups'],
                Table('backups', meta, autoload=True))
+    orm.mapper(models['backup_retention_policies'],
+               Table('backup_retention_policies', meta, autoload=True))
     orm.mapper(models['security_group'],
                Table('security_groups', meta, autoload=True))
     orm.mapper(models['security_group_rule'],
@@ -0,0 +1,61 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from oslo_log import log as logging
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import Column
+from sqlalchemy.schema import Index
+from sqlalchemy.schema import MetaData
+from sqlalchemy.schema import UniqueConstraint
+
+from trove.db.sqlalchemy.migrate_repo.schema import create_tables
+from trove.db.sqlalchemy.migrate_repo.schema import DateTime
+from trove.db.sqlalchemy.migrate_repo.schema import Integer
+from trove.db.sqlalchemy.migrate_repo.schema import String
+from trove.db.sqlalchemy.migrate_repo.schema import Table
+
+logger = logging.getLogger('trove.db.sqlalchemy.migrate_repo.schema')
+
+meta = MetaData()
+
+backup_retention_policies = Table(
+    'backup_retention_policies',
+    meta,
+    Column('id', String(length=64), primary_key=True, nullable=False),
+    Column('tenant_id', String(length=36), nullable=False),
+    Column('instance_id', String(length=36)),
+    Column('keep_daily', Integer(), nullable=False, default=0),
+    Column('keep_weekly', Integer(), nullable=False, default=0),
+    Column('created', DateTime(), nullable=False),
+    Column('updated', DateTime(), nullable=False),
+    UniqueConstraint(
+        'tenant_id', 'instance_id',
+        name='UQ_backup_retention_policies_tenant_id_instance_id'),
+)
+
+
+def upgrade(migrate_engine):
+    meta.bind = migrate_engine
+    create_tables([backup_retention_policies])
+
+    # The retention engine selects all live backups of a tenant at once.
+    backups = Table('backups', meta, autoload=True)
+    backups_tenant_id_idx = Index("backups_tenant_id_deleted",
+                                  backups.c.tenant_id, backups.c.deleted)
+    try:
+        backups_tenant_id_idx.create()
+    except OperationalError as e:
+        logger.info(e)
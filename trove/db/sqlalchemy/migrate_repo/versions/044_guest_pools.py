@@ -0,0 +1,67 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.schema import Column
+from sqlalchemy.schema import Index
+from sqlalchemy.schema import MetaData
+
+from trove.db.sqlalchemy.migrate_repo.schema import create_tables
+from trove.db.sqlalchemy.migrate_repo.schema import DateTime
+from trove.db.sqlalchemy.migrate_repo.schema import Integer
+from trove.db.sqlalchemy.migrate_repo.schema import String
+from trove.db.sqlalchemy.migrate_repo.schema import Table
+
+meta = MetaData()
+
+guest_pools = Table(
+    'guest_pools',
+    meta,
+    Column('id', String(length=64), primary_key=True, nullable=False),
+    Column('datastore_version_id', String(length=36),
+           ForeignKey('datastore_versions.id'), nullable=False),
+    Column('flavor_id', String(length=255), nullable=False),
+    Column('volume_size', Integer()),
+    Column('volume_type', String(length=255)),
+    Column('size', Integer(), nullable=False, default=0),
+    Column('idle_timeout', Integer(), nullable=False, default=0),
+    Column('claimed', Integer(), nullable=False, default=0),
+    Column('missed', Integer(), nullable=False, default=0),
+    Column('created', DateTime(), nullable=False),
+    Column('updated', DateTime(), nullable=False),
+)
+
+guest_pool_members = Table(
+    'guest_pool_members',
+    meta,
+    Column('id', String(length=64), primary_key=True, nullable=False),
+    Column('pool_id', String(length=64),
+           ForeignKey('guest_pools.id', ondelete="CASCADE"),
+           nullable=False),
+    Column('instance_id', String(length=36),
+           ForeignKey('instances.id'), nullable=False),
+    Column('status', String(length=32), nullable=False),
+    Column('created', DateTime(), nullable=False),
+    Column('updated', DateTime(), nullable=False),
+    Index('guest_pool_members_pool_id_status', 'pool_id', 'status'),
+)
+
+
+def upgrade(migrate_engine):
+    meta.bind = migrate_engine
+    Table('datastore_versions', meta, autoload=True)
+    Table('instances', meta, autoload=True)
+    create_tables([guest_pools, guest_pool_members])
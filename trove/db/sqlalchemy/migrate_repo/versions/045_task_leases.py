@@ -0,0 +1,48 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from sqlalchemy.schema import Column
+from sqlalchemy.schema import Index
+from sqlalchemy.schema import MetaData
+
+from trove.db.sqlalchemy.migrate_repo.schema import create_tables
+from trove.db.sqlalchemy.migrate_repo.schema import DateTime
+from trove.db.sqlalchemy.migrate_repo.schema import Integer
+from trove.db.sqlalchemy.migrate_repo.schema import String
+from trove.db.sqlalchemy.migrate_repo.schema import Table
+from trove.db.sqlalchemy.migrate_repo.schema import Text
+
+meta = MetaData()
+
+task_leases = Table(
+    'task_leases',
+    meta,
+    Column('id', String(length=64), primary_key=True, nullable=False),
+    Column('method', String(length=255), nullable=False),
+    Column('resource_id', String(length=64)),
+    Column('payload', Text(), nullable=False),
+    Column('owner', String(length=255)),
+    Column('lease_expires', DateTime(), nullable=False),
+    Column('attempts', Integer(), nullable=False, default=0),
+    Column('created', DateTime(), nullable=False),
+    Column('updated', DateTime(), nullable=False),
+    Index('task_leases_lease_expires', 'lease_expires'),
+)
+
+
+def upgrade(migrate_engine):
+    meta.bind = migrate_engine
+    create_tables([task_leases])
@@ -0,0 +1,52 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.schema import Column
+from sqlalchemy.schema import Index
+from sqlalchemy.schema import MetaData
+
+from trove.db.sqlalchemy.migrate_repo.schema import create_tables
+from trove.db.sqlalchemy.migrate_repo.schema import DateTime
+from trove.db.sqlalchemy.migrate_repo.schema import Float
+from trove.db.sqlalchemy.migrate_repo.schema import String
+from trove.db.sqlalchemy.migrate_repo.schema import Table
+
+
+meta = MetaData()
+
+instance_task_history = Table(
+    'instance_task_history',
+    meta,
+    Column('id', String(length=64), primary_key=True, nullable=False),
+    Column('instance_id', String(length=64),
+           ForeignKey('instances.id', ondelete="CASCADE",
+                      onupdate="CASCADE"), nullable=False),
+    Column('task', String(length=64), nullable=False),
+    Column('step', String(length=64), nullable=False),
+    Column('started', DateTime(), nullable=False),
+    Column('duration', Float(), nullable=False),
+    Column('error', String(length=255)),
+    Column('created', DateTime(), nullable=False),
+    Column('updated', DateTime(), nullable=False),
+    Index('instance_task_history_instance_id', 'instance_id'),
+)
+
+
+def upgrade(migrate_engine):
+    meta.bind = migrate_engine
+    Table('instances', meta, autoload=True)
+    create_tables([instance_task_history])
@@ -50,6 +50,7 @@ def configure_db(options, models_mapper=None):
         from trove.instance import models as base_models
         from trove.module import models as module_models
         from trove.quota import models as quota_models
+        from trove.taskmanager import leases as lease_models
 
         model_modules = [
             base_models,
@@ -63,7 +64,8 @@ def configure_db(options, models_mapper=None):
             configurations_models,
             conductor_models,
             cluster_models,
-            module_models
+            module_models,
+            lease_models
         ]
 
         models = {}
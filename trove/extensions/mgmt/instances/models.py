@@ -22,6 +22,7 @@ from trove.common import remote
 from trove.common import timeutils
 from trove.extensions.mysql import models as mysql_models
 from trove.instance import models as instance_models
+from trove.instance import server_cache
 from trove import rpc
 
 LOG = logging.getLogger(__name__)
@@ -29,13 +30,22 @@ CONF = cfg.CONF
 
 
 def load_mgmt_instances(context, deleted=None, client=None,
-                        include_clustered=None):
+                        include_clustered=None, refresh=False):
     if not client:
         client = remote.create_nova_client(context, CONF.os_region_name)
-    try:
-        mgmt_servers = client.rdservers.list()
-    except AttributeError:
-        mgmt_servers = client.servers.list(search_opts={'all_tenants': 1})
+
+    def list_servers(**search_opts):
+        if not search_opts:
+            try:
+                return client.rdservers.list()
+            except AttributeError:
+                pass
+        search_opts['all_tenants'] = 1
+        return client.servers.list(search_opts=search_opts)
+
+    mgmt_servers = server_cache.server_lists.get(
+        (server_cache.ALL_TENANTS, CONF.os_region_name), list_servers,
+        refresh=refresh)
     LOG.info(_("Found %d servers in Nova"),
              len(mgmt_servers if mgmt_servers else []))
     args = {}
@@ -134,6 +144,9 @@ class MgmtInstance(instance_models.Instance):
     def get_diagnostics(self):
         return self.get_guest().get_diagnostics()
 
+    def get_metrics(self, window=None, names=None):
+        return self.get_guest().get_metrics(window=window, names=names)
+
     def stop_db(self):
         return self.get_guest().stop_db()
 
@@ -265,7 +278,7 @@ class NovaNotificationTransformer(NotificationTransformer):
     def __call__(self):
         audit_start, audit_end = NotificationTransformer._get_audit_period()
         instances = load_mgmt_instances(self.context, deleted=False,
-                                        client=self.nova_client)
+                                        client=self.nova_client, refresh=True)
         messages = []
         for instance in filter(
                 lambda inst: inst.status != 'SHUTDOWN' and inst.server,
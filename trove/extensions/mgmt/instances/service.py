@@ -29,6 +29,7 @@ from trove.extensions.mgmt.instances import models
 from trove.extensions.mgmt.instances import views
 from trove.extensions.mgmt.instances.views import DiagnosticsView
 from trove.extensions.mgmt.instances.views import HwInfoView
+from trove.extensions.mgmt.instances.views import MetricsView
 from trove.extensions.mysql import models as mysql_models
 from trove.instance import models as instance_models
 from trove.instance.service import InstanceController
@@ -61,9 +62,11 @@ class MgmtInstanceController(InstanceController):
             deleted = False
         clustered_q = req.GET.get('include_clustered', '').lower()
         include_clustered = clustered_q == 'true'
+        refresh = req.GET.get('fresh', '').lower() == 'true'
         try:
             instances = models.load_mgmt_instances(
-                context, deleted=deleted, include_clustered=include_clustered)
+                context, deleted=deleted, include_clustered=include_clustered,
+                refresh=refresh)
         except nova_exceptions.ClientException as e:
             LOG.exception(e)
             return wsgi.Result(str(e), 403)
@@ -205,6 +208,33 @@ class MgmtInstanceController(InstanceController):
         diagnostics = instance.get_diagnostics()
         return wsgi.Result(DiagnosticsView(id, diagnostics).data(), 200)
 
+    @admin_context
+    def metrics(self, req, tenant_id, id):
+        """Return the datastore metrics of a single instance, aggregated
+        over the last 'window' seconds.
+        """
+        LOG.info(_("Showing metrics for a database instance %(id)s for "
+                   "tenant '%(tenant_id)s'\n"
+                   "req : '%(req)s'\n\n"), {
+                       "tenant_id": tenant_id, "req": req, "id": id})
+
+        window = req.GET.get('window')
+        try:
+            window = int(window) if window else None
+        except ValueError:
+            window = -1
+        if window is not None and window <= 0:
+            raise exception.BadRequest(
+                _("The window must be a positive number of seconds."))
+        names = req.GET.get('names')
+        names = names.split(',') if names else None
+
+        context = req.environ[wsgi.CONTEXT_KEY]
+        instance = models.MgmtInstance.load(context=context, id=id)
+
+        metrics = instance.get_metrics(window=window, names=names)
+        return wsgi.Result(MetricsView(id, metrics).data(), 200)
+
     @admin_context
     def rpc_ping(self, req, tenant_id, id):
         """Checks if instance is reachable via rpc."""
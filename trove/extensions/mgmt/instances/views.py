@@ -166,3 +166,22 @@ class DiagnosticsView(object):
                 'vmHwm': self.diagnostics['vm_hwm'],
             }
         }
+
+
+class MetricsView(object):
+
+    def __init__(self, instance_id, metrics):
+        self.instance_id = instance_id
+        self.metrics = metrics
+
+    def data(self):
+        return {
+            'metrics': {
+                'instance_id': self.instance_id,
+                'samples': self.metrics['samples'],
+                'from': self.metrics['from'],
+                'to': self.metrics['to'],
+                'values': self.metrics['metrics'],
+                'sampler': self.metrics['sampler'],
+            }
+        }
@@ -70,6 +70,19 @@ def populate_users(users, initial_databases=None):
     return users_data
 
 
+def populate_grants(grants):
+    """Create a serializable request granting users access to databases."""
+    grants_data = []
+    for grant in grants:
+        u = guest_models.MySQLUser(name=grant.get('name', ''),
+                                   host=grant.get('host', '%'))
+        u.check_reserved()
+        for grant_db in grant.get('databases', []):
+            u.databases = grant_db.get('name', '')
+        grants_data.append(u.serialize())
+    return grants_data
+
+
 def unquote_user_host(user_hostname):
     unquoted = unquote(user_hostname)
     if '@' not in unquoted:
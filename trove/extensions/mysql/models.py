@@ -82,6 +82,13 @@ class User(object):
                                                   host=host_name)
         return client.create_user(users)
 
+    @classmethod
+    def bulk_provision(cls, context, instance_id, databases, users, grants):
+        load_and_verify(context, instance_id)
+        client = create_guest_client(context, instance_id)
+        return client.bulk_provision(databases=databases, users=users,
+                                     grants=grants)
+
     @classmethod
     def delete(cls, context, instance_id, user):
         load_and_verify(context, instance_id)
@@ -31,6 +31,7 @@ from trove.common.utils import correct_id_with_req
 from trove.common import wsgi
 from trove.extensions.common.service import DefaultRootController
 from trove.extensions.common.service import ExtensionController
+from trove.extensions.mysql.common import populate_grants
 from trove.extensions.mysql.common import populate_users
 from trove.extensions.mysql.common import populate_validated_databases
 from trove.extensions.mysql.common import unquote_user_host
@@ -92,6 +93,38 @@ class UserController(ExtensionController):
                                            % {'e': e})
         return wsgi.Result(None, 202)
 
+    def provision(self, req, body, tenant_id, instance_id):
+        """Creates databases and users and grants users access to
+        databases, returning the outcome of each item.
+        """
+        LOG.info(_("Provisioning databases and users for instance "
+                   "'%(id)s'\n"
+                   "req : '%(req)s'\n\n"),
+                 {"id": instance_id, "req": strutils.mask_password(req)})
+        context = req.environ[wsgi.CONTEXT_KEY]
+        databases = body.get('databases', [])
+        users = body.get('users', [])
+        grants = body.get('grants', [])
+        if databases:
+            self.authorize_target_action(
+                context, 'database:create', instance_id)
+        if users:
+            self.authorize_target_action(context, 'user:create', instance_id)
+        if grants:
+            self.authorize_target_action(
+                context, 'user_access:update', instance_id)
+        try:
+            model_schemas = populate_validated_databases(databases)
+            model_users = populate_users(users)
+            model_grants = populate_grants(grants)
+        except (ValueError, AttributeError) as e:
+            raise exception.BadRequest(_("Provisioning error: %(e)s")
+                                       % {'e': e})
+        results = models.User.bulk_provision(context, instance_id,
+                                             model_schemas, model_users,
+                                             model_grants)
+        return wsgi.Result(views.BulkProvisionView(results).data(), 200)
+
     def delete(self, req, tenant_id, instance_id, id):
         LOG.info(_("Delete instance '%(id)s'\n"
                    "req : '%(req)s'\n\n"),
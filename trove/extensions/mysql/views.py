@@ -42,6 +42,27 @@ class UsersView(object):
         return {"users": userlist}
 
 
+class BulkProvisionView(object):
+
+    def __init__(self, results):
+        self.results = results
+
+    @staticmethod
+    def _item(result):
+        item = {"name": result['name'],
+                "status": "failed" if result['error'] else "ok"}
+        if result.get('host'):
+            item["host"] = result['host']
+        if result['error']:
+            item["error"] = result['error']
+        return item
+
+    def data(self):
+        return dict((kind, [self._item(result)
+                            for result in self.results.get(kind, [])])
+                    for kind in ("databases", "users", "grants"))
+
+
 class UserAccessView(object):
     def __init__(self, databases):
         self.databases = databases
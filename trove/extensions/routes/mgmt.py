@@ -50,6 +50,7 @@ class Mgmt(extensions.ExtensionDescriptor):
             MgmtInstanceController(),
             member_actions={'root': 'GET',
                             'diagnostics': 'GET',
+                            'metrics': 'GET',
                             'hwinfo': 'GET',
                             'rpc_ping': 'GET',
                             'action': 'POST'})
@@ -51,7 +51,8 @@ class Mysql(extensions.ExtensionDescriptor):
             parent={'member_name': 'instance',
                     'collection_name': '{tenant_id}/instances'},
             member_actions={'update': 'PUT'},
-            collection_actions={'update_all': 'PUT'})
+            collection_actions={'update_all': 'PUT',
+                                'provision': 'POST'})
         resources.append(resource)
 
         collection_url = '{tenant_id}/instances/:instance_id/users'
@@ -40,13 +40,14 @@ class API(object):
 
     API version history:
         * 1.0 - Initial version.
+        * 1.1 - Seeding a replica through get_replication_snapshot.
 
     When updating this API, also update API_LATEST_VERSION
     """
 
     # API_LATEST_VERSION should bump the minor number each time
     # a method signature is added or changed
-    API_LATEST_VERSION = '1.0'
+    API_LATEST_VERSION = '1.1'
 
     # API_BASE_VERSION should only change on major version upgrade
     API_BASE_VERSION = '1.0'
@@ -189,6 +190,22 @@ class API(object):
                           username=username, hostname=hostname,
                           database=database)
 
+    def bulk_provision(self, databases=None, users=None, grants=None):
+        """Make a synchronous call to create databases and users and grant
+        users access to databases, in bulk. Return the outcome of each
+        item.
+        """
+        LOG.debug("Provisioning %(databases)d databases, %(users)d users "
+                  "and %(grants)d grants on instance %(id)s.",
+                  {'databases': len(databases or []),
+                   'users': len(users or []),
+                   'grants': len(grants or []), 'id': self.id})
+        version = self.API_BASE_VERSION
+
+        return self._call("bulk_provision", AGENT_HIGH_TIMEOUT,
+                          version=version, databases=databases, users=users,
+                          grants=grants)
+
     def list_users(self, limit=None, marker=None, include_marker=False):
         """Make an asynchronous call to list database users."""
         LOG.debug("Listing Users for instance %s.", self.id)
@@ -293,6 +310,16 @@ class API(object):
         return self._call("get_diagnostics", AGENT_LOW_TIMEOUT,
                           version=version)
 
+    def get_metrics(self, window=None, names=None):
+        """Make a synchronous call to get the aggregates of the datastore
+        metrics sampled over the last window seconds.
+        """
+        LOG.debug("Get metrics of instance %s.", self.id)
+        version = self.API_BASE_VERSION
+
+        return self._call("get_metrics", AGENT_LOW_TIMEOUT,
+                          version=version, window=window, names=names)
+
     def rpc_ping(self):
         """Make a synchronous RPC call to check if we can ping the instance."""
         LOG.debug("Check RPC ping on instance %s.", self.id)
@@ -495,11 +522,19 @@ class API(object):
                                  replica_source_config=None):
         LOG.debug("Retrieving replication snapshot from instance %s.", self.id)
         version = self.API_BASE_VERSION
+        if snapshot_info and snapshot_info.get('seed'):
+            # A 1.0 guest would ignore the seed flag and take a full backup,
+            # so it has to reject the request instead.
+            version = '1.1'
 
         return self._call("get_replication_snapshot", AGENT_SNAPSHOT_TIMEOUT,
                           version=version, snapshot_info=snapshot_info,
                           replica_source_config=replica_source_config)
 
+    def can_seed_replica(self):
+        """Whether the guest can be asked to seed a replica directly."""
+        return self.client.can_send_version('1.1')
+
     def attach_replication_slave(self, snapshot, replica_config=None):
         LOG.debug("Configuring instance %s to replicate from %s.",
                   self.id, snapshot.get('master').get('id'))
@@ -605,6 +640,14 @@ class API(object):
                           enable=enable, disable=disable,
                           publish=publish, discard=discard)
 
+    def log_archive_action(self, enable):
+        LOG.debug("Setting log archiving on %(id)s to %(enable)s.",
+                  {'id': self.id, 'enable': enable})
+        version = self.API_BASE_VERSION
+
+        self._call("log_archive_action", AGENT_HIGH_TIMEOUT,
+                   version=version, enable=enable)
+
     def module_list(self, include_contents):
         LOG.debug("Querying modules on %s (contents: %s).",
                   self.id, include_contents)
@@ -21,7 +21,7 @@ from trove.guestagent.backup.backupagent import BackupAgent
 AGENT = BackupAgent()
 
 
-def backup(context, backup_info):
+def backup(context, backup_info, sampler=None):
     """
     Main entry point for starting a backup based on the given backup id.  This
     will create a backup for this DB instance and will then store the backup
@@ -29,8 +29,10 @@ def backup(context, backup_info):
 
     :param context:     the context token which contains the users details
     :param backup_id:   the id of the persisted backup object
+    :param sampler:     the datastore metrics sampler, whose latency drives
+                        the adaptive backup throttling
     """
-    return AGENT.execute_backup(context, backup_info)
+    return AGENT.execute_backup(context, backup_info, sampler=sampler)
 
 
 def restore(context, backup_info, restore_location):
@@ -43,3 +45,26 @@ def restore(context, backup_info, restore_location):
     :param backup_id:   the id of the persisted backup object
     """
     return AGENT.execute_restore(context, backup_info, restore_location)
+
+
+def archive_logs(context):
+    """
+    Main entry point for continuous log archiving.  This ships the closed
+    transaction log segments (binlogs, WAL) of this DB instance to the
+    configured repository (e.g. Swift) in compressed batches.
+
+    :param context:     the context token which contains the users details
+    """
+    return AGENT.execute_log_archive(context)
+
+
+def replay_logs(context, backup_info, restore_location):
+    """
+    Main entry point for point-in-time recovery.  This replays the archived
+    log segments of the backed-up instance on top of a restored backup, up
+    to backup_info['restore_point'] (a 'timestamp' or a 'position').
+
+    :param context:     the context token which contains the users details
+    :param backup_info: the restored backup, including the restore point
+    """
+    return AGENT.execute_log_replay(context, backup_info, restore_location)
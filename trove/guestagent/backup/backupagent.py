@@ -19,10 +19,14 @@ from oslo_utils import timeutils
 
 from trove.backup.state import BackupState
 from trove.common import cfg
+from trove.common import exception
 from trove.common.i18n import _
 from trove.common.strategies.storage import get_storage_strategy
 from trove.conductor import api as conductor_api
+from trove.guestagent.backup.seed import SeedClient
+from trove.guestagent.backup.throttle import ThrottledStream
 from trove.guestagent.dbaas import get_filesystem_volume_stats
+from trove.guestagent.strategies.archive import get_archive_strategy
 from trove.guestagent.strategies.backup.base import BackupError
 from trove.guestagent.strategies.backup.base import UnknownBackupType
 from trove.guestagent.strategies.backup import get_backup_strategy
@@ -60,8 +64,29 @@ class BackupAgent(object):
                                        "ns": RESTORE_NAMESPACE})
         return runner
 
+    def _throttle(self, bkup, sampler=None):
+        """Return the stream of a running backup, rate limited as set for
+        the datastore.
+        """
+        rate_limit = CONFIG_MANAGER.backup_rate_limit
+        adaptive = CONFIG_MANAGER.backup_adaptive_throttling
+        if adaptive and sampler is None:
+            LOG.debug("The datastore metrics are not sampled, the backup "
+                      "is not throttled adaptively.")
+            adaptive = False
+        if not rate_limit and not adaptive:
+            return bkup
+        LOG.debug("Throttling the backup to %(rate)s bytes/s "
+                  "(adaptive: %(adaptive)s).",
+                  {'rate': rate_limit or 'unlimited', 'adaptive': adaptive})
+        return ThrottledStream(
+            bkup, rate_limit, sampler=sampler if adaptive else None,
+            latency_factor=CONFIG_MANAGER.backup_adaptive_latency_factor,
+            min_rate=CONFIG_MANAGER.backup_adaptive_min_rate)
+
     def stream_backup_to_storage(self, context, backup_info, runner, storage,
-                                 parent_metadata={}, extra_opts=EXTRA_OPTS):
+                                 parent_metadata={}, extra_opts=EXTRA_OPTS,
+                                 sampler=None):
         backup_id = backup_info['id']
         conductor = conductor_api.API(context)
 
@@ -87,7 +112,7 @@ class BackupAgent(object):
                 meta['datastore_version'] = backup_info['datastore_version']
                 success, note, checksum, location = storage.save(
                     bkup.manifest,
-                    bkup,
+                    self._throttle(bkup, sampler),
                     metadata=meta)
 
                 backup_state.update({
@@ -128,7 +153,7 @@ class BackupAgent(object):
 
     def execute_backup(self, context, backup_info,
                        runner=RUNNER, extra_opts=EXTRA_OPTS,
-                       incremental_runner=INCREMENTAL_RUNNER):
+                       incremental_runner=INCREMENTAL_RUNNER, sampler=None):
 
         LOG.debug("Running backup %(id)s.", backup_info)
         storage = get_storage_strategy(
@@ -151,7 +176,8 @@ class BackupAgent(object):
             })
 
         self.stream_backup_to_storage(context, backup_info, runner, storage,
-                                      parent_metadata, extra_opts)
+                                      parent_metadata, extra_opts,
+                                      sampler=sampler)
 
     def execute_restore(self, context, backup_info, restore_location):
 
@@ -159,10 +185,14 @@ class BackupAgent(object):
             LOG.debug("Getting Restore Runner %(type)s.", backup_info)
             restore_runner = self._get_restore_runner(backup_info['type'])
 
-            LOG.debug("Getting Storage Strategy.")
-            storage = get_storage_strategy(
-                CONF.storage_strategy,
-                CONF.storage_namespace)(context)
+            if backup_info.get('seed'):
+                LOG.debug("Loading the backup from the master.")
+                storage = SeedClient(backup_info['seed'])
+            else:
+                LOG.debug("Getting Storage Strategy.")
+                storage = get_storage_strategy(
+                    CONF.storage_strategy,
+                    CONF.storage_namespace)(context)
 
             runner = restore_runner(storage, location=backup_info['location'],
                                     checksum=backup_info['checksum'],
@@ -181,3 +211,36 @@ class BackupAgent(object):
 
         else:
             LOG.debug("Restored backup %(id)s.", backup_info)
+
+    def _get_log_archiver(self, context):
+        """Returns the LogArchiver of this datastore bound to the storage."""
+        strategy = getattr(CONFIG_MANAGER, 'log_archive_strategy', None)
+        namespace = getattr(CONFIG_MANAGER, 'log_archive_namespace', None)
+        if not strategy or not namespace:
+            raise exception.DatastoreOperationNotSupported(
+                operation='log_archive', datastore=CONF.datastore_manager)
+        storage = get_storage_strategy(
+            CONF.storage_strategy,
+            CONF.storage_namespace)(context)
+        return get_archive_strategy(strategy, namespace)(storage)
+
+    def execute_log_archive(self, context):
+        archiver = self._get_log_archiver(context)
+        count = archiver.archive(CONF.guest_id)
+        LOG.debug("Archived %d log segments.", count)
+        return count
+
+    def execute_log_replay(self, context, backup_info, restore_location):
+        LOG.debug("Replaying archived logs of instance %(instance_id)s up "
+                  "to %(restore_point)s.", backup_info)
+        archiver = self._get_log_archiver(context)
+        # The archive index lives next to the backups of the source instance.
+        index_location = '%s/%s' % (
+            backup_info['location'].rsplit('/', 1)[0],
+            archiver.index_name(backup_info['instance_id']))
+        try:
+            archiver.replay(index_location, backup_info, restore_location)
+        except Exception:
+            LOG.exception(_("Error replaying archived logs on top of "
+                            "backup %(id)s."), backup_info)
+            raise
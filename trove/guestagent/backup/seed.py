@@ -0,0 +1,287 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Seed a replica with a backup streamed straight from its master.
+
+The master listens for the replica and runs its replication backup once
+the replica is connected, sending the output in length-prefixed chunks;
+an empty chunk ends the stream, once the backup has exited successfully.
+If it failed, the stream ends with an error frame instead.  The replica
+pipes the chunks into the matching restore runner, the way it would a
+backup loaded from storage.
+Nothing is written to the backup storage.
+
+The replica is authenticated by a secret it gets with the replication
+snapshot: the master sends a random challenge, the replica answers with
+its HMAC.  The data is encrypted the way backups are
+(backup_use_openssl_encryption).
+
+The master keeps the last replica_seed_resume_window bytes it sent.  A
+replica losing the connection reconnects and resumes from the last byte
+it received, as long as the master still has it.
+"""
+
+import binascii
+import collections
+import hashlib
+import hmac
+import os
+import struct
+
+import eventlet
+from eventlet.green import socket
+from oslo_log import log as logging
+
+from trove.common import cfg
+from trove.common.i18n import _
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+PROTOCOL = b'TROVESEED1'
+CHALLENGE_SIZE = 64
+FRAME = struct.Struct('!I')
+FAILED_FRAME = 0xFFFFFFFF
+OFFSET = struct.Struct('!Q')
+ACCEPTED = b'+'
+REFUSED = b'-'
+
+
+class SeedError(Exception):
+    """Error seeding a replica from its master."""
+
+
+def _digest(secret, challenge):
+    return hmac.new(secret.encode('utf-8'), challenge,
+                    hashlib.sha256).hexdigest().encode('ascii')
+
+
+def _recv_exactly(conn, size):
+    data = b''
+    while len(data) < size:
+        received = conn.recv(size - len(data))
+        if not received:
+            raise socket.error(_("Connection closed by the peer."))
+        data += received
+    return data
+
+
+def backup_info(seed):
+    """Return the backup info restoring a replica from a seed."""
+    return {'id': seed['id'],
+            'type': seed['type'],
+            'location': 'seed://%s:%s' % (seed['host'], seed['port']),
+            'checksum': None,
+            'seed': seed}
+
+
+class SeedServer(object):
+    """Streams a backup to the one replica knowing the secret.
+
+    :param runner_factory: returns the backup runner, called once the
+                           replica is connected.
+    """
+
+    def __init__(self, runner_factory, secret, port=None, timeout=None,
+                 window=None):
+        self.runner_factory = runner_factory
+        self.secret = secret
+        self.timeout = timeout or CONF.replica_seed_timeout
+        self.window = window or CONF.replica_seed_resume_window
+        # Listen right away, so that the master fails to seed (and the
+        # replica is seeded from storage) if the port is not available.
+        self.sock = eventlet.listen(
+            ('0.0.0.0', CONF.replica_seed_port if port is None else port))
+        self.port = self.sock.getsockname()[1]
+        self.runner = None
+        # The chunks sent last, the first one starting at buffer_start.
+        self.buffer = collections.deque()
+        self.buffer_start = 0
+        self.sent = 0
+        self.finished = False
+        self.failed = False
+
+    def start(self):
+        return eventlet.spawn(self.serve)
+
+    def serve(self):
+        self.sock.settimeout(self.timeout)
+        try:
+            while True:
+                conn, peer = self.sock.accept()
+                try:
+                    if self._serve_connection(conn, peer):
+                        LOG.info(_("Seeded replica %(peer)s with %(size)d "
+                                   "bytes."),
+                                 {'peer': peer[0], 'size': self.sent})
+                        return
+                except socket.error as ex:
+                    LOG.warning(_("Lost the connection to replica %(peer)s "
+                                  "at byte %(offset)d, waiting for it to "
+                                  "resume: %(error)s"),
+                                {'peer': peer[0], 'offset': self.sent,
+                                 'error': ex})
+                finally:
+                    conn.close()
+        except socket.timeout:
+            LOG.error(_("The replica did not connect to the seed server "
+                        "within %ds."), self.timeout)
+        except SeedError as ex:
+            LOG.error(_("Could not seed the replica: %s"), ex)
+        finally:
+            self.sock.close()
+            self._stop_runner()
+
+    def _serve_connection(self, conn, peer):
+        conn.settimeout(self.timeout)
+        challenge = binascii.hexlify(os.urandom(CHALLENGE_SIZE // 2))
+        conn.sendall(PROTOCOL + challenge)
+        answer = _recv_exactly(conn, CHALLENGE_SIZE + OFFSET.size)
+        offset = OFFSET.unpack(answer[CHALLENGE_SIZE:])[0]
+        if not hmac.compare_digest(answer[:CHALLENGE_SIZE],
+                                   _digest(self.secret, challenge)):
+            LOG.warning(_("Refused an unauthenticated seed connection from "
+                          "%s."), peer[0])
+            conn.sendall(REFUSED)
+            return False
+        if not self.buffer_start <= offset <= self.sent:
+            conn.sendall(REFUSED)
+            raise SeedError(_("Replica %(peer)s cannot resume at byte "
+                              "%(offset)d, the bytes kept start at "
+                              "%(start)d.") %
+                            {'peer': peer[0], 'offset': offset,
+                             'start': self.buffer_start})
+        conn.sendall(ACCEPTED)
+        if self.runner is None:
+            LOG.debug("Replica %s connected, starting the backup.", peer[0])
+            self.runner = self.runner_factory()
+            self.runner.__enter__()
+        elif offset < self.sent:
+            LOG.info(_("Replica %(peer)s resumed at byte %(offset)d."),
+                     {'peer': peer[0], 'offset': offset})
+        for chunk in self._buffered_from(offset):
+            conn.sendall(FRAME.pack(len(chunk)) + chunk)
+        while not self.finished:
+            chunk = self.runner.read(CONF.backup_chunk_size)
+            if not chunk:
+                self._finish_runner()
+                break
+            self._keep(chunk)
+            conn.sendall(FRAME.pack(len(chunk)) + chunk)
+        if self.failed:
+            conn.sendall(FRAME.pack(FAILED_FRAME))
+            raise SeedError(_("The seed backup failed, replica %s cannot "
+                              "be restored from it.") % peer[0])
+        conn.sendall(FRAME.pack(0))
+        # The replica may not have got the end of the stream until it
+        # says so.
+        return _recv_exactly(conn, 1) == ACCEPTED
+
+    def _keep(self, chunk):
+        self.buffer.append(chunk)
+        self.sent += len(chunk)
+        while self.sent - self.buffer_start - len(self.buffer[0]) >= (
+                self.window):
+            self.buffer_start += len(self.buffer.popleft())
+
+    def _buffered_from(self, offset):
+        start = self.buffer_start
+        for chunk in self.buffer:
+            end = start + len(chunk)
+            if end > offset:
+                yield chunk[max(offset - start, 0):]
+            start = end
+
+    def _finish_runner(self):
+        # The backup must have succeeded before the replica is told the
+        # stream is complete.
+        self.finished = True
+        try:
+            self.runner.__exit__(None, None, None)
+        except Exception as ex:
+            LOG.error(_("The seed backup failed: %s"), ex)
+            self.failed = True
+
+    def _stop_runner(self):
+        if self.runner is not None and not self.finished:
+            try:
+                # Stops the backup process, the stream was not read to its
+                # end.
+                self.runner.__exit__(None, None, None)
+            except Exception as ex:
+                LOG.debug("Stopped the seed backup: %s", ex)
+        self.buffer.clear()
+
+
+class SeedClient(object):
+    """Loads the stream of a seed server, the way a storage strategy loads
+    a backup.
+    """
+
+    def __init__(self, seed):
+        self.host = seed['host']
+        self.port = seed['port']
+        self.secret = seed['secret']
+        self.received = 0
+
+    def load(self, location, backup_checksum):
+        return self._stream()
+
+    def _stream(self):
+        attempts = 0
+        while True:
+            try:
+                conn = socket.create_connection(
+                    (self.host, self.port), CONF.replica_seed_timeout)
+                try:
+                    self._handshake(conn)
+                    attempts = 0
+                    while True:
+                        size = FRAME.unpack(_recv_exactly(conn, FRAME.size))[0]
+                        if not size:
+                            conn.sendall(ACCEPTED)
+                            return
+                        if size == FAILED_FRAME:
+                            raise SeedError(_("The seed backup on %s "
+                                              "failed.") % self.host)
+                        chunk = _recv_exactly(conn, size)
+                        self.received += size
+                        yield chunk
+                finally:
+                    conn.close()
+            except socket.error as ex:
+                attempts += 1
+                if attempts > CONF.replica_seed_retries:
+                    raise SeedError(_("Could not load the seed stream from "
+                                      "%(host)s:%(port)s: %(error)s") %
+                                    {'host': self.host, 'port': self.port,
+                                     'error': ex})
+                LOG.warning(_("Lost the seed stream from %(host)s at byte "
+                              "%(offset)d, resuming: %(error)s"),
+                            {'host': self.host, 'offset': self.received,
+                             'error': ex})
+                eventlet.sleep(min(2 ** attempts, 30))
+
+    def _handshake(self, conn):
+        greeting = _recv_exactly(conn, len(PROTOCOL) + CHALLENGE_SIZE)
+        if not greeting.startswith(PROTOCOL):
+            raise SeedError(_("%s is not a seed server.") % self.host)
+        conn.sendall(_digest(self.secret, greeting[len(PROTOCOL):]) +
+                     OFFSET.pack(self.received))
+        if _recv_exactly(conn, 1) != ACCEPTED:
+            raise SeedError(_("The seed server on %(host)s refused to send "
+                              "the stream from byte %(offset)d.") %
+                            {'host': self.host, 'offset': self.received})
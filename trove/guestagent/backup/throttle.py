@@ -0,0 +1,154 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Keep backups from starving the datastore.
+
+The output of the backup process is read through a token bucket.  The
+process blocks writing to its output pipe while it is read slower than it
+produces, so the rate limit applies to the upload and, through the pipe,
+to the reads of the datastore files too.
+
+In adaptive mode the rate follows the time the datastore takes to answer
+the metrics collection: it is halved when that time rises too far over the
+lowest one seen, and raised back by half once it does not.
+"""
+
+import time
+
+from oslo_log import log as logging
+
+from trove.common.i18n import _
+
+LOG = logging.getLogger(__name__)
+
+# The rate is raised back by this factor at each sample the datastore
+# latency is normal.
+RECOVERY_FACTOR = 1.5
+
+
+class TokenBucket(object):
+    """Allows rate bytes per second, in bursts of up to one second worth.
+
+    A rate of 0 means no limit.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated_at = time.time()
+
+    def set_rate(self, rate):
+        self.rate = rate
+        self.tokens = min(self.tokens, rate)
+
+    def consume(self, amount):
+        """Take amount tokens, sleeping until they are available.
+        Return the time slept.
+        """
+        now = time.time()
+        if not self.rate:
+            self.updated_at = now
+            return 0.0
+        self.tokens = min(self.tokens + (now - self.updated_at) * self.rate,
+                          self.rate)
+        self.updated_at = now
+        # The tokens may go negative, the time slept pays them back.
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        wait = -self.tokens / self.rate
+        time.sleep(wait)
+        return wait
+
+
+class ThrottledStream(object):
+    """Wraps a backup runner, reading its output at a limited rate.
+
+    :param rate_limit:     bytes per second, 0 for no limit.
+    :param sampler:        the metrics sampler of the datastore, whose
+                           collection time is used as its latency in
+                           adaptive mode (None to disable it).
+    :param latency_factor: rise of the latency over its lowest value above
+                           which the rate is halved.
+    :param min_rate:       rate never gone below in adaptive mode.
+    """
+
+    def __init__(self, stream, rate_limit, sampler=None, latency_factor=2.0,
+                 min_rate=1):
+        self.stream = stream
+        self.rate_limit = rate_limit
+        self.bucket = TokenBucket(rate_limit)
+        self.sampler = sampler
+        self.latency_factor = latency_factor
+        self.min_rate = min_rate
+        self.bytes_read = 0
+        self.wait_time = 0.0
+        self.backoffs = 0
+        self.lowest_rate = rate_limit
+        self._lowest_latency = None
+        self._samples_seen = sampler.samples if sampler else 0
+        self._checked_at = time.time()
+        self._checked_bytes = 0
+
+    def read(self, chunk_size):
+        chunk = self.stream.read(chunk_size)
+        if chunk:
+            self.bytes_read += len(chunk)
+            self.wait_time += self.bucket.consume(len(chunk))
+        if self.sampler is not None and (
+                self.sampler.samples != self._samples_seen):
+            self._samples_seen = self.sampler.samples
+            self._adapt(self.sampler.last_duration)
+        return chunk
+
+    def _adapt(self, latency):
+        now = time.time()
+        elapsed = now - self._checked_at
+        read = self.bytes_read - self._checked_bytes
+        self._checked_at, self._checked_bytes = now, self.bytes_read
+        if self._lowest_latency is None or latency < self._lowest_latency:
+            self._lowest_latency = latency
+        allowed = self.bucket.rate * elapsed
+        if latency > self._lowest_latency * self.latency_factor:
+            # With no limit yet, back off from the rate actually read at.
+            current = self.bucket.rate or (read / elapsed if elapsed else 0)
+            rate = max(int(current / 2), self.min_rate)
+            self.backoffs += 1
+            LOG.info(_("The datastore latency rose to %(latency).3fs, "
+                       "slowing the backup down to %(rate)d bytes/s."),
+                     {'latency': latency, 'rate': rate})
+        elif not self.bucket.rate or read < allowed / 2:
+            # The limit is not what holds the backup back any more.
+            rate = self.rate_limit
+        else:
+            rate = int(self.bucket.rate * RECOVERY_FACTOR)
+            if self.rate_limit:
+                rate = min(rate, self.rate_limit)
+        if rate != self.bucket.rate:
+            LOG.debug("Backup rate limit set to %d bytes/s.", rate)
+            self.bucket.set_rate(rate)
+            if rate and (not self.lowest_rate or rate < self.lowest_rate):
+                self.lowest_rate = rate
+
+    def metadata(self):
+        metadata = self.stream.metadata()
+        metadata.update({
+            'throttle_rate_limit': self.rate_limit,
+            'throttle_lowest_rate': self.lowest_rate,
+            'throttle_backoffs': self.backoffs,
+            'throttle_wait': round(self.wait_time, 1),
+        })
+        return metadata
@@ -17,6 +17,7 @@ import collections
 import os
 import re
 
+from oslo_utils import encodeutils
 import six
 
 from trove.common import pagination
@@ -140,3 +141,16 @@ def serialize_list(li, limit=None, marker=None, include_marker=False):
     page, next_name = paginate_list(li, limit=limit, marker=marker,
                                     include_marker=include_marker)
     return [item.serialize() for item in page], next_name
+
+
+def bulk_result(item, error=None):
+    """Return the outcome of an item (a serialized database or user) of a
+    bulk request: its name, its host if it has one and the message of the
+    error it failed with, None if it succeeded.
+    """
+    result = {'name': item.get('_name'),
+              'error': (encodeutils.exception_to_unicode(error)
+                        if error is not None else None)}
+    if item.get('_host'):
+        result['host'] = item['_host']
+    return result
@@ -692,8 +692,35 @@ def move(source, destination, force=False, **kwargs):
     _execute_shell_cmd('mv', options, source, destination, **kwargs)
 
 
+def link(source, destination, force=False, **kwargs):
+    """Create a hard link to a given file.
+
+    :seealso: _execute_shell_cmd for valid optional keyword arguments.
+
+    :param source:          Path to the linked file.
+    :type source:           string
+
+    :param destination:     Path to the new link.
+    :type destination:      string
+
+    :param force:           Remove an existing destination file.
+    :type force:            boolean
+
+    :raises:                :class:`UnprocessableEntity` if source or
+                            destination not given.
+    """
+
+    if not source:
+        raise exception.UnprocessableEntity(_("Missing source path."))
+    elif not destination:
+        raise exception.UnprocessableEntity(_("Missing destination path."))
+
+    options = (('f', force),)
+    _execute_shell_cmd('ln', options, source, destination, **kwargs)
+
+
 def copy(source, destination, force=False, preserve=False, recursive=True,
-         dereference=False, **kwargs):
+         dereference=False, reflink=False, **kwargs):
     """Copy a given file or directory to another location.
     Copy does NOT attempt to preserve ownership, permissions and timestamps
     unless the 'preserve' option is enabled.
@@ -719,6 +746,10 @@ def copy(source, destination, force=False, preserve=False, recursive=True,
     :param dereference:     Follow symbolic links when copying from them.
     :type dereference:      boolean
 
+    :param reflink:         Share the data blocks with the source where the
+                            filesystem supports it.
+    :type reflink:          boolean
+
     :raises:                :class:`UnprocessableEntity` if source or
                             destination not given.
     """
@@ -730,7 +761,9 @@ def copy(source, destination, force=False, preserve=False, recursive=True,
 
     options = (('f', force), ('p', preserve), ('R', recursive),
                ('L', dereference))
-    _execute_shell_cmd('cp', options, source, destination, **kwargs)
+    args = ['--reflink=auto'] if reflink else []
+    _execute_shell_cmd('cp', options, *(args + [source, destination]),
+                       **kwargs)
 
 
 def get_bytes_free_on_fs(path):
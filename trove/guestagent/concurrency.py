@@ -0,0 +1,122 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Worker pools for the RPC calls handled by the Guest Agent.
+
+Every RPC method belongs to a concurrency class - long I/O, admin or
+liveness - and each class has its own number of workers and its own queue,
+so a backup or a log publication cannot keep a ping or a user listing from
+running and the executor threads are not all taken by one kind of call.
+
+A call is rejected when the queue of its class is full, the caller gets
+the error back and can retry.  Casts are always queued instead: nobody
+would see their rejection and the task they start, e.g. a backup, would
+be left in its initial state.
+"""
+
+import contextlib
+import functools
+
+from eventlet import semaphore
+from oslo_log import log as logging
+
+from trove.common import cfg
+from trove.common import exception
+from trove.common.i18n import _
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+LONG_IO = 'long_io'
+ADMIN = 'admin'
+LIVENESS = 'liveness'
+
+# The methods the Guest Agent API casts, see trove.guestagent.api.
+CAST_METHODS = frozenset([
+    'attach_replication_slave', 'change_passwords', 'create_backup',
+    'create_database', 'create_user', 'delete_database', 'delete_user',
+    'prepare', 'update_attributes', 'upgrade'])
+
+
+class ConcurrencyClass(object):
+    """A number of workers and the calls waiting for one of them."""
+
+    def __init__(self, name, workers, queue_limit):
+        self.name = name
+        self.queue_limit = queue_limit
+        self.waiting = 0
+        self._workers = semaphore.Semaphore(workers)
+
+    @contextlib.contextmanager
+    def worker(self, method, always_queue=False):
+        if self._workers.locked():
+            if (self.queue_limit and self.waiting >= self.queue_limit and
+                    not always_queue):
+                LOG.warning(_("Rejecting %(method)s, %(waiting)d %(name)s "
+                              "calls are already waiting."),
+                            {'method': method, 'waiting': self.waiting,
+                             'name': self.name})
+                raise exception.GuestAgentBusy(concurrency_class=self.name,
+                                               method=method)
+            LOG.debug("%(method)s waits for a %(name)s worker.",
+                      {'method': method, 'name': self.name})
+            self.waiting += 1
+            try:
+                self._workers.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            self._workers.acquire()
+        try:
+            yield
+        finally:
+            self._workers.release()
+
+
+def concurrency_classes():
+    return dict((name, ConcurrencyClass(
+        name, CONF.get('guest_rpc_%s_workers' % name),
+        CONF.get('guest_rpc_%s_queue' % name)))
+        for name in (LONG_IO, ADMIN, LIVENESS))
+
+
+def classify(method):
+    if method in CONF.guest_rpc_long_io_methods:
+        return LONG_IO
+    if method in CONF.guest_rpc_liveness_methods:
+        return LIVENESS
+    return ADMIN
+
+
+class LimitedEndpoint(object):
+    """An RPC endpoint running the methods of a manager in their pools."""
+
+    def __init__(self, manager, classes=None):
+        self._manager = manager
+        self._classes = classes or concurrency_classes()
+
+    def __getattr__(self, name):
+        attr = getattr(self._manager, name)
+        if name.startswith('_') or name == 'target' or not callable(attr):
+            return attr
+        concurrency_class = self._classes[classify(name)]
+        always_queue = name in CAST_METHODS
+
+        @functools.wraps(attr)
+        def limited(*args, **kwargs):
+            with concurrency_class.worker(name, always_queue=always_queue):
+                return attr(*args, **kwargs)
+        return limited
@@ -65,6 +65,10 @@ class Manager(manager.Manager):
     def configuration_manager(self):
         return self.app.configuration_manager
 
+    @property
+    def metrics_collector(self):
+        return service.CassandraMetricsCollector(self.app)
+
     @property
     def datastore_log_defs(self):
         system_log_file = self.validate_log_file(
@@ -154,7 +158,7 @@ class Manager(manager.Manager):
                 device = volume.VolumeDevice(device_path)
                 # unmount if device is already mounted
                 device.unmount_device(device_path)
-                device.format()
+                device.format(migration_source=mount_point)
                 if os.path.exists(mount_point):
                     # rsync exiting data
                     LOG.debug("Migrating existing data.")
@@ -217,6 +221,10 @@ class Manager(manager.Manager):
     def list_access(self, context, username, hostname):
         return self.admin.list_access(context, username, hostname)
 
+    def bulk_provision(self, context, databases=None, users=None,
+                       grants=None):
+        return self.admin.bulk_provision(context, databases, users, grants)
+
     def list_databases(self, context, limit=None, marker=None,
                        include_marker=False):
         return self.admin.list_databases(context, limit, marker,
@@ -261,7 +269,7 @@ class Manager(manager.Manager):
         """
 
         with EndNotification(context):
-            backup.backup(context, backup_info)
+            backup.backup(context, backup_info, sampler=self.metrics_sampler)
 
     def update_overrides(self, context, overrides, remove=False):
         LOG.debug("Updating overrides.")
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import math
 import os
 import re
 import stat
@@ -20,6 +21,7 @@ import stat
 from cassandra.auth import PlainTextAuthProvider
 from cassandra.cluster import Cluster
 from cassandra.cluster import NoHostAvailable
+from cassandra import DriverException
 from cassandra import OperationTimedOut
 from cassandra.policies import ConstantReconnectionPolicy
 from oslo_log import log as logging
@@ -41,6 +43,7 @@ from trove.guestagent.common import guestagent_utils
 from trove.guestagent.common import operating_system
 from trove.guestagent.common.operating_system import FileMode
 from trove.guestagent.datastore import service
+from trove.guestagent import metrics
 from trove.guestagent import pkg
 
 
@@ -746,6 +749,57 @@ class CassandraApp(object):
                     if user.name != self._ADMIN_USER]) > 0
 
 
+class CassandraMetricsCollector(metrics.MetricsCollector):
+    """Collects the statistics of the keyspaces and tables of the node
+    (nodetool cfstats).  The system keyspaces are left out and only a few
+    statistics are kept per table.
+    """
+
+    TABLE_STATS = ('sstable_count', 'space_used_live', 'local_read_count',
+                   'local_read_latency', 'local_write_count',
+                   'local_write_latency', 'pending_flushes')
+
+    def __init__(self, app):
+        self.app = app
+
+    def collect(self):
+        out, err = self.app._run_nodetool_command('cfstats')
+        return self.parse_cfstats(out, cfg.get_ignored_dbs())
+
+    @classmethod
+    def parse_cfstats(cls, out, ignore_keyspaces=()):
+        stats = {}
+        keyspace = table = None
+        for line in out.splitlines():
+            name, sep, value = line.partition(':')
+            name = re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+            value = value.strip()
+            if name == 'keyspace':
+                keyspace, table = value, None
+                continue
+            if name in ('table', 'column_family'):
+                table = value.split()[0]
+                continue
+            if not keyspace or keyspace in ignore_keyspaces or not value:
+                continue
+            if table:
+                if name not in cls.TABLE_STATS:
+                    continue
+                name = '%s.%s.%s' % (keyspace, table, name)
+            else:
+                name = '%s.%s' % (keyspace, name)
+            try:
+                number = float(value.split()[0])
+            except ValueError:
+                continue
+            if not math.isnan(number):
+                stats[name] = number
+        return stats
+
+    def is_counter(self, name):
+        return name.endswith(('read_count', 'write_count'))
+
+
 class CassandraAppStatus(service.BaseDbStatus):
 
     def __init__(self, superuser):
@@ -825,6 +879,51 @@ class CassandraAdmin(object):
             self._grant_full_access_on_keyspace(
                 client, self._deserialize_keyspace(db), user)
 
+    def bulk_provision(self, context, databases=None, users=None,
+                       grants=None):
+        """
+        Create keyspaces and users and grant users full access to keyspaces,
+        on a single session.
+        Cassandra runs each statement on its own: an item failing does not
+        undo the ones before it. Return the outcome of each item.
+        """
+        client = self.client
+        existing = {user.name for user in client.execute("LIST USERS;")}
+
+        def run(item, action):
+            try:
+                action(item)
+            except (ValueError, exception.TroveError, DriverException) as e:
+                return guestagent_utils.bulk_result(item, e)
+            return guestagent_utils.bulk_result(item)
+
+        def create_keyspace(item):
+            self._create_single_node_keyspace(
+                client, self._deserialize_keyspace(item))
+
+        def create_user(item):
+            user = self._deserialize_user(item)
+            if user.name in existing:
+                raise exception.UserAlreadyExists(name=user.name)
+            self._create_user(client, user)
+            existing.add(user.name)
+            grant(item)
+
+        def grant(item):
+            user = self._deserialize_user(item)
+            if user.name not in existing:
+                raise exception.UserNotFound(uuid=user.name)
+            for db in user.databases:
+                self._grant_full_access_on_keyspace(
+                    client, self._deserialize_keyspace(db), user)
+
+        return {
+            'databases': [run(item, create_keyspace)
+                          for item in databases or []],
+            'users': [run(item, create_user) for item in users or []],
+            'grants': [run(item, grant) for item in grants or []],
+        }
+
     def _create_user(self, client, user):
         # Create only NOSUPERUSER accounts here.
         LOG.debug("Creating a new user '%s'.", user.name)
@@ -53,7 +53,7 @@ class Manager(manager.Manager):
             device = volume.VolumeDevice(device_path)
             # unmount if device is already mounted
             device.unmount_device(device_path)
-            device.format()
+            device.format(migration_source=mount_point)
             if os.path.exists(mount_point):
                 device.migrate_data(mount_point)
             device.mount(mount_point)
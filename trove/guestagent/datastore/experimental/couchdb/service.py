@@ -13,10 +13,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import ast
+import base64
+from collections import OrderedDict
 import getpass
 import json
+import socket
+
 from oslo_log import log as logging
+from six.moves import http_client
+from six.moves.urllib import parse as urllib_parse
 
 from trove.common import cfg
 from trove.common.db.couchdb import models
@@ -189,11 +194,84 @@ class CouchDBAppStatus(service.BaseDbStatus):
             return rd_instance.ServiceStatuses.SHUTDOWN
 
 
+class CouchDBClient(object):
+    """Client of the HTTP API of the local CouchDB server.
+
+    The connections are kept alive and reused by the next requests, and
+    the responses are decoded from JSON.
+    """
+
+    def __init__(self, username, password, host='localhost',
+                 port=system.COUCHDB_HTTPD_PORT, timeout=system.HTTP_TIMEOUT):
+        credentials = '%s:%s' % (username, password)
+        self._authorization = 'Basic ' + base64.b64encode(
+            credentials.encode('utf-8')).decode('ascii')
+        self._host = host
+        self._port = int(port)
+        self._timeout = timeout
+        self._idle = []
+
+    @staticmethod
+    def path(*names):
+        return '/' + '/'.join(urllib_parse.quote(name, safe=':')
+                              for name in names)
+
+    def get(self, path, missing_ok=False):
+        return self.request('GET', path, missing_ok=missing_ok)
+
+    def put(self, path, body=None):
+        return self.request('PUT', path, body)
+
+    def delete(self, path):
+        return self.request('DELETE', path)
+
+    def request(self, method, path, body=None, missing_ok=False):
+        """Send a request and return its decoded response.
+
+        :param missing_ok: return None rather than fail when the resource
+                           does not exist.
+        """
+        headers = {'Accept': 'application/json',
+                   'Authorization': self._authorization}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        status, data = self._send(method, path, body, headers)
+        if status == 404 and missing_ok:
+            return None
+        if status >= 400:
+            raise exception.GuestError(original_message=_(
+                "CouchDB %(method)s %(path)s returned %(status)d: "
+                "%(data)s") % {'method': method, 'path': path,
+                               'status': status, 'data': data})
+        return json.loads(data) if data else None
+
+    def _send(self, method, path, body, headers):
+        reused = bool(self._idle)
+        connection = (self._idle.pop() if reused else
+                      http_client.HTTPConnection(self._host, self._port,
+                                                 timeout=self._timeout))
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (http_client.HTTPException, socket.error):
+            connection.close()
+            if not reused:
+                raise
+            # The server closed the idle connection, e.g. on a restart.
+            return self._send(method, path, body, headers)
+        self._idle.append(connection)
+        return response.status, data
+
+
 class CouchDBAdmin(object):
     '''Handles administrative functions on CouchDB.'''
 
     # user is cached by making it a class attribute
     admin_user = None
+    # and so is the client connected with it
+    _client = None
 
     def _admin_user(self):
         if not type(self).admin_user:
@@ -203,6 +281,13 @@ class CouchDBAdmin(object):
             type(self).admin_user = user
         return type(self).admin_user
 
+    @property
+    def client(self):
+        if not type(self)._client:
+            user = self._admin_user()
+            type(self)._client = CouchDBClient(user.name, user.password)
+        return type(self)._client
+
     def _is_modifiable_user(self, name):
         if name in cfg.get_ignored_users():
             return False
@@ -213,163 +298,108 @@ class CouchDBAdmin(object):
     def _is_modifiable_database(self, name):
         return name not in cfg.get_ignored_dbs()
 
+    def _user_path(self, username):
+        return self.client.path('_users', system.USER_DOC_PREFIX + username)
+
+    def _get_members(self, db_name):
+        """Return the security object of a database and its member names."""
+        security = self.client.get(self.client.path(db_name, '_security'))
+        security = security or {}
+        members = security.setdefault('members', {})
+        members.setdefault('roles', [])
+        return security, members.setdefault('names', [])
+
+    def _set_members(self, db_name, security):
+        security.setdefault('admins', {'names': [], 'roles': []})
+        self.client.put(self.client.path(db_name, '_security'), security)
+
+    def _database_members(self, db_names):
+        """Return the member names of every database, one request each."""
+        members = {}
+        for db in db_names:
+            try:
+                members[db] = self._get_members(db)[1]
+            except exception.GuestError:
+                LOG.debug(
+                    "Error while trying to get the users for database: %s.",
+                    db)
+        return members
+
     def create_user(self, users):
         LOG.debug("Creating user(s) for accessing CouchDB database(s).")
-        self._admin_user()
-        try:
-            for item in users:
-                user = models.CouchDBUser.deserialize(item)
+        for item in users:
+            user = models.CouchDBUser.deserialize(item)
+            try:
+                LOG.debug("Creating user: %s.", user.name)
+                self.client.put(self._user_path(user.name),
+                                {'name': user.name,
+                                 'password': user.password,
+                                 'roles': [],
+                                 'type': 'user'})
+            except exception.GuestError:
+                LOG.exception(_("Error creating user: %s."), user.name)
+
+            for database in user.databases:
+                mydb = models.CouchDBSchema.deserialize(database)
                 try:
-                    LOG.debug("Creating user: %s.", user.name)
-                    utils.execute_with_timeout(
-                        system.CREATE_USER_COMMAND %
-                        {'admin_name': self._admin_user().name,
-                         'admin_password': self._admin_user().password,
-                         'username': user.name,
-                         'username': user.name,
-                         'password': user.password},
-                        shell=True)
-                except exception.ProcessExecutionError as pe:
-                    LOG.exception(_("Error creating user: %s."), user.name)
-                    pass
-
-                for database in user.databases:
-                    mydb = models.CouchDBSchema.deserialize(database)
-                    try:
-                        LOG.debug("Granting user: %(user)s access to "
-                                  "database: %(db)s.",
-                                  {'user': user.name, 'db': mydb.name})
-                        out, err = utils.execute_with_timeout(
-                            system.GRANT_ACCESS_COMMAND %
-                            {'admin_name': self._admin_user().name,
-                             'admin_password': self._admin_user().password,
-                             'dbname': mydb.name,
-                             'username': user.name},
-                            shell=True)
-                    except exception.ProcessExecutionError as pe:
-                        LOG.debug("Error granting user: %(user)s access to"
-                                  "database: %(db)s.",
-                                  {'user': user.name, 'db': mydb.name})
-                        LOG.debug(pe)
-                        pass
-        except exception.ProcessExecutionError as pe:
-            LOG.exception(_("An error occurred creating users: %s."),
-                          pe.message)
-            pass
+                    LOG.debug("Granting user: %(user)s access to "
+                              "database: %(db)s.",
+                              {'user': user.name, 'db': mydb.name})
+                    self._grant(user.name, mydb.name)
+                except exception.GuestError as pe:
+                    LOG.debug("Error granting user: %(user)s access to"
+                              "database: %(db)s.",
+                              {'user': user.name, 'db': mydb.name})
+                    LOG.debug(pe)
 
     def delete_user(self, user):
         LOG.debug("Delete a given CouchDB user.")
         couchdb_user = models.CouchDBUser.deserialize(user)
-        db_names = self.list_database_names()
-
-        for db in db_names:
-            userlist = []
+        for db in self.list_database_names():
             try:
-                out, err = utils.execute_with_timeout(
-                    system.DB_ACCESS_COMMAND %
-                    {'admin_name': self._admin_user().name,
-                     'admin_password': self._admin_user().password,
-                     'dbname': db},
-                    shell=True)
-            except exception.ProcessExecutionError:
+                self._revoke(couchdb_user.name, db)
+            except exception.GuestError:
                 LOG.debug(
-                    "Error while trying to get the users for database: %s.",
-                    db)
-                continue
-
-            evalout = ast.literal_eval(out)
-            if evalout:
-                members = evalout['members']
-                names = members['names']
-                for i in range(0, len(names)):
-                    couchdb_user.databases = db
-                    userlist.append(names[i])
-                if couchdb_user.name in userlist:
-                    userlist.remove(couchdb_user.name)
-            out2, err2 = utils.execute_with_timeout(
-                system.REVOKE_ACCESS_COMMAND % {
-                    'admin_name': self._admin_user().name,
-                    'admin_password': self._admin_user().password,
-                    'dbname': db,
-                    'username': userlist},
-                shell=True)
+                    "Error while trying to revoke the access of user %(user)s "
+                    "to database: %(db)s.",
+                    {'user': couchdb_user.name, 'db': db})
 
         try:
-            out2, err = utils.execute_with_timeout(
-                system.DELETE_REV_ID %
-                {'admin_name': self._admin_user().name,
-                 'admin_password': self._admin_user().password},
-                shell=True)
-            evalout2 = ast.literal_eval(out2)
-            rows = evalout2['rows']
-            userlist = []
-
-            for i in range(0, len(rows)):
-                row = rows[i]
-                username = "org.couchdb.user:" + couchdb_user.name
-                if row['key'] == username:
-                    rev = row['value']
-                    revid = rev['rev']
-            utils.execute_with_timeout(
-                system.DELETE_USER_COMMAND % {
-                    'admin_name': self._admin_user().name,
-                    'admin_password': self._admin_user().password,
-                    'username': couchdb_user.name,
-                    'revid': revid},
-                shell=True)
-        except exception.ProcessExecutionError as pe:
+            path = self._user_path(couchdb_user.name)
+            doc = self.client.get(path)
+            self.client.delete(path + '?rev=' + urllib_parse.quote(
+                doc['_rev']))
+        except exception.GuestError as pe:
             LOG.exception(_(
                 "There was an error while deleting user: %s."), pe)
             raise exception.GuestError(original_message=_(
                 "Unable to delete user: %s.") % couchdb_user.name)
 
+    def _user_names(self):
+        rows = self.client.get(self.client.path('_users', '_all_docs'))
+        names = []
+        for row in rows['rows']:
+            key = row['key']
+            if key.startswith(system.USER_DOC_PREFIX):
+                name = key[len(system.USER_DOC_PREFIX):]
+                if name and self._is_modifiable_user(name):
+                    names.append(name)
+        return names
+
     def list_users(self, limit=None, marker=None, include_marker=False):
         '''List all users and the databases they have access to.'''
-        users = []
-        db_names = self.list_database_names()
-        try:
-            out, err = utils.execute_with_timeout(
-                system.ALL_USERS_COMMAND %
-                {'admin_name': self._admin_user().name,
-                 'admin_password': self._admin_user().password},
-                shell=True)
-        except exception.ProcessExecutionError:
-            LOG.debug("Error while trying to get list of all couchdb users")
-        evalout = ast.literal_eval(out)
-        rows = evalout['rows']
-        userlist = []
-        for i in range(0, len(rows)):
-            row = rows[i]
-            uname = row['key']
-            if not self._is_modifiable_user(uname):
-                break
-            elif uname[17:]:
-                userlist.append(uname[17:])
-        for i in range(len(userlist)):
-            user = models.CouchDBUser(userlist[i])
-            for db in db_names:
-                try:
-                    out2, err = utils.execute_with_timeout(
-                        system.DB_ACCESS_COMMAND %
-                        {'admin_name': self._admin_user().name,
-                         'admin_password': self._admin_user().password,
-                         'dbname': db},
-                        shell=True)
-                except exception.ProcessExecutionError:
-                    LOG.debug(
-                        "Error while trying to get users for database: %s.",
-                        db)
-                    continue
-                evalout2 = ast.literal_eval(out2)
-                if evalout2:
-                    members = evalout2['members']
-                    names = members['names']
-                    for i in range(0, len(names)):
-                        if user.name == names[i]:
-                            user.databases = db
-            users.append(user.serialize())
-        next_marker = None
-        return users, next_marker
+        names, next_marker = pagination.paginate_list(
+            self._user_names(), limit, marker, include_marker)
+        if not names:
+            return [], next_marker
+        users = OrderedDict((name, models.CouchDBUser(name))
+                            for name in names)
+        members = self._database_members(self.list_database_names())
+        for db, db_members in members.items():
+            for name in db_members:
+                if name in users:
+                    users[name].databases = db
+        return [user.serialize() for user in users.values()], next_marker
 
     def get_user(self, username, hostname):
         '''Get Information about the given user.'''
@@ -381,30 +411,24 @@ class CouchDBAdmin(object):
 
     def _get_user(self, username, hostname):
         user = models.CouchDBUser(username)
-        db_names = self.list_database_names()
-        for db in db_names:
-            try:
-                out, err = utils.execute_with_timeout(
-                    system.DB_ACCESS_COMMAND %
-                    {'admin_name': self._admin_user().name,
-                     'admin_password': self._admin_user().password,
-                     'dbname': db},
-                    shell=True)
-            except exception.ProcessExecutionError:
-                LOG.debug(
-                    "Error while trying to get the users for database: %s.",
-                    db)
-                continue
-
-            evalout = ast.literal_eval(out)
-            if evalout:
-                members = evalout['members']
-                names = members['names']
-                for i in range(0, len(names)):
-                    if user.name == names[i]:
-                        user.databases = db
+        members = self._database_members(self.list_database_names())
+        for db, db_members in members.items():
+            if username in db_members:
+                user.databases = db
         return user
 
+    def _grant(self, username, db_name):
+        security, names = self._get_members(db_name)
+        if username not in names:
+            names.append(username)
+            self._set_members(db_name, security)
+
+    def _revoke(self, username, db_name):
+        security, names = self._get_members(db_name)
+        if username in names:
+            names.remove(username)
+            self._set_members(db_name, security)
+
     def grant_access(self, username, databases):
         if self._get_user(username, None).name != username:
             raise exception.BadRequest(_(
@@ -420,37 +444,11 @@ class CouchDBAdmin(object):
                     'Cannot grant access for reserved or non-existant user '
                     '%(user)s') % {'user': username})
             for db_name in databases:
-                out, err = utils.execute_with_timeout(
-                    system.GRANT_ACCESS_COMMAND %
-                    {'admin_name': self._admin_user().name,
-                     'admin_password': self._admin_user().password,
-                     'dbname': db_name,
-                     'username': username},
-                    shell=True)
+                self._grant(username, db_name)
 
     def revoke_access(self, username, database):
-        userlist = []
         if self._is_modifiable_user(username):
-            out, err = utils.execute_with_timeout(
-                system.DB_ACCESS_COMMAND %
-                {'admin_name': self._admin_user().name,
-                 'admin_password': self._admin_user().password,
-                 'dbname': database},
-                shell=True)
-            evalout = ast.literal_eval(out)
-            members = evalout['members']
-            names = members['names']
-            for i in range(0, len(names)):
-                userlist.append(names[i])
-            if username in userlist:
-                userlist.remove(username)
-        out2, err2 = utils.execute_with_timeout(
-            system.REVOKE_ACCESS_COMMAND %
-            {'admin_name': self._admin_user().name,
-             'admin_password': self._admin_user().password,
-             'dbname': database,
-             'username': userlist},
-            shell=True)
+            self._revoke(username, database)
 
     def list_access(self, username, hostname):
         '''Returns a list of all databases which the user has access to'''
@@ -460,26 +458,14 @@ class CouchDBAdmin(object):
     def enable_root(self, root_pwd=None):
         '''Create admin user root'''
         root_user = models.CouchDBUser.root(password=root_pwd)
-        out, err = utils.execute_with_timeout(
-            system.ENABLE_ROOT %
-            {'admin_name': self._admin_user().name,
-             'admin_password': self._admin_user().password,
-             'password': root_pwd},
-            shell=True)
+        self.client.put(self.client.path('_config', 'admins', 'root'),
+                        root_pwd)
         return root_user.serialize()
 
     def is_root_enabled(self):
         '''Check if user root exists'''
-        out, err = utils.execute_with_timeout(
-            system.IS_ROOT_ENABLED %
-            {'admin_name': self._admin_user().name,
-             'admin_password': self._admin_user().password},
-            shell=True)
-        evalout = ast.literal_eval(out)
-        if evalout['root']:
-            return True
-        else:
-            return False
+        admins = self.client.get(self.client.path('_config', 'admins'))
+        return bool(admins and admins.get('root'))
 
     def create_database(self, databases):
         '''Create the given database(s).'''
@@ -492,17 +478,11 @@ class CouchDBAdmin(object):
             if self._is_modifiable_database(dbName):
                 LOG.debug('Creating CouchDB database %s', dbName)
                 try:
-                    utils.execute_with_timeout(
-                        system.CREATE_DB_COMMAND %
-                        {'admin_name': self._admin_user().name,
-                         'admin_password': self._admin_user().password,
-                         'dbname': dbName},
-                        shell=True)
-                except exception.ProcessExecutionError:
+                    self.client.put(self.client.path(dbName))
+                except exception.GuestError:
                     LOG.exception(_(
                         "There was an error creating database: %s."), dbName)
                     db_create_failed.append(dbName)
-                    pass
             else:
                 LOG.warning(_('Cannot create database with a reserved name '
                               '%(db)s'), {'db': dbName})
@@ -513,12 +493,7 @@ class CouchDBAdmin(object):
 
     def list_database_names(self):
         '''Get the list of database names.'''
-        out, err = utils.execute_with_timeout(
-            system.LIST_DB_COMMAND %
-            {'admin_name': self._admin_user().name,
-             'admin_password': self._admin_user().password},
-            shell=True)
-        dbnames_list = eval(out)
+        dbnames_list = self.client.get('/_all_dbs')
         for hidden in cfg.get_ignored_dbs():
             if hidden in dbnames_list:
                 dbnames_list.remove(hidden)
@@ -541,13 +516,8 @@ class CouchDBAdmin(object):
         if self._is_modifiable_database(dbName):
             try:
                 LOG.debug("Deleting CouchDB database: %s.", dbName)
-                utils.execute_with_timeout(
-                    system.DELETE_DB_COMMAND %
-                    {'admin_name': self._admin_user().name,
-                     'admin_password': self._admin_user().password,
-                     'dbname': dbName},
-                    shell=True)
-            except exception.ProcessExecutionError:
+                self.client.delete(self.client.path(dbName))
+            except exception.GuestError:
                 LOG.exception(_(
                     "There was an error while deleting database:%s."), dbName)
                 raise exception.GuestError(original_message=_(
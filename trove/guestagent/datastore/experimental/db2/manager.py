@@ -56,7 +56,7 @@ class Manager(manager.Manager):
         if device_path:
             device = volume.VolumeDevice(device_path)
             device.unmount_device(device_path)
-            device.format()
+            device.format(migration_source=mount_point)
             if os.path.exists(mount_point):
                 device.migrate_data(mount_point)
                 device.mount(mount_point)
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import os
 
 from oslo_log import log as logging
@@ -268,21 +269,27 @@ class DB2App(object):
         self._apply_config(overrides)
         self.configuration_manager.apply_user_override(overrides)
 
-    def _update_dbm_config(self, param, value):
-        try:
-            run_command(
-                system.UPDATE_DBM_CONFIGURATION % {
-                    "parameter": param,
-                    "value": value})
-        except exception.ProcessExecutionError:
-            LOG.exception(_("Failed to update config %s"), param)
-            raise
+    def _update_dbm_config(self, config):
+        """Update the given database manager configuration parameters in
+        a single CLP session.
+        """
+        params = list(config)
+        results = run_batch([system.UPDATE_DBM_CONFIGURATION % {
+            "parameter": param, "value": config[param]} for param in params])
+        failed = []
+        for param, result in zip(params, results):
+            if result.error:
+                LOG.error(_("Failed to update config %(param)s: %(error)s"),
+                          {'param': param, 'error': result.error})
+                failed.append(param)
+        if failed:
+            raise RuntimeError(_("Failed to update config %s")
+                               % ', '.join(failed))
 
     def _reset_config(self, config):
         try:
-            for k, v in config.iteritems():
-                default_cfg_value = self.dbm_default_config[k]
-                self._update_dbm_config(k, default_cfg_value)
+            self._update_dbm_config(dict(
+                (k, self.dbm_default_config[k]) for k in config))
         except Exception:
             LOG.exception(_("DB2 configuration reset failed."))
             raise RuntimeError(_("DB2 configuration reset failed."))
@@ -290,8 +297,7 @@ class DB2App(object):
 
     def _apply_config(self, config):
         try:
-            for k, v in config.items():
-                self._update_dbm_config(k, v)
+            self._update_dbm_config(config)
         except Exception:
             LOG.exception(_("DB2 configuration apply failed"))
             raise RuntimeError(_("DB2 configuration apply failed"))
@@ -322,6 +328,57 @@ def run_command(command, superuser=system.DB2_INSTANCE_OWNER,
                                       command, timeout=timeout)
 
 
+ClpResult = collections.namedtuple('ClpResult',
+                                   ['statement', 'output', 'error'])
+
+
+def run_batch(statements, superuser=system.DB2_INSTANCE_OWNER,
+              timeout=system.TIMEOUT):
+    """Run CLP statements in a single db2 session.
+
+    The statements run one after the other whether or not the previous
+    ones failed.  Return a ClpResult for each of them, with the lines it
+    output and the first error message the CLP reported for it, if any.
+    """
+    if not statements:
+        return []
+    out, err = utils.execute_with_timeout(
+        "sudo", "su", "-", superuser, "-c", system.CLP_BATCH,
+        process_input=''.join('%s;\n' % statement
+                              for statement in statements),
+        check_exit_code=system.CLP_BATCH_EXIT_CODES, timeout=timeout)
+    return parse_batch_output(statements, out)
+
+
+def parse_batch_output(statements, out):
+    """Split the output of a CLP session by the statements echoed in it."""
+    echoes = [' '.join(statement.split()) for statement in statements]
+    outputs = [[] for statement in statements]
+    errors = [None] * len(statements)
+    index = -1
+    in_message = False
+    for line in out.splitlines():
+        if (index + 1 < len(echoes) and
+                ' '.join(line.split()) == echoes[index + 1]):
+            index += 1
+            in_message = False
+            continue
+        if index < 0 or not line.strip():
+            in_message = False
+            continue
+        message = system.CLP_MESSAGE.match(line)
+        if message:
+            in_message = True
+            if (message.group(1) in system.CLP_ERROR_SEVERITIES and
+                    errors[index] is None):
+                errors[index] = line.strip()
+        elif not in_message:
+            # Messages may go on over the next lines, up to a blank one.
+            outputs[index].append(line)
+    return [ClpResult(*result)
+            for result in zip(statements, outputs, errors)]
+
+
 def create_db2_dir(dir_name):
     if not operating_system.exists(dir_name, True):
         operating_system.create_directory(dir_name,
@@ -342,44 +399,60 @@ class DB2Admin(object):
     """
     def create_database(self, databases):
         """Create the given database(s)."""
-        dbName = None
         db_create_failed = []
         LOG.debug("Creating DB2 databases.")
+        db_names = []
         for item in databases:
             mydb = models.DatastoreSchema.deserialize(item)
             mydb.check_create()
-            dbName = mydb.name
-            LOG.debug("Creating DB2 database: %s.", dbName)
-            try:
-                run_command(system.CREATE_DB_COMMAND % {'dbname': dbName})
-            except exception.ProcessExecutionError:
-                LOG.exception(_(
-                    "There was an error creating database: %s."), dbName)
-                db_create_failed.append(dbName)
-                pass
+            db_names.append(mydb.name)
+        LOG.debug("Creating DB2 databases: %s.", db_names)
+        created = []
+        try:
+            results = run_batch([system.CREATE_DB_COMMAND % {'dbname': name}
+                                 for name in db_names])
+            for name, result in zip(db_names, results):
+                if result.error:
+                    LOG.error(_("There was an error creating database "
+                                "%(db)s: %(error)s"),
+                              {'db': name, 'error': result.error})
+                    db_create_failed.append(name)
+                else:
+                    created.append(name)
+        except exception.ProcessExecutionError:
+            LOG.exception(_("There was an error creating databases: %s."),
+                          db_names)
+            db_create_failed = db_names
 
-            '''
-            Configure each database to do archive logging for online
-            backups. Once the database is configured, it will go in to a
-            BACKUP PENDING state. In this state, the database will not
-            be accessible for any operations. To get the database back to
-            normal mode, we have to do a full offline backup as soon as we
-            configure it for archive logging.
-            '''
+        '''
+        Configure each database to do archive logging for online
+        backups. Once the database is configured, it will go in to a
+        BACKUP PENDING state. In this state, the database will not
+        be accessible for any operations. To get the database back to
+        normal mode, we have to do a full offline backup as soon as we
+        configure it for archive logging.
+        '''
+        if created and CONF.db2.backup_strategy == 'DB2OnlineBackup':
+            statements = []
+            for name in created:
+                statements.extend([
+                    system.UPDATE_DB_LOG_CONFIGURATION % {'dbname': name},
+                    system.RECOVER_FROM_BACKUP_PENDING_MODE % {
+                        'dbname': name}])
             try:
-                if CONF.db2.backup_strategy == 'DB2OnlineBackup':
-                    run_command(system.UPDATE_DB_LOG_CONFIGURATION % {
-                        'dbname': dbName})
-                    run_command(system.RECOVER_FROM_BACKUP_PENDING_MODE % {
-                        'dbname': dbName})
+                for result in run_batch(statements):
+                    if result.error:
+                        LOG.error(_("There was an error while configuring "
+                                    "the database for online backup: "
+                                    "%s."), result.error)
             except exception.ProcessExecutionError:
                 LOG.exception(_(
-                    "There was an error while configuring the database for "
-                    "online backup: %s."), dbName)
+                    "There was an error while configuring the databases for "
+                    "online backup: %s."), created)
 
         if len(db_create_failed) > 0:
-            LOG.exception(_("Creating the following databases failed: %s."),
-                          db_create_failed)
+            LOG.error(_("Creating the following databases failed: %s."),
+                      db_create_failed)
 
     def delete_database(self, database):
         """Delete the specified database."""
@@ -443,6 +516,7 @@ class DB2Admin(object):
 
     def create_user(self, users):
         LOG.debug("Creating user(s) for accessing DB2 database(s).")
+        grants = collections.OrderedDict()
         try:
             for item in users:
                 user = models.DatastoreUser.deserialize(item)
@@ -459,18 +533,20 @@ class DB2Admin(object):
 
                 for database in user.databases:
                     mydb = models.DatastoreSchema.deserialize(database)
-                    try:
-                        LOG.debug("Granting user: %(user)s access to "
-                                  "database: %(db)s.",
-                                  {'user': user.name, 'db': mydb.name})
-                        run_command(system.GRANT_USER_ACCESS % {
-                            'dbname': mydb.name, 'login': user.name})
-                    except exception.ProcessExecutionError as pe:
-                        LOG.debug("Error granting user: %(user)s access to "
-                                  "database: %(db)s.",
-                                  {'user': user.name, 'db': mydb.name})
-                        LOG.debug(pe)
-                        pass
+                    grants.setdefault(mydb.name, []).append(user.name)
+
+            # All the grants of a database are made on one connection.
+            statements = []
+            for db_name, logins in grants.items():
+                statements.append(system.CONNECT_TO_DB % {'dbname': db_name})
+                statements.extend(system.GRANT_USER_ACCESS % {'login': login}
+                                  for login in logins)
+                statements.append(system.CONNECT_RESET)
+            for result in run_batch(statements):
+                if result.error:
+                    LOG.debug("Error running %(statement)s: %(error)s",
+                              {'statement': result.statement,
+                               'error': result.error})
         except exception.ProcessExecutionError as pe:
             LOG.exception(_("An error occurred creating users: %s."),
                           pe.message)
@@ -522,27 +598,14 @@ class DB2Admin(object):
         count = 0
 
         databases, marker = self.list_databases()
+        database_users = self._list_database_users(databases)
         for database in databases:
             db2_db = models.DatastoreSchema.deserialize(database)
-            out = None
-            try:
-                out, err = run_command(
-                    system.LIST_DB_USERS % {'dbname': db2_db.name})
-            except exception.ProcessExecutionError:
-                LOG.debug(
-                    "There was an error while listing users for database: %s.",
-                    db2_db.name)
+            if db2_db.name not in database_users:
                 continue
 
-            userlist = []
-            for item in out.split('\n'):
-                LOG.debug("item = %r", item)
-                user = item.split() if item != "" else None
-                LOG.debug("user = %r", user)
-                if (user is not None
-                    and (user[0] not in cfg.get_ignored_users()
-                         and user[1] == 'Y')):
-                    userlist.append(user[0])
+            userlist = [user for user in database_users[db2_db.name]
+                        if user not in cfg.get_ignored_users()]
             result = iter(userlist)
 
             if marker is not None:
@@ -601,27 +664,46 @@ class DB2Admin(object):
         LOG.debug("Get details of a given database user %s.", username)
         user = models.DatastoreUser(name=username)
         databases, marker = self.list_databases()
-        out = None
-        for database in databases:
-            db2_db = models.DatastoreSchema.deserialize(database)
-            try:
-                out, err = run_command(
-                    system.LIST_DB_USERS % {'dbname': db2_db.name})
-            except exception.ProcessExecutionError:
-                LOG.debug(
-                    "Error while trying to get the users for database: %s.",
-                    db2_db.name)
-                continue
-
-            for item in out.split('\n'):
-                user_access = item.split() if item != "" else None
-                if (user_access is not None and
-                        user_access[0].lower() == username.lower() and
-                        user_access[1] == 'Y'):
-                    user.databases = db2_db.name
-                    break
+        for db_name, logins in self._list_database_users(databases).items():
+            if username.lower() in [login.lower() for login in logins]:
+                user.databases = db_name
         return user
 
+    def _list_database_users(self, databases):
+        """Return the users with data access to each database, by name.
+
+        The users of all the databases are listed in a single CLP session;
+        the databases whose users could not be listed are left out.
+        """
+        db_names = [models.DatastoreSchema.deserialize(database).name
+                    for database in databases]
+        statements = []
+        for db_name in db_names:
+            statements.extend([system.CONNECT_TO_DB % {'dbname': db_name},
+                               system.LIST_DB_USERS,
+                               system.CONNECT_RESET])
+        database_users = collections.OrderedDict()
+        try:
+            results = run_batch(statements)
+        except exception.ProcessExecutionError:
+            LOG.debug("There was an error while listing users for "
+                      "databases: %s.", db_names)
+            return database_users
+
+        for index, db_name in enumerate(db_names):
+            connect, select = results[3 * index:3 * index + 2]
+            if connect.error or select.error:
+                LOG.debug("There was an error while listing users for "
+                          "database %(db)s: %(error)s",
+                          {'db': db_name,
+                           'error': connect.error or select.error})
+                continue
+            database_users[db_name] = [
+                fields[0] for fields in (line.split()
+                                         for line in select.output)
+                if len(fields) > 1 and fields[1] == 'Y']
+        return database_users
+
     def list_access(self, username, hostname):
         """
            Show all the databases to which the user has more than
@@ -13,6 +13,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import re
+
 from trove.common import cfg
 
 CONF = cfg.CONF
@@ -35,7 +37,20 @@ UNQUIESCE_DB2 = "db2 UNQUIESCE INSTANCE DB2INST1"
 STOP_DB2 = "db2 force application all; db2 terminate; db2stop"
 DB2_STATUS = ("ps -ef | grep " + DB2_INSTANCE_OWNER + " | grep db2sysc |"
               "grep -v grep | wc -l")
-CREATE_DB_COMMAND = "db2 create database %(dbname)s"
+# Runs the statements read from stdin, each terminated by ';', in a single
+# CLP session, echoing every statement before its output and leaving out
+# the column headers.
+CLP_BATCH = "db2 -tvxf /dev/stdin"
+# The CLP exits with 2 or 4 when statements returned warnings or errors,
+# those are reported for each statement.
+CLP_BATCH_EXIT_CODES = [0, 1, 2, 4]
+# CLP and SQL messages, e.g. "SQL0204N ..."; the C, E and N severities are
+# errors.
+CLP_MESSAGE = re.compile(r"^(?:SQL|DB2)\d{4,5}([A-Z])\s")
+CLP_ERROR_SEVERITIES = "CEN"
+CONNECT_TO_DB = "connect to %(dbname)s"
+CONNECT_RESET = "connect reset"
+CREATE_DB_COMMAND = "create database %(dbname)s"
 DELETE_DB_COMMAND = "db2 drop database %(dbname)s"
 LIST_DB_COMMAND = (
     "db2 list database directory | grep -B6 -i indirect | "
@@ -44,18 +59,14 @@ CREATE_USER_COMMAND = (
     'sudo useradd -m -d /home/%(login)s %(login)s;'
     'sudo echo %(login)s:%(passwd)s |sudo  chpasswd')
 GRANT_USER_ACCESS = (
-    "db2 connect to %(dbname)s; "
-    "db2 GRANT DBADM,CREATETAB,BINDADD,CONNECT,DATAACCESS "
-    "ON DATABASE TO USER %(login)s; db2 connect reset")
+    "GRANT DBADM,CREATETAB,BINDADD,CONNECT,DATAACCESS "
+    "ON DATABASE TO USER %(login)s")
 DELETE_USER_COMMAND = 'sudo userdel -r %(login)s'
 REVOKE_USER_ACCESS = (
     "db2 connect to %(dbname)s; "
     "db2 REVOKE DBADM,CREATETAB,BINDADD,CONNECT,DATAACCESS "
     "ON DATABASE FROM USER %(login)s; db2 connect reset")
-LIST_DB_USERS = (
-    "db2 +o  connect to %(dbname)s; "
-    "db2 -x  select grantee, dataaccessauth from sysibm.sysdbauth; "
-    "db2 connect reset")
+LIST_DB_USERS = "select grantee, dataaccessauth from sysibm.sysdbauth"
 OFFLINE_BACKUP_DB = "db2 backup database %(dbname)s to " + DB2_BACKUP_DIR
 RESTORE_OFFLINE_DB = (
     "db2 restore database %(dbname)s from " + DB2_BACKUP_DIR)
@@ -67,10 +78,10 @@ GET_DB_SIZE = (
 GET_DB_NAMES = ("find /home/db2inst1/db2inst1/backup/ -type f -name '*.001' |"
                 " grep -Po \"(?<=backup/)[^.']*(?=\.)\"")
 GET_DBM_CONFIGURATION = "db2 get dbm configuration > %(dbm_config)s"
-UPDATE_DBM_CONFIGURATION = ("db2 update database manager configuration using "
+UPDATE_DBM_CONFIGURATION = ("update database manager configuration using "
                             "%(parameter)s %(value)s")
 UPDATE_DB_LOG_CONFIGURATION = (
-    "db2 update database configuration for "
+    "update database configuration for "
     "%(dbname)s using LOGARCHMETH1 'DISK:" + DB2_ARCHIVE_LOGS_DIR + "'")
 LOG_UTILIZATION = (
     "db2 +o connect to %(dbname)s;"
@@ -86,4 +97,4 @@ ROLL_FORWARD_DB = (
     "db2 ROLLFORWARD DATABASE %(dbname)s TO END OF BACKUP "
     "AND COMPLETE OVERFLOW LOG PATH '(" + DB2_ARCHIVE_LOGS_DIR + ")'")
 RECOVER_FROM_BACKUP_PENDING_MODE = (
-    "db2 backup database %(dbname)s to /dev/null")
+    "backup database %(dbname)s to /dev/null")
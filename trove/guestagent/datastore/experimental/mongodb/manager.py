@@ -46,6 +46,10 @@ class Manager(manager.Manager):
     def configuration_manager(self):
         return self.app.configuration_manager
 
+    @property
+    def metrics_collector(self):
+        return service.MongoDBMetricsCollector(service.MongoDBAdmin())
+
     def do_prepare(self, context, packages, databases, memory_mb, users,
                    device_path, mount_point, backup_info,
                    config_contents, root_password, overrides,
@@ -61,7 +65,7 @@ class Manager(manager.Manager):
             device = volume.VolumeDevice(device_path)
             # unmount if device is already mounted
             device.unmount_device(device_path)
-            device.format()
+            device.format(migration_source=mount_point)
             if os.path.exists(system.MONGODB_MOUNT_POINT):
                 device.migrate_data(mount_point)
             device.mount(mount_point)
@@ -195,7 +199,7 @@ class Manager(manager.Manager):
     def create_backup(self, context, backup_info):
         LOG.debug("Creating backup.")
         with EndNotification(context):
-            backup.backup(context, backup_info)
+            backup.backup(context, backup_info, sampler=self.metrics_sampler)
 
     def update_overrides(self, context, overrides, remove=False):
         LOG.debug("Updating overrides.")
@@ -32,6 +32,7 @@ from trove.guestagent.common import guestagent_utils
 from trove.guestagent.common import operating_system
 from trove.guestagent.datastore.experimental.mongodb import system
 from trove.guestagent.datastore import service
+from trove.guestagent import metrics
 
 
 LOG = logging.getLogger(__name__)
@@ -731,6 +732,11 @@ class MongoDBAdmin(object):
         with MongoDBClient(self._admin_user()) as admin_client:
             admin_client.admin.command({'addShard': url})
 
+    def get_server_status(self):
+        """Runs the serverStatus command."""
+        with MongoDBClient(self._admin_user()) as admin_client:
+            return admin_client.admin.command('serverStatus')
+
     def get_repl_status(self):
         """Runs the replSetGetStatus command."""
         with MongoDBClient(self._admin_user()) as admin_client:
@@ -767,6 +773,26 @@ class MongoDBAdmin(object):
             return [shard for shard in admin_client.config.shards.find()]
 
 
+class MongoDBMetricsCollector(metrics.MetricsCollector):
+    """Collects a few sections of the MongoDB serverStatus."""
+
+    SECTIONS = ('asserts', 'connections', 'globalLock', 'mem', 'network',
+                'opcounters', 'opcountersRepl')
+
+    counter_prefixes = ('asserts.', 'connections.totalCreated',
+                        'globalLock.totalTime', 'network.', 'opcounters.',
+                        'opcountersRepl.')
+
+    def __init__(self, admin):
+        self.admin = admin
+
+    def collect(self):
+        status = self.admin.get_server_status()
+        return metrics.flatten(
+            dict((section, status[section]) for section in self.SECTIONS
+                 if section in status), parse_strings=False)
+
+
 class MongoDBClient(object):
     """A wrapper to manage a MongoDB connection."""
 
@@ -29,6 +29,8 @@ from trove.guestagent import backup
 from trove.guestagent.datastore.experimental.postgresql.service import (
     PgSqlAdmin)
 from trove.guestagent.datastore.experimental.postgresql.service import PgSqlApp
+from trove.guestagent.datastore.experimental.postgresql.service import (
+    PgSqlMetricsCollector)
 from trove.guestagent.datastore import manager
 from trove.guestagent import guest_log
 from trove.guestagent import volume
@@ -68,6 +70,10 @@ class Manager(manager.Manager):
     def configuration_manager(self):
         return self.app.configuration_manager
 
+    @property
+    def metrics_collector(self):
+        return PgSqlMetricsCollector(self.admin)
+
     @property
     def datastore_log_defs(self):
         owner = self.app.pgsql_owner
@@ -110,6 +116,10 @@ class Manager(manager.Manager):
     def list_access(self, context, username, hostname):
         return self.admin.list_access(context, username, hostname)
 
+    def bulk_provision(self, context, databases=None, users=None,
+                       grants=None):
+        return self.admin.bulk_provision(context, databases, users, grants)
+
     def update_overrides(self, context, overrides, remove=False):
         self.app.update_overrides(context, overrides, remove)
 
@@ -222,7 +232,7 @@ class Manager(manager.Manager):
 
         if device_path:
             device = volume.VolumeDevice(device_path)
-            device.format()
+            device.format(migration_source=mount_point)
             if os.path.exists(mount_point):
                 device.migrate_data(mount_point)
             device.mount(mount_point)
@@ -233,6 +243,8 @@ class Manager(manager.Manager):
 
         if backup_info:
             backup.restore(context, backup_info, '/tmp')
+            if backup_info.get('restore_point'):
+                backup.replay_logs(context, backup_info, '/tmp')
             self.app.set_current_admin_user(os_admin)
 
         if snapshot:
@@ -252,7 +264,10 @@ class Manager(manager.Manager):
     def create_backup(self, context, backup_info):
         with EndNotification(context):
             self.app.enable_backups()
-            backup.backup(context, backup_info)
+            backup.backup(context, backup_info, sampler=self.metrics_sampler)
+
+    def do_log_archive(self, context):
+        backup.archive_logs(context)
 
     def backup_required_for_replication(self, context):
         return self.replication.backup_required_for_replication()
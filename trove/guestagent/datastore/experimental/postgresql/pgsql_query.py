@@ -16,6 +16,22 @@
 #    under the License.
 
 
+def _page_clause(column, limit=None, marker=None, include_marker=False):
+    """Order by a column and keep the rows of a page.
+
+    The marker is bound as the 'marker' parameter. One more row than the
+    limit is returned, to tell whether there is a next page.
+    """
+    clause = ''
+    if marker is not None:
+        clause += " AND {column} {op} %(marker)s".format(
+            column=column, op='>=' if include_marker else '>')
+    clause += " ORDER BY {column}".format(column=column)
+    if limit:
+        clause += " LIMIT {limit}".format(limit=int(limit) + 1)
+    return clause
+
+
 class DatabaseQuery(object):
 
     @classmethod
@@ -33,6 +49,15 @@ class DatabaseQuery(object):
 
         return statement
 
+    @classmethod
+    def list_page(cls, ignore=(), limit=None, marker=None,
+                  include_marker=False):
+        """Query to list a page of databases, ordered by name."""
+
+        return cls.list(ignore=ignore) + _page_clause(
+            'datname', limit=limit, marker=marker,
+            include_marker=include_marker)
+
     @classmethod
     def create(cls, name, encoding=None, collation=None):
         """Query to create a database."""
@@ -74,6 +99,27 @@ class UserQuery(object):
 
         return statement
 
+    @classmethod
+    def list_page(cls, ignore=(), limit=None, marker=None,
+                  include_marker=False):
+        """Query to list a page of users, ordered by name, along with the
+        databases they have access to (one row per user and database).
+        """
+
+        users = "SELECT usename FROM pg_catalog.pg_user WHERE true"
+        for name in ignore:
+            users += " AND usename != '{name}'".format(name=name)
+        users += _page_clause('usename', limit=limit, marker=marker,
+                              include_marker=include_marker)
+
+        return (
+            "SELECT usename, datname, pg_encoding_to_char(encoding), "
+            "datcollate FROM (" + users + ") AS users "
+            "LEFT JOIN pg_catalog.pg_database "
+            "ON CONCAT(usename, '=CTc/os_admin') = ANY(datacl::text[]) "
+            "AND datistemplate = false "
+            "ORDER BY usename, datname")
+
     @classmethod
     def list_root(cls, ignore=()):
         """Query to list all superuser accounts."""
@@ -175,3 +221,36 @@ class AccessQuery(object):
             database=database,
             user=user,
         )
+
+
+class StatsQuery(object):
+
+    # Columns of pg_stat_database, summed over the databases.
+    DATABASE_COLUMNS = (
+        'numbackends', 'xact_commit', 'xact_rollback', 'blks_read',
+        'blks_hit', 'tup_returned', 'tup_fetched', 'tup_inserted',
+        'tup_updated', 'tup_deleted', 'conflicts', 'temp_files',
+        'temp_bytes', 'deadlocks')
+
+    BGWRITER_COLUMNS = (
+        'checkpoints_timed', 'checkpoints_req', 'buffers_checkpoint',
+        'buffers_clean', 'maxwritten_clean', 'buffers_backend',
+        'buffers_alloc')
+
+    @classmethod
+    def get(cls):
+        """Query to get the statistics of the server, in one row of the
+        DATABASE_COLUMNS then the BGWRITER_COLUMNS.
+        """
+
+        return (
+            "SELECT {database}, {bgwriter} FROM "
+            "(SELECT {sums} FROM pg_stat_database) AS d "
+            "CROSS JOIN pg_stat_bgwriter AS b".format(
+                database=', '.join('d.%s' % column
+                                   for column in cls.DATABASE_COLUMNS),
+                bgwriter=', '.join('b.%s' % column
+                                   for column in cls.BGWRITER_COLUMNS),
+                sums=', '.join('sum(%s) AS %s' % (column, column)
+                               for column in cls.DATABASE_COLUMNS))
+        )
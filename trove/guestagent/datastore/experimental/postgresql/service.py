@@ -21,6 +21,7 @@ import re
 
 from oslo_log import log as logging
 import psycopg2
+import psycopg2.extensions
 
 from trove.common import cfg
 from trove.common.db.postgresql import models
@@ -36,6 +37,7 @@ from trove.guestagent.common import operating_system
 from trove.guestagent.common.operating_system import FileMode
 from trove.guestagent.datastore.experimental.postgresql import pgsql_query
 from trove.guestagent.datastore import service
+from trove.guestagent import metrics
 from trove.guestagent import pkg
 
 LOG = logging.getLogger(__name__)
@@ -384,6 +386,7 @@ class PgSqlApp(object):
         return version_file, version.strip()
 
     def restart(self):
+        close_connections()
         self.status.restart_db_service(
             self.service_candidates, CONF.state_change_wait_time)
 
@@ -393,6 +396,7 @@ class PgSqlApp(object):
             enable_on_boot=enable_on_boot, update_db=update_db)
 
     def stop_db(self, do_not_start_on_reboot=False, update_db=False):
+        close_connections()
         self.status.stop_db_service(
             self.service_candidates, CONF.state_change_wait_time,
             disable_on_boot=do_not_start_on_reboot, update_db=update_db)
@@ -609,7 +613,12 @@ class PgSqlAdmin(object):
         The username and hostname parameters are strings.
         The databases parameter is a list of strings representing the names of
         the databases to grant permission on.
+        All the permissions are given in a single transaction.
         """
+        self.psql_transaction(self._grant_statements(username, databases))
+
+    def _grant_statements(self, username, databases):
+        statements = []
         for database in databases:
             LOG.info(
                 _("{guest_id}: Granting user ({user}) access to database "
@@ -618,13 +627,12 @@ class PgSqlAdmin(object):
                         user=username,
                         database=database,)
             )
-            self.psql(
+            statements.append(
                 pgsql_query.AccessQuery.grant(
                     user=username,
                     database=database,
-                ),
-                timeout=30,
-            )
+                ))
+        return statements
 
     def revoke_access(self, context, username, hostname, database):
         """Revoke a user's permission to use a given database.
@@ -717,30 +725,102 @@ class PgSqlAdmin(object):
         """List all databases on the instance.
         Return a paginated list of serialized Postgres databases.
         """
-
-        return guestagent_utils.serialize_list(
-            self._get_databases(),
-            limit=limit, marker=marker, include_marker=include_marker)
-
-    def _get_databases(self):
-        """Return all non-system Postgres databases on the instance."""
         results = self.query(
-            pgsql_query.DatabaseQuery.list(ignore=self.ignore_dbs),
+            pgsql_query.DatabaseQuery.list_page(
+                ignore=self.ignore_dbs, limit=limit, marker=marker,
+                include_marker=include_marker),
+            data_values=self._marker_values(marker),
             timeout=30,
         )
-        return [models.PostgreSQLSchema(
-            row[0].strip(), character_set=row[1], collate=row[2])
-            for row in results]
+        return self._serialize_page(
+            [models.PostgreSQLSchema(
+                row[0].strip(), character_set=row[1], collate=row[2])
+             for row in results], limit)
+
+    @staticmethod
+    def _marker_values(marker):
+        return {'marker': marker} if marker is not None else None
+
+    @staticmethod
+    def _serialize_page(items, limit):
+        """Serialize a page queried with one more item than the limit.
+        Return the page and the marker of the next one.
+        """
+        next_marker = None
+        if limit and len(items) > limit:
+            items = items[:limit]
+            next_marker = items[-1].name
+        return [item.serialize() for item in items], next_marker
 
     def create_user(self, context, users):
         """Create users and grant privileges for the specified databases.
 
         The users parameter is a list of serialized Postgres users.
+        All the users are created in a single transaction.
         """
+        statements = []
         for user in users:
-            self._create_user(
-                context,
-                models.PostgreSQLUser.deserialize(user), None)
+            statements.extend(self._create_user_statements(
+                models.PostgreSQLUser.deserialize(user), None))
+        self.psql_transaction(statements)
+
+    def bulk_provision(self, context, databases=None, users=None,
+                       grants=None):
+        """Create databases and users and grant users access to databases.
+
+        The databases are created on one connection in autocommit mode, as
+        CREATE DATABASE cannot run in a transaction. The users and grants
+        then all run in a single transaction, each item in its own
+        savepoint. Return the outcome of each item.
+        """
+        def database_statements(item):
+            database = models.PostgreSQLSchema.deserialize(item)
+            return [pgsql_query.DatabaseQuery.create(
+                name=database.name,
+                encoding=database.character_set,
+                collation=database.collate)]
+
+        def user_statements(item):
+            return self._create_user_statements(
+                models.PostgreSQLUser.deserialize(item), None)
+
+        def grant_statements(item):
+            user = models.PostgreSQLUser.deserialize(item)
+            return self._grant_statements(
+                user.name, [models.PostgreSQLSchema.deserialize(db).name
+                            for db in user.databases])
+
+        def build(items, statements):
+            # The items that cannot be turned into statements fail here.
+            groups, errors = [], []
+            for item in items or []:
+                try:
+                    groups.append(statements(item))
+                    errors.append(None)
+                except ValueError as e:
+                    errors.append(e)
+            return groups, errors
+
+        def results(items, errors, run_errors):
+            run_errors = iter(run_errors)
+            return [guestagent_utils.bulk_result(
+                item, error if error is not None else next(run_errors))
+                for item, error in zip(items or [], errors)]
+
+        db_groups, db_errors = build(databases, database_statements)
+        user_groups, user_errors = build(users, user_statements)
+        grant_groups, grant_errors = build(grants, grant_statements)
+        run_errors = (self.psql_each(db_groups, autocommit=True)
+                      if db_groups else [])
+        acl_errors = (self.psql_each(user_groups + grant_groups)
+                      if user_groups or grant_groups else [])
+        return {
+            'databases': results(databases, db_errors, run_errors),
+            'users': results(users, user_errors,
+                             acl_errors[:len(user_groups)]),
+            'grants': results(grants, grant_errors,
+                              acl_errors[len(user_groups):]),
+        }
 
     def _create_user(self, context, user, encrypt_password=None, *options):
         """Create a user and grant privileges for the specified databases.
@@ -756,6 +836,10 @@ class PgSqlAdmin(object):
         :param options:           Other user options.
         :type options:            list
         """
+        self.psql_transaction(
+            self._create_user_statements(user, encrypt_password, *options))
+
+    def _create_user_statements(self, user, encrypt_password=None, *options):
         LOG.info(
             _("{guest_id}: Creating user {user} {with_clause}.")
             .format(
@@ -768,18 +852,15 @@ class PgSqlAdmin(object):
                 ),
             )
         )
-        self.psql(
-            pgsql_query.UserQuery.create(
-                user.name,
-                user.password,
-                encrypt_password,
-                *options
-            ),
-            timeout=30,
+        create = pgsql_query.UserQuery.create(
+            user.name,
+            user.password,
+            encrypt_password,
+            *options
         )
-        self._grant_access(
-            context, user.name,
-            [models.PostgreSQLSchema.deserialize(db)
+        return [create] + self._grant_statements(
+            user.name,
+            [models.PostgreSQLSchema.deserialize(db).name
              for db in user.databases])
 
     def _create_admin_user(self, context, user, encrypt_password=None):
@@ -798,19 +879,29 @@ class PgSqlAdmin(object):
         """List all users on the instance along with their access permissions.
         Return a paginated list of serialized Postgres users.
         """
-        return guestagent_utils.serialize_list(
-            self._get_users(context),
-            limit=limit, marker=marker, include_marker=include_marker)
-
-    def _get_users(self, context):
-        """Return all non-system Postgres users on the instance."""
         results = self.query(
-            pgsql_query.UserQuery.list(ignore=self.ignore_users),
+            pgsql_query.UserQuery.list_page(
+                ignore=self.ignore_users, limit=limit, marker=marker,
+                include_marker=include_marker),
+            data_values=self._marker_values(marker),
             timeout=30,
         )
+        return self._serialize_page(self._build_users(results), limit)
 
-        names = set([row[0].strip() for row in results])
-        return [self._build_user(context, name, results) for name in names]
+    def _build_users(self, acl):
+        """Build the model representations of the users of an ACL result
+        ordered by user name, in a single pass.
+        """
+        users = OrderedDict()
+        for row in acl:
+            name = row[0].strip()
+            if name not in users:
+                users[name] = models.PostgreSQLUser(name)
+            if row[1] is not None:
+                users[name].databases.append(models.PostgreSQLSchema(
+                    row[1].strip(), character_set=row[2],
+                    collate=row[3]).serialize())
+        return list(users.values())
 
     def _build_user(self, context, username, acl=None):
         """Build a model representation of a Postgres user.
@@ -986,10 +1077,21 @@ class PgSqlAdmin(object):
         """
         return self.__connection.execute(statement)
 
-    def query(self, query, timeout=30):
+    def psql_transaction(self, statements, timeout=30):
+        """Execute non-returning statements in a single transaction.
+        """
+        return self.__connection.execute_in_transaction(statements)
+
+    def psql_each(self, groups, autocommit=False):
+        """Execute groups of non-returning statements, a failing group not
+        stopping the others. Return the error of each group.
+        """
+        return self.__connection.execute_each(groups, autocommit=autocommit)
+
+    def query(self, query, data_values=None, timeout=30):
         """Execute a query and return the result set.
         """
-        return self.__connection.query(query)
+        return self.__connection.query(query, data_values=data_values)
 
     @property
     def ignore_users(self):
@@ -1000,6 +1102,83 @@ class PgSqlAdmin(object):
         return cfg.get_ignored_dbs()
 
 
+# Idle connections to the local server, by connection arguments.
+_pools = {}
+
+
+def close_connections():
+    """Close the idle connections, e.g. before the server is stopped."""
+    for pool in _pools.values():
+        pool.clear()
+
+
+class PgSqlMetricsCollector(metrics.MetricsCollector):
+    """Collects the pg_stat_database (summed over the databases) and
+    pg_stat_bgwriter statistics.
+    """
+
+    counter_prefixes = ('database.', 'bgwriter.')
+
+    def __init__(self, admin):
+        self.admin = admin
+
+    def collect(self):
+        row = self.admin.query(pgsql_query.StatsQuery.get())[0]
+        names = (
+            ['database.%s' % column
+             for column in pgsql_query.StatsQuery.DATABASE_COLUMNS] +
+            ['bgwriter.%s' % column
+             for column in pgsql_query.StatsQuery.BGWRITER_COLUMNS])
+        return metrics.flatten(dict(
+            (name, value) for name, value in zip(names, row)
+            if value is not None))
+
+    def is_counter(self, name):
+        return name != 'database.numbackends' and (
+            super(PgSqlMetricsCollector, self).is_counter(name))
+
+
+class PostgresConnectionPool(object):
+    """Connections kept open between the statements of the guest."""
+
+    def __init__(self, connection_args, size):
+        self._connection_args = connection_args
+        self._size = size
+        self._idle = []
+
+    def get(self):
+        """Return a connection and whether it was used before."""
+        while self._idle:
+            connection = self._idle.pop()
+            if self._is_healthy(connection):
+                return connection, True
+            self._close(connection)
+        return psycopg2.connect(**self._connection_args), False
+
+    def put(self, connection):
+        if len(self._idle) < self._size and self._is_healthy(connection):
+            self._idle.append(connection)
+        else:
+            self._close(connection)
+
+    def clear(self):
+        while self._idle:
+            self._close(self._idle.pop())
+
+    @staticmethod
+    def _is_healthy(connection):
+        return (not connection.closed and
+                connection.get_transaction_status() ==
+                psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+
 class PostgresConnection(object):
 
     def __init__(self, **connection_args):
@@ -1011,6 +1190,50 @@ class PostgresConnection(object):
         self._execute_stmt(statement, identifiers, data_values, False,
                            autocommit=True)
 
+    def execute_in_transaction(self, statements):
+        """Execute non-returning statements in a single transaction.
+        """
+        for statement in statements:
+            self._check(statement)
+        if statements:
+            self._run([(statement, None) for statement in statements],
+                      False, autocommit=False)
+
+    def execute_each(self, groups, autocommit=False):
+        """Execute groups of non-returning statements on one connection.
+        Unless in autocommit mode, all the groups run in a single
+        transaction, each one in a savepoint so that a failing group is
+        rolled back alone.
+        Return the error each group failed with, None if it succeeded.
+        """
+        errors = []
+
+        def run(cursor):
+            # After reconnecting, the groups already committed in autocommit
+            # mode are not run again. A lost transaction is rolled back,
+            # all its groups are.
+            if not autocommit:
+                del errors[:]
+            for statements in groups[len(errors):]:
+                error = None
+                if not autocommit:
+                    cursor.execute('SAVEPOINT item;')
+                try:
+                    for statement in statements:
+                        self._check(statement)
+                        cursor.execute(statement)
+                except psycopg2.Error as e:
+                    if cursor.connection.closed:
+                        raise
+                    error = e
+                if not autocommit:
+                    cursor.execute('ROLLBACK TO SAVEPOINT item;' if error
+                                   else 'RELEASE SAVEPOINT item;')
+                errors.append(error)
+            return errors
+
+        return self._with_cursor(run, autocommit)
+
     def query(self, query, identifiers=None, data_values=None):
         """Execute a query and return the result set.
         """
@@ -1018,18 +1241,56 @@ class PostgresConnection(object):
 
     def _execute_stmt(self, statement, identifiers, data_values, fetch,
                       autocommit=False):
-        if statement:
-            with psycopg2.connect(**self._connection_args) as connection:
-                connection.autocommit = autocommit
-                with connection.cursor() as cursor:
-                    cursor.execute(
-                        self._bind(statement, identifiers), data_values)
-                    if fetch:
-                        return cursor.fetchall()
-        else:
+        self._check(statement)
+        return self._run([(self._bind(statement, identifiers), data_values)],
+                         fetch, autocommit=autocommit)
+
+    def _check(self, statement):
+        if not statement:
             raise exception.UnprocessableEntity(_("Invalid SQL statement: %s")
                                                 % statement)
 
+    @property
+    def _pool(self):
+        key = tuple(sorted(self._connection_args.items()))
+        if key not in _pools:
+            _pools[key] = PostgresConnectionPool(
+                self._connection_args,
+                cfg.get_configuration_property('connection_pool_size'))
+        return _pools[key]
+
+    def _run(self, statements, fetch, autocommit=False):
+        def run(cursor):
+            for statement, data_values in statements:
+                cursor.execute(statement, data_values)
+            return cursor.fetchall() if fetch else None
+
+        return self._with_cursor(run, autocommit)
+
+    def _with_cursor(self, run, autocommit):
+        pool = self._pool
+        while True:
+            connection, reused = pool.get()
+            try:
+                connection.autocommit = autocommit
+                with connection:
+                    with connection.cursor() as cursor:
+                        result = run(cursor)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                pool.clear()
+                PostgresConnectionPool._close(connection)
+                if not reused:
+                    raise
+                # The server has been restarted since the connection was
+                # opened, the other idle connections are gone as well.
+                LOG.debug("Reconnecting to the database server.")
+                continue
+            except Exception:
+                pool.put(connection)
+                raise
+            pool.put(connection)
+            return result
+
     def _bind(self, statement, identifiers):
         if identifiers:
             return statement.format(*identifiers)
@@ -48,6 +48,10 @@ class Manager(manager.Manager):
     def configuration_manager(self):
         return self._app.configuration_manager
 
+    @property
+    def metrics_collector(self):
+        return service.RedisMetricsCollector(self._app)
+
     def _perform_restore(self, backup_info, context, restore_location, app):
         """Perform a restore on this instance."""
         LOG.info(_("Restoring database from backup %s."), backup_info['id'])
@@ -122,7 +126,7 @@ class Manager(manager.Manager):
         """Create a backup of the database."""
         LOG.debug("Creating backup.")
         with EndNotification(context):
-            backup.backup(context, backup_info)
+            backup.backup(context, backup_info, sampler=self.metrics_sampler)
 
     def update_overrides(self, context, overrides, remove=False):
         LOG.debug("Updating overrides.")
@@ -255,6 +259,14 @@ class Manager(manager.Manager):
         LOG.debug("Retrieving cluster node ip address.")
         return self._app.get_node_ip()
 
+    def get_node_id(self, context):
+        LOG.debug("Retrieving cluster node id.")
+        return self._app.get_node_id()
+
+    def get_cluster_nodes(self, context):
+        LOG.debug("Retrieving the nodes of the cluster.")
+        return self._app.get_cluster_nodes()
+
     def get_node_id_for_removal(self, context):
         LOG.debug("Validating removal of node from cluster.")
         return self._app.get_node_id_for_removal()
@@ -267,3 +279,18 @@ class Manager(manager.Manager):
         LOG.debug("Executing cluster_addslots to assign hash slots %s-%s.",
                   first_slot, last_slot)
         self._app.cluster_addslots(first_slot, last_slot)
+
+    def cluster_import_slots(self, context, slots, source_id):
+        LOG.debug("Importing %(count)d hash slots from node %(node)s.",
+                  {'count': len(slots), 'node': source_id})
+        self._app.cluster_import_slots(slots, source_id)
+
+    def cluster_migrate_slots(self, context, slots, target_id, ip, port):
+        LOG.debug("Migrating %(count)d hash slots to node %(node)s.",
+                  {'count': len(slots), 'node': target_id})
+        return self._app.cluster_migrate_slots(slots, target_id, ip, port)
+
+    def cluster_set_slots_node(self, context, slots, node_id):
+        LOG.debug("Assigning %(count)d hash slots to node %(node)s.",
+                  {'count': len(slots), 'node': node_id})
+        self._app.cluster_set_slots_node(slots, node_id)
@@ -15,9 +15,11 @@
 
 import os
 import redis
+import time
 from redis.exceptions import BusyLoadingError, ConnectionError
 
 from oslo_log import log as logging
+import six
 
 from trove.common import cfg
 from trove.common import exception
@@ -31,11 +33,17 @@ from trove.guestagent.common import guestagent_utils
 from trove.guestagent.common import operating_system
 from trove.guestagent.datastore.experimental.redis import system
 from trove.guestagent.datastore import service
+from trove.guestagent import metrics
 from trove.guestagent import pkg
 
 LOG = logging.getLogger(__name__)
 TIME_OUT = 1200
 CONF = cfg.CONF
+# Bounds (in seconds) of the interval between background save checks.
+BGSAVE_POLL_MIN_INTERVAL = 0.05
+BGSAVE_POLL_MAX_INTERVAL = 2
+# Timeout (in milliseconds) of the MIGRATE of a batch of keys.
+MIGRATE_TIMEOUT = 5000
 CLUSTER_CFG = 'clustering'
 packager = pkg.Package()
 
@@ -331,26 +339,15 @@ class RedisApp(object):
 
     def cluster_meet(self, ip, port):
         try:
-            utils.execute_with_timeout('redis-cli', 'cluster', 'meet',
-                                       ip, port)
-        except exception.ProcessExecutionError:
+            self.admin.cluster('MEET', ip, port)
+        except exception.TroveError:
             LOG.exception(_('Error joining node to cluster at %s.'), ip)
             raise
 
     def cluster_addslots(self, first_slot, last_slot):
         try:
-            slots = map(str, range(first_slot, last_slot + 1))
-            group_size = 200
-            while slots:
-                cmd = (['redis-cli', 'cluster', 'addslots']
-                       + slots[0:group_size])
-                out, err = utils.execute_with_timeout(*cmd, run_as_root=True,
-                                                      root_helper='sudo')
-                if 'OK' not in out:
-                    raise RuntimeError(_('Error executing addslots: %s')
-                                       % out)
-                del slots[0:group_size]
-        except exception.ProcessExecutionError:
+            self.admin.cluster('ADDSLOTS', *range(first_slot, last_slot + 1))
+        except exception.TroveError:
             LOG.exception(_('Error adding slots %(first_slot)s-%(last_slot)s'
                             ' to cluster.'),
                           {'first_slot': first_slot, 'last_slot': last_slot})
@@ -358,10 +355,9 @@ class RedisApp(object):
 
     def _get_node_info(self):
         try:
-            out, _ = utils.execute_with_timeout('redis-cli', '--csv',
-                                                'cluster', 'nodes')
+            out = self.admin.cluster('NODES')
             return [line.split(' ') for line in out.splitlines()]
-        except exception.ProcessExecutionError:
+        except exception.TroveError:
             LOG.exception(_('Error getting node info.'))
             raise
 
@@ -373,29 +369,131 @@ class RedisApp(object):
 
     def get_node_ip(self):
         """Returns [ip, port] where both values are strings"""
-        return self._get_node_details()[1].split(':')
+        return self._get_node_details()[1].split('@')[0].split(':')
+
+    def get_node_id(self):
+        return self._get_node_details()[0]
 
     def get_node_id_for_removal(self):
+        """Return the id of this node if it owns no hash slots, so that it
+        can be removed from the cluster, or None otherwise.
+        """
         node_details = self._get_node_details()
-        node_id = node_details[0]
-        my_ip = node_details[1].split(':')[0]
-        try:
-            slots, _ = utils.execute_with_timeout('redis-cli', '--csv',
-                                                  'cluster', 'slots')
-            return node_id if my_ip not in slots else None
-        except exception.ProcessExecutionError:
-            LOG.exception(_('Error validating node to for removal.'))
-            raise
+        return node_details[0] if not node_details[8:] else None
+
+    def get_cluster_nodes(self):
+        """Return the nodes known to this node by id, with their
+        'address' (ip:port), 'flags' and the [first, last] ranges of
+        the hash slots they own.
+        """
+        nodes = {}
+        for node_details in self._get_node_info():
+            nodes[node_details[0]] = {
+                'address': node_details[1].split('@')[0],
+                'flags': node_details[2].split(','),
+                'slots': self._parse_slot_ranges(node_details[8:])}
+        return nodes
+
+    @staticmethod
+    def _parse_slot_ranges(fields):
+        ranges = []
+        for field in fields:
+            if field.startswith('['):
+                # A slot being imported or migrated, still owned by the
+                # node it is migrated from.
+                continue
+            first, _, last = field.partition('-')
+            ranges.append([int(first), int(last or first)])
+        return ranges
 
     def remove_nodes(self, node_ids):
         try:
             for node_id in node_ids:
-                utils.execute_with_timeout('redis-cli', 'cluster',
-                                           'forget', node_id)
-        except exception.ProcessExecutionError:
+                self.admin.cluster('FORGET', node_id)
+        except exception.TroveError:
             LOG.exception(_('Error removing node from cluster.'))
             raise
 
+    def cluster_import_slots(self, slots, source_id):
+        """Get ready to receive the keys of hash slots from another node."""
+        try:
+            self.admin.cluster_setslots(slots, 'IMPORTING', source_id)
+        except Exception:
+            LOG.exception(_('Error importing slots from node %s.'),
+                          source_id)
+            raise
+
+    def cluster_migrate_slots(self, slots, target_id, ip, port):
+        """Move the keys of hash slots to the node importing them and
+        return the number of keys moved.
+
+        The slots stay owned by this node until cluster_set_slots_node is
+        called; meanwhile the clients are redirected to the importing node
+        for the keys already moved.
+        """
+        bandwidth = cfg.get_configuration_property(
+            'slot_migration_max_bandwidth')
+        throttle = BandwidthThrottle(bandwidth * 1024) if bandwidth else None
+        try:
+            self.admin.cluster_setslots(slots, 'MIGRATING', target_id)
+            keys = self.admin.migrate_slot_keys(
+                slots, ip, port,
+                cfg.get_configuration_property('slot_migration_batch_size'),
+                throttle=throttle)
+        except Exception:
+            LOG.exception(_('Error migrating slots to node %s.'), target_id)
+            raise
+        LOG.debug("Moved %(keys)d keys of %(slots)d slots to %(ip)s:%(port)s.",
+                  {'keys': keys, 'slots': len(slots), 'ip': ip,
+                   'port': port})
+        return keys
+
+    def cluster_set_slots_node(self, slots, node_id):
+        """Assign hash slots to a node, ending their migration."""
+        try:
+            self.admin.cluster_setslots(slots, 'NODE', node_id)
+        except Exception:
+            LOG.exception(_('Error assigning slots to node %s.'), node_id)
+            raise
+
+
+class RedisMetricsCollector(metrics.MetricsCollector):
+    """Collects the default sections of the Redis INFO."""
+
+    counter_prefixes = ('total_', 'expired_keys', 'evicted_keys',
+                        'keyspace_hits', 'keyspace_misses',
+                        'rejected_connections', 'sync_full',
+                        'sync_partial_', 'used_cpu_')
+
+    def __init__(self, app):
+        self.app = app
+
+    def collect(self):
+        # The client already parses the numbers, the strings left (such as
+        # the version or the run id) are not metrics.
+        return metrics.flatten(self.app.admin.get_info(),
+                               parse_strings=False)
+
+
+class BandwidthThrottle(object):
+    """Keeps the average rate of the data sent under a number of bytes
+    per second.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._started = time.time()
+        self._sent = 0
+
+    def consume(self, size):
+        """Account for size bytes about to be sent, first waiting for as
+        long as sending them now would go over the rate.
+        """
+        self._sent += size
+        wait = self._sent / float(self.rate) - (time.time() - self._started)
+        if wait > 0:
+            time.sleep(wait)
+
 
 class RedisAdmin(object):
     """Handles administrative tasks on the Redis database.
@@ -456,6 +554,43 @@ class RedisAdmin(object):
                                                 "Redis data (%s)") % save_cmd)
         LOG.debug("Redis data persist (%s) completed", save_cmd)
 
+    def background_save(self, timeout=TIME_OUT):
+        """Run a BGSAVE and return as soon as 'INFO persistence' reports
+        that it is no longer in progress.
+
+        The save is in progress from the moment BGSAVE returns, so it is
+        over once Redis says no save is in progress; the time of the last
+        save is not updated by a failed save and only has a resolution of
+        a second. The status is polled with a growing interval, starting
+        short so that small datasets are not held back by a fixed sleep.
+        """
+        LOG.debug("Starting Redis background save.")
+        try:
+            self.__client.bgsave()
+        except redis.exceptions.ResponseError as re:
+            # An auto-save in progress is as recent as a new one.
+            if "Background save already in progress" in str(re):
+                LOG.info(_("Waiting for existing background save to finish"))
+            else:
+                raise
+
+        deadline = time.time() + timeout
+        interval = BGSAVE_POLL_MIN_INTERVAL
+        while True:
+            info = self.get_info('persistence')
+            if not info['rdb_bgsave_in_progress']:
+                break
+            if time.time() > deadline:
+                raise RuntimeError(_("Timeout occurred waiting for Redis "
+                                     "persist (BGSAVE) to complete."))
+            time.sleep(interval)
+            interval = min(interval * 2, BGSAVE_POLL_MAX_INTERVAL)
+
+        if info.get('rdb_last_bgsave_status', 'ok') != 'ok':
+            raise exception.BackupCreationError(
+                _("Could not persist Redis data (BGSAVE)"))
+        LOG.debug("Redis background save completed.")
+
     def set_master(self, host=None, port=None):
         self.__client.slaveof(host, port)
 
@@ -467,6 +602,72 @@ class RedisAdmin(object):
                 _("Could not set configuration property '%(name)s' to "
                   "'%(value)s'.") % {'name': name, 'value': value})
 
+    def cluster(self, subcommand, *args):
+        """Execute a CLUSTER subcommand and return its response as text.
+        """
+        response = self.execute('CLUSTER', subcommand, *args)
+        if isinstance(response, bytes):
+            return response.decode('utf-8')
+        return response
+
+    def cluster_setslots(self, slots, subcommand, node_id=None):
+        """Run 'CLUSTER SETSLOT' for a number of hash slots in one round
+        trip.
+        """
+        args = (subcommand, node_id) if node_id else (subcommand,)
+        pipe = self.__client.pipeline(transaction=False)
+        for slot in slots:
+            pipe.execute_command('CLUSTER', 'SETSLOT', slot, *args)
+        pipe.execute()
+
+    def migrate_slot_keys(self, slots, host, port, batch_size,
+                          throttle=None):
+        """Move the keys of hash slots to the node at host:port and return
+        the number of keys moved.
+
+        The keys of all the slots are listed in one round trip, then moved
+        batch_size keys per MIGRATE with all the MIGRATE commands sent in
+        one pipeline, until the slots are empty.
+        """
+        moved = 0
+        pending = list(slots)
+        while pending:
+            pipe = self.__client.pipeline(transaction=False)
+            for slot in pending:
+                pipe.execute_command('CLUSTER', 'GETKEYSINSLOT', slot,
+                                     batch_size)
+            key_lists = pipe.execute()
+            # New keys of a migrating slot are created on the importing
+            # node, so a slot listing fewer keys than asked for is empty
+            # once they are moved.
+            pending = [slot for slot, keys in zip(pending, key_lists)
+                       if len(keys) >= batch_size]
+            key_lists = [keys for keys in key_lists if keys]
+            if not key_lists:
+                continue
+            if throttle:
+                throttle.consume(self._memory_usage(
+                    [key for keys in key_lists for key in keys]))
+            pipe = self.__client.pipeline(transaction=False)
+            for keys in key_lists:
+                pipe.execute_command('MIGRATE', host, port, '', 0,
+                                     MIGRATE_TIMEOUT, 'KEYS', *keys)
+            pipe.execute()
+            moved += sum(len(keys) for keys in key_lists)
+        return moved
+
+    def _memory_usage(self, keys):
+        """Return the number of bytes used by keys.
+
+        'MEMORY USAGE' is not available before Redis 4.0, the keys are then
+        not counted and the rate is not limited.
+        """
+        pipe = self.__client.pipeline(transaction=False)
+        for key in keys:
+            pipe.execute_command('MEMORY', 'USAGE', key)
+        return sum(size for size in pipe.execute(raise_on_error=False)
+                   if isinstance(size, six.integer_types))
+
     def _is_ok_response(self, response):
         """Return True if a given Redis response is 'OK'.
         """
@@ -482,7 +683,8 @@ class RedisAdmin(object):
             LOG.exception(e)
             raise exception.TroveError(
                 _("Redis command '%(cmd_name)s %(cmd_args)s' failed.")
-                % {'cmd_name': cmd_name, 'cmd_args': ' '.join(cmd_args)})
+                % {'cmd_name': cmd_name,
+                   'cmd_args': ' '.join(map(str, cmd_args))})
 
     def wait_until(self, key, wait_value, section=None, timeout=None):
         """Polls redis until the specified 'key' changes to 'wait_value'."""
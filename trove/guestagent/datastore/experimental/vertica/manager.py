@@ -51,7 +51,7 @@ class Manager(manager.Manager):
             device = volume.VolumeDevice(device_path)
             # unmount if device is already mounted
             device.unmount_device(device_path)
-            device.format()
+            device.format(migration_source=mount_point)
             if os.path.exists(mount_point):
                 # rsync any existing data
                 device.migrate_data(mount_point)
@@ -105,19 +105,32 @@ class VerticaApp(object):
         self.configuration_manager.apply_user_override(overrides)
         self._apply_config(overrides)
 
+    def _alter_db_config(self, commands):
+        """Run ALTER DATABASE commands, by parameter name, in a single vsql
+        session and return the names of the parameters that failed.
+        """
+        params = list(commands)
+        errors = system.exec_vsql_batch(
+            self._get_database_password(),
+            [commands[param] for param in params])
+        failed = []
+        for param, err in zip(params, errors):
+            if err:
+                if err.is_warning():
+                    LOG.warning(err)
+                else:
+                    LOG.error(err)
+                    failed.append(param)
+        return failed
+
     def _reset_config(self, config):
         try:
-            db_password = self._get_database_password()
-            for k, v in config.iteritems():
-                alter_db_cmd = system.ALTER_DB_RESET_CFG % (DB_NAME, str(k))
-                out, err = system.exec_vsql_command(db_password, alter_db_cmd)
-                if err:
-                    if err.is_warning():
-                        LOG.warning(err)
-                    else:
-                        LOG.error(err)
-                        raise RuntimeError(_("Failed to remove config %s") % k)
-
+            failed = self._alter_db_config(dict(
+                (str(k), system.ALTER_DB_RESET_CFG % (DB_NAME, str(k)))
+                for k in config))
+            if failed:
+                raise RuntimeError(_("Failed to remove config %s")
+                                   % ', '.join(failed))
         except Exception:
             LOG.exception(_("Vertica configuration remove failed."))
             raise RuntimeError(_("Vertica configuration remove failed."))
@@ -125,17 +138,12 @@ class VerticaApp(object):
 
     def _apply_config(self, config):
         try:
-            db_password = self._get_database_password()
-            for k, v in config.iteritems():
-                alter_db_cmd = system.ALTER_DB_CFG % (DB_NAME, str(k), str(v))
-                out, err = system.exec_vsql_command(db_password, alter_db_cmd)
-                if err:
-                    if err.is_warning():
-                        LOG.warning(err)
-                    else:
-                        LOG.error(err)
-                        raise RuntimeError(_("Failed to apply config %s") % k)
-
+            failed = self._alter_db_config(dict(
+                (str(k), system.ALTER_DB_CFG % (DB_NAME, str(k), str(v)))
+                for k, v in config.items()))
+            if failed:
+                raise RuntimeError(_("Failed to apply config %s")
+                                   % ', '.join(failed))
         except Exception:
             LOG.exception(_("Vertica configuration apply failed"))
             raise RuntimeError(_("Vertica configuration apply failed"))
@@ -60,6 +60,9 @@ UPDATE_ADD = ("/opt/vertica/sbin/update_vertica --add-hosts %s "
 USER_EXISTS = ("/opt/vertica/bin/vsql -w '%s' -c "
                "\"select 1 from users where user_name = '%s'\" "
                "| grep row | awk '{print $1}' | cut -c2-")
+# The errors vsql reports when reading from a file, e.g.
+# "vsql:<stdin>:3: ERROR 2512: ..."
+VSQL_LINE_ERROR = re.compile(r"^vsql:[^:]*:(\d+): ((?:ERROR|WARNING) .+)$")
 VERTICA_ADMIN = "dbadmin"
 VERTICA_ADMIN_GRP = "verticadba"
 VERTICA_AGENT_SERVICE_COMMAND = "service vertica_agent %s"
@@ -78,7 +81,7 @@ UDL_LIBS = [
 ]
 
 
-def shell_execute(command, command_executor="root"):
+def shell_execute(command, command_executor="root", **kwargs):
     # This method encapsulates utils.execute for 2 purpose:
     # 1. Helps in safe testing.
     # 2. Helps in executing commands as other user, using their environment.
@@ -87,7 +90,7 @@ def shell_execute(command, command_executor="root"):
     # does not works with vertica installer
     # and it has problems while executing remote commands.
     return utils.execute("sudo", "su", "-", command_executor, "-c", "%s"
-                         % command)
+                         % command, **kwargs)
 
 
 class VSqlError(object):
@@ -119,3 +122,26 @@ def exec_vsql_command(dbadmin_password, command):
     if err:
         err = VSqlError(err)
     return out, err
+
+
+def exec_vsql_batch(dbadmin_password, commands):
+    """Executes VSQL commands in a single vsql session.
+
+    The commands are read from stdin, one per line, and run whether or not
+    the previous ones failed.  Returns the VSqlError of each command, or
+    None if it succeeded, matched by the line number vsql reports.
+    """
+    errors = [None] * len(commands)
+    if not commands:
+        return errors
+    out, err = shell_execute("/opt/vertica/bin/vsql -w \'%s\' -f -"
+                             % dbadmin_password, VERTICA_ADMIN,
+                             process_input=''.join(
+                                 '%s;\n' % command for command in commands))
+    for line in err.splitlines():
+        match = VSQL_LINE_ERROR.match(line)
+        if match:
+            index = int(match.group(1)) - 1
+            if errors[index] is None:
+                errors[index] = VSqlError(match.group(2))
+    return errors
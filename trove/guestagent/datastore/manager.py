@@ -15,27 +15,37 @@
 #
 
 import abc
+import functools
 import operator
+import time
 
+import eventlet
 from oslo_config import cfg as oslo_cfg
 from oslo_log import log as logging
 from oslo_service import periodic_task
 from oslo_utils import encodeutils
+from oslo_utils import timeutils
 
 from trove.common import cfg
+from trove.common import context as trove_context
 from trove.common import exception
 from trove.common.i18n import _
 from trove.common import instance
 from trove.common.notification import EndNotification
+from trove.common import remote
+from trove.common import stream_codecs
+from trove.conductor import api as conductor_api
 from trove.guestagent.common import guestagent_utils
 from trove.guestagent.common import operating_system
 from trove.guestagent.common.operating_system import FileMode
 from trove.guestagent import dbaas
 from trove.guestagent import guest_log
+from trove.guestagent import metrics
 from trove.guestagent.module import driver_manager
 from trove.guestagent.module import module_manager
 from trove.guestagent.strategies import replication as repl_strategy
 from trove.guestagent import volume
+from trove.module import blobs as module_blobs
 
 
 LOG = logging.getLogger(__name__)
@@ -82,6 +92,15 @@ class Manager(periodic_task.PeriodicTasks):
         # Module
         self.module_driver_manager = driver_manager.ModuleDriverManager()
 
+        # Log archive
+        self._log_archive_state = None
+        self._log_archive_thread = None
+
+        # Metrics
+        self._metrics_sampler = None
+        self._metrics_thread = None
+        self._metrics_pushed_at = 0
+
     @property
     def manager_name(self):
         """This returns the passed-in name of the manager."""
@@ -638,6 +657,154 @@ class Manager(periodic_task.PeriodicTasks):
         LOG.debug("Set log file '%s' as readable", log_file)
         return log_file
 
+    ###############
+    # Log archiving
+    ###############
+    @property
+    def log_archive_state_file(self):
+        return guestagent_utils.build_file_path(
+            '~', 'log_archive_state', 'json')
+
+    @property
+    def log_archive_state(self):
+        """The log archiving state, kept on the guest so that archiving
+        goes on after the guest agent is restarted.
+        """
+        if self._log_archive_state is None:
+            self._log_archive_state = {}
+            if operating_system.exists(self.log_archive_state_file):
+                self._log_archive_state = operating_system.read_file(
+                    self.log_archive_state_file,
+                    codec=stream_codecs.JsonCodec())
+        return self._log_archive_state
+
+    def _save_log_archive_state(self, state):
+        operating_system.write_file(self.log_archive_state_file, state,
+                                    codec=stream_codecs.JsonCodec())
+        self._log_archive_state = state
+
+    def log_archive_action(self, context, enable):
+        """Start or stop continuous archiving of the transaction logs.
+        The first pass runs right away so that configuration errors are
+        reported to the caller. The token of the caller expires, so the
+        later passes need a Swift client authenticating on its own.
+        """
+        if enable:
+            LOG.info(_("Enabling log archiving."))
+            if remote.create_swift_client is remote.swift_client:
+                raise exception.TroveError(
+                    _("Log archiving needs a Swift client authenticating "
+                      "with the credentials of the guest, such as "
+                      "remote_swift_client = trove.common."
+                      "single_tenant_remote.swift_client_trove_admin."))
+            self.do_log_archive(context)
+            self._save_log_archive_state({'enabled': True,
+                                          'tenant_id': context.tenant})
+        else:
+            LOG.info(_("Disabling log archiving."))
+            self._save_log_archive_state({'enabled': False})
+
+    @periodic_task.periodic_task(spacing=CONF.log_archive_interval)
+    def archive_logs(self, context):
+        """Ship newly closed log segments if log archiving is enabled.
+        A pass that is still uploading is not interrupted and other periodic
+        tasks (such as the heartbeat) are not held up by the upload.
+        """
+        if not self.log_archive_state.get('enabled'):
+            return
+        if self._log_archive_thread and not self._log_archive_thread.dead:
+            LOG.debug("Previous log archive pass still running.")
+            return
+        self._log_archive_thread = eventlet.spawn(self._run_log_archive)
+
+    def _run_log_archive(self):
+        """Run a periodic log archiving pass and report its failure, which
+        would otherwise be lost with the thread.
+        """
+        context = trove_context.TroveContext(
+            tenant=self.log_archive_state['tenant_id'])
+        try:
+            self.do_log_archive(context)
+        except Exception as e:
+            LOG.exception(_("Log archiving pass failed."))
+            conductor_api.API(trove_context.TroveContext()).report_log_archive(
+                CONF.guest_id, encodeutils.exception_to_unicode(e))
+
+    def do_log_archive(self, context):
+        """Run one log archiving pass. Datastores supporting
+        point-in-time recovery must implement this method.
+        """
+        raise exception.DatastoreOperationNotSupported(
+            operation='log_archive', datastore=self.manager)
+
+    #################
+    # Metrics related
+    #################
+    @property
+    def metrics_collector(self):
+        """Return the collector of the datastore performance metrics.
+        Datastores exposing their metrics must implement this property.
+        """
+        return None
+
+    @property
+    def metrics_sampler(self):
+        if self._metrics_sampler is None and CONF.guest_metrics_interval:
+            collector = self.metrics_collector
+            if collector is not None:
+                self._metrics_sampler = metrics.MetricsSampler(
+                    collector, CONF.guest_metrics_buffer_size,
+                    CONF.guest_metrics_interval,
+                    CONF.guest_metrics_max_overhead)
+        return self._metrics_sampler
+
+    @periodic_task.periodic_task(spacing=CONF.guest_metrics_interval)
+    def sample_metrics(self, context):
+        """Sample the datastore performance metrics. The collection runs
+        apart from the other periodic tasks (such as the heartbeat), a
+        sample is skipped if the previous one is still running.
+        """
+        if not self.status.is_running or self.metrics_sampler is None:
+            return
+        if self._metrics_thread and not self._metrics_thread.dead:
+            LOG.debug("Previous metrics sample still running.")
+            self.metrics_sampler.skipped += 1
+            return
+        self._metrics_thread = eventlet.spawn(self.metrics_sampler.sample)
+
+    @periodic_task.periodic_task(spacing=CONF.guest_metrics_push_interval)
+    def push_metrics(self, context):
+        """Send the metrics sampled since the previous push to the
+        conductor.
+        """
+        if not CONF.guest_metrics_push_interval or (
+                self.metrics_sampler is None):
+            return
+        # The last sample pushed is aggregated again, so that the counter
+        # deltas of two pushes follow each other.
+        aggregates = self.metrics_sampler.aggregate(
+            since=self._metrics_pushed_at)
+        if not aggregates['samples']:
+            return
+        LOG.debug("Pushing %d metrics samples.", aggregates['samples'])
+        conductor_api.API(trove_context.TroveContext()).report_metrics(
+            CONF.guest_id, aggregates,
+            sent=timeutils.utcnow_ts(microsecond=True))
+        self._metrics_pushed_at = aggregates['to']
+
+    def get_metrics(self, context, window=None, names=None):
+        """Return the aggregates of the metrics sampled over the last
+        window seconds (all the samples kept by default), optionally only
+        of the given metrics.
+        """
+        if self.metrics_sampler is None:
+            raise exception.DatastoreOperationNotSupported(
+                operation='get_metrics', datastore=self.manager)
+        since = time.time() - window if window else 0
+        LOG.debug("Getting the metrics of the last %s seconds.",
+                  window or 'all')
+        return self.metrics_sampler.aggregate(since=since, names=names)
+
     ################
     # Module related
     ################
@@ -672,6 +839,7 @@ class Manager(periodic_task.PeriodicTasks):
             ds_version = module.get('datastore_version',
                                     self.MODULE_APPLY_TO_ALL)
             contents = module.get('contents', None)
+            contents_ref = module.get('contents_ref', None)
             md5 = module.get('md5', None)
             auto_apply = module.get('auto_apply', True)
             visible = module.get('visible', True)
@@ -683,7 +851,7 @@ class Manager(periodic_task.PeriodicTasks):
                             auto_apply)
             if not name:
                 raise AttributeError(_("Module name not specified"))
-            if not contents:
+            if not contents and not contents_ref:
                 raise AttributeError(_("Module contents not specified"))
             driver = self.module_driver_manager.get_driver(module_type)
             if not driver:
@@ -695,9 +863,14 @@ class Manager(periodic_task.PeriodicTasks):
                 reason = (_("Module not valid for datastore %s") %
                           CONF.datastore_manager)
                 raise exception.ModuleInvalid(reason=reason)
+            fetch_contents = None
+            if contents_ref:
+                fetch_contents = functools.partial(
+                    module_blobs.fetch, context, contents_ref)
             result = module_manager.ModuleManager.apply_module(
                 driver, module_type, name, tenant, datastore, ds_version,
-                contents, id, md5, auto_apply, visible, is_admin)
+                contents, id, md5, auto_apply, visible, is_admin,
+                fetch_contents=fetch_contents)
             results.append(result)
         LOG.info(_("Returning list of modules: %s"), results)
         return results
@@ -822,6 +995,21 @@ class Manager(periodic_task.PeriodicTasks):
         raise exception.DatastoreOperationNotSupported(
             operation='list_access', datastore=self.manager)
 
+    def bulk_provision(self, context, databases=None, users=None,
+                       grants=None):
+        """Create databases and users and grant users access to databases,
+        in bulk.
+
+        The databases are serialized databases, the users and grants
+        serialized users (the latter without password).  Return the
+        outcome of each item of the three lists (see
+        guestagent_utils.bulk_result), an item failing does not stop the
+        others.
+        """
+        LOG.debug("Provisioning databases and users in bulk.")
+        raise exception.DatastoreOperationNotSupported(
+            operation='bulk_provision', datastore=self.manager)
+
     def get_config_changes(self, cluster_config, mount_point=None):
         LOG.debug("Get configuration changes.")
         raise exception.DatastoreOperationNotSupported(
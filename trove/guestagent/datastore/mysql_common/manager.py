@@ -27,6 +27,7 @@ from trove.common.i18n import _
 from trove.common import instance as rd_instance
 from trove.common.notification import EndNotification
 from trove.guestagent import backup
+from trove.guestagent.backup import seed
 from trove.guestagent.common import operating_system
 from trove.guestagent.datastore import manager
 from trove.guestagent.datastore.mysql_common import service
@@ -71,6 +72,11 @@ class MySqlManager(manager.Manager):
         return self.mysql_app(
             self.mysql_app_status.get()).configuration_manager
 
+    @property
+    def metrics_collector(self):
+        return service.MySqlMetricsCollector(
+            self.mysql_app(self.mysql_app_status.get()))
+
     @property
     def datastore_log_defs(self):
         owner = 'mysql'
@@ -162,6 +168,10 @@ class MySqlManager(manager.Manager):
     def list_access(self, context, username, hostname):
         return self.mysql_admin().list_access(username, hostname)
 
+    def bulk_provision(self, context, databases=None, users=None,
+                       grants=None):
+        return self.mysql_admin().bulk_provision(databases, users, grants)
+
     def list_databases(self, context, limit=None, marker=None,
                        include_marker=False):
         return self.mysql_admin().list_databases(limit, marker,
@@ -209,7 +219,7 @@ class MySqlManager(manager.Manager):
             device = volume.VolumeDevice(device_path)
             # unmount if device is already mounted
             device.unmount_device(device_path)
-            device.format()
+            device.format(migration_source=mount_point)
             if os.path.exists(mount_point):
                 # rsync existing data to a "data" sub-directory
                 # on the new volume
@@ -227,10 +237,14 @@ class MySqlManager(manager.Manager):
             # (see MySqlApp.secure()) and restart.
             app.set_data_dir(mount_point + '/data')
             app.start_mysql()
+        if not backup_info and snapshot and snapshot['dataset'].get('seed'):
+            backup_info = seed.backup_info(snapshot['dataset']['seed'])
         if backup_info:
             self._perform_restore(backup_info, context,
                                   mount_point + "/data", app)
         app.secure(config_contents)
+        if backup_info and backup_info.get('restore_point'):
+            backup.replay_logs(context, backup_info, mount_point + "/data")
         enable_root_on_restore = (backup_info and
                                   self.mysql_admin().is_root_enabled())
         if enable_root_on_restore:
@@ -316,7 +330,10 @@ class MySqlManager(manager.Manager):
                             backup task, location, type, and other data.
         """
         with EndNotification(context):
-            backup.backup(context, backup_info)
+            backup.backup(context, backup_info, sampler=self.metrics_sampler)
+
+    def do_log_archive(self, context):
+        backup.archive_logs(context)
 
     def update_overrides(self, context, overrides, remove=False):
         app = self.mysql_app(self.mysql_app_status.get())
@@ -339,8 +356,16 @@ class MySqlManager(manager.Manager):
 
         self.replication.enable_as_master(app, replica_source_config)
 
-        snapshot_id, log_position = self.replication.snapshot_for_replication(
-            context, app, None, snapshot_info)
+        seed_ref = None
+        if snapshot_info and snapshot_info.get('seed'):
+            # The replica gets the backup from this instance directly.
+            snapshot_id = None
+            seed_ref, log_position = self.replication.seed_for_replication(
+                context, app, snapshot_info)
+        else:
+            snapshot_id, log_position = (
+                self.replication.snapshot_for_replication(
+                    context, app, None, snapshot_info))
 
         volume_stats = self.get_filesystem_stats(context, None)
 
@@ -355,6 +380,8 @@ class MySqlManager(manager.Manager):
             'master': self.replication.get_master_ref(app, snapshot_info),
             'log_position': log_position
         }
+        if seed_ref:
+            replication_snapshot['dataset']['seed'] = seed_ref
 
         return replication_snapshot
 
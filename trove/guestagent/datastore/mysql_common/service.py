@@ -47,6 +47,7 @@ from trove.guestagent.common import guestagent_utils
 from trove.guestagent.common import operating_system
 from trove.guestagent.common import sql_query
 from trove.guestagent.datastore import service
+from trove.guestagent import metrics
 from trove.guestagent import pkg
 
 ADMIN_USER_NAME = "os_admin"
@@ -292,13 +293,15 @@ class BaseMySqlAdmin(object):
         """Create the list of specified databases."""
         with self.local_sql_client(self.mysql_app.get_engine()) as client:
             for item in databases:
-                mydb = models.MySQLSchema.deserialize(item)
-                mydb.check_create()
-                cd = sql_query.CreateDatabase(mydb.name,
-                                              mydb.character_set,
-                                              mydb.collate)
-                t = text(str(cd))
-                client.execute(t)
+                client.execute(self._create_database_statement(item))
+
+    def _create_database_statement(self, item):
+        mydb = models.MySQLSchema.deserialize(item)
+        mydb.check_create()
+        cd = sql_query.CreateDatabase(mydb.name,
+                                      mydb.character_set,
+                                      mydb.collate)
+        return text(str(cd))
 
     def create_user(self, users):
         """Create users and grant them privileges for the
@@ -307,21 +310,93 @@ class BaseMySqlAdmin(object):
         with self.local_sql_client(self.mysql_app.get_engine()) as client:
             for item in users:
                 user = models.MySQLUser.deserialize(item)
-                user.check_create()
-                # TODO(cp16net):Should users be allowed to create users
-                # 'os_admin' or 'debian-sys-maint'
-                g = sql_query.Grant(user=user.name, host=user.host,
-                                    clear=user.password)
-                t = text(str(g))
-                client.execute(t)
-                for database in user.databases:
-                    mydb = models.MySQLSchema.deserialize(database)
-                    g = sql_query.Grant(permissions='ALL', database=mydb.name,
-                                        user=user.name, host=user.host,
-                                        clear=user.password)
-                    t = text(str(g))
+                for t in self._create_user_statements(user):
                     client.execute(t)
 
+    def _create_user_statements(self, user):
+        user.check_create()
+        # TODO(cp16net):Should users be allowed to create users
+        # 'os_admin' or 'debian-sys-maint'
+        g = sql_query.Grant(user=user.name, host=user.host,
+                            clear=user.password)
+        statements = [text(str(g))]
+        for database in user.databases:
+            mydb = models.MySQLSchema.deserialize(database)
+            g = sql_query.Grant(permissions='ALL', database=mydb.name,
+                                user=user.name, host=user.host,
+                                clear=user.password)
+            statements.append(text(str(g)))
+        return statements
+
+    def _grant_statements(self, user):
+        user.check_reserved()
+        statements = []
+        for database in user.databases:
+            mydb = models.MySQLSchema.deserialize(database)
+            mydb.check_reserved()
+            g = sql_query.Grant(permissions='ALL', database=mydb.name,
+                                user=user.name, host=user.host)
+            statements.append(text(str(g)))
+        return statements
+
+    def bulk_provision(self, databases=None, users=None, grants=None):
+        """Create databases and users and grant users access to databases
+        on a single connection, flushing the privileges once at the end.
+
+        MySQL commits each of these statements on its own: an item failing
+        does not undo the ones before it.  Return the outcome of each item.
+        """
+        results = {'databases': [], 'users': [], 'grants': []}
+        with self.local_sql_client(self.mysql_app.get_engine()) as client:
+            q = sql_query.Query()
+            q.columns = ['User', 'Host']
+            q.tables = ['mysql.user']
+            existing = set((row['User'], row['Host'])
+                           for row in client.execute(text(str(q))))
+
+            def run(item, statements):
+                try:
+                    for t in statements:
+                        client.execute(t)
+                except exc.DBAPIError as e:
+                    # Not the exception itself, its message would include
+                    # the statement and so the password.
+                    return guestagent_utils.bulk_result(item, e.orig)
+                except (ValueError, exception.TroveError) as e:
+                    return guestagent_utils.bulk_result(item, e)
+                return guestagent_utils.bulk_result(item)
+
+            def create_database(item):
+                yield self._create_database_statement(item)
+
+            def create_user(item):
+                user = models.MySQLUser.deserialize(item)
+                if (user.name, user.host) in existing:
+                    raise exception.UserAlreadyExists(name=user.name,
+                                                      host=user.host)
+                for t in self._create_user_statements(user):
+                    yield t
+                existing.add((user.name, user.host))
+
+            def grant(item):
+                user = models.MySQLUser.deserialize(item)
+                if (user.name, user.host) not in existing:
+                    raise exception.UserNotFound(
+                        uuid='%s@%s' % (user.name, user.host))
+                for t in self._grant_statements(user):
+                    yield t
+
+            for item in databases or []:
+                results['databases'].append(run(item, create_database(item)))
+            for item in users or []:
+                results['users'].append(run(item, create_user(item)))
+            for item in grants or []:
+                results['grants'].append(run(item, grant(item)))
+        LOG.debug("Provisioned %(databases)d databases, %(users)d users and "
+                  "%(grants)d grants.",
+                  dict((key, len(value)) for key, value in results.items()))
+        return results
+
     def delete_database(self, database):
         """Delete the specified database."""
         with self.local_sql_client(self.mysql_app.get_engine()) as client:
@@ -1088,3 +1163,29 @@ class BaseMySqlRootAccess(object):
         """Reset the root password to an unknown value.
         """
         self.enable_root(root_password=None)
+
+
+class MySqlMetricsCollector(metrics.MetricsCollector):
+    """Collects the global status variables of MySQL."""
+
+    # Status variables giving a current level, the others are counts.
+    gauge_prefixes = (
+        'Innodb_buffer_pool_bytes_', 'Innodb_buffer_pool_pages_',
+        'Innodb_num_open_files', 'Innodb_page_size',
+        'Innodb_row_lock_current_waits', 'Key_blocks_',
+        'Max_used_connections', 'Open_', 'Qcache_free_',
+        'Qcache_queries_in_cache', 'Qcache_total_blocks',
+        'Slave_open_temp_tables', 'Threads_cached', 'Threads_connected',
+        'Threads_running', 'Uptime')
+
+    def __init__(self, app):
+        self.app = app
+
+    def collect(self):
+        with self.app.local_sql_client(self.app.get_engine(),
+                                       use_flush=False) as client:
+            rows = client.execute('SHOW GLOBAL STATUS').fetchall()
+        return metrics.flatten(dict((row[0], row[1]) for row in rows))
+
+    def is_counter(self, name):
+        return not name.startswith(self.gauge_prefixes)
@@ -0,0 +1,133 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Call the guest agents of many instances at the same time."""
+
+import functools
+import time
+
+import eventlet
+from eventlet import Timeout
+from oslo_log import log as logging
+
+from trove.common import cfg
+from trove.common import exception
+from trove.common.i18n import _
+from trove.common.remote import create_guest_client
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+
+class GuestCallResult(object):
+    """The outcome of one call, either a result or an error."""
+
+    def __init__(self, instance_id, method, result=None, error=None):
+        self.instance_id = instance_id
+        self.method = method
+        self.result = result
+        self.error = error
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+
+class FanoutResults(list):
+    """The results of a fan-out, in the order of the calls."""
+
+    @property
+    def errors(self):
+        return dict((result.instance_id, result.error)
+                    for result in self if result.failed)
+
+    def raise_on_error(self):
+        """Raise the error of the first call that failed, if any."""
+        for result in self:
+            if result.failed:
+                raise result.error
+
+
+class GuestFanout(object):
+    """Send the same kind of call to many guests concurrently.
+
+    Each call runs in its own greenthread, at most 'concurrency' at a time,
+    and is bounded by 'call_timeout'.  With a 'deadline' (in seconds) the
+    calls that did not start before it passes fail with GuestTimeout, and
+    the running ones are cut short when it passes.  Errors never stop the
+    other calls, they are returned with the results.
+
+        results = GuestFanout(context).run(
+            (instance_id, 'restart', {}) for instance_id in instance_ids)
+        results.raise_on_error()
+    """
+
+    def __init__(self, context, concurrency=None, call_timeout=None,
+                 deadline=None, client_factory=None):
+        """
+        :param client_factory: returns the guest client of an instance id,
+                               by default the client for the datastore of
+                               the instance.
+        """
+        self.concurrency = concurrency or CONF.guest_fanout_concurrency
+        self.call_timeout = call_timeout or CONF.agent_call_high_timeout
+        self.deadline = deadline
+        self.client_factory = client_factory or functools.partial(
+            create_guest_client, context)
+
+    def run(self, calls):
+        """Make the calls and wait for all of them.
+
+        :param calls: (instance_id, method, kwargs) tuples, the method is a
+                      method of the guest client.
+        :returns: a FanoutResults list.
+        """
+        end = time.time() + self.deadline if self.deadline else None
+
+        def _call(call):
+            instance_id, method, kwargs = call
+            timeout = self.call_timeout
+            if end is not None:
+                timeout = min(timeout, end - time.time())
+                if timeout <= 0:
+                    return self._failed(instance_id, method,
+                                        exception.GuestTimeout())
+            timer = Timeout(timeout)
+            try:
+                client = self.client_factory(instance_id)
+                return GuestCallResult(
+                    instance_id, method,
+                    result=getattr(client, method)(**(kwargs or {})))
+            except Timeout as t:
+                if t is not timer:
+                    raise
+                return self._failed(instance_id, method,
+                                    exception.GuestTimeout())
+            except Exception as e:
+                return self._failed(instance_id, method, e)
+            finally:
+                timer.cancel()
+
+        pool = eventlet.GreenPool(self.concurrency)
+        return FanoutResults(pool.imap(_call, calls))
+
+    @staticmethod
+    def _failed(instance_id, method, error):
+        LOG.warning(_("Guest call %(method)s to instance %(instance)s "
+                      "failed: %(error)s"),
+                    {'method': method, 'instance': instance_id,
+                     'error': error})
+        return GuestCallResult(instance_id, method, error=error)
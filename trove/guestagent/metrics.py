@@ -0,0 +1,227 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Performance metrics of the datastore, sampled by the Guest Agent.
+
+Each datastore manager provides a collector reading the counters of its
+datastore (SHOW GLOBAL STATUS, pg_stat_*, INFO, serverStatus, nodetool
+cfstats).  The samples are kept in a ring buffer holding one array of
+doubles per metric, and aggregated over a window when they are asked for
+or pushed to the conductor.
+
+The time spent collecting is measured.  When a collection takes longer
+than guest_metrics_max_overhead of the sampling interval, the following
+samples are skipped until the time spent is paid back, so sampling never
+takes more than that share of the time.
+"""
+
+import array
+import math
+import time
+
+from oslo_log import log as logging
+import six
+
+LOG = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+
+def flatten(values, prefix='', parse_strings=True):
+    """Return the numeric values of a nested dict, by dotted name.
+
+    Numbers sent as strings are converted if parse_strings is set, other
+    values are dropped.
+    """
+    flat = {}
+    for name, value in values.items():
+        name = '%s%s' % (prefix, name)
+        if isinstance(value, dict):
+            flat.update(flatten(value, prefix=name + '.',
+                                parse_strings=parse_strings))
+            continue
+        if parse_strings and isinstance(value, six.string_types):
+            try:
+                value = float(value)
+            except ValueError:
+                continue
+        if isinstance(value, six.integer_types + (float,)):
+            flat[name] = float(value)
+    return flat
+
+
+class MetricsCollector(object):
+    """Reads the metrics of a datastore."""
+
+    # Prefixes of the metrics that only ever increase.  Their delta and
+    # rate are aggregated, rather than their minimum and maximum.
+    counter_prefixes = ()
+
+    def collect(self):
+        """Return the current value of each metric, by name."""
+        raise NotImplementedError()
+
+    def is_counter(self, name):
+        return name.startswith(self.counter_prefixes)
+
+
+class RingBuffer(object):
+    """The last samples of each metric, in fixed size arrays of doubles.
+
+    A metric missing from a sample is NaN there.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.count = 0
+        self.timestamps = array.array('d', [NAN] * size)
+        self.series = {}
+
+    def append(self, timestamp, values):
+        index = self.count % self.size
+        for name in values:
+            if name not in self.series:
+                self.series[name] = array.array('d', [NAN] * self.size)
+        self.timestamps[index] = timestamp
+        for name, series in self.series.items():
+            series[index] = values.get(name, NAN)
+        self.count += 1
+
+    def window(self, since):
+        """Return the indexes of the samples taken since a time, oldest
+        first.
+        """
+        indexes = []
+        for age in range(min(self.count, self.size)):
+            index = (self.count - 1 - age) % self.size
+            if self.timestamps[index] < since:
+                break
+            indexes.append(index)
+        indexes.reverse()
+        return indexes
+
+    def values(self, name, indexes):
+        """Return the (timestamp, value) samples of a metric."""
+        series = self.series[name]
+        return [(self.timestamps[index], series[index]) for index in indexes
+                if not math.isnan(series[index])]
+
+
+def aggregate_counter(samples):
+    """Return the increase of a counter and its rate per second.
+
+    The counter starting again from zero (the datastore was restarted)
+    counts as an increase of its new value.
+    """
+    delta = 0.0
+    for (_, previous), (_, value) in zip(samples, samples[1:]):
+        delta += value - previous if value >= previous else value
+    elapsed = samples[-1][0] - samples[0][0]
+    return {'delta': delta,
+            'rate': delta / elapsed if elapsed > 0 else 0.0,
+            'last': samples[-1][1]}
+
+
+def aggregate_gauge(samples):
+    values = [value for _, value in samples]
+    return {'min': min(values),
+            'max': max(values),
+            'avg': sum(values) / len(values),
+            'last': values[-1]}
+
+
+class MetricsSampler(object):
+    """Samples a collector into a ring buffer, within an overhead budget.
+
+    :param interval:     seconds between two samples.
+    :param max_overhead: share of the interval a sample may take.
+    """
+
+    def __init__(self, collector, size, interval, max_overhead):
+        self.collector = collector
+        self.buffer = RingBuffer(size)
+        self.allowance = interval * max_overhead
+        self.started_at = time.time()
+        self.samples = 0
+        self.skipped = 0
+        self.errors = 0
+        self.sampling_time = 0.0
+        self.last_duration = 0.0
+        # Collection time over the allowance not paid back yet.
+        self._debt = 0.0
+
+    def sample(self):
+        """Take a sample, unless the previous ones took too long.
+        Return whether a sample was taken.
+        """
+        if self._debt > 0:
+            self._debt = max(self._debt - self.allowance, 0.0)
+            self.skipped += 1
+            return False
+        started_at = time.time()
+        try:
+            values = self.collector.collect()
+        except Exception as ex:
+            values = None
+            self.errors += 1
+            LOG.debug("Could not collect the metrics: %s", ex)
+        finished_at = time.time()
+        self.last_duration = finished_at - started_at
+        self.sampling_time += self.last_duration
+        self._debt = max(self.last_duration - self.allowance, 0.0)
+        if values is None:
+            return False
+        self.buffer.append(finished_at, values)
+        self.samples += 1
+        return True
+
+    def overhead(self):
+        """Return the share of the time spent collecting."""
+        elapsed = time.time() - self.started_at
+        return self.sampling_time / elapsed if elapsed > 0 else 0.0
+
+    def aggregate(self, since=0, names=None):
+        """Return the aggregates of the metrics sampled since a time.
+
+        Counters get their delta, rate and last value; the other metrics
+        their minimum, maximum, average and last value.
+        """
+        indexes = self.buffer.window(since)
+        metrics = {}
+        for name in sorted(self.buffer.series):
+            if names and name not in names:
+                continue
+            samples = self.buffer.values(name, indexes)
+            if not samples:
+                continue
+            if self.collector.is_counter(name):
+                metrics[name] = aggregate_counter(samples)
+            else:
+                metrics[name] = aggregate_gauge(samples)
+        return {
+            'samples': len(indexes),
+            'from': self.buffer.timestamps[indexes[0]] if indexes else None,
+            'to': self.buffer.timestamps[indexes[-1]] if indexes else None,
+            'metrics': metrics,
+            'sampler': self.stats(),
+        }
+
+    def stats(self):
+        return {'samples': self.samples,
+                'skipped': self.skipped,
+                'errors': self.errors,
+                'last_duration': self.last_duration,
+                'overhead': self.overhead()}
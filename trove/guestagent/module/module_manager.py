@@ -38,6 +38,7 @@ class ModuleManager(object):
     MODULE_APPLY_TO_ALL = 'all'
     MODULE_BASE_DIR = guestagent_utils.build_file_path('~', 'modules')
     MODULE_CONTENTS_FILENAME = 'contents.dat'
+    MODULE_CONTENTS_MD5_FILENAME = 'contents.md5'
     MODULE_RESULT_FILENAME = 'result.json'
 
     @classmethod
@@ -47,12 +48,13 @@ class ModuleManager(object):
     @classmethod
     def apply_module(cls, driver, module_type, name, tenant,
                      datastore, ds_version, contents, module_id, md5,
-                     auto_apply, visible, admin_module):
+                     auto_apply, visible, admin_module, fetch_contents=None):
         tenant = tenant or cls.MODULE_APPLY_TO_ALL
         datastore = datastore or cls.MODULE_APPLY_TO_ALL
         ds_version = ds_version or cls.MODULE_APPLY_TO_ALL
         module_dir = cls.build_module_dir(module_type, module_id)
-        data_file = cls.write_module_contents(module_dir, contents, md5)
+        data_file = cls.write_module_contents(module_dir, contents, md5,
+                                              fetch_contents)
         applied = True
         message = None
         now = cls.get_current_timestamp()
@@ -98,11 +100,29 @@ class ModuleManager(object):
         return module_dir
 
     @classmethod
-    def write_module_contents(cls, module_dir, contents, md5):
+    def write_module_contents(cls, module_dir, contents, md5,
+                              fetch_contents=None):
+        """Write the contents unless the file already has these ones.
+
+        :param fetch_contents: returns the contents when they were not sent
+                               with the module, it is only called if the
+                               file is out of date.
+        """
         contents_file = cls.build_contents_filename(module_dir)
+        md5_file = guestagent_utils.build_file_path(
+            module_dir, cls.MODULE_CONTENTS_MD5_FILENAME)
+        if (md5 and operating_system.exists(contents_file) and
+                operating_system.exists(md5_file) and
+                operating_system.read_file(md5_file) == md5):
+            LOG.debug("Contents of module %s are up to date.", module_dir)
+            return contents_file
+        if contents is None and fetch_contents:
+            contents = fetch_contents()
         operating_system.write_file(contents_file, contents,
                                     codec=stream_codecs.Base64Codec(),
                                     encode=False)
+        if md5:
+            operating_system.write_file(md5_file, md5)
         return contents_file
 
     @classmethod
@@ -0,0 +1,26 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from oslo_log import log as logging
+
+from trove.common.strategies.strategy import Strategy
+
+LOG = logging.getLogger(__name__)
+
+
+def get_archive_strategy(archive_driver, ns=__name__):
+    LOG.debug("Getting log archive strategy: %s.", archive_driver)
+    return Strategy.get_strategy(archive_driver, ns)
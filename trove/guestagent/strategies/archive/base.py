@@ -0,0 +1,315 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import abc
+import calendar
+import json
+import re
+
+import eventlet
+from eventlet import queue
+from oslo_log import log as logging
+from oslo_utils import timeutils
+import six
+
+from trove.common import cfg
+from trove.common.i18n import _
+from trove.common import stream_codecs
+from trove.common.strategies.strategy import Strategy
+from trove.common import utils
+from trove.guestagent.common import guestagent_utils
+from trove.guestagent.common import operating_system
+from trove.guestagent.strategies.backup import base as backup_base
+from trove.guestagent.strategies.restore import base as restore_base
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+
+class ArchiveError(Exception):
+    """Error archiving or replaying transaction log segments."""
+
+
+class LogArchiveBatch(backup_base.BackupRunner):
+    """Stream a batch of closed log segments as a single tar archive.
+
+    The batch goes through the same compression and encryption pipeline
+    as a regular backup so that it can be handed to any storage strategy.
+    """
+    __strategy_name__ = 'log_archive_batch'
+
+    def __init__(self, filename, **kwargs):
+        self.segments = kwargs.pop('segments')
+        self.end_time = kwargs.pop('end_time', None)
+        kwargs['segment_list'] = ' '.join(self.segments)
+        super(LogArchiveBatch, self).__init__(filename, **kwargs)
+
+    @property
+    def cmd(self):
+        cmd = 'sudo tar -cf - -C %(log_dir)s %(segment_list)s'
+        return cmd + self.zip_cmd + self.encrypt_cmd
+
+    @property
+    def filename(self):
+        return '%s.tar' % self.base_filename
+
+    def metadata(self):
+        return {'first_segment': self.segments[0],
+                'last_segment': self.segments[-1],
+                'segment_count': len(self.segments),
+                'end_time': self.end_time}
+
+
+class LogArchiveRestore(restore_base.RestoreRunner):
+    """Unpack an archived batch of log segments into a directory."""
+    __strategy_name__ = 'log_archive_batch'
+    base_restore_cmd = 'sudo tar -xf - -C %(restore_location)s'
+
+
+class _IndexStream(object):
+    """Serve the archive index to a storage strategy as a backup stream."""
+
+    def __init__(self, index):
+        self._data = six.BytesIO(json.dumps(index).encode('utf-8'))
+
+    def read(self, chunk_size):
+        return self._data.read(chunk_size)
+
+    def metadata(self):
+        return {}
+
+
+class LogArchiver(Strategy):
+    """Base class for continuous transaction log archiving strategies.
+
+    Every pass collects the log segments the datastore has closed since
+    the previous pass, groups them into compressed batches and uploads
+    them to the configured storage strategy.  The uploaded batches are
+    recorded in an index kept both on the guest and next to the backups
+    so that a new instance can replay them on top of a restored backup.
+    """
+    __strategy_type__ = 'log_archiver'
+    __strategy_ns__ = 'trove.guestagent.strategies.archive'
+
+    # Directory the staged log segments are extracted to during replay.
+    staging_dir = '/tmp/log_archive'
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.batch_size = CONF.log_archive_batch_size
+        self.queue_size = CONF.log_archive_queue_size
+        self.upload_workers = CONF.log_archive_upload_workers
+        super(LogArchiver, self).__init__()
+
+    @abc.abstractproperty
+    def log_dir(self):
+        """The directory holding the closed log segments."""
+
+    @abc.abstractmethod
+    def closed_segments(self):
+        """Return the sorted names of the log segments that the datastore
+        has finished writing to.
+        """
+
+    @abc.abstractmethod
+    def start_segment(self, backup_info, restore_location):
+        """Return the first log segment needed to roll the restored backup
+        forward.
+        """
+
+    @abc.abstractmethod
+    def apply(self, segments, restore_point, restore_location):
+        """Roll the restored datastore forward through the staged segments
+        up to the given restore point.
+        """
+
+    @classmethod
+    def index_name(cls, instance_id):
+        return '%s_log_archive.json' % instance_id
+
+    @property
+    def local_index_file(self):
+        return guestagent_utils.build_file_path('~', 'log_archive', 'json')
+
+    def segment_time(self, segment):
+        """Return the time (seconds since epoch) the segment was closed."""
+        path = guestagent_utils.build_file_path(self.log_dir, segment)
+        out, err = utils.execute_with_timeout('stat', '-c', '%Y', path,
+                                              run_as_root=True,
+                                              root_helper='sudo')
+        return int(out.strip())
+
+    def load_local_index(self):
+        if not operating_system.exists(self.local_index_file):
+            return []
+        return operating_system.read_file(self.local_index_file,
+                                          codec=stream_codecs.JsonCodec())
+
+    def save_index(self, instance_id, index):
+        operating_system.write_file(self.local_index_file, index,
+                                    codec=stream_codecs.JsonCodec())
+        success, note, checksum, location = self.storage.save(
+            self.index_name(instance_id), _IndexStream(index))
+        if not success:
+            raise ArchiveError(note)
+
+    def load_index(self, location):
+        # The index is rewritten on every archive pass, so the checksum
+        # recorded at backup time cannot be used to verify it.
+        stream = self.storage.load(location, None)
+        return json.loads(b''.join(stream).decode('utf-8'))
+
+    def _batch_name(self, instance_id, segments):
+        # Storage strategies derive segment names from the part of the
+        # file name before the first dot, so keep dots out of the batch id.
+        return '%s_logs_%s' % (instance_id,
+                               re.sub('[^0-9A-Za-z_-]', '-', segments[0]))
+
+    def _upload_batch(self, instance_id, segments):
+        end_time = self.segment_time(segments[-1])
+        with LogArchiveBatch(self._batch_name(instance_id, segments),
+                             log_dir=self.log_dir, segments=segments,
+                             end_time=end_time) as batch:
+            success, note, checksum, location = self.storage.save(
+                batch.manifest, batch)
+            if not success:
+                raise ArchiveError(note)
+        return {'segments': segments,
+                'location': location,
+                'checksum': checksum,
+                'end_time': end_time}
+
+    def archive(self, instance_id):
+        """Archive all closed segments that have not been archived yet.
+
+        Batches are handed to a bounded queue drained by a fixed number
+        of uploaders, so scanning never runs more than
+        'log_archive_queue_size' batches ahead of the uploads.
+
+        :returns: the number of segments archived during this pass.
+        """
+        index = self.load_local_index()
+        archived = set(seg for batch in index for seg in batch['segments'])
+        pending = [seg for seg in self.closed_segments()
+                   if seg not in archived]
+        if not pending:
+            LOG.debug("No new log segments to archive.")
+            return 0
+
+        batches = [pending[pos:pos + self.batch_size]
+                   for pos in range(0, len(pending), self.batch_size)]
+        LOG.debug("Archiving %(count)d log segments in %(batches)d batches.",
+                  {'count': len(pending), 'batches': len(batches)})
+
+        upload_queue = queue.LightQueue(self.queue_size)
+        results = {}
+
+        def _uploader():
+            while True:
+                item = upload_queue.get()
+                if item is None:
+                    return
+                number, segments = item
+                try:
+                    results[number] = self._upload_batch(instance_id,
+                                                         segments)
+                except Exception:
+                    LOG.exception(_("Error archiving log segments "
+                                    "%(first)s to %(last)s."),
+                                  {'first': segments[0],
+                                   'last': segments[-1]})
+
+        pool = eventlet.GreenPool(self.upload_workers)
+        for worker in range(self.upload_workers):
+            pool.spawn_n(_uploader)
+        for item in enumerate(batches):
+            upload_queue.put(item)
+        for worker in range(self.upload_workers):
+            upload_queue.put(None)
+        pool.waitall()
+
+        # Only record the batches uploaded without a gap, the rest will be
+        # uploaded again on the next pass.
+        archived_count = 0
+        for number in range(len(batches)):
+            if number not in results:
+                break
+            index.append(results[number])
+            archived_count += len(results[number]['segments'])
+        if archived_count:
+            self.save_index(instance_id, index)
+        return archived_count
+
+    def restore_point_datetime(self, restore_point):
+        """Return the (UTC) time a 'timestamp' restore point refers to."""
+        timestamp = restore_point.get('timestamp')
+        if not timestamp:
+            return None
+        return timeutils.normalize_time(timeutils.parse_isotime(timestamp))
+
+    def _restore_point_time(self, restore_point):
+        target = self.restore_point_datetime(restore_point)
+        return calendar.timegm(target.utctimetuple()) if target else None
+
+    def restore_point_segment(self, restore_point):
+        """Return the segment a 'position' restore point falls into."""
+        return restore_point.get('position')
+
+    def select_batches(self, index, start_segment, restore_point):
+        """Return the archived batches needed to go from the start segment
+        to the restore point.
+        """
+        target_time = self._restore_point_time(restore_point)
+        target_segment = self.restore_point_segment(restore_point)
+        selected = []
+        for batch in sorted(index, key=lambda batch: batch['segments'][0]):
+            if batch['segments'][-1] < start_segment:
+                continue
+            selected.append(batch)
+            if target_segment and batch['segments'][-1] >= target_segment:
+                return selected
+            if target_time and batch['end_time'] >= target_time:
+                return selected
+        if target_time or target_segment:
+            LOG.warning(_("The restore point %s is past the end of the "
+                          "archived logs. Replaying all archived segments."),
+                        restore_point)
+        return selected
+
+    def replay(self, index_location, backup_info, restore_location):
+        """Replay the archived log segments on top of a restored backup."""
+        restore_point = backup_info['restore_point']
+        index = self.load_index(index_location)
+        start_segment = self.start_segment(backup_info, restore_location)
+        batches = self.select_batches(index, start_segment, restore_point)
+        if not batches:
+            raise ArchiveError(_("No archived log segments found after %s.")
+                               % start_segment)
+
+        operating_system.create_directory(self.staging_dir, as_root=True)
+        segments = []
+        for batch in batches:
+            LOG.debug("Fetching archived log segments %(first)s to "
+                      "%(last)s.", {'first': batch['segments'][0],
+                                    'last': batch['segments'][-1]})
+            LogArchiveRestore(self.storage, location=batch['location'],
+                              checksum=batch['checksum'],
+                              restore_location=self.staging_dir).restore()
+            segments.extend(seg for seg in batch['segments']
+                            if seg >= start_segment)
+        self.apply(segments, restore_point, restore_location)
+        LOG.info(_("Replayed %(count)d log segments up to %(point)s."),
+                 {'count': len(segments), 'point': restore_point})
@@ -0,0 +1,96 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import os
+
+from oslo_log import log as logging
+
+from trove.common import cfg
+from trove.common import stream_codecs
+from trove.guestagent.common import operating_system
+from trove.guestagent.datastore.experimental.postgresql.service import PgSqlApp
+from trove.guestagent.strategies.archive import base
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+WAL_ARCHIVE_DIR = CONF.postgresql.wal_archive_location
+
+
+class PgWalArchiver(base.LogArchiver):
+    """Archive the WAL segments shipped by 'archive_command' and replay
+    them through PostgreSQL recovery.
+
+    The segments are staged directly into the WAL archive directory, from
+    where the server fetches them on startup using 'restore_command'.
+    """
+    __strategy_name__ = 'pg_wal'
+
+    staging_dir = WAL_ARCHIVE_DIR
+
+    def __init__(self, *args, **kwargs):
+        self._app = None
+        super(PgWalArchiver, self).__init__(*args, **kwargs)
+
+    @property
+    def app(self):
+        if self._app is None:
+            self._app = PgSqlApp()
+        return self._app
+
+    @property
+    def log_dir(self):
+        return WAL_ARCHIVE_DIR
+
+    def closed_segments(self):
+        # Only full segments are matched, '.backup' and '.history' files
+        # are skipped.
+        return sorted(
+            os.path.basename(wal_file) for wal_file in
+            operating_system.list_files_in_directory(
+                WAL_ARCHIVE_DIR, pattern='[0-9A-F]{24}', as_root=True))
+
+    def start_segment(self, backup_info, restore_location):
+        metadata = self.storage.load_metadata(backup_info['location'],
+                                              backup_info['checksum'])
+        return metadata['start-wal-file']
+
+    def apply(self, segments, restore_point, restore_location):
+        recovery_conf = ("restore_command = 'cp %s/%%f \"%%p\"'\n" %
+                         WAL_ARCHIVE_DIR)
+        recovery_conf += "recovery_target_timeline = 'latest'\n"
+        if restore_point.get('position'):
+            recovery_conf += ("recovery_target_xid = '%s'\n" %
+                              restore_point['position'])
+        elif restore_point.get('timestamp'):
+            target = self.restore_point_datetime(restore_point)
+            recovery_conf += ("recovery_target_time = '%s UTC'\n" %
+                              target.strftime('%Y-%m-%d %H:%M:%S'))
+
+        # Recovery runs as soon as the server starts.
+        recovery_file = self.app.pgsql_recovery_config
+        operating_system.write_file(recovery_file, recovery_conf,
+                                    codec=stream_codecs.IdentityCodec(),
+                                    as_root=True)
+        operating_system.chown(recovery_file, user=self.app.pgsql_owner,
+                               group=self.app.pgsql_owner, as_root=True)
+        operating_system.chown(WAL_ARCHIVE_DIR, user=self.app.pgsql_owner,
+                               group=self.app.pgsql_owner, as_root=True)
+        LOG.debug("Staged %d WAL segments for recovery.", len(segments))
+
+    def restore_point_segment(self, restore_point):
+        # Transaction ids cannot be mapped to a WAL segment without reading
+        # the segments, so stop selecting on time only.
+        return None
@@ -0,0 +1,104 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import os
+
+from oslo_log import log as logging
+
+from trove.common import cfg
+from trove.common.configurations import MySQLConfParser
+from trove.common.i18n import _
+from trove.common import utils
+from trove.guestagent.common import guestagent_utils
+from trove.guestagent.common import operating_system
+from trove.guestagent.datastore.mysql.service import MySqlApp
+from trove.guestagent.datastore.mysql_common.service import ADMIN_USER_NAME
+from trove.guestagent.strategies.archive import base
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+
+class MySqlBinlogArchiver(base.LogArchiver):
+    """Archive closed MySQL binary logs and replay them with mysqlbinlog.
+
+    Binary logging has to be enabled ('log_bin') on the instance.
+    """
+    __strategy_name__ = 'mysqlbinlog'
+
+    # File written by innobackupex with the binlog coordinates of the backup.
+    BINLOG_INFO_FILE = 'xtrabackup_binlog_info'
+
+    def __init__(self, *args, **kwargs):
+        super(MySqlBinlogArchiver, self).__init__(*args, **kwargs)
+        self._start_position = None
+
+    @property
+    def log_bin(self):
+        log_bin = MySqlApp.configuration_manager.get_value(
+            MySQLConfParser.SERVER_CONF_SECTION).get('log_bin')
+        if not log_bin:
+            raise base.ArchiveError(_("Binary logging is not enabled."))
+        return os.path.splitext(log_bin)[0]
+
+    @property
+    def log_dir(self):
+        return os.path.dirname(self.log_bin)
+
+    def closed_segments(self):
+        index_file = guestagent_utils.build_file_path(
+            self.log_dir, os.path.basename(self.log_bin), 'index')
+        segments = [os.path.basename(line.strip()) for line in
+                    operating_system.read_file(index_file,
+                                               as_root=True).splitlines()
+                    if line.strip()]
+        # The last binlog in the index is the one the server writes to.
+        return sorted(segments[:-1])
+
+    def start_segment(self, backup_info, restore_location):
+        info_file = guestagent_utils.build_file_path(restore_location,
+                                                     self.BINLOG_INFO_FILE)
+        binlog_info = operating_system.read_file(info_file, as_root=True)
+        segment, position = binlog_info.split()[:2]
+        self._start_position = position
+        return segment
+
+    def restore_point_segment(self, restore_point):
+        position = restore_point.get('position')
+        return position.split(':')[0] if position else None
+
+    def apply(self, segments, restore_point, restore_location):
+        options = ['--start-position=%s' % self._start_position]
+        if restore_point.get('position'):
+            stop_segment, stop_position = (
+                restore_point['position'].split(':'))
+            segments = [seg for seg in segments if seg <= stop_segment]
+            options.append('--stop-position=%s' % stop_position)
+        elif restore_point.get('timestamp'):
+            target = self.restore_point_datetime(restore_point)
+            options.append('--stop-datetime="%s"' %
+                           target.strftime('%Y-%m-%d %H:%M:%S'))
+        cmd = ('sudo mysqlbinlog %(options)s %(files)s | '
+               'mysql --user=%(user)s --password=%(password)s' %
+               {'options': ' '.join(options),
+                'files': ' '.join(os.path.join(self.staging_dir, seg)
+                                  for seg in segments),
+                'user': ADMIN_USER_NAME,
+                'password': MySqlApp.get_auth_password()})
+        LOG.debug("Replaying %d binary logs.", len(segments))
+        utils.execute_with_timeout(cmd, shell=True,
+                                   timeout=CONF.restore_usage_timeout)
+        operating_system.remove(self.staging_dir, force=True, as_root=True)
@@ -17,6 +17,7 @@ import os
 import signal
 
 from oslo_log import log as logging
+from six.moves import shlex_quote
 
 from eventlet.green import subprocess
 from trove.common import cfg, utils
@@ -58,9 +59,31 @@ class BackupRunner(Strategy):
     def backup_type(self):
         return type(self).__name__
 
+    @property
+    def placement_cmd(self):
+        """The commands placing the backup process in the I/O scheduling
+        class and control group set for the datastore.
+        """
+        cmd = ''
+        cgroup = cfg.get_configuration_property('backup_cgroup')
+        if cgroup:
+            cmd += 'cgexec -g %s ' % cgroup
+        ionice_class = cfg.get_configuration_property('backup_ionice_class')
+        if ionice_class == 'idle':
+            cmd += 'ionice -c 3 '
+        elif ionice_class == 'best-effort':
+            cmd += 'ionice -c 2 -n %d ' % cfg.get_configuration_property(
+                'backup_ionice_priority')
+        return cmd
+
     def _run(self):
         LOG.debug("BackupRunner running cmd: %s", self.command)
-        self.process = subprocess.Popen(self.command, shell=True,
+        command = self.command
+        placement_cmd = self.placement_cmd
+        if placement_cmd:
+            # The whole pipeline inherits the scheduling class and group.
+            command = '%ssh -c %s' % (placement_cmd, shlex_quote(command))
+        self.process = subprocess.Popen(command, shell=True,
                                         stdout=subprocess.PIPE,
                                         stderr=subprocess.PIPE,
                                         preexec_fn=os.setsid)
@@ -22,6 +22,7 @@ from oslo_log import log as logging
 from trove.common import cfg
 from trove.common import exception
 from trove.common.i18n import _
+from trove.common import stream_codecs
 from trove.common import utils
 from trove.guestagent.common import operating_system
 from trove.guestagent.common.operating_system import FileMode
@@ -31,6 +32,10 @@ from trove.guestagent.strategies.backup import base
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 WAL_ARCHIVE_DIR = CONF.postgresql.wal_archive_location
+PARALLEL_DUMP_DIR = CONF.postgresql.mount_point + '/paralleldump'
+# Files of a parallel dump besides the database dump directories.
+GLOBALS_FILE = 'globals.sql'
+DATABASES_FILE = 'databases.json'
 
 
 class PgDump(base.BackupRunner):
@@ -43,6 +48,88 @@ class PgDump(base.BackupRunner):
         return cmd + self.zip_cmd + self.encrypt_cmd
 
 
+class PgParallelDump(base.BackupRunner):
+    """Dump each database with pg_dump in the directory format, several
+    tables at a time, and the roles and tablespaces with pg_dumpall.
+
+    The jobs of a pg_dump share a synchronized snapshot, so each database
+    is dumped consistently.  The dumps are written to the data volume and
+    then streamed as a tar archive, along with the list of the dumped
+    databases.
+    """
+    __strategy_name__ = 'pg_paralleldump'
+
+    def __init__(self, *args, **kwargs):
+        self._app = None
+        super(PgParallelDump, self).__init__(*args, **kwargs)
+
+    @property
+    def app(self):
+        if self._app is None:
+            self._app = self._build_app()
+        return self._app
+
+    def _build_app(self):
+        return PgSqlApp()
+
+    @property
+    def cmd(self):
+        cmd = 'sudo -u postgres tar -C %s -cf - .' % PARALLEL_DUMP_DIR
+        return cmd + self.zip_cmd + self.encrypt_cmd
+
+    def _run_as_owner(self, *cmd):
+        return utils.execute_with_timeout(
+            'sudo', '-u', self.app.pgsql_owner, *cmd, timeout=None)
+
+    def list_databases(self):
+        out, err = self._run_as_owner(
+            'psql', '-At', '-c',
+            'SELECT datname FROM pg_database '
+            'WHERE datallowconn AND NOT datistemplate ORDER BY datname')
+        return [name for name in out.splitlines() if name]
+
+    def _run_pre_backup(self):
+        self.cleanup()
+        operating_system.create_directory(
+            PARALLEL_DUMP_DIR, user=self.app.pgsql_owner,
+            group=self.app.pgsql_owner, as_root=True)
+        try:
+            self._run_as_owner(
+                'pg_dumpall', '--globals-only',
+                '--file=%s' % os.path.join(PARALLEL_DUMP_DIR, GLOBALS_FILE))
+            databases = []
+            for index, database in enumerate(self.list_databases()):
+                dump_dir = 'db%04d' % index
+                LOG.debug("Dumping database %(db)s into %(dir)s.",
+                          {'db': database, 'dir': dump_dir})
+                self._run_as_owner(
+                    'pg_dump', '--format=directory',
+                    '--jobs=%d' % CONF.logical_backup_jobs,
+                    '--file=%s' % os.path.join(PARALLEL_DUMP_DIR, dump_dir),
+                    database)
+                databases.append([dump_dir, database])
+            databases_file = os.path.join(PARALLEL_DUMP_DIR, DATABASES_FILE)
+            operating_system.write_file(databases_file, databases,
+                                        codec=stream_codecs.JsonCodec(),
+                                        as_root=True)
+            operating_system.chown(databases_file, self.app.pgsql_owner,
+                                   self.app.pgsql_owner, as_root=True)
+        except exception.ProcessExecutionError:
+            LOG.error(_("pg_dump failed, removing %s."), PARALLEL_DUMP_DIR)
+            self.cleanup()
+            raise
+
+    def cleanup(self):
+        operating_system.remove(PARALLEL_DUMP_DIR, force=True, as_root=True)
+
+    def _run_post_backup(self):
+        self.cleanup()
+
+    @property
+    def filename(self):
+        return '%s.tar' % self.base_filename
+
+
 class PgBaseBackupUtil(object):
 
     def most_recent_backup_wal(self, pos=0):
@@ -13,8 +13,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+
 from oslo_log import log as logging
 
+from trove.common import exception
+from trove.common.i18n import _
+from trove.guestagent.common import operating_system
 from trove.guestagent.datastore.experimental.redis import service
 from trove.guestagent.strategies.backup import base
 
@@ -37,3 +42,74 @@ class RedisBackup(base.BackupRunner):
     def _run_pre_backup(self):
         self.app.admin.persist_data()
         LOG.debug('Redis data persisted.')
+
+
+class RedisSnapshotBackup(base.BackupRunner):
+    """Back up a hardlinked snapshot of the RDB file written by BGSAVE.
+
+    The RDB file is linked to a stable snapshot path as soon as
+    'INFO persistence' reports that the background save is done, so later
+    saves that replace the RDB file do not affect the backup.  The snapshot
+    is read by the compression or encryption command directly, or by the
+    agent itself if the backup is neither compressed nor encrypted.
+    """
+    __strategy_name__ = 'redissnapshotbackup'
+
+    def __init__(self, filename, **kwargs):
+        self.app = service.RedisApp()
+        self.snapshot = '%s.snapshot' % self.app.get_persistence_filepath()
+        self._snapshot_file = None
+        kwargs['snapshot'] = self.snapshot
+        super(RedisSnapshotBackup, self).__init__(filename, **kwargs)
+
+    @property
+    def cmd(self):
+        if self.is_zipped:
+            return 'sudo gzip -c %(snapshot)s' + self.encrypt_cmd
+        elif self.is_encrypted:
+            return ('sudo openssl enc -aes-256-cbc -salt -pass pass:%s '
+                    '-in %%(snapshot)s' % self.encrypt_key)
+        return 'sudo cat %(snapshot)s'
+
+    def _link_snapshot(self):
+        rdb_file = self.app.get_persistence_filepath()
+        operating_system.remove(self.snapshot, force=True, as_root=True)
+        try:
+            operating_system.link(rdb_file, self.snapshot, as_root=True)
+        except exception.ProcessExecutionError:
+            # Hardlinks are not possible on some filesystems, a reflink
+            # still avoids copying the data where it is supported.
+            LOG.debug("Could not hardlink %s, trying a reflink.", rdb_file)
+            operating_system.copy(rdb_file, self.snapshot, recursive=False,
+                                  reflink=True, as_root=True)
+
+    def _run_pre_backup(self):
+        self.app.admin.background_save()
+        self._link_snapshot()
+        LOG.debug('Redis data snapshot taken: %s.', self.snapshot)
+
+    def _run(self):
+        if (not self.is_zipped and not self.is_encrypted and
+                os.access(self.snapshot, os.R_OK)):
+            LOG.debug("Streaming Redis snapshot %s.", self.snapshot)
+            self._snapshot_file = open(self.snapshot, 'rb')
+        else:
+            super(RedisSnapshotBackup, self)._run()
+
+    def read(self, chunk_size):
+        if self._snapshot_file:
+            return self._snapshot_file.read(chunk_size)
+        return super(RedisSnapshotBackup, self).read(chunk_size)
+
+    def _run_post_backup(self):
+        if self._snapshot_file:
+            self._snapshot_file.close()
+        operating_system.remove(self.snapshot, force=True, as_root=True)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            LOG.error(_("Redis snapshot backup failed, removing %s."),
+                      self.snapshot)
+            self._run_post_backup()
+        return super(RedisSnapshotBackup, self).__exit__(
+            exc_type, exc_value, traceback)
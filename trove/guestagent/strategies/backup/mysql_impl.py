@@ -15,17 +15,26 @@
 #    under the License.
 #
 
+import os
 import re
 
 from oslo_log import log as logging
 
+from trove.common import cfg
+from trove.common import exception
 from trove.common.i18n import _
+from trove.common import utils
+from trove.guestagent.common import operating_system
 from trove.guestagent.datastore.mysql.service import MySqlApp
 from trove.guestagent.datastore.mysql_common.service import ADMIN_USER_NAME
 from trove.guestagent.strategies.backup import base
 
+CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+# Directory next to the data directory the parallel dumps are written to.
+PARALLEL_DUMP_DIR = 'paralleldump'
+
 
 class MySQLDump(base.BackupRunner):
     """Implementation of Backup Strategy for MySQLDump."""
@@ -45,6 +54,65 @@ class MySQLDump(base.BackupRunner):
         return cmd + self.zip_cmd + self.encrypt_cmd
 
 
+class MySQLParallelDump(base.BackupRunner):
+    """Implementation of Backup Strategy for mydumper.
+
+    mydumper dumps several tables at a time, all from one consistent
+    snapshot, each table to its own (compressed) files.  The files are
+    written next to the data directory, on the data volume, and then
+    streamed as a tar archive.
+    """
+    __strategy_name__ = 'mysqlparalleldump'
+
+    def __init__(self, filename, **kwargs):
+        self.dump_dir = os.path.join(
+            os.path.dirname(MySqlApp.get_data_dir().rstrip('/')),
+            PARALLEL_DUMP_DIR)
+        self.extra_opts = kwargs.get('extra_opts', '')
+        kwargs['dump_dir'] = self.dump_dir
+        super(MySQLParallelDump, self).__init__(filename, **kwargs)
+
+    @property
+    def cmd(self):
+        cmd = 'sudo tar -C %(dump_dir)s -cf - .'
+        return cmd + self.zip_cmd + self.encrypt_cmd
+
+    @property
+    def dump_cmd(self):
+        return ('sudo mydumper'
+                ' --threads=%(jobs)d'
+                ' --outputdir=%(dump_dir)s'
+                ' --compress --triggers --events --routines'
+                ' %(extra_opts)s'
+                ' --user=%(user)s --password=%(password)s' %
+                {'jobs': CONF.logical_backup_jobs,
+                 'dump_dir': self.dump_dir,
+                 'extra_opts': self.extra_opts,
+                 'user': ADMIN_USER_NAME,
+                 'password': MySqlApp.get_auth_password()})
+
+    def _run_pre_backup(self):
+        self.cleanup()
+        operating_system.create_directory(self.dump_dir, as_root=True)
+        try:
+            utils.execute_with_timeout(self.dump_cmd, shell=True,
+                                       timeout=None)
+        except exception.ProcessExecutionError:
+            LOG.error(_("mydumper failed, removing %s."), self.dump_dir)
+            self.cleanup()
+            raise
+
+    def cleanup(self):
+        operating_system.remove(self.dump_dir, force=True, as_root=True)
+
+    def _run_post_backup(self):
+        self.cleanup()
+
+    @property
+    def filename(self):
+        return '%s.tar' % self.base_filename
+
+
 class InnoBackupEx(base.BackupRunner):
     """Implementation of Backup Strategy for InnoBackupEx."""
     __strategy_name__ = 'innobackupex'
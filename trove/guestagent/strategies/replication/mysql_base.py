@@ -15,6 +15,7 @@
 #
 
 import abc
+import functools
 import uuid
 
 from oslo_log import log as logging
@@ -25,6 +26,7 @@ from trove.common.db.mysql import models
 from trove.common.i18n import _
 from trove.common import utils
 from trove.guestagent.backup.backupagent import BackupAgent
+from trove.guestagent.backup import seed
 from trove.guestagent.datastore.mysql.service import MySqlAdmin
 from trove.guestagent.strategies import backup
 from trove.guestagent.strategies.replication import base
@@ -113,15 +115,39 @@ class MysqlReplicationBase(base.Replication):
                   {'snapshot_id': snapshot_id,
                    'replica_number': replica_number})
 
+        return snapshot_id, self._replication_log_position(service)
+
+    def seed_for_replication(self, context, service, snapshot_info):
+        """Start streaming a backup to a new replica, return the seed the
+        replica connects to and the log position.
+        """
+        seed_id = str(uuid.uuid4())
+        secret = utils.generate_random_password(32)
+        runner = functools.partial(self.repl_backup_runner, filename=seed_id,
+                                   extra_opts=self.repl_backup_extra_opts)
+        server = seed.SeedServer(runner, secret)
+        server.start()
+        LOG.debug("Seeding replica %(number)d from port %(port)d.",
+                  {'number': snapshot_info.get('replica_number', 1),
+                   'port': server.port})
+        seed_ref = {
+            'id': seed_id,
+            'type': self.repl_backup_runner.__name__,
+            'host': netutils.get_my_ipv4(),
+            'port': server.port,
+            'secret': secret
+        }
+        return seed_ref, self._replication_log_position(service)
+
+    def _replication_log_position(self, service):
         replication_user = self._create_replication_user()
         service.grant_replication_privilege(replication_user)
 
         # With streamed InnobackupEx, the log position is in
         # the stream and will be decoded by the slave
-        log_position = {
+        return {
             'replication_user': replication_user
         }
-        return snapshot_id, log_position
 
     def enable_as_master(self, service, master_config):
         if not service.exists_replication_source_overrides():
@@ -22,6 +22,7 @@ from oslo_log import log as logging
 from trove.common import cfg
 from trove.common.i18n import _
 from trove.common import stream_codecs
+from trove.common import utils
 from trove.guestagent.common import operating_system
 from trove.guestagent.common.operating_system import FileMode
 from trove.guestagent.datastore.experimental.postgresql.service import PgSqlApp
@@ -30,6 +31,9 @@ from trove.guestagent.strategies.restore import base
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 WAL_ARCHIVE_DIR = CONF.postgresql.wal_archive_location
+PARALLEL_DUMP_DIR = CONF.postgresql.mount_point + '/paralleldump'
+GLOBALS_FILE = 'globals.sql'
+DATABASES_FILE = 'databases.json'
 
 
 class PgDump(base.RestoreRunner):
@@ -90,6 +94,77 @@ class PgDump(base.RestoreRunner):
             pass
 
 
+class PgParallelDump(base.RestoreRunner):
+    """Implementation of Restore Strategy for PgParallelDump.
+
+    The archive is unpacked on the data volume, the roles and tablespaces
+    are created and each database is then restored by pg_restore, several
+    tables at a time.  pg_restore loads the data of all the tables before
+    building their indexes and constraints, in parallel too.
+    """
+    __strategy_name__ = 'pg_paralleldump'
+
+    def __init__(self, *args, **kwargs):
+        self._app = None
+        self.base_restore_cmd = 'sudo -u %s tar -C %s -xf -' % (
+            self.app.pgsql_owner, PARALLEL_DUMP_DIR)
+        super(PgParallelDump, self).__init__(*args, **kwargs)
+
+    @property
+    def app(self):
+        if self._app is None:
+            self._app = self._build_app()
+        return self._app
+
+    def _build_app(self):
+        return PgSqlApp()
+
+    def _run_as_owner(self, *cmd):
+        return utils.execute_with_timeout(
+            'sudo', '-u', self.app.pgsql_owner, *cmd,
+            timeout=CONF.restore_usage_timeout)
+
+    def pre_restore(self):
+        self.cleanup()
+        operating_system.create_directory(
+            PARALLEL_DUMP_DIR, user=self.app.pgsql_owner,
+            group=self.app.pgsql_owner, as_root=True)
+
+    def post_restore(self):
+        try:
+            # Roles already existing (such as postgres) fail to be created,
+            # psql goes on with the next statements.
+            self._run_as_owner(
+                'psql', '-q', '-d', 'postgres',
+                '-f', os.path.join(PARALLEL_DUMP_DIR, GLOBALS_FILE))
+            out, err = self._run_as_owner(
+                'psql', '-At', '-c', 'SELECT datname FROM pg_database')
+            existing = set(out.splitlines())
+            databases = operating_system.read_file(
+                os.path.join(PARALLEL_DUMP_DIR, DATABASES_FILE),
+                codec=stream_codecs.JsonCodec(), as_root=True)
+            for dump_dir, database in databases:
+                LOG.info(_("Restoring database %s."), database)
+                self._run_as_owner(*self._restore_cmd(
+                    os.path.join(PARALLEL_DUMP_DIR, dump_dir), database,
+                    database in existing))
+        finally:
+            self.cleanup()
+
+    def _restore_cmd(self, dump_dir, database, exists):
+        cmd = ['pg_restore', '--jobs=%d' % CONF.logical_backup_jobs]
+        if exists:
+            # Databases created with the server (postgres) are emptied
+            # before their objects are restored.
+            cmd += ['--clean', '--if-exists', '--dbname=%s' % database]
+        else:
+            cmd += ['--create', '--dbname=postgres']
+        return cmd + [dump_dir]
+
+    def cleanup(self):
+        operating_system.remove(PARALLEL_DUMP_DIR, force=True, as_root=True)
+
+
 class PgBaseBackup(base.RestoreRunner):
     """Implementation of Restore Strategy for pg_basebackup."""
     __strategy_name__ = 'pg_basebackup'
@@ -73,3 +73,11 @@ class RedisBackup(base.RestoreRunner):
             self.app.configuration_manager.remove_system_override(
                 change_id=self.CONF_LABEL_AOF_TEMP_OFF)
             self.app.start_db()
+
+
+class RedisSnapshotBackup(RedisBackup):
+    """Restore a backup taken by the RedisSnapshotBackup strategy.
+
+    The backup holds the same RDB file as a RedisBackup one.
+    """
+    __strategy_name__ = 'redissnapshotbackup'
@@ -31,8 +31,12 @@ from trove.guestagent.common.operating_system import FileMode
 import trove.guestagent.datastore.mysql.service as dbaas
 from trove.guestagent.strategies.restore import base
 
+CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+# Directory next to the data directory the parallel dumps are unpacked to.
+PARALLEL_DUMP_DIR = 'paralleldump'
+
 
 class MySQLRestoreMixin(object):
     """Common utils for restoring MySQL databases."""
@@ -165,6 +169,47 @@ class MySQLDump(base.RestoreRunner, MySQLRestoreMixin):
     base_restore_cmd = 'sudo mysql'
 
 
+class MySQLParallelDump(base.RestoreRunner, MySQLRestoreMixin):
+    """Implementation of Restore Strategy for MySQLParallelDump.
+
+    The archive is unpacked next to the data directory, then myloader loads
+    several tables at a time, optionally creating their secondary indexes
+    once their data is loaded.
+    """
+    __strategy_name__ = 'mysqlparalleldump'
+    base_restore_cmd = 'sudo tar -C %(dump_dir)s -xf -'
+
+    def __init__(self, storage, **kwargs):
+        self.dump_dir = os.path.join(
+            os.path.dirname(kwargs['restore_location'].rstrip('/')),
+            PARALLEL_DUMP_DIR)
+        kwargs['dump_dir'] = self.dump_dir
+        super(MySQLParallelDump, self).__init__(storage, **kwargs)
+
+    @property
+    def load_cmd(self):
+        cmd = ['myloader', '--threads=%d' % CONF.logical_backup_jobs,
+               '--directory=%s' % self.dump_dir, '--overwrite-tables']
+        if CONF.logical_restore_defer_indexes:
+            cmd.append('--innodb-optimize-keys')
+        return cmd
+
+    def pre_restore(self):
+        self.cleanup()
+        operating_system.create_directory(self.dump_dir, as_root=True)
+
+    def post_restore(self):
+        try:
+            utils.execute_with_timeout(*self.load_cmd, run_as_root=True,
+                                       root_helper='sudo',
+                                       timeout=CONF.restore_usage_timeout)
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
+        operating_system.remove(self.dump_dir, force=True, as_root=True)
+
+
 class InnoBackupEx(base.RestoreRunner, MySQLRestoreMixin):
     """Implementation of Restore Strategy for InnoBackupEx."""
     __strategy_name__ = 'innobackupex'
@@ -13,21 +13,33 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import heapq
 import os
 import shlex
 from tempfile import NamedTemporaryFile
+import time
 import traceback
 
+import eventlet
+from eventlet import semaphore
 from oslo_log import log as logging
 
 from trove.common import cfg
 from trove.common import exception
 from trove.common.i18n import _
+from trove.common.stream_codecs import JsonCodec
 from trove.common import utils
 from trove.guestagent.common import operating_system
 
 TMP_MOUNT_POINT = "/mnt/volume"
 
+# Directory on the target volume that holds the migration checkpoint.
+MIGRATION_CHECKPOINT_DIR = ".trove-migration"
+MIGRATION_UNITS_PER_WORKER = 4
+MIGRATION_UNIT_ATTEMPTS = 3
+RSYNC_OPTIONS = ("--safe-links", "--perms", "--owner", "--group",
+                 "--xattrs", "--sparse")
+
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 
@@ -48,16 +60,20 @@ class VolumeDevice(object):
         volume; optionally to a new sub-directory on the new volume.
         """
         self.mount(TMP_MOUNT_POINT, write_to_fstab=False)
-        if not source_dir[-1] == '/':
-            source_dir = "%s/" % source_dir
+        source_dir = _source_path(source_dir)
         target_dir = TMP_MOUNT_POINT
         if target_subdir:
             target_dir = target_dir + "/" + target_subdir
         try:
-            utils.execute("rsync", "--safe-links", "--perms",
-                          "--recursive", "--owner", "--group", "--xattrs",
-                          "--sparse", source_dir, target_dir,
-                          run_as_root=True, root_helper="sudo")
+            workers = CONF.volume_migration_workers
+            if workers > 1:
+                DataMigration(source_dir, target_dir, TMP_MOUNT_POINT,
+                              workers).run()
+            else:
+                utils.execute("rsync", "--safe-links", "--perms",
+                              "--recursive", "--owner", "--group",
+                              "--xattrs", "--sparse", source_dir, target_dir,
+                              run_as_root=True, root_helper="sudo")
         except exception.ProcessExecutionError:
             msg = _("Could not migrate data.")
             log_and_raise(msg)
@@ -117,12 +133,46 @@ class VolumeDevice(object):
             msg = _("Could not format '%s'.") % self.device_path
             log_and_raise(msg)
 
-    def format(self):
-        """Formats the device at device_path and checks the filesystem."""
+    def format(self, migration_source=None):
+        """Formats the device at device_path and checks the filesystem.
+
+        A device holding the checkpoint of an interrupted migration of the
+        data of migration_source is left as it is, so that migrate_data
+        resumes the migration.
+        """
         self._check_device_exists()
+        if (migration_source and
+                self._migration_checkpoint_source() ==
+                _source_path(migration_source)):
+            LOG.info(_("Not formatting '%s', it holds an interrupted data "
+                       "migration."), self.device_path)
+            return
         self._format()
         self._check_format()
 
+    def _migration_checkpoint_source(self):
+        """Return the source directory of the data migration whose
+        checkpoint the device holds, None if there is none.
+        """
+        if CONF.volume_migration_workers <= 1:
+            return None
+        if not operating_system.exists(TMP_MOUNT_POINT, is_directory=True,
+                                       as_root=True):
+            operating_system.create_directory(TMP_MOUNT_POINT, as_root=True)
+        try:
+            utils.execute("mount", "-t", CONF.volume_fstype,
+                          "-o", CONF.mount_options,
+                          self.device_path, TMP_MOUNT_POINT,
+                          run_as_root=True, root_helper="sudo")
+        except exception.ProcessExecutionError:
+            # Not formatted yet.
+            return None
+        try:
+            state = DataMigration.read_checkpoint(TMP_MOUNT_POINT)
+            return state.get('source') if state else None
+        finally:
+            self.unmount(TMP_MOUNT_POINT)
+
     def mount(self, mount_point, write_to_fstab=True):
         """Mounts, and writes to fstab."""
         LOG.debug("Will mount %(path)s at %(mount_point)s.",
@@ -206,6 +256,169 @@ class VolumeDevice(object):
             log_and_raise(msg)
 
 
+def _source_path(source_dir):
+    """The source directory, as rsync copies the contents of it."""
+    if not source_dir[-1] == '/':
+        return "%s/" % source_dir
+    return source_dir
+
+
+def split_work_units(files, count):
+    """Split the files into at most 'count' units of about the same size.
+
+    :param files:   (size, path) pairs.
+    :returns:       a list of (total size, paths) pairs.
+    """
+    heap = [(0, index) for index in range(min(count, len(files)))]
+    sizes = [0] * len(heap)
+    paths = [[] for entry in heap]
+    # The largest files are placed first, always into the smallest unit.
+    for size, path in sorted(files, reverse=True):
+        total, index = heapq.heappop(heap)
+        paths[index].append(path)
+        sizes[index] = total + size
+        heapq.heappush(heap, (sizes[index], index))
+    return [(size, sorted(unit)) for size, unit in zip(sizes, paths)]
+
+
+class DataMigration(object):
+    """Copy a directory tree with several rsync processes in parallel.
+
+    The regular files are split into work units of about the same size,
+    each copied by its own rsync.  Every finished unit is recorded in a
+    checkpoint on the target volume, so that migrating again after a
+    failure only copies the units that are left.  A last recursive rsync
+    copies what the units do not cover (directory attributes, links and
+    files created in the meantime) without copying the other files again.
+    """
+
+    def __init__(self, source_dir, target_dir, checkpoint_root, workers):
+        self.source_dir = source_dir
+        self.target_dir = target_dir
+        self.checkpoint_root = checkpoint_root
+        self.checkpoint_dir = os.path.join(checkpoint_root,
+                                           MIGRATION_CHECKPOINT_DIR)
+        self.state_file = os.path.join(self.checkpoint_dir, "state.json")
+        self.workers = workers
+        self.state = None
+        self._lock = semaphore.Semaphore()
+        self._started = None
+        self._copied = 0
+        self._total = 0
+
+    def run(self):
+        if self._load_checkpoint():
+            LOG.info(_("Resuming data migration, %(done)d of %(units)d "
+                       "work units were already copied."),
+                     {'done': len(self.state['done']),
+                      'units': len(self.state['units'])})
+        else:
+            self._create_checkpoint()
+
+        pending = [index for index in range(len(self.state['units']))
+                   if index not in self.state['done']]
+        self._started = time.time()
+        self._total = sum(self.state['units'][index] for index in pending)
+        pool = eventlet.GreenPool(self.workers)
+        errors = [error for error in pool.imap(self._copy_unit, pending)
+                  if error]
+        if errors:
+            raise errors[0]
+
+        self._rsync("--recursive", "--ignore-existing",
+                    self.source_dir, self.target_dir)
+        operating_system.remove(self.checkpoint_dir, force=True,
+                                as_root=True)
+
+    def _list_files(self):
+        stdout, stderr = utils.execute(
+            "find", self.source_dir, "-type", "f", "-printf", "%s\\t%P\\0",
+            run_as_root=True, root_helper="sudo")
+        files = []
+        for entry in stdout.split("\0"):
+            if entry:
+                size, path = entry.split("\t", 1)
+                files.append((int(size), path))
+        return files
+
+    def _unit_file(self, index):
+        return os.path.join(self.checkpoint_dir, "unit-%04d.list" % index)
+
+    @staticmethod
+    def read_checkpoint(checkpoint_root):
+        """Return the checkpoint state kept under checkpoint_root, None if
+        there is none.
+        """
+        state_file = os.path.join(checkpoint_root, MIGRATION_CHECKPOINT_DIR,
+                                  "state.json")
+        if not operating_system.exists(state_file, as_root=True):
+            return None
+        return operating_system.read_file(state_file, codec=JsonCodec(),
+                                          as_root=True)
+
+    def _load_checkpoint(self):
+        state = self.read_checkpoint(self.checkpoint_root)
+        if not state:
+            return False
+        if (state.get('source') != self.source_dir or
+                state.get('target') != self.target_dir):
+            LOG.debug("Discarding the checkpoint of another migration.")
+            return False
+        self.state = state
+        return True
+
+    def _create_checkpoint(self):
+        units = split_work_units(self._list_files(),
+                                 self.workers * MIGRATION_UNITS_PER_WORKER)
+        operating_system.remove(self.checkpoint_dir, force=True,
+                                as_root=True)
+        operating_system.create_directory(self.checkpoint_dir, as_root=True)
+        for index, (size, paths) in enumerate(units):
+            operating_system.write_file(self._unit_file(index),
+                                        "\0".join(paths), as_root=True)
+        self.state = {'source': self.source_dir, 'target': self.target_dir,
+                      'units': [size for size, paths in units], 'done': []}
+        self._save_checkpoint()
+
+    def _save_checkpoint(self):
+        operating_system.write_file(self.state_file, self.state,
+                                    codec=JsonCodec(), as_root=True)
+
+    def _copy_unit(self, index):
+        """Copy one work unit and record it in the checkpoint.
+
+        :returns: the error of the last attempt if the unit failed.
+        """
+        error = None
+        for attempt in range(1, MIGRATION_UNIT_ATTEMPTS + 1):
+            try:
+                self._rsync("--from0",
+                            "--files-from=%s" % self._unit_file(index),
+                            self.source_dir, self.target_dir)
+                break
+            except exception.ProcessExecutionError as e:
+                LOG.warning(_("Attempt %(attempt)d to copy work unit "
+                              "%(unit)d failed: %(error)s"),
+                            {'attempt': attempt, 'unit': index, 'error': e})
+                error = e
+        else:
+            return error
+
+        with self._lock:
+            self.state['done'].append(index)
+            self._save_checkpoint()
+            self._copied += self.state['units'][index]
+            elapsed = max(time.time() - self._started, 1)
+            LOG.info(_("Migrated %(copied)d of %(total)d bytes "
+                       "(%(rate)d bytes/s)."),
+                     {'copied': self._copied, 'total': self._total,
+                      'rate': self._copied / elapsed})
+
+    def _rsync(self, *args):
+        utils.execute("rsync", *(RSYNC_OPTIONS + args),
+                      run_as_root=True, root_helper="sudo")
+
+
 class VolumeMountPoint(object):
 
     def __init__(self, device_path, mount_point):
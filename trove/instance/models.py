@@ -24,6 +24,7 @@ from sqlalchemy import func
 from novaclient import exceptions as nova_exceptions
 from oslo_config.cfg import NoSuchOptError
 from oslo_log import log as logging
+from oslo_utils import timeutils as oslo_timeutils
 
 from trove.backup.models import Backup
 from trove.common import cfg
@@ -49,6 +50,7 @@ from trove.datastore.models import DBDatastoreVersionMetadata
 from trove.db import get_db_api
 from trove.db import models as dbmodels
 from trove.extensions.security_group.models import SecurityGroup
+from trove.instance import server_cache
 from trove.instance.tasks import InstanceTask
 from trove.instance.tasks import InstanceTasks
 from trove.module import models as module_models
@@ -850,7 +852,7 @@ class Instance(BuiltInstance):
                availability_zone=None, nics=None,
                configuration_id=None, slave_of_id=None, cluster_config=None,
                replica_count=None, volume_type=None, modules=None,
-               locality=None, region_name=None):
+               locality=None, region_name=None, restore_point=None):
 
         region_name = region_name or CONF.os_region_name
 
@@ -913,12 +915,34 @@ class Instance(BuiltInstance):
                     raise exception.LocalStorageNotSpecified(flavor=flavor_id)
                 target_size = flavor.ephemeral  # ephemeral_Storage
 
+        restore_time = None
+        if restore_point:
+            restore_point = dict(restore_point)
+            source_id = restore_point.pop('instance_id', None)
+            if restore_point.get('timestamp'):
+                try:
+                    restore_time = oslo_timeutils.normalize_time(
+                        oslo_timeutils.parse_isotime(
+                            restore_point['timestamp']))
+                except ValueError as e:
+                    raise exception.BadRequest(msg=str(e))
+            if not backup_id:
+                backup_id = Backup.get_restore_base(
+                    context, source_id, restore_time).id
+            call_args['restore_point'] = (restore_point.get('timestamp') or
+                                          restore_point.get('position'))
+
         if backup_id:
             call_args['backup_id'] = backup_id
             backup_info = Backup.get_by_id(context, backup_id)
             if not backup_info.is_done_successfuly:
                 raise exception.BackupNotCompleteError(
                     backup_id=backup_id, state=backup_info.state)
+            if restore_time and restore_time < backup_info.updated:
+                raise exception.BadRequest(_(
+                    "The restore point %(point)s is older than backup "
+                    "%(backup)s.") % {'point': restore_point['timestamp'],
+                                      'backup': backup_id})
 
             if backup_info.size > target_size:
                 raise exception.BackupTooLarge(
@@ -980,6 +1004,12 @@ class Instance(BuiltInstance):
         if locality:
             call_args['locality'] = locality
 
+        # Pooled instances are booted on the default networks of the
+        # region, without any placement constraint.
+        from_pool = not (slave_of_id or cluster_config or nics or
+                         availability_zone or locality or
+                         region_name != CONF.os_region_name)
+
         if not nics:
             nics = []
         if CONF.default_neutron_networks:
@@ -1001,7 +1031,7 @@ class Instance(BuiltInstance):
                 modules.append(aa_module)
         module_models.Modules.validate(
             modules, datastore.id, datastore_version.id)
-        module_list = module_views.convert_modules_to_list(modules)
+        module_list = module_views.convert_modules_to_list(modules, context)
 
         def _create_resources():
 
@@ -1017,15 +1047,23 @@ class Instance(BuiltInstance):
             root_passwords = []
             root_password = None
             for instance_index in range(0, instance_count):
-                db_info = DBInstance.create(
-                    name=name, flavor_id=flavor_id, tenant_id=context.tenant,
-                    volume_size=volume_size,
-                    datastore_version_id=datastore_version.id,
-                    task_status=InstanceTasks.BUILDING,
-                    configuration_id=configuration_id,
-                    slave_of_id=slave_of_id, cluster_id=cluster_id,
-                    shard_id=shard_id, type=instance_type,
-                    region_id=region_name)
+                db_info = None
+                if from_pool:
+                    db_info = GuestPool.claim(
+                        context, datastore_version.id, flavor_id,
+                        volume_size, volume_type, name=name,
+                        configuration_id=configuration_id)
+                pooled = db_info is not None
+                if not pooled:
+                    db_info = DBInstance.create(
+                        name=name, flavor_id=flavor_id,
+                        tenant_id=context.tenant, volume_size=volume_size,
+                        datastore_version_id=datastore_version.id,
+                        task_status=InstanceTasks.BUILDING,
+                        configuration_id=configuration_id,
+                        slave_of_id=slave_of_id, cluster_id=cluster_id,
+                        shard_id=shard_id, type=instance_type,
+                        region_id=region_name)
                 LOG.debug("Tenant %(tenant)s created new Trove instance "
                           "%(db)s in region %(region)s.",
                           {'tenant': context.tenant, 'db': db_info.id,
@@ -1050,9 +1088,15 @@ class Instance(BuiltInstance):
 
                 config = Configuration(context, configuration_id)
                 overrides = config.get_configuration_overrides()
-                service_status = InstanceServiceStatus.create(
-                    instance_id=instance_id,
-                    status=tr_instance.ServiceStatuses.NEW)
+                if pooled:
+                    service_status = InstanceServiceStatus.find_by(
+                        instance_id=instance_id)
+                    service_status.set_status(tr_instance.ServiceStatuses.NEW)
+                    service_status.save()
+                else:
+                    service_status = InstanceServiceStatus.create(
+                        instance_id=instance_id,
+                        status=tr_instance.ServiceStatuses.NEW)
 
                 if CONF.trove_dns_support:
                     dns_client = create_dns_client(context)
@@ -1075,7 +1119,7 @@ class Instance(BuiltInstance):
                 volume_size, backup_id, availability_zone, root_password,
                 nics, overrides, slave_of_id, cluster_config,
                 volume_type=volume_type, modules=module_list,
-                locality=locality)
+                locality=locality, restore_point=restore_point)
 
             return SimpleInstance(context, db_info, service_status,
                                   root_password, locality=locality)
@@ -1182,6 +1226,12 @@ class Instance(BuiltInstance):
         self.update_db(task_status=InstanceTasks.REBOOTING)
         task_api.API(self.context).restart(self.id)
 
+    def log_archive_action(self, enable):
+        self.validate_can_perform_action()
+        LOG.info(_LI("Setting log archiving on instance %(id)s to "
+                     "%(enable)s."), {'id': self.id, 'enable': enable})
+        self.get_guest().log_archive_action(enable)
+
     def detach_replica(self):
         self.validate_can_perform_action()
         LOG.info(_LI("Detaching instance %s from its replication source."),
@@ -1429,10 +1479,20 @@ class Instance(BuiltInstance):
                                            datastore_version.id)
 
 
-def create_server_list_matcher(server_list):
+def create_server_list_matcher(server_list, refresh_servers=None):
     # Returns a method which finds a server from the given list.
+    # A server missing from a cached list may have been created since the
+    # list was made, so the list is replaced once by the one returned by
+    # refresh_servers, if given.
+    refresh = [refresh_servers]
+
     def find_server(instance_id, server_id):
         matches = [server for server in server_list if server.id == server_id]
+        if not matches and refresh[0] and server_id:
+            server_list[:] = refresh[0]()
+            refresh[0] = None
+            matches = [server for server in server_list
+                       if server.id == server_id]
         if len(matches) == 1:
             return matches[0]
         elif len(matches) < 1:
@@ -1455,15 +1515,27 @@ class Instances(object):
     DEFAULT_LIMIT = CONF.instances_page_size
 
     @staticmethod
-    def load(context, include_clustered, instance_ids=None):
+    def load(context, include_clustered, instance_ids=None, refresh=False):
 
         def load_simple_instance(context, db_info, status, **kwargs):
             return SimpleInstance(context, db_info, status)
 
+        def list_servers(**search_opts):
+            if search_opts:
+                return client.servers.list(search_opts=search_opts)
+            return client.servers.list()
+
+        def refresh_servers():
+            return server_cache.server_lists.get(
+                (context.tenant, CONF.os_region_name), list_servers,
+                refresh=True)
+
         if context is None:
             raise TypeError(_("Argument context not defined."))
         client = create_nova_client(context)
-        servers = client.servers.list()
+        servers = server_cache.server_lists.get(
+            (context.tenant, CONF.os_region_name), list_servers,
+            refresh=refresh)
         query_opts = {'tenant_id': context.tenant,
                       'deleted': False}
         if not include_clustered:
@@ -1481,7 +1553,11 @@ class Instances(object):
                                                   marker=context.marker)
         next_marker = data_view.next_page_marker
 
-        find_server = create_server_list_matcher(servers)
+        # Without the cache, or on refresh, the servers were just listed.
+        find_server = create_server_list_matcher(
+            servers,
+            refresh_servers if CONF.server_list_cache_ttl and not refresh
+            else None)
         for db in db_infos:
             LOG.debug("Checking for db [id=%(db_id)s, "
                       "compute_instance_id=%(instance_id)s].",
@@ -1753,6 +1829,30 @@ class DBInstanceFault(dbmodels.DatabaseModelBase):
         self.details = details
 
 
+class DBInstanceTaskHistory(dbmodels.DatabaseModelBase):
+    _data_fields = ['instance_id', 'task', 'step', 'started', 'duration',
+                    'error', 'created', 'updated']
+
+
+def save_task_history(instance_id, task, timings):
+    """Record how long each step of a task took on an instance.
+
+    The history is informational: failing to record it is logged and does
+    not fail the task.
+    """
+    try:
+        for timing in timings:
+            error = ("%s" % timing.error)[:255] if timing.error else None
+            DBInstanceTaskHistory.create(
+                instance_id=instance_id, task=task, step=timing.name,
+                started=timing.started, duration=timing.duration,
+                error=error)
+    except Exception:
+        LOG.exception(_("Could not record the history of task %(task)s "
+                        "on instance %(id)s."),
+                      {'task': task, 'id': instance_id})
+
+
 class InstanceServiceStatus(dbmodels.DatabaseModelBase):
     _data_fields = ['instance_id', 'status_id', 'status_description',
                     'updated_at']
@@ -1795,11 +1895,97 @@ class InstanceServiceStatus(dbmodels.DatabaseModelBase):
     status = property(get_status, set_status)
 
 
+class DBGuestPool(dbmodels.DatabaseModelBase):
+    """A pool of booted instances for one datastore version, flavor and
+    volume, kept by the Task Manager to speed up the create requests.
+    """
+    _data_fields = ['id', 'datastore_version_id', 'flavor_id', 'volume_size',
+                    'volume_type', 'size', 'idle_timeout', 'claimed',
+                    'missed', 'created', 'updated']
+
+
+class DBGuestPoolMember(dbmodels.DatabaseModelBase):
+    _data_fields = ['id', 'pool_id', 'instance_id', 'status', 'created',
+                    'updated']
+
+
+class GuestPoolMemberStatus(object):
+    # The server is booting, or its guest agent did not answer yet.
+    BUILDING = 'BUILDING'
+    # The guest agent is running and waiting for a prepare.
+    READY = 'READY'
+
+
+class GuestPool(object):
+    """Hand over the ready instances of the guest pools to tenants."""
+
+    # Number of ready members tried before giving up on a pool.
+    CLAIM_ATTEMPTS = 3
+
+    @classmethod
+    def find(cls, datastore_version_id, flavor_id, volume_size, volume_type):
+        try:
+            return DBGuestPool.find_by(
+                datastore_version_id=datastore_version_id,
+                flavor_id=flavor_id, volume_size=volume_size,
+                volume_type=volume_type)
+        except exception.ModelNotFoundError:
+            return None
+
+    @classmethod
+    def count(cls, pool, field):
+        DBGuestPool.query().filter_by(id=pool.id).update(
+            {field: getattr(DBGuestPool, field) + 1},
+            synchronize_session=False)
+
+    @classmethod
+    def claim(cls, context, datastore_version_id, flavor_id, volume_size,
+              volume_type, **values):
+        """Take a ready instance out of the matching pool, if there is one.
+
+        :returns: the record of the instance, which now belongs to the
+                  tenant of the context, or None.
+        """
+        if not CONF.guest_pool_interval:
+            return None
+        pool = cls.find(datastore_version_id, flavor_id, volume_size,
+                        volume_type)
+        if not pool:
+            return None
+
+        members = DBGuestPoolMember.query().filter_by(
+            pool_id=pool.id, status=GuestPoolMemberStatus.READY).order_by(
+            DBGuestPoolMember.created).limit(cls.CLAIM_ATTEMPTS).all()
+        for member in members:
+            # Other API workers and the Task Manager may race for the
+            # member; only the one that removes its row gets the instance.
+            if not DBGuestPoolMember.query().filter_by(
+                    id=member.id,
+                    status=GuestPoolMemberStatus.READY).delete():
+                continue
+            cls.count(pool, 'claimed')
+            db_info = DBInstance.find_by(id=member.instance_id,
+                                         deleted=False)
+            db_info.update(tenant_id=context.tenant,
+                           task_status=InstanceTasks.BUILDING,
+                           created=timeutils.utcnow(), **values)
+            LOG.info(_LI("Instance %(instance)s taken from guest pool "
+                         "%(pool)s."),
+                     {'instance': db_info.id, 'pool': pool.id})
+            return db_info
+
+        cls.count(pool, 'missed')
+        return None
+
+
 def persisted_models():
     return {
         'instance': DBInstance,
         'instance_faults': DBInstanceFault,
+        'instance_task_history': DBInstanceTaskHistory,
         'service_statuses': InstanceServiceStatus,
+        'guest_pools': DBGuestPool,
+        'guest_pool_members': DBGuestPoolMember,
     }
 
 
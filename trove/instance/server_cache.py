@@ -0,0 +1,142 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Server lists shared by the instance list requests.
+
+Listing the instances needs the status of their servers, and dashboards
+list the instances every few seconds.  The servers listed from Nova are
+kept per tenant (and for all the tenants, for the admin views) and reused
+for server_list_cache_ttl seconds.  For as long again the list is still
+used while it is refreshed in the background, after that it is refreshed
+before being used.  A refresh only lists the servers changed since the
+previous one, except every server_list_cache_full_refresh seconds.  The
+lists that have not been used for that long are dropped.
+"""
+
+import collections
+from datetime import timedelta
+import time
+
+import eventlet
+from eventlet import semaphore
+from oslo_log import log as logging
+
+from trove.common import cfg
+from trove.common.i18n import _
+from trove.common import timeutils
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+ALL_TENANTS = '*'
+
+# Servers changed just before a listing may only show in the next one, so
+# the changes are listed from a bit before the previous listing.
+CHANGES_SINCE_OVERLAP = 10
+
+
+class _ServerList(object):
+
+    def __init__(self):
+        self.servers = collections.OrderedDict()
+        self.lock = semaphore.Semaphore()
+        self.listed_at = None
+        self.listed_since = None
+        self.full_listed_at = None
+
+    @property
+    def age(self):
+        if self.listed_at is None:
+            return float('inf')
+        return time.time() - self.listed_at
+
+
+class ServerListCache(object):
+
+    def __init__(self):
+        self._lists = {}
+        self._evicted_at = 0
+
+    def get(self, key, list_servers, refresh=False):
+        """Return the servers of a tenant, as listed by list_servers.
+
+        :param key: (tenant or ALL_TENANTS, region) of the servers.
+        :param list_servers: called with Nova search options, if any, to
+                             list the servers.
+        :param refresh: list the servers again rather than use the cache.
+        """
+        ttl = CONF.server_list_cache_ttl
+        if not ttl:
+            return list_servers()
+        self._evict(ttl)
+        server_list = self._lists.setdefault(key, _ServerList())
+        if refresh:
+            self._refresh(server_list, list_servers, full=True)
+        elif server_list.age >= 2 * ttl:
+            self._refresh(server_list, list_servers)
+        elif server_list.age >= ttl and not server_list.lock.locked():
+            eventlet.spawn_n(self._refresh_in_background, key, server_list,
+                             list_servers)
+        return list(server_list.servers.values())
+
+    def clear(self):
+        self._lists.clear()
+
+    def _evict(self, ttl):
+        """Drop the lists that would have to be listed in full anyway."""
+        now = time.time()
+        if now - self._evicted_at < ttl:
+            return
+        self._evicted_at = now
+        max_age = max(2 * ttl, CONF.server_list_cache_full_refresh)
+        for key, server_list in list(self._lists.items()):
+            if server_list.age >= max_age and not server_list.lock.locked():
+                del self._lists[key]
+
+    def _refresh_in_background(self, key, server_list, list_servers):
+        try:
+            self._refresh(server_list, list_servers)
+        except Exception:
+            LOG.exception(_("Could not refresh the servers of %s."), key)
+
+    def _refresh(self, server_list, list_servers, full=False):
+        with server_list.lock:
+            if not full and server_list.age < CONF.server_list_cache_ttl:
+                # Refreshed while waiting for the lock.
+                return
+            listed_at = time.time()
+            listed_since = timeutils.utcnow()
+            full = (full or server_list.full_listed_at is None or
+                    listed_at - server_list.full_listed_at >=
+                    CONF.server_list_cache_full_refresh)
+            if full:
+                server_list.servers = collections.OrderedDict(
+                    (server.id, server) for server in list_servers())
+                server_list.full_listed_at = listed_at
+            else:
+                changes_since = timeutils.isotime(
+                    server_list.listed_since -
+                    timedelta(seconds=CHANGES_SINCE_OVERLAP))
+                for server in list_servers(**{'changes-since': changes_since}):
+                    if server.status == 'DELETED':
+                        server_list.servers.pop(server.id, None)
+                    else:
+                        server_list.servers[server.id] = server
+            server_list.listed_at = listed_at
+            server_list.listed_since = listed_since
+
+
+server_lists = ServerListCache()
@@ -90,6 +90,7 @@ class InstanceController(wsgi.Controller):
             self._action_promote_to_replica_source,
             'eject_replica_source': self._action_eject_replica_source,
             'reset_status': self._action_reset_status,
+            'log_archive': self._action_log_archive,
         }
         selected_action = None
         action_name = None
@@ -177,6 +178,11 @@ class InstanceController(wsgi.Controller):
             instance.eject_replica_source()
         return wsgi.Result(None, 202)
 
+    def _action_log_archive(self, context, req, instance, body):
+        self.authorize_instance_action(context, 'log_archive', instance)
+        instance.log_archive_action(bool(body['log_archive']['enable']))
+        return wsgi.Result(None, 202)
+
     def _action_reset_status(self, context, req, instance, body):
         if 'force_delete' in body['reset_status']:
             self.authorize_instance_action(context, 'force_delete', instance)
@@ -201,7 +207,9 @@ class InstanceController(wsgi.Controller):
         policy.authorize_on_tenant(context, 'instance:index')
         clustered_q = req.GET.get('include_clustered', '').lower()
         include_clustered = clustered_q == 'true'
-        servers, marker = models.Instances.load(context, include_clustered)
+        refresh = req.GET.get('fresh', '').lower() == 'true'
+        servers, marker = models.Instances.load(context, include_clustered,
+                                                refresh=refresh)
         view = views.InstancesView(servers, req=req)
         paged = pagination.SimplePaginatedDataView(req.url, 'instances', view,
                                                    marker)
@@ -318,11 +326,11 @@ class InstanceController(wsgi.Controller):
             volume_size = None
             volume_type = None
 
+        backup_id = None
+        restore_point = None
         if 'restorePoint' in body['instance']:
-            backupRef = body['instance']['restorePoint']['backupRef']
-            backup_id = utils.get_id_from_href(backupRef)
-        else:
-            backup_id = None
+            restore_point, backup_id = self._restore_point_parse(
+                body['instance']['restorePoint'])
 
         availability_zone = body['instance'].get('availability_zone')
         nics = body['instance'].get('nics')
@@ -357,11 +365,46 @@ class InstanceController(wsgi.Controller):
                                           volume_type=volume_type,
                                           modules=modules,
                                           locality=locality,
-                                          region_name=region_name)
+                                          region_name=region_name,
+                                          restore_point=restore_point)
 
         view = views.InstanceDetailView(instance, req=req)
         return wsgi.Result(view.data(), 200)
 
+    def _restore_point_parse(self, restore_point_ref):
+        """Split the restorePoint of a create request into the point to
+        recover to and the backup to start from.
+
+        A backupRef alone restores that backup.  A timestamp or a log
+        position replays the archived logs on top of the backup, which
+        Trove picks among the full backups of instanceRef when no
+        backupRef is given.
+        """
+        backup_id = None
+        if restore_point_ref.get('backupRef'):
+            backup_id = utils.get_id_from_href(restore_point_ref['backupRef'])
+        restore_point = dict(
+            (key, restore_point_ref[key])
+            for key in ('timestamp', 'position') if restore_point_ref.get(key))
+        if not restore_point:
+            if not backup_id:
+                raise exception.BadRequest(_(
+                    "The restorePoint requires a backupRef, or a timestamp "
+                    "or position to recover to."))
+            return None, backup_id
+        if not backup_id:
+            if not restore_point_ref.get('instanceRef'):
+                raise exception.BadRequest(_(
+                    "The restorePoint requires a backupRef or the "
+                    "instanceRef of the instance to recover."))
+            if 'timestamp' not in restore_point:
+                raise exception.BadRequest(_(
+                    "A restorePoint without backupRef requires a "
+                    "timestamp."))
+            restore_point['instance_id'] = utils.get_id_from_href(
+                restore_point_ref['instanceRef'])
+        return restore_point, backup_id
+
     def _configuration_parse(self, context, body):
         if 'configuration' in body['instance']:
             configuration_ref = body['instance']['configuration']
@@ -533,7 +576,7 @@ class InstanceController(wsgi.Controller):
         modules = module_models.Modules.load_by_ids(context, module_ids)
         module_models.Modules.validate(
             modules, instance.datastore.id, instance.datastore_version.id)
-        module_list = module_views.convert_modules_to_list(modules)
+        module_list = module_views.convert_modules_to_list(modules, context)
         client = create_guest_client(context, id)
         result_list = client.module_apply(module_list)
         models.Instance.add_instance_modules(context, id, modules)
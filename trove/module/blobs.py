@@ -0,0 +1,90 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Module contents kept in object storage and referenced by their MD5.
+
+Large modules are uploaded once to the Swift account of the context that
+applies them, in an object named after the MD5 of the contents, and the
+RPC messages to the guests only carry a reference to that object.  The
+object is encrypted with a key derived from the module encryption key and
+the MD5, so a tenant cannot read the contents of admin modules from its own
+account; the key travels in the reference.
+"""
+
+import hashlib
+import hmac
+
+from oslo_log import log as logging
+from oslo_utils import encodeutils
+from swiftclient.client import ClientException
+
+from trove.common import cfg
+from trove.common import crypto_utils as cu
+from trove.common import exception
+from trove.common.i18n import _
+from trove.common.remote import create_swift_client
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+
+def is_external(contents):
+    """Whether the contents should be stored rather than sent inline."""
+    min_size = CONF.module_storage_min_size
+    return bool(min_size and contents and len(contents) >= min_size)
+
+
+def _object_key(md5):
+    return hmac.new(encodeutils.to_utf8(CONF.module_aes_cbc_key),
+                    encodeutils.to_utf8(md5), hashlib.sha256).hexdigest()
+
+
+def store(context, md5, contents):
+    """Make sure the contents are in object storage.
+
+    The object is looked up every time rather than remembered, since it can
+    be deleted from the account behind our back.
+
+    :returns: the reference sent to the guests instead of the contents.
+    """
+    client = create_swift_client(context)
+    container = CONF.module_storage_container
+    key = _object_key(md5)
+    try:
+        client.head_object(container, md5)
+    except ClientException as e:
+        if e.http_status != 404:
+            raise
+        LOG.debug("Uploading the contents of module %(md5)s "
+                  "(%(size)d bytes) to container %(container)s.",
+                  {'md5': md5, 'size': len(contents),
+                   'container': container})
+        client.put_container(container)
+        client.put_object(container, md5, cu.encrypt_data(contents, key))
+    return {'container': container, 'name': md5, 'md5': md5, 'key': key}
+
+
+def fetch(context, reference):
+    """Download and check the contents of a reference (on the guest)."""
+    client = create_swift_client(context)
+    headers, data = client.get_object(reference['container'],
+                                      reference['name'])
+    contents = cu.decrypt_data(data, reference['key'])
+    if hashlib.md5(contents).hexdigest() != reference['md5']:
+        raise exception.TroveError(
+            _("The contents of module %s in object storage are "
+              "corrupt.") % reference['md5'])
+    return contents
@@ -15,6 +15,7 @@
 #
 
 from trove.datastore import models as datastore_models
+from trove.module import blobs
 from trove.module import models
 
 
@@ -108,9 +109,18 @@ class DetailedModuleView(ModuleView):
         return {"module": module_dict}
 
 
-def convert_modules_to_list(modules):
+def convert_modules_to_list(modules, context=None):
+    """Build the module list sent to the guests.
+
+    With a context, large contents are replaced by a reference to a copy
+    in object storage (see trove.module.blobs).
+    """
     module_list = []
     for module in modules:
         module_info = DetailedModuleView(module).data(include_contents=True)
+        module_dict = module_info['module']
+        if context and blobs.is_external(module_dict['contents']):
+            module_dict['contents_ref'] = blobs.store(
+                context, module.md5, module_dict.pop('contents'))
         module_list.append(module_info)
     return module_list
@@ -187,16 +187,27 @@ class API(object):
 
         self._cast("delete_backup", version=version, backup_id=backup_id)
 
+    def consolidate_backup(self, backup_id, chain_ids):
+        LOG.debug("Making async call to consolidate backups %(chain)s into "
+                  "backup: %(id)s", {'chain': chain_ids, 'id': backup_id})
+        version = self.API_BASE_VERSION
+
+        self._cast("consolidate_backup", version=version,
+                   backup_id=backup_id, chain_ids=chain_ids)
+
     def create_instance(self, instance_id, name, flavor,
                         image_id, databases, users, datastore_manager,
                         packages, volume_size, backup_id=None,
                         availability_zone=None, root_password=None,
                         nics=None, overrides=None, slave_of_id=None,
                         cluster_config=None, volume_type=None,
-                        modules=None, locality=None):
+                        modules=None, locality=None, restore_point=None):
 
         LOG.debug("Making async call to create instance %s ", instance_id)
         version = self.API_BASE_VERSION
+        kwargs = {}
+        if restore_point:
+            kwargs['restore_point'] = restore_point
         self._cast("create_instance", version=version,
                    instance_id=instance_id, name=name,
                    flavor=self._transform_obj(flavor),
@@ -214,7 +225,7 @@ class API(object):
                    slave_of_id=slave_of_id,
                    cluster_config=cluster_config,
                    volume_type=volume_type,
-                   modules=modules, locality=locality)
+                   modules=modules, locality=locality, **kwargs)
 
     def create_cluster(self, cluster_id):
         LOG.debug("Making async call to create cluster %s ", cluster_id)
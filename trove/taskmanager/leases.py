@@ -0,0 +1,310 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Leases on the long running tasks of the Task Manager.
+
+A leased task is recorded in the task_leases table before it runs and the
+row is removed once the task returns.  The worker running a task renews
+its lease; when the worker dies the lease expires and the next Task
+Manager polling the table claims the task and starts it again.  Claims
+are conditional updates, so a task is only ever owned by one worker.
+Every worker caps the number of tasks it runs at the same time and leaves
+the others in the table for a worker with room for them.
+
+The same table keeps the periodic tasks that work on shared data from
+running on every worker: a row per task records until when its last run
+holds it, see TaskLeases.claim_periodic.
+"""
+
+from datetime import timedelta
+import functools
+import inspect
+import json
+import os
+import socket
+
+from eventlet import greenthread
+from oslo_log import log as logging
+from oslo_service import loopingcall
+
+from trove.cluster.models import DBCluster
+from trove.cluster.tasks import ClusterTasks
+from trove.common import cfg
+from trove.common.context import TroveContext
+from trove.common import crypto_utils as cu
+from trove.common import exception
+from trove.common.i18n import _
+from trove.common import timeutils
+from trove.db import models as dbmodels
+from trove.instance.models import DBInstance
+from trove.instance.tasks import InstanceTasks
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+# Prefix of the ids of the rows held by periodic tasks, which are never
+# taken over as they are not tasks waiting to run.
+PERIODIC_PREFIX = 'periodic:'
+
+
+class DBTaskLease(dbmodels.DatabaseModelBase):
+    _data_fields = ['id', 'method', 'resource_id', 'payload', 'owner',
+                    'lease_expires', 'attempts', 'created', 'updated']
+
+
+def persisted_models():
+    return {
+        'task_leases': DBTaskLease,
+    }
+
+
+def leased_task(resource_key=None):
+    """Run a Task Manager method under a lease if leases are enabled.
+
+    :param resource_key: the argument holding the id of the instance or
+                         cluster the task works on.  A task taken over from
+                         a dead worker is dropped if that resource has no
+                         task in progress any more.
+    """
+    def decorator(func):
+        arg_names = inspect.getargspec(func).args[2:]
+
+        @functools.wraps(func)
+        def wrapper(manager, context, *args, **kwargs):
+            if not CONF.taskmanager_task_leases:
+                return func(manager, context, *args, **kwargs)
+            kwargs.update(zip(arg_names, args))
+            resource_id = kwargs.get(resource_key) if resource_key else None
+            if isinstance(resource_id, list):
+                resource_id = resource_id[0]
+            manager.task_leases.start(func.__name__, resource_id, context,
+                                      kwargs)
+
+        wrapper.leased_func = func
+        wrapper.resource_key = resource_key
+        return wrapper
+    return decorator
+
+
+class TaskLeases(object):
+    """Run the leased tasks of one Task Manager worker."""
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.running = 0
+
+    @property
+    def owner(self):
+        # The manager is built before the service forks its workers.
+        return '%s:%d' % (socket.gethostname(), os.getpid())
+
+    @staticmethod
+    def _lease_end():
+        return timeutils.utcnow() + timedelta(
+            seconds=CONF.taskmanager_task_lease_time)
+
+    def start(self, method, resource_id, context, kwargs):
+        """Record a task and run it if this worker has room for it."""
+        lease = DBTaskLease.create(
+            method=method, resource_id=resource_id,
+            payload=self._dump(context, kwargs), owner=None,
+            lease_expires=timeutils.utcnow(), attempts=0)
+        if self._claim(lease):
+            self._run(lease.id, method, context, kwargs)
+        else:
+            LOG.info(_("Task %(method)s %(id)s is left to another Task "
+                       "Manager, this one already runs %(running)d tasks."),
+                     {'method': method, 'id': lease.id,
+                      'running': self.running})
+
+    def take_over(self):
+        """Claim the waiting tasks and the tasks whose lease expired.
+
+        :returns: the number of tasks started.
+        """
+        free = CONF.taskmanager_max_concurrent_tasks - self.running
+        if free <= 0:
+            return 0
+        leases = DBTaskLease.query().filter(
+            DBTaskLease.lease_expires <= timeutils.utcnow(),
+            ~DBTaskLease.id.startswith(PERIODIC_PREFIX)).order_by(
+            DBTaskLease.created).limit(free).all()
+        started = 0
+        for lease in leases:
+            if lease.attempts >= CONF.taskmanager_task_max_attempts:
+                self._give_up(lease)
+                continue
+            if not self._claim(lease):
+                continue
+            try:
+                context, kwargs = self._load(lease.payload)
+                orphaned = lease.owner is not None
+                if orphaned and not self._in_progress(lease):
+                    LOG.info(_("Dropping task %(method)s %(id)s of "
+                               "%(owner)s, %(resource)s has no task in "
+                               "progress."),
+                             {'method': lease.method, 'id': lease.id,
+                              'owner': lease.owner,
+                              'resource': lease.resource_id})
+                    self._release(lease.id)
+                    continue
+            except Exception:
+                LOG.exception(_("Error loading task %s."), lease.id)
+                self._release(lease.id)
+                continue
+            if orphaned:
+                LOG.warning(_("Taking over task %(method)s %(id)s from "
+                              "%(owner)s (attempt %(attempt)d)."),
+                            {'method': lease.method, 'id': lease.id,
+                             'owner': lease.owner,
+                             'attempt': lease.attempts + 1})
+            greenthread.spawn_n(self._run, lease.id, lease.method, context,
+                                kwargs)
+            started += 1
+        return started
+
+    def claim_periodic(self, method, spacing):
+        """Take the current run of a periodic task.
+
+        Every worker of every Task Manager runs the periodic tasks; the
+        ones that must only run once per interval call this first and run
+        only when it returns True.  The run is held a little less than the
+        interval, so that the worker which won it also wins the next one
+        despite the drift of its timer.
+        """
+        lease_id = PERIODIC_PREFIX + method
+        now = timeutils.utcnow()
+        held_until = now + timedelta(seconds=spacing * 0.9)
+        claimed = DBTaskLease.query().filter(
+            DBTaskLease.id == lease_id,
+            DBTaskLease.lease_expires <= now).update(
+            {'owner': self.owner, 'lease_expires': held_until,
+             'updated': now}, synchronize_session=False)
+        if claimed:
+            return True
+        if DBTaskLease.query().filter_by(id=lease_id).count():
+            return False
+        # First run of the task ever, the workers race for the insert.
+        try:
+            DBTaskLease.create(id=lease_id, method=method, payload='',
+                               owner=self.owner, lease_expires=held_until,
+                               attempts=0)
+        except exception.DBConstraintError:
+            return False
+        return True
+
+    def _claim(self, lease):
+        """Take a free slot of this worker and the lease of the task."""
+        if self.running >= CONF.taskmanager_max_concurrent_tasks:
+            return False
+        # Count the task before talking to the database, which yields.
+        self.running += 1
+        now = timeutils.utcnow()
+        claimed = DBTaskLease.query().filter(
+            DBTaskLease.id == lease.id,
+            DBTaskLease.attempts == lease.attempts,
+            DBTaskLease.lease_expires <= now).update(
+            {'owner': self.owner, 'lease_expires': self._lease_end(),
+             'attempts': lease.attempts + 1, 'updated': now},
+            synchronize_session=False)
+        if not claimed:
+            self.running -= 1
+        return bool(claimed)
+
+    def _release(self, lease_id):
+        DBTaskLease.query().filter_by(id=lease_id, owner=self.owner).delete(
+            synchronize_session=False)
+        self.running -= 1
+
+    def _run(self, lease_id, method, context, kwargs):
+        renewal = loopingcall.FixedIntervalLoopingCall(self._renew, lease_id)
+        interval = max(1, CONF.taskmanager_task_lease_time // 3)
+        renewal.start(interval=interval, initial_delay=interval)
+        try:
+            func = getattr(type(self.manager), method).leased_func
+            return func(self.manager, context, **kwargs)
+        finally:
+            renewal.stop()
+            try:
+                self._release(lease_id)
+            except Exception:
+                # The lease expires and the task is run again.
+                self.running -= 1
+                LOG.exception(_("Error releasing the lease of task %s."),
+                              lease_id)
+            greenthread.spawn_n(self.take_over)
+
+    def _renew(self, lease_id):
+        try:
+            renewed = DBTaskLease.query().filter_by(
+                id=lease_id, owner=self.owner).update(
+                {'lease_expires': self._lease_end(),
+                 'updated': timeutils.utcnow()},
+                synchronize_session=False)
+        except Exception:
+            # Keep trying, the lease is still ours until it expires.
+            LOG.exception(_("Error renewing the lease of task %s."),
+                          lease_id)
+            return
+        if not renewed:
+            LOG.warning(_("Task %s was taken over by another Task Manager."),
+                        lease_id)
+            raise loopingcall.LoopingCallDone()
+
+    def _give_up(self, lease):
+        if DBTaskLease.query().filter_by(
+                id=lease.id, attempts=lease.attempts).delete(
+                synchronize_session=False):
+            LOG.error(_("Giving up task %(method)s %(id)s of %(resource)s "
+                        "after %(attempts)d attempts."),
+                      {'method': lease.method, 'id': lease.id,
+                       'resource': lease.resource_id,
+                       'attempts': lease.attempts})
+
+    def _in_progress(self, lease):
+        if not lease.resource_id:
+            return True
+        resource_key = getattr(type(self.manager), lease.method).resource_key
+        try:
+            if resource_key == 'cluster_id':
+                cluster = DBCluster.find_by(id=lease.resource_id,
+                                            deleted=False)
+                return cluster.task_id != ClusterTasks.NONE.code
+            db_info = DBInstance.find_by(id=lease.resource_id, deleted=False)
+        except exception.ModelNotFoundError:
+            return False
+        return not (db_info.task_status == InstanceTasks.NONE or
+                    db_info.task_status.is_error)
+
+    @staticmethod
+    def _dump(context, kwargs):
+        payload = json.dumps({'context': context.to_dict(),
+                              'kwargs': kwargs})
+        if CONF.enable_secure_rpc_messaging:
+            # The arguments carry passwords, keep them as safe as on the
+            # message bus.
+            payload = cu.encode_data(cu.encrypt_data(
+                payload, CONF.taskmanager_rpc_encr_key))
+        return payload
+
+    @staticmethod
+    def _load(payload):
+        if CONF.enable_secure_rpc_messaging:
+            payload = cu.decrypt_data(cu.decode_data(payload),
+                                      CONF.taskmanager_rpc_encr_key)
+        payload = json.loads(payload)
+        return (TroveContext.from_dict(payload['context']),
+                payload['kwargs'])
@@ -13,11 +13,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from eventlet import greenpool
 from oslo_log import log as logging
 from oslo_service import periodic_task
 from oslo_utils import importutils
 
 from trove.backup.models import Backup
+from trove.backup import retention
 import trove.common.cfg as cfg
 from trove.common.context import TroveContext
 from trove.common import exception
@@ -31,8 +33,10 @@ from trove.common.strategies.cluster import strategy
 from trove.datastore.models import DatastoreVersion
 import trove.extensions.mgmt.instances.models as mgmtmodels
 from trove.instance.tasks import InstanceTasks
+from trove.taskmanager import leases
 from trove.taskmanager import models
 from trove.taskmanager.models import FreshInstanceTasks, BuiltInstanceTasks
+from trove.taskmanager import pool as guest_pool
 from trove.quota.quota import QUOTAS
 
 LOG = logging.getLogger(__name__)
@@ -47,11 +51,15 @@ class Manager(periodic_task.PeriodicTasks):
             user=CONF.nova_proxy_admin_user,
             auth_token=CONF.nova_proxy_admin_pass,
             tenant=CONF.nova_proxy_admin_tenant_id)
+        self.task_leases = leases.TaskLeases(self)
+        if CONF.backup_retention_interval:
+            retention.check_config()
         if CONF.exists_notification_transformer:
             self.exists_transformer = importutils.import_object(
                 CONF.exists_notification_transformer,
                 context=self.admin_context)
 
+    @leases.leased_task('instance_id')
     def resize_volume(self, context, instance_id, new_size):
         with EndNotification(context):
             instance_tasks = models.BuiltInstanceTasks.load(context,
@@ -270,6 +278,11 @@ class Manager(periodic_task.PeriodicTasks):
         with EndNotification(context):
             models.BackupTasks.delete_backup(context, backup_id)
 
+    def consolidate_backup(self, context, backup_id, chain_ids):
+        with EndNotification(context, consolidated_backup_id=backup_id):
+            models.BackupTasks.consolidate_backup(context, backup_id,
+                                                  chain_ids)
+
     def create_backup(self, context, backup_info, instance_id):
         with EndNotification(context, backup_id=backup_info['id']):
             instance_tasks = models.BuiltInstanceTasks.load(context,
@@ -289,9 +302,7 @@ class Manager(periodic_task.PeriodicTasks):
         else:
             ids = [instance_id]
             root_passwords = [root_password]
-        replica_number = 0
-        replica_backup_id = backup_id
-        replica_backup_created = False
+        replica_count = len(ids)
         replicas = []
 
         master_instance_tasks = BuiltInstanceTasks.load(context, slave_of_id)
@@ -299,34 +310,55 @@ class Manager(periodic_task.PeriodicTasks):
         scheduler_hints = srv_grp.ServerGroup.convert_to_hint(server_group)
         LOG.debug("Using scheduler hints for locality: %s", scheduler_hints)
 
+        # The snapshot of the master is taken once, for the first replica,
+        # and restored on all the replicas of the batch at the same time.
+        first_replica = FreshInstanceTasks.load(context, ids[0])
+        snapshot = first_replica.get_replication_master_snapshot(
+            context, slave_of_id, flavor, backup_id, replica_number=1,
+            replica_count=replica_count)
+        replica_backup_id = snapshot['dataset']['snapshot_id']
+        replica_backup_created = (replica_backup_id is not None)
+
+        def _create_replica(replica_index, instance_tasks=None,
+                            snapshot=None):
+            replica_number = replica_index + 1
+            LOG.debug("Creating replica %(num)d of %(count)d.",
+                      {'num': replica_number, 'count': replica_count})
+            if instance_tasks is None:
+                instance_tasks = FreshInstanceTasks.load(
+                    context, ids[replica_index])
+                snapshot = instance_tasks.get_replication_master_snapshot(
+                    context, slave_of_id, flavor, replica_backup_id,
+                    replica_number=replica_number,
+                    replica_count=replica_count)
+            instance_tasks.create_instance(
+                flavor, image_id, databases, users, datastore_manager,
+                packages, volume_size, replica_backup_id,
+                availability_zone, root_passwords[replica_index],
+                nics, overrides, None, snapshot, volume_type,
+                modules, scheduler_hints)
+            return instance_tasks
+
         try:
-            for replica_index in range(0, len(ids)):
+            pool = greenpool.GreenPool(replica_count)
+            threads = [pool.spawn(_create_replica, 0, first_replica,
+                                  snapshot)]
+            for replica_index in range(1, replica_count):
+                threads.append(pool.spawn(_create_replica, replica_index))
+
+            error = None
+            for replica_index, thread in enumerate(threads):
                 try:
-                    replica_number += 1
-                    LOG.debug("Creating replica %(num)d of %(count)d.",
-                              {'num': replica_number, 'count': len(ids)})
-                    instance_tasks = FreshInstanceTasks.load(
-                        context, ids[replica_index])
-                    snapshot = instance_tasks.get_replication_master_snapshot(
-                        context, slave_of_id, flavor, replica_backup_id,
-                        replica_number=replica_number)
-                    replica_backup_id = snapshot['dataset']['snapshot_id']
-                    replica_backup_created = (replica_backup_id is not None)
-                    instance_tasks.create_instance(
-                        flavor, image_id, databases, users, datastore_manager,
-                        packages, volume_size, replica_backup_id,
-                        availability_zone, root_passwords[replica_index],
-                        nics, overrides, None, snapshot, volume_type,
-                        modules, scheduler_hints)
-                    replicas.append(instance_tasks)
-                except Exception:
-                    # if it's the first replica, then we shouldn't continue
+                    replicas.append(thread.wait())
+                except Exception as ex:
+                    error = error or ex
                     LOG.exception(_(
                         "Could not create replica %(num)d of %(count)d."),
-                        {'num': replica_number, 'count': len(ids)})
-                    if replica_number == 1:
-                        raise
+                        {'num': replica_index + 1, 'count': replica_count})
+            if not replicas:
+                raise error
 
+            # The snapshot is deleted once all the replicas restored it.
             for replica in replicas:
                 replica.wait_for_instance(CONF.restore_usage_timeout, flavor)
 
@@ -338,7 +370,8 @@ class Manager(periodic_task.PeriodicTasks):
                          image_id, databases, users, datastore_manager,
                          packages, volume_size, backup_id, availability_zone,
                          root_password, nics, overrides, slave_of_id,
-                         cluster_config, volume_type, modules, locality):
+                         cluster_config, volume_type, modules, locality,
+                         restore_point=None):
         if slave_of_id:
             self._create_replication_slave(context, instance_id, name,
                                            flavor, image_id, databases, users,
@@ -361,16 +394,19 @@ class Manager(periodic_task.PeriodicTasks):
                                            availability_zone, root_password,
                                            nics, overrides, cluster_config,
                                            None, volume_type, modules,
-                                           scheduler_hints)
+                                           scheduler_hints,
+                                           restore_point=restore_point)
             timeout = (CONF.restore_usage_timeout if backup_id
                        else CONF.usage_timeout)
             instance_tasks.wait_for_instance(timeout, flavor)
 
+    @leases.leased_task('instance_id')
     def create_instance(self, context, instance_id, name, flavor,
                         image_id, databases, users, datastore_manager,
                         packages, volume_size, backup_id, availability_zone,
                         root_password, nics, overrides, slave_of_id,
-                        cluster_config, volume_type, modules, locality):
+                        cluster_config, volume_type, modules, locality,
+                        restore_point=None):
         with EndNotification(context,
                              instance_id=(instance_id[0]
                                           if isinstance(instance_id, list)
@@ -381,7 +417,7 @@ class Manager(periodic_task.PeriodicTasks):
                                   backup_id, availability_zone,
                                   root_password, nics, overrides, slave_of_id,
                                   cluster_config, volume_type, modules,
-                                  locality)
+                                  locality, restore_point=restore_point)
 
     def upgrade(self, context, instance_id, datastore_version_id):
         instance_tasks = models.BuiltInstanceTasks.load(context, instance_id)
@@ -389,11 +425,13 @@ class Manager(periodic_task.PeriodicTasks):
         with EndNotification(context):
             instance_tasks.upgrade(datastore_version)
 
+    @leases.leased_task('cluster_id')
     def create_cluster(self, context, cluster_id):
         with EndNotification(context, cluster_id=cluster_id):
             cluster_tasks = models.load_cluster_tasks(context, cluster_id)
             cluster_tasks.create_cluster(context, cluster_id)
 
+    @leases.leased_task('cluster_id')
     def grow_cluster(self, context, cluster_id, new_instance_ids):
         cluster_tasks = models.load_cluster_tasks(context, cluster_id)
         cluster_tasks.grow_cluster(context, cluster_id, new_instance_ids)
@@ -416,6 +454,7 @@ class Manager(periodic_task.PeriodicTasks):
             cluster_tasks = models.load_cluster_tasks(context, cluster_id)
             cluster_tasks.delete_cluster(context, cluster_id)
 
+    @leases.leased_task()
     def reapply_module(self, context, module_id, md5, include_clustered,
                        batch_size, batch_delay, force):
         models.ModuleTasks.reapply_module(
@@ -441,6 +480,24 @@ class Manager(periodic_task.PeriodicTasks):
                     usage = QUOTAS.get_quota_usage(quota)
                     DBaaSQuotas(self.admin_context, quota, usage).notify()
 
+    if CONF.backup_retention_interval:
+        @periodic_task.periodic_task(spacing=CONF.backup_retention_interval)
+        def enforce_backup_retention(self, context):
+            if self.task_leases.claim_periodic(
+                    'enforce_backup_retention',
+                    CONF.backup_retention_interval):
+                retention.BackupRetention(self.admin_context).run()
+
+    if CONF.guest_pool_interval:
+        @periodic_task.periodic_task(spacing=CONF.guest_pool_interval)
+        def maintain_guest_pools(self, context):
+            guest_pool.GuestPoolManager(self.admin_context).run()
+
+    if CONF.taskmanager_task_leases:
+        @periodic_task.periodic_task
+        def take_over_task_leases(self, context):
+            self.task_leases.take_over()
+
     def __getattr__(self, name):
         """
         We should only get here if Python couldn't find a "real" method.
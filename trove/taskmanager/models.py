@@ -17,6 +17,7 @@ import time
 import traceback
 
 from cinderclient import exceptions as cinder_exceptions
+from eventlet import greenpool
 from eventlet import greenthread
 from eventlet.timeout import Timeout
 from novaclient import exceptions as nova_exceptions
@@ -26,6 +27,7 @@ from swiftclient.client import ClientException
 from trove.backup import models as bkup_models
 from trove.backup.models import Backup
 from trove.backup.models import DBBackup
+from trove.backup import consolidation
 from trove.backup.state import BackupState
 from trove.cluster.models import Cluster
 from trove.cluster.models import DBCluster
@@ -56,9 +58,9 @@ from trove.common.notification import (
 import trove.common.remote as remote
 from trove.common.remote import create_cinder_client
 from trove.common.remote import create_dns_client
-from trove.common.remote import create_guest_client
 from trove.common import server_group as srv_grp
 from trove.common.strategies.cluster import strategy
+from trove.common.strategies.storage import get_storage_strategy
 from trove.common import template
 from trove.common import timeutils
 from trove.common import utils
@@ -66,6 +68,7 @@ from trove.common.utils import try_recover
 from trove.extensions.mysql import models as mysql_models
 from trove.extensions.security_group.models import SecurityGroup
 from trove.extensions.security_group.models import SecurityGroupRule
+from trove.guestagent.fanout import GuestFanout
 from trove.instance import models as inst_models
 from trove.instance.models import BuiltInstance
 from trove.instance.models import DBInstance
@@ -78,6 +81,7 @@ from trove.module import models as module_models
 from trove.module import views as module_views
 from trove.quota.quota import run_with_quotas
 from trove import rpc
+from trove.taskmanager import steps
 
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
@@ -210,6 +214,24 @@ class ClusterTasks(Cluster):
     def get_ip(cls, instance):
         return instance.get_visible_ip_addresses()[0]
 
+    def call_guests(self, context, instances, method, kwargs=None):
+        """Call a guest method on all the instances concurrently.
+
+        :param kwargs: the arguments of the calls, or a function returning
+                       the arguments for an instance.
+        :returns: the FanoutResults of the calls.
+        :raises: the error of the first call that failed, once all the
+                 calls are done.
+        """
+        guests = dict((instance.id, self.get_guest(instance))
+                      for instance in instances)
+        calls = [(instance.id, method,
+                  kwargs(instance) if callable(kwargs) else kwargs)
+                 for instance in instances]
+        results = GuestFanout(context, client_factory=guests.get).run(calls)
+        results.raise_on_error()
+        return results
+
     def _all_instances_ready(self, instance_ids, cluster_id,
                              shard_id=None):
         """Wait for all instances to get READY."""
@@ -458,42 +480,119 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
                         datastore_manager, packages, volume_size,
                         backup_id, availability_zone, root_password, nics,
                         overrides, cluster_config, snapshot, volume_type,
-                        modules, scheduler_hints):
+                        modules, scheduler_hints, restore_point=None):
         # It is the caller's responsibility to ensure that
         # FreshInstanceTasks.wait_for_instance is called after
         # create_instance to ensure that the proper usage event gets sent
 
         LOG.info(_("Creating instance %s."), self.id)
-        security_groups = None
+        graph = steps.StepGraph('create')
+        if self.db_info.compute_instance_id:
+            # The instance was taken from a guest pool, its server is
+            # already running.
+            graph.add('server', lambda: self._take_over_pooled_server(
+                datastore_manager))
+        else:
+            graph.add('security_groups', lambda: self._create_security_groups(
+                datastore_manager))
+            graph.add('server', lambda security_groups:
+                      self._create_server_and_volume(
+                          flavor['id'], image_id, security_groups,
+                          datastore_manager, volume_size, availability_zone,
+                          nics, volume_type, scheduler_hints),
+                      requires=['security_groups'])
+        graph.add('config', lambda: self._render_config(flavor))
+        graph.add('backup', lambda: self._load_backup_info(backup_id,
+                                                           restore_point))
+
+        def prepare(server, config, backup):
+            self._guest_prepare(flavor['ram'], server, packages, databases,
+                                users, backup, config.config_contents,
+                                root_password, overrides, cluster_config,
+                                snapshot, modules)
+            # Recorded with the prepare call, so that a failure of the
+            # steps running alongside it does not lose it.
+            if root_password:
+                self.report_root_enabled()
+
+        graph.add('prepare', prepare, requires=['server', 'config', 'backup'])
+        # The DNS entry is created while the guest is being prepared, as
+        # soon as the server has an address.  It is started with the
+        # prepare call so that a DNS failure never keeps the guest from
+        # being prepared: retrying DNS is much easier than re-sending the
+        # prepare call.  A failed step leaves the task status in error, as
+        # a DNS failure after the prepare call always did.
+        graph.add('dns', lambda **results: self._create_instance_dns_entry(),
+                  requires=['server', 'config', 'backup'])
+        try:
+            graph.run()
+        finally:
+            inst_models.save_task_history(self.id, graph.name, graph.timings)
 
-        if CONF.trove_security_groups_support:
-            try:
-                security_groups = self._create_secgroup(datastore_manager)
-            except Exception as e:
-                msg = (_("Error creating security group for instance: %s") %
-                       self.id)
-                err = inst_models.InstanceTasks.BUILDING_ERROR_SEC_GROUP
-                self._log_and_raise(e, msg, err)
-            else:
-                LOG.debug("Successfully created security group for "
-                          "instance: %s", self.id)
+        if not self.db_info.task_status.is_error:
+            self.reset_task_status()
 
+    def _load_backup_info(self, backup_id, restore_point=None):
+        if backup_id is None:
+            return None
+        backup = bkup_models.Backup.get_by_id(self.context, backup_id)
+        backup_info = {'id': backup_id,
+                       'instance_id': backup.instance_id,
+                       'location': backup.location,
+                       'type': backup.backup_type,
+                       'checksum': backup.checksum,
+                       }
+        if restore_point:
+            # The guest replays the archived logs of the backed-up
+            # instance up to this point once the backup is restored.
+            backup_info['restore_point'] = restore_point
+        return backup_info
+
+    def _create_instance_dns_entry(self):
+        try:
+            self._create_dns_entry()
+        except Exception as e:
+            msg = _("Error creating DNS entry for instance: %s") % self.id
+            err = inst_models.InstanceTasks.BUILDING_ERROR_DNS
+            self._log_and_raise(e, msg, err)
+
+    def create_pooled_instance(self, flavor_id, image_id, datastore_manager,
+                               volume_size, volume_type):
+        """Boot the server of a guest pool instance.
+
+        The guest is not prepared; create_instance does it once the
+        instance has been handed over to a tenant.
+        """
+        LOG.info(_("Creating pooled instance %s."), self.id)
+        security_groups = self._create_security_groups(datastore_manager)
+        nics = [{"net-id": net_id} for net_id in CONF.default_neutron_networks]
+        self._create_server_and_volume(flavor_id, image_id, security_groups,
+                                       datastore_manager, volume_size, None,
+                                       nics, volume_type, None)
+
+    def _create_security_groups(self, datastore_manager):
+        if not CONF.trove_security_groups_support:
+            return None
+        try:
+            security_groups = self._create_secgroup(datastore_manager)
+        except Exception as e:
+            msg = (_("Error creating security group for instance: %s") %
+                   self.id)
+            err = inst_models.InstanceTasks.BUILDING_ERROR_SEC_GROUP
+            self._log_and_raise(e, msg, err)
+        LOG.debug("Successfully created security group for "
+                  "instance: %s", self.id)
+        return security_groups
+
+    def _create_server_and_volume(self, flavor_id, image_id, security_groups,
+                                  datastore_manager, volume_size,
+                                  availability_zone, nics, volume_type,
+                                  scheduler_hints):
         files = self.get_injected_files(datastore_manager)
         cinder_volume_type = volume_type or CONF.cinder_volume_type
         if use_nova_server_volume:
-            volume_info = self._create_server_volume(
-                flavor['id'],
-                image_id,
-                security_groups,
-                datastore_manager,
-                volume_size,
-                availability_zone,
-                nics,
-                files,
-                scheduler_hints)
-        else:
-            volume_info = self._create_server_volume_individually(
-                flavor['id'],
+            return self._create_server_volume(
+                flavor_id,
                 image_id,
                 security_groups,
                 datastore_manager,
@@ -501,42 +600,32 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
                 availability_zone,
                 nics,
                 files,
-                cinder_volume_type,
                 scheduler_hints)
-
-        config = self._render_config(flavor)
-
-        backup_info = None
-        if backup_id is not None:
-                backup = bkup_models.Backup.get_by_id(self.context, backup_id)
-                backup_info = {'id': backup_id,
-                               'instance_id': backup.instance_id,
-                               'location': backup.location,
-                               'type': backup.backup_type,
-                               'checksum': backup.checksum,
-                               }
-        self._guest_prepare(flavor['ram'], volume_info,
-                            packages, databases, users, backup_info,
-                            config.config_contents, root_password,
-                            overrides,
-                            cluster_config, snapshot, modules)
-
-        if root_password:
-            self.report_root_enabled()
-
-        if not self.db_info.task_status.is_error:
-            self.reset_task_status()
-
-        # when DNS is supported, we attempt to add this after the
-        # instance is prepared.  Otherwise, if DNS fails, instances
-        # end up in a poorer state and there's no tooling around
-        # re-sending the prepare call; retrying DNS is much easier.
+        return self._create_server_volume_individually(
+            flavor_id,
+            image_id,
+            security_groups,
+            datastore_manager,
+            volume_size,
+            availability_zone,
+            nics,
+            files,
+            cinder_volume_type,
+            scheduler_hints)
+
+    def _take_over_pooled_server(self, datastore_manager):
+        """Give the server of a pooled instance the name of the instance."""
+        LOG.debug("Instance %(id)s uses pooled server %(server)s.",
+                  {'id': self.id, 'server': self.db_info.compute_instance_id})
         try:
-            self._create_dns_entry()
-        except Exception as e:
-            msg = _("Error creating DNS entry for instance: %s") % self.id
-            err = inst_models.InstanceTasks.BUILDING_ERROR_DNS
-            self._log_and_raise(e, msg, err)
+            self.nova_client.servers.update(
+                self.db_info.compute_instance_id,
+                name=self.hostname or self.name)
+        except Exception:
+            LOG.exception(_("Could not rename the server of instance %s."),
+                          self.id)
+        return {'device_path': self.device_path,
+                'mount_point': CONF.get(datastore_manager).mount_point}
 
     def attach_replication_slave(self, snapshot, flavor):
         LOG.debug("Calling attach_replication_slave for %s.", self.id)
@@ -551,7 +640,8 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
             self._log_and_raise(e, msg, err)
 
     def get_replication_master_snapshot(self, context, slave_of_id, flavor,
-                                        backup_id=None, replica_number=1):
+                                        backup_id=None, replica_number=1,
+                                        replica_count=1):
         # First check to see if we need to take a backup
         master = BuiltInstanceTasks.load(context, slave_of_id)
         backup_required = master.backup_required_for_replication()
@@ -578,6 +668,19 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
             'replica_number': replica_number,
         }
 
+        # A seed stream serves a single replica: replicas created together
+        # all restore the one backup taken for the first of them instead.
+        if (backup_required and replica_count == 1 and
+                self._seed_replica_directly(master)):
+            try:
+                return self._get_replication_master_seed(
+                    master, snapshot_info, flavor)
+            except Exception:
+                LOG.exception(_("Could not stream the data of instance "
+                                "%(master)s to new replica %(replica)s, "
+                                "using a backup instead."),
+                              {'master': slave_of_id, 'replica': self.id})
+
         replica_backup_id = None
         if backup_required:
             # Only do a backup if it's the first replica
@@ -646,6 +749,36 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
             # the delete worked, so just log the original problem with create
             self._log_and_raise(e_create, msg_create, err)
 
+    @staticmethod
+    def _seed_replica_directly(master):
+        manager_conf = CONF.get(master.datastore_version.manager)
+        if getattr(manager_conf, 'replica_seeding', None) != 'direct':
+            return False
+        if not master.guest.can_seed_replica():
+            LOG.debug("The guest of instance %s cannot seed replicas, "
+                      "using a backup instead.", master.id)
+            return False
+        return True
+
+    def _get_replication_master_seed(self, master, snapshot_info, flavor):
+        """Return a replication snapshot whose data the replica gets
+        straight from the master, without a backup.
+        """
+        LOG.debug("Seeding replica %(replica)s directly from %(master)s.",
+                  {'replica': self.id, 'master': master.id})
+        snapshot_info = dict(snapshot_info, id=None, seed=True,
+                             datastore=master.datastore.name,
+                             datastore_version=master.datastore_version.name)
+        snapshot = master.get_replication_snapshot(
+            snapshot_info, flavor=master.flavor_id)
+        if not snapshot['dataset'].get('seed'):
+            raise TroveError(_("Instance %s cannot stream its data to a "
+                               "replica.") % master.id)
+        snapshot.update({
+            'config': self._render_replica_config(flavor).config_contents
+        })
+        return snapshot
+
     def report_root_enabled(self):
         mysql_models.RootHistory.create(self.context, self.id, 'root')
 
@@ -1009,20 +1142,29 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
         cidr = CONF.trove_security_group_rule_cidr
 
         if protocol == 'icmp':
-            SecurityGroupRule.create_sec_group_rule(
-                s_group, 'icmp', None, None,
-                cidr, self.context, self.region_name)
+            rules = [(None, None)]
         else:
+            rules = []
             for port_or_range in set(ports):
                 try:
                     from_, to_ = (None, None)
                     from_, to_ = port_or_range[0], port_or_range[-1]
-                    SecurityGroupRule.create_sec_group_rule(
-                        s_group, protocol, int(from_), int(to_),
-                        cidr, self.context, self.region_name)
-                except (ValueError, TroveError):
+                    rules.append((int(from_), int(to_)))
+                except ValueError:
                     set_error_and_raise([from_, to_])
 
+        # The rules do not depend on each other, they are created at once.
+        def create_rule(rule):
+            try:
+                return SecurityGroupRule.create_sec_group_rule(
+                    s_group, protocol, rule[0], rule[1],
+                    cidr, self.context, self.region_name)
+            except TroveError:
+                set_error_and_raise(rule)
+
+        pool = greenpool.GreenPool(max(len(rules), 1))
+        list(pool.imap(create_rule, rules))
+
 
 class BuiltInstanceTasks(BuiltInstance, NotifyMixin, ConfigurationMixin):
     """
@@ -1159,6 +1301,9 @@ class BuiltInstanceTasks(BuiltInstance, NotifyMixin, ConfigurationMixin):
                               self.id)
                 raise
 
+        if snapshot_info.get('seed'):
+            # Streamed to the replica, no backup is stored.
+            return _get_replication_snapshot()
         return run_with_quotas(self.context.tenant, {'backups': 1},
                                _get_replication_snapshot)
 
@@ -1480,6 +1625,49 @@ class BackupTasks(object):
             backup.delete()
         LOG.info(_("Deleted backup %s successfully."), backup_id)
 
+    @classmethod
+    def consolidate_backup(cls, context, backup_id, chain_ids):
+        """Merge a chain of backups into a synthetic full backup."""
+        LOG.info(_("Consolidating backups %(chain)s into backup %(id)s."),
+                 {'chain': chain_ids, 'id': backup_id})
+        backup = bkup_models.Backup.get_by_id(context, backup_id)
+        chain = [bkup_models.Backup.get_by_id(context, link_id)
+                 for link_id in chain_ids]
+        storage = get_storage_strategy(CONF.storage_strategy,
+                                       CONF.storage_namespace)(context)
+        consolidator = consolidation.ChainConsolidator(storage, backup_id)
+
+        backup.state = BackupState.BUILDING
+        backup.save()
+        try:
+            checksum, location, size = consolidator.consolidate(chain)
+        except Exception:
+            LOG.exception(_("Error consolidating backup %s."), backup_id)
+            backup.state = BackupState.FAILED
+            backup.save()
+            raise TroveError(_("Failed to consolidate backup %s.")
+                             % backup_id)
+
+        backup.location = location
+        backup.checksum = checksum
+        backup.size = size
+        backup.backup_type = consolidation.CONSOLIDATED_BACKUP_TYPE
+        backup.backup_timestamp = chain[-1].backup_timestamp
+        backup.state = BackupState.COMPLETED
+        backup.save()
+
+        # Incrementals taken after the chain now build on the synthetic
+        # backup, so the old chain can be deleted without them.
+        children = DBBackup.find_all(parent_id=chain[-1].id,
+                                     deleted=False).all()
+        for child in children:
+            LOG.debug("Re-parenting backup %(child)s onto %(id)s.",
+                      {'child': child.id, 'id': backup_id})
+            consolidator.reparent(child, location, checksum)
+            child.parent_id = backup_id
+            child.save()
+        LOG.info(_("Consolidated backup %s successfully."), backup_id)
+
 
 class ModuleTasks(object):
 
@@ -1502,11 +1690,13 @@ class ModuleTasks(object):
         # Process all the instances
         instance_modules = module_models.InstanceModules.load_all(
             context, module_id=module_id, md5=md5)
-        total_count = instance_modules.count()
         reapply_count = 0
         skipped_count = 0
+        failed_count = 0
+        instance_ids = []
         if instance_modules:
-            module_list = module_views.convert_modules_to_list(modules)
+            module_list = module_views.convert_modules_to_list(
+                modules, context)
             for instance_module in instance_modules:
                 instance_id = instance_module.instance_id
                 if (instance_module.md5 != current_md5 or force) and (
@@ -1519,25 +1709,10 @@ class ModuleTasks(object):
                             module_models.Modules.validate(
                                 modules, instance.datastore.id,
                                 instance.datastore_version.id)
-                            client = create_guest_client(context, instance_id)
-                            client.module_apply(module_list)
-                            Instance.add_instance_modules(
-                                context, instance_id, modules)
-                            reapply_count += 1
+                            instance_ids.append(instance_id)
                         except exception.ModuleInvalid as ex:
                             LOG.info(_("Skipping: %s"), ex)
                             skipped_count += 1
-
-                        # Sleep if we've fired off too many in a row.
-                        if (batch_size and
-                                not reapply_count % batch_size and
-                                (reapply_count + skipped_count) < total_count):
-                            LOG.debug("Applied module to %(cnt)d of %(total)d "
-                                      "instances - sleeping for %(batch)ds",
-                                      {'cnt': reapply_count,
-                                       'total': total_count,
-                                       'batch': batch_delay})
-                            time.sleep(batch_delay)
                     else:
                         LOG.debug("Instance '%s' not found or doesn't match "
                                   "criteria, skipping reapply.", instance_id)
@@ -1546,9 +1721,32 @@ class ModuleTasks(object):
                     LOG.debug("Instance '%s' does not match "
                               "criteria, skipping reapply.", instance_id)
                     skipped_count += 1
+
+        # Apply the module to a batch of instances at the same time and
+        # sleep between the batches.
+        batch_size = batch_size or len(instance_ids) or 1
+        fanout = GuestFanout(context, concurrency=batch_size)
+        for start in range(0, len(instance_ids), batch_size):
+            if start:
+                LOG.debug("Applied module to %(cnt)d of %(total)d "
+                          "instances - sleeping for %(batch)ds",
+                          {'cnt': start, 'total': len(instance_ids),
+                           'batch': batch_delay})
+                time.sleep(batch_delay)
+            results = fanout.run(
+                (instance_id, 'module_apply', {'modules': module_list})
+                for instance_id in instance_ids[start:start + batch_size])
+            for result in results:
+                if result.failed:
+                    failed_count += 1
+                else:
+                    Instance.add_instance_modules(
+                        context, result.instance_id, modules)
+                    reapply_count += 1
         LOG.info(_("Reapplied module to %(num)d instances "
-                   "(skipped %(skip)d)."),
-                 {'num': reapply_count, 'skip': skipped_count})
+                   "(skipped %(skip)d, failed %(fail)d)."),
+                 {'num': reapply_count, 'skip': skipped_count,
+                  'fail': failed_count})
 
 
 class ResizeVolumeAction(object):
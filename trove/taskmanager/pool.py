@@ -0,0 +1,257 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Guest pools: instances booted ahead of the create requests.
+
+The Task Manager keeps every pool filled with instances whose server is
+running and whose guest agent answers, but which are not prepared yet.
+Instance.create takes one of them over (see GuestPool.claim) and the Task
+Manager then only has to send the prepare call.
+"""
+
+from datetime import timedelta
+
+from eventlet import greenthread
+from oslo_log import log as logging
+
+from trove.common import cfg
+from trove.common import exception
+from trove.common.i18n import _
+from trove.common import instance as tr_instance
+from trove.common.remote import create_guest_client
+from trove.common import timeutils
+from trove.datastore import models as datastore_models
+from trove.instance.models import DBGuestPool
+from trove.instance.models import DBGuestPoolMember
+from trove.instance.models import DBInstance
+from trove.instance.models import GuestPoolMemberStatus
+from trove.instance.models import InstanceServiceStatus
+from trove.instance.tasks import InstanceTasks
+from trove.taskmanager.models import BuiltInstanceTasks
+from trove.taskmanager.models import FreshInstanceTasks
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+POOL_INSTANCE_NAME = 'pool-%s'
+
+
+class GuestPools(object):
+    """Manage the definitions of the guest pools."""
+
+    @classmethod
+    def update(cls, datastore, datastore_version, flavor_id, size,
+               volume_size=None, volume_type=None, idle_timeout=0):
+        size = int(size)
+        idle_timeout = int(idle_timeout)
+        if size < 0 or idle_timeout < 0:
+            raise exception.BadRequest(
+                _("The size and idle timeout of a guest pool cannot be "
+                  "negative."))
+        ds, ds_version = datastore_models.get_datastore_version(
+            type=datastore, version=datastore_version)
+        volume_size = int(volume_size) if volume_size else None
+        try:
+            pool = DBGuestPool.find_by(datastore_version_id=ds_version.id,
+                                       flavor_id=flavor_id,
+                                       volume_size=volume_size,
+                                       volume_type=volume_type)
+            pool.update(size=size, idle_timeout=idle_timeout)
+        except exception.ModelNotFoundError:
+            pool = DBGuestPool.create(datastore_version_id=ds_version.id,
+                                      flavor_id=flavor_id,
+                                      volume_size=volume_size,
+                                      volume_type=volume_type, size=size,
+                                      idle_timeout=idle_timeout, claimed=0,
+                                      missed=0)
+        return pool
+
+    @classmethod
+    def delete(cls, pool_id):
+        pool = DBGuestPool.find_by(id=pool_id)
+        if DBGuestPoolMember.find_all(pool_id=pool_id).count():
+            raise exception.BadRequest(
+                _("Guest pool %s still has instances, set its size to 0 "
+                  "and wait for them to be deleted.") % pool_id)
+        pool.delete()
+
+    @classmethod
+    def load_all(cls):
+        """Return the pools with the number of members in each state."""
+        pools = []
+        for pool in DBGuestPool.find_all().all():
+            members = DBGuestPoolMember.find_all(pool_id=pool.id).all()
+            info = dict((field, pool[field])
+                        for field in DBGuestPool._data_fields)
+            for status in (GuestPoolMemberStatus.BUILDING,
+                           GuestPoolMemberStatus.READY):
+                info[status.lower()] = len(
+                    [member for member in members if member.status == status])
+            pools.append(info)
+        return pools
+
+
+class GuestPoolManager(object):
+    """Replenish the guest pools and reap their instances.
+
+    The instances are created with the context of the Task Manager and
+    only handed over to a tenant in the database, so the pools need
+    all compute resources to live in a single service tenant.
+    """
+
+    def __init__(self, context):
+        self.context = context
+
+    def run(self):
+        """Maintain all the pools.
+
+        :returns: the statistics of every pool.
+        """
+        report = []
+        for pool in DBGuestPool.find_all().all():
+            try:
+                report.append(self.maintain(pool))
+            except Exception:
+                LOG.exception(_("Error maintaining guest pool %s."), pool.id)
+        return report
+
+    def maintain(self, pool):
+        now = timeutils.utcnow()
+        build_timeout = timedelta(seconds=CONF.guest_pool_build_timeout)
+        idle_timeout = timedelta(seconds=pool.idle_timeout)
+        stats = {'pool_id': pool.id, 'size': pool.size, 'reaped': 0,
+                 'started': 0, 'claimed': pool.claimed,
+                 'missed': pool.missed}
+
+        ready = []
+        building = []
+        for member in DBGuestPoolMember.find_all(pool_id=pool.id).all():
+            if member.status == GuestPoolMemberStatus.BUILDING:
+                status = self._check_building(member)
+                if status == GuestPoolMemberStatus.READY:
+                    if self._transition(member, GuestPoolMemberStatus.READY):
+                        ready.append(member)
+                elif status and now - member.created < build_timeout:
+                    building.append(member)
+                else:
+                    stats['reaped'] += self._reap(member, _("build failed"))
+            elif pool.idle_timeout and now - member.updated > idle_timeout:
+                # Do not keep guests around forever, they get stale.
+                stats['reaped'] += self._reap(member, _("idle"))
+            else:
+                ready.append(member)
+
+        excess = len(ready) + len(building) - pool.size
+        if excess > 0:
+            ready.sort(key=lambda member: member.updated)
+            for member in ready[:excess]:
+                stats['reaped'] += self._reap(member, _("pool shrunk"))
+            ready = ready[excess:]
+
+        missing = pool.size - len(ready) - len(building)
+        for index in range(min(missing, CONF.guest_pool_build_batch)):
+            self._build(pool)
+            stats['started'] += 1
+
+        stats['ready'] = len(ready)
+        stats['building'] = len(building) + stats['started']
+        LOG.info(_("Guest pool %(pool_id)s: %(ready)d ready, %(building)d "
+                   "building (%(started)d started), %(reaped)d reaped, "
+                   "%(claimed)d claimed and %(missed)d missed requests."),
+                 stats)
+        return stats
+
+    def _check_building(self, member):
+        """Return the status of a building member, None if it failed."""
+        try:
+            db_info = DBInstance.find_by(id=member.instance_id,
+                                         deleted=False)
+        except exception.ModelNotFoundError:
+            return None
+        if db_info.task_status.is_error:
+            return None
+        if not db_info.compute_instance_id:
+            return GuestPoolMemberStatus.BUILDING
+        try:
+            create_guest_client(self.context, member.instance_id).rpc_ping()
+        except Exception:
+            return GuestPoolMemberStatus.BUILDING
+        db_info.update(task_status=InstanceTasks.NONE)
+        return GuestPoolMemberStatus.READY
+
+    def _transition(self, member, status):
+        # A ready member may have been claimed by the API in the meantime.
+        return DBGuestPoolMember.query().filter_by(
+            id=member.id, status=member.status).update(
+            {'status': status, 'updated': timeutils.utcnow()},
+            synchronize_session=False)
+
+    def _build(self, pool):
+        ds_version = datastore_models.DatastoreVersion.load_by_uuid(
+            pool.datastore_version_id)
+        db_info = DBInstance.create(
+            name=POOL_INSTANCE_NAME % pool.id, flavor_id=pool.flavor_id,
+            tenant_id=self.context.tenant, volume_size=pool.volume_size,
+            datastore_version_id=ds_version.id,
+            task_status=InstanceTasks.BUILDING,
+            region_id=CONF.os_region_name)
+        InstanceServiceStatus.create(instance_id=db_info.id,
+                                     status=tr_instance.ServiceStatuses.NEW)
+        DBGuestPoolMember.create(pool_id=pool.id, instance_id=db_info.id,
+                                 status=GuestPoolMemberStatus.BUILDING)
+        LOG.debug("Building instance %(instance)s for guest pool %(pool)s.",
+                  {'instance': db_info.id, 'pool': pool.id})
+        greenthread.spawn_n(self._boot, db_info.id, pool, ds_version)
+
+    def _boot(self, instance_id, pool, ds_version):
+        try:
+            instance_tasks = FreshInstanceTasks.load(self.context,
+                                                     instance_id)
+            instance_tasks.create_pooled_instance(
+                pool.flavor_id, ds_version.image_id, ds_version.manager,
+                pool.volume_size, pool.volume_type)
+        except Exception:
+            # The member is reaped by the next run.
+            LOG.exception(_("Error creating instance %(instance)s of guest "
+                            "pool %(pool)s."),
+                          {'instance': instance_id, 'pool': pool.id})
+
+    def _reap(self, member, reason):
+        """Delete a member and its instance.
+
+        :returns: 1 if the member was deleted, 0 if it was claimed first.
+        """
+        if not DBGuestPoolMember.query().filter_by(
+                id=member.id, status=member.status).delete():
+            return 0
+        LOG.info(_("Deleting instance %(instance)s of guest pool %(pool)s "
+                   "(%(reason)s)."), {'instance': member.instance_id,
+                                      'pool': member.pool_id,
+                                      'reason': reason})
+        try:
+            try:
+                instance_tasks = BuiltInstanceTasks.load(self.context,
+                                                         member.instance_id)
+            except exception.UnprocessableEntity:
+                instance_tasks = FreshInstanceTasks.load(self.context,
+                                                         member.instance_id)
+            instance_tasks.delete_async()
+        except exception.ModelNotFoundError:
+            pass
+        except Exception:
+            LOG.exception(_("Error deleting instance %s."),
+                          member.instance_id)
+        return 1
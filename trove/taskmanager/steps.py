@@ -0,0 +1,106 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""Run the steps of a task concurrently, in the order they depend on."""
+
+import collections
+import sys
+import time
+
+import eventlet
+from eventlet import queue
+from oslo_log import log as logging
+import six
+
+from trove.common import exception
+from trove.common.i18n import _
+from trove.common import timeutils
+
+LOG = logging.getLogger(__name__)
+
+StepTiming = collections.namedtuple(
+    'StepTiming', ['name', 'started', 'duration', 'error'])
+
+
+class StepGraph(object):
+    """The steps of a task and the steps each of them requires.
+
+    A step is started in its own green thread as soon as the steps it
+    requires have completed, and is passed their results as keyword
+    arguments.  Once a step has failed no other step is started; the
+    running ones are waited for and the first error is raised again.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.results = {}
+        self.timings = []
+        self._steps = collections.OrderedDict()
+
+    def add(self, name, func, requires=()):
+        """Add a step; the steps it requires must have been added first."""
+        for required in requires:
+            if required not in self._steps:
+                raise exception.TroveError(
+                    _("Step %(step)s of %(task)s requires the unknown step "
+                      "%(required)s.") %
+                    {'step': name, 'task': self.name, 'required': required})
+        self._steps[name] = (func, tuple(requires))
+
+    def run(self):
+        """Run all the steps and return their results by name."""
+        pending = collections.OrderedDict(self._steps)
+        done = queue.LightQueue()
+        running = 0
+        error = None
+        while pending or running:
+            if error is None:
+                for name, (func, requires) in list(pending.items()):
+                    if all(required in self.results
+                           for required in requires):
+                        del pending[name]
+                        eventlet.spawn_n(self._run_step, name, func,
+                                         requires, done)
+                        running += 1
+            if not running:
+                break
+            exc_info = done.get()
+            running -= 1
+            if exc_info and error is None:
+                error = exc_info
+        LOG.debug("%(task)s steps: %(timings)s",
+                  {'task': self.name,
+                   'timings': ', '.join('%s %.2fs' % (timing.name,
+                                                      timing.duration)
+                                        for timing in self.timings)})
+        if error:
+            six.reraise(*error)
+        return self.results
+
+    def _run_step(self, name, func, requires, done):
+        started = timeutils.utcnow()
+        start = time.time()
+        exc_info = None
+        try:
+            self.results[name] = func(
+                **dict((required, self.results[required])
+                       for required in requires))
+        except BaseException:
+            # Including eventlet.Timeout, the graph waits for every step.
+            exc_info = sys.exc_info()
+        self.timings.append(StepTiming(name, started, time.time() - start,
+                                       exc_info[1] if exc_info else None))
+        done.put(exc_info)
@@ -269,6 +269,73 @@ class BackupDeleteTest(trove_testtools.TestCase):
                                   self.context, 'backup_id')
 
 
+class BackupConsolidateTest(trove_testtools.TestCase):
+    def setUp(self):
+        super(BackupConsolidateTest, self).setUp()
+        util.init_db()
+        self.context, self.instance_id = _prep_conf(timeutils.utcnow())
+        self.full = self._create(BACKUP_NAME, 'InnoBackupEx')
+        self.incremental = self._create(BACKUP_NAME_2,
+                                        'InnoBackupExIncremental',
+                                        parent_id=self.full.id)
+
+    def tearDown(self):
+        super(BackupConsolidateTest, self).tearDown()
+        for backup in models.DBBackup.find_all(
+                tenant_id=self.context.tenant).all():
+            backup.delete()
+
+    def _create(self, name, backup_type, parent_id=None,
+                state=BACKUP_STATE_COMPLETED):
+        return models.DBBackup.create(tenant_id=self.context.tenant,
+                                      name=name,
+                                      state=state,
+                                      instance_id=self.instance_id,
+                                      backup_type=backup_type,
+                                      parent_id=parent_id,
+                                      deleted=False,
+                                      location=BACKUP_LOCATION)
+
+    def test_get_chain(self):
+        last = self._create(BACKUP_NAME_3, 'InnoBackupExIncremental',
+                            parent_id=self.incremental.id)
+        chain = models.Backup.get_chain(self.context, last.id)
+        self.assertEqual([self.full.id, self.incremental.id, last.id],
+                         [backup.id for backup in chain])
+
+    @patch.object(models.Backup, 'verify_swift_auth_token')
+    @patch.object(api.API, 'consolidate_backup')
+    def test_consolidate(self, mock_consolidate, _):
+        backup = models.Backup.consolidate(self.context,
+                                           self.incremental.id)
+        self.assertIsNone(backup.parent_id)
+        self.assertEqual(BACKUP_STATE, backup.state)
+        self.assertEqual(self.instance_id, backup.instance_id)
+        self.assertEqual(BACKUP_NAME_2 + '-consolidated', backup.name)
+        mock_consolidate.assert_called_once_with(
+            backup.id, [self.full.id, self.incremental.id])
+
+    def test_consolidate_full_backup(self):
+        self.assertRaises(exception.UnprocessableEntity,
+                          models.Backup.consolidate,
+                          self.context, self.full.id)
+
+    def test_consolidate_incomplete_chain(self):
+        last = self._create(BACKUP_NAME_3, 'InnoBackupExIncremental',
+                            parent_id=self.incremental.id,
+                            state=state.BackupState.FAILED)
+        self.assertRaises(exception.UnprocessableEntity,
+                          models.Backup.consolidate,
+                          self.context, last.id)
+
+    def test_consolidate_unsupported_type(self):
+        last = self._create(BACKUP_NAME_3, 'MySQLDump',
+                            parent_id=self.incremental.id)
+        self.assertRaises(exception.UnprocessableEntity,
+                          models.Backup.consolidate,
+                          self.context, last.id)
+
+
 class BackupORMTest(trove_testtools.TestCase):
     def setUp(self):
         super(BackupORMTest, self).setUp()
@@ -340,6 +407,32 @@ class BackupORMTest(trove_testtools.TestCase):
             self.context, self.instance_id, include_incremental=False)
         self.assertEqual(BACKUP_NAME_4, backup.name)
 
+    def test_get_restore_base(self):
+        full = models.DBBackup.create(tenant_id=self.context.tenant,
+                                      name=BACKUP_NAME_4,
+                                      state=BACKUP_STATE_COMPLETED,
+                                      instance_id=self.instance_id,
+                                      size=2.0,
+                                      deleted=False)
+        models.DBBackup.create(tenant_id=self.context.tenant,
+                               name=BACKUP_NAME_5,
+                               state=BACKUP_STATE_COMPLETED,
+                               instance_id=self.instance_id,
+                               parent_id=full.id,
+                               size=2.0,
+                               deleted=False)
+        now = timeutils.utcnow()
+
+        backup = models.Backup.get_restore_base(
+            self.context, self.instance_id,
+            now + datetime.timedelta(hours=1))
+        self.assertEqual(full.id, backup.id)
+
+        self.assertRaises(exception.RestorePointBackupNotFound,
+                          models.Backup.get_restore_base,
+                          self.context, self.instance_id,
+                          now - datetime.timedelta(days=1))
+
     def test_running(self):
         running = models.Backup.running(instance_id=self.instance_id)
         self.assertTrue(running)
@@ -0,0 +1,101 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import MagicMock, patch
+
+from trove.backup import consolidation
+from trove.tests.unittests import trove_testtools
+
+
+class ChainConsolidatorTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(ChainConsolidatorTest, self).setUp()
+        self.storage = MagicMock()
+        self.storage.load_metadata.return_value = {
+            'lsn': '4321', 'parent_location': 'parent',
+            'parent_checksum': 'md5', 'datastore': 'mysql'}
+        self.storage.save.return_value = (True, 'ok', 'new-md5', 'new-loc')
+        self.consolidator = consolidation.ChainConsolidator(self.storage,
+                                                            'backup-id')
+        self.chain = [MagicMock(id='full'), MagicMock(id='inc1'),
+                      MagicMock(id='inc2')]
+
+    @patch.object(consolidation, 'check_commands')
+    @patch.object(consolidation.shutil, 'rmtree')
+    @patch.object(consolidation.ConsolidatedBackup, '__exit__',
+                  return_value=False)
+    @patch.object(consolidation.ConsolidatedBackup, '__enter__')
+    @patch.object(consolidation.ChainConsolidator, '_apply')
+    def test_consolidate(self, mock_apply, mock_enter, mock_exit,
+                         mock_rmtree, _):
+        mock_enter.return_value.bytes_read = 3 * 1024 ** 3
+        self.assertEqual(('new-md5', 'new-loc', 3.0),
+                         self.consolidator.consolidate(self.chain))
+        self.assertEqual([(link, number == 0) for number, link
+                          in enumerate(self.chain)],
+                         [call[0] for call in mock_apply.call_args_list])
+        # The synthetic backup keeps the last lsn but has no parent.
+        self.assertEqual({'datastore': 'mysql'},
+                         self.storage.save.call_args[1]['metadata'])
+        mock_rmtree.assert_called_once_with(self.consolidator.workspace,
+                                            ignore_errors=True)
+
+    @patch.object(consolidation, 'check_commands')
+    @patch.object(consolidation.shutil, 'rmtree')
+    @patch.object(consolidation.ChainConsolidator, '_apply',
+                  side_effect=consolidation.ConsolidationError)
+    def test_consolidate_prepare_failure(self, _, mock_rmtree, __):
+        self.assertRaises(consolidation.ConsolidationError,
+                          self.consolidator.consolidate, self.chain)
+        self.assertFalse(self.storage.save.called)
+        mock_rmtree.assert_called_once_with(self.consolidator.workspace,
+                                            ignore_errors=True)
+
+    @patch.object(consolidation.shutil, 'rmtree')
+    @patch.object(consolidation, '_find_command',
+                  side_effect=lambda command: (None if command == 'xbstream'
+                                               else '/usr/bin/' + command))
+    def test_consolidate_missing_xtrabackup(self, _, mock_rmtree):
+        error = self.assertRaises(consolidation.ConsolidationError,
+                                  self.consolidator.consolidate, self.chain)
+        self.assertIn('xbstream not found', str(error))
+        self.assertFalse(self.storage.load_metadata.called)
+        self.assertFalse(mock_rmtree.called)
+
+    def test_reparent(self):
+        child = MagicMock(location='child-loc', checksum='child-md5')
+        self.consolidator.reparent(child, 'new-loc', 'new-md5')
+        metadata = self.storage.save_metadata.call_args[0][1]
+        self.assertEqual('new-loc', metadata['parent_location'])
+        self.assertEqual('new-md5', metadata['parent_checksum'])
+        self.assertEqual('4321', metadata['lsn'])
+
+    def test_consolidated_backup_cmd(self):
+        backup = consolidation.ConsolidatedBackup(
+            'backup-id', base_dir='/tmp/base', lsn='4321')
+        self.assertTrue(backup.command.startswith(
+            'cd /tmp/base && find . -type f -print0 | xargs -0 xbstream -c'))
+        self.assertEqual({'lsn': '4321'}, backup.metadata())
+        self.assertEqual('InnoBackupEx', backup.backup_type)
+
+    def test_consolidated_backup_counts_bytes(self):
+        backup = consolidation.ConsolidatedBackup(
+            'backup-id', base_dir='/tmp/base')
+        backup.process = MagicMock()
+        backup.process.stdout.read.side_effect = [b'x' * 10, b'y' * 5, b'']
+        while backup.read(10):
+            pass
+        self.assertEqual(15, backup.bytes_read)
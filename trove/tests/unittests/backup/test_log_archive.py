@@ -0,0 +1,141 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import MagicMock, patch
+
+from trove.guestagent.common import operating_system
+from trove.guestagent.strategies.archive import base
+from trove.guestagent.strategies.archive import mysql_impl
+from trove.tests.unittests import trove_testtools
+
+
+class FakeArchiver(base.LogArchiver):
+    __strategy_name__ = 'fake'
+
+    log_dir = '/var/lib/fake'
+
+    def __init__(self, storage, segments):
+        super(FakeArchiver, self).__init__(storage)
+        self.segments = segments
+
+    def closed_segments(self):
+        return self.segments
+
+    def start_segment(self, backup_info, restore_location):
+        return backup_info['start']
+
+    def apply(self, segments, restore_point, restore_location):
+        pass
+
+
+class LogArchiverTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(LogArchiverTest, self).setUp()
+        self.storage = MagicMock()
+        self.archiver = FakeArchiver(
+            self.storage, ['log.%06d' % num for num in range(1, 6)])
+        self.archiver.batch_size = 2
+        self.archiver.upload_workers = 2
+
+    def _upload(self, instance_id, segments):
+        return {'segments': segments, 'location': 'loc', 'checksum': 'md5',
+                'end_time': 100 * int(segments[-1].split('.')[1])}
+
+    @patch.object(base.LogArchiver, 'save_index')
+    @patch.object(base.LogArchiver, 'load_local_index',
+                  return_value=[{'segments': ['log.000001']}])
+    def test_archive_skips_archived_segments(self, *mocks):
+        with patch.object(self.archiver, '_upload_batch',
+                          side_effect=self._upload) as mock_upload:
+            self.assertEqual(4, self.archiver.archive('inst'))
+        uploaded = sorted(call[0][1] for call in mock_upload.call_args_list)
+        self.assertEqual([['log.000002', 'log.000003'],
+                          ['log.000004', 'log.000005']], uploaded)
+
+    @patch.object(base.LogArchiver, 'save_index')
+    @patch.object(base.LogArchiver, 'load_local_index', return_value=[])
+    def test_archive_records_batches_before_failure(self, _, mock_save):
+        def _upload(instance_id, segments):
+            if segments[0] == 'log.000003':
+                raise base.ArchiveError('upload failed')
+            return self._upload(instance_id, segments)
+
+        with patch.object(self.archiver, '_upload_batch',
+                          side_effect=_upload):
+            self.assertEqual(2, self.archiver.archive('inst'))
+        index = mock_save.call_args[0][1]
+        self.assertEqual([['log.000001', 'log.000002']],
+                         [batch['segments'] for batch in index])
+
+    @patch.object(base.LogArchiver, 'save_index')
+    @patch.object(base.LogArchiver, 'load_local_index', return_value=[])
+    def test_archive_nothing_pending(self, _, mock_save):
+        self.archiver.segments = []
+        self.assertEqual(0, self.archiver.archive('inst'))
+        self.assertFalse(mock_save.called)
+
+    def test_select_batches_by_time(self):
+        index = [self._upload('inst', ['log.000003', 'log.000004']),
+                 self._upload('inst', ['log.000001', 'log.000002']),
+                 self._upload('inst', ['log.000005', 'log.000006'])]
+        # 1970-01-01 00:05:00 is 300 seconds, which is in the second batch.
+        selected = self.archiver.select_batches(
+            index, 'log.000002', {'timestamp': '1970-01-01T00:05:00Z'})
+        self.assertEqual([['log.000001', 'log.000002'],
+                          ['log.000003', 'log.000004']],
+                         [batch['segments'] for batch in selected])
+
+    def test_select_batches_by_position(self):
+        index = [self._upload('inst', ['log.000001', 'log.000002']),
+                 self._upload('inst', ['log.000003', 'log.000004']),
+                 self._upload('inst', ['log.000005', 'log.000006'])]
+        selected = self.archiver.select_batches(
+            index, 'log.000003', {'position': 'log.000005'})
+        self.assertEqual([['log.000003', 'log.000004'],
+                          ['log.000005', 'log.000006']],
+                         [batch['segments'] for batch in selected])
+
+
+class MySqlBinlogArchiverTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(MySqlBinlogArchiverTest, self).setUp()
+        self.archiver = mysql_impl.MySqlBinlogArchiver(MagicMock())
+
+    @patch.object(operating_system, 'read_file',
+                  return_value='./mysql-bin.000001\n./mysql-bin.000002\n'
+                               './mysql-bin.000003\n')
+    @patch.object(mysql_impl.MySqlBinlogArchiver, 'log_bin',
+                  new='/var/lib/mysql/data/mysql-bin')
+    def test_closed_segments_skip_active_log(self, mock_read):
+        self.assertEqual(['mysql-bin.000001', 'mysql-bin.000002'],
+                         self.archiver.closed_segments())
+        mock_read.assert_called_once_with(
+            '/var/lib/mysql/data/mysql-bin.index', as_root=True)
+
+    @patch.object(operating_system, 'read_file',
+                  return_value='mysql-bin.000007\t1234\n')
+    def test_start_segment(self, _):
+        self.assertEqual('mysql-bin.000007',
+                         self.archiver.start_segment({}, '/var/lib/mysql'))
+        self.assertEqual('1234', self.archiver._start_position)
+
+    def test_restore_point_segment(self):
+        self.assertEqual('mysql-bin.000009',
+                         self.archiver.restore_point_segment(
+                             {'position': 'mysql-bin.000009:4'}))
+        self.assertIsNone(self.archiver.restore_point_segment(
+            {'timestamp': '2016-10-01T10:00:00'}))
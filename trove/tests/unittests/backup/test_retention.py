@@ -0,0 +1,171 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import datetime
+import json
+
+from mock import MagicMock, patch
+
+from trove.backup import retention
+from trove.backup.state import BackupState
+from trove.common import exception
+from trove.tests.unittests import trove_testtools
+
+FakeBackup = collections.namedtuple(
+    'FakeBackup', ['id', 'instance_id', 'parent_id', 'state', 'created',
+                   'location'])
+
+
+def _backup(backup_id, day, parent_id=None, state=BackupState.COMPLETED,
+            hour=0):
+    return FakeBackup(backup_id, 'inst', parent_id, state,
+                      datetime.datetime(2016, 10, day, hour),
+                      'http://swift/v1/AUTH_t/database_backups/%s.xbstream.gz'
+                      % backup_id)
+
+
+class SelectExpiredTest(trove_testtools.TestCase):
+
+    def _expired(self, backups, keep_daily, keep_weekly):
+        return sorted(backup.id for backup in retention.select_expired(
+            backups, keep_daily, keep_weekly))
+
+    def test_keep_newest_per_day(self):
+        backups = [_backup('a', 10), _backup('b', 10, hour=12),
+                   _backup('c', 11), _backup('d', 12)]
+        self.assertEqual(['a', 'b'], self._expired(backups, 2, 0))
+
+    def test_keep_weekly(self):
+        # 2016-10-03 and 2016-10-10 are Mondays.
+        backups = [_backup('a', 3), _backup('b', 4), _backup('c', 10),
+                   _backup('d', 11)]
+        self.assertEqual(['a', 'c'], self._expired(backups, 0, 2))
+
+    def test_keep_parents_of_kept_backups(self):
+        backups = [_backup('full', 1), _backup('inc1', 2, parent_id='full'),
+                   _backup('inc2', 3, parent_id='inc1'), _backup('old', 1)]
+        self.assertEqual(['old'], self._expired(backups, 1, 0))
+
+    def test_running_backups_are_kept(self):
+        backups = [_backup('full', 1), _backup('new', 2),
+                   _backup('inc', 3, parent_id='full',
+                           state=BackupState.BUILDING)]
+        self.assertEqual([], self._expired(backups, 1, 0))
+
+    def test_failed_backups_expire(self):
+        backups = [_backup('a', 1), _backup('b', 2, state=BackupState.FAILED)]
+        self.assertEqual(['b'], self._expired(backups, 1, 0))
+
+
+class RetentionPolicyTest(trove_testtools.TestCase):
+
+    def test_update_keeps_nothing(self):
+        self.assertRaises(exception.BadRequest,
+                          retention.RetentionPolicy.update, 'tenant', 0, 0)
+
+    def test_update_negative(self):
+        self.assertRaises(exception.BadRequest,
+                          retention.RetentionPolicy.update, 'tenant', -1, 2)
+
+
+class BackupRetentionTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(BackupRetentionTest, self).setUp()
+        self.patch_conf_property('swift_url', 'http://swift/v1/AUTH_')
+        self.context = MagicMock()
+        self.engine = retention.BackupRetention(self.context)
+        self.engine.batch_size = 2
+
+    def test_swift_url_required(self):
+        self.patch_conf_property('swift_url', None)
+        self.assertRaises(exception.TroveError,
+                          retention.BackupRetention, self.context)
+        self.assertTrue(retention.BackupRetention(self.context,
+                                                  dry_run=True).dry_run)
+
+    def test_object_names(self):
+        client = MagicMock()
+        client.get_container.return_value = ({}, [
+            {'name': 'a.xbstream.gz'}, {'name': 'a_00000000'},
+            {'name': 'a_00000001'}, {'name': 'b.xbstream.gz'},
+            {'name': 'inst_logs_mysql-bin-000001.tar.gz'}])
+        names = self.engine._object_names(client, [_backup('a', 1)])
+        self.assertEqual({'/database_backups/a.xbstream.gz': 'a',
+                          '/database_backups/a_00000000': 'a',
+                          '/database_backups/a_00000001': 'a'}, names)
+
+    def _bulk_delete(self, names, result):
+        client = MagicMock()
+        client.post_account.return_value = ({}, json.dumps(result))
+        client_pool = MagicMock()
+        client_pool.item.return_value.__enter__.return_value = client
+        failed = self.engine._bulk_delete(client_pool, names)
+        self.assertEqual('bulk-delete',
+                         client.post_account.call_args[1]['query_string'])
+        return failed
+
+    def test_bulk_delete_ignores_missing_objects(self):
+        self.assertEqual([], self._bulk_delete(
+            ['/database_backups/a_00000000', '/database_backups/b c'],
+            {'Response Status': '200 OK', 'Number Deleted': 1,
+             'Number Not Found': 1, 'Errors': []}))
+
+    @patch('trove.backup.retention.LOG')
+    def test_bulk_delete_errors(self, _):
+        names = ['/database_backups/a_00000000', '/database_backups/b c']
+        self.assertEqual(names, self._bulk_delete(
+            names, {'Response Status': '400 Bad Request',
+                    'Number Deleted': 1, 'Number Not Found': 0,
+                    'Errors': [['/database_backups/b%20c', '409 Conflict']]}))
+
+    @patch('trove.backup.retention.LOG')
+    def test_bulk_delete_aborted(self, _):
+        # The objects the batch did not get to are not listed as errors.
+        names = ['/database_backups/a_00000000', '/database_backups/a_0001',
+                 '/database_backups/a_0002']
+        self.assertEqual(names, self._bulk_delete(
+            names, {'Response Status': '502 Bad Gateway',
+                    'Number Deleted': 1, 'Number Not Found': 0,
+                    'Errors': []}))
+        self.assertEqual(names, self._bulk_delete(
+            names, {'Response Status': '200 OK', 'Number Deleted': 2,
+                    'Number Not Found': 0, 'Errors': []}))
+
+    @patch.object(retention, 'create_swift_client')
+    @patch.object(retention.BackupRetention, '_bulk_delete')
+    @patch.object(retention.BackupRetention, '_object_names',
+                  return_value={'/c/a.gz': 'a', '/c/a_00000000': 'a',
+                                '/c/b.gz': 'b'})
+    def test_delete_objects_in_batches(self, _, mock_bulk_delete, __):
+        mock_bulk_delete.side_effect = [['/c/a_00000000'], []]
+        failed = self.engine._delete_objects(
+            self.context, [_backup('a', 1), _backup('b', 1)])
+        self.assertEqual({'a'}, failed)
+        self.assertEqual(2, mock_bulk_delete.call_count)
+
+    @patch.object(retention.BackupRetention, '_delete')
+    @patch.object(retention.BackupRetention, '_live_backups',
+                  return_value=[_backup('a', 1), _backup('b', 2)])
+    @patch.object(retention.RetentionPolicy, 'load_all')
+    def test_dry_run(self, mock_load_all, _, mock_delete):
+        mock_load_all.return_value = {
+            'tenant': {None: MagicMock(keep_daily=1, keep_weekly=0)}}
+        self.engine.dry_run = True
+        report = self.engine.run()
+        self.assertEqual(['a'], [backup['id']
+                                 for backup in report[0]['expired']])
+        self.assertFalse(mock_delete.called)
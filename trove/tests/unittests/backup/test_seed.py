@@ -0,0 +1,114 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+
+from eventlet.green import socket
+
+from trove.guestagent.backup import seed
+from trove.tests.unittests import trove_testtools
+
+DATA = b'0123456789' * 10
+
+
+class FakeRunner(object):
+
+    def __init__(self, error=None):
+        self.stream = io.BytesIO(DATA)
+        self.exited = False
+        self.error = error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.exited = True
+        if self.error:
+            raise self.error
+
+    def read(self, chunk_size):
+        return self.stream.read(chunk_size)
+
+
+class SeedTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(SeedTest, self).setUp()
+        self.patch_conf_property('backup_chunk_size', 8)
+        self.patch_conf_property('replica_seed_retries', 0)
+        self.runner = FakeRunner()
+
+    def _server(self, window=1000):
+        server = seed.SeedServer(lambda: self.runner, 'secret', port=0,
+                                 timeout=5, window=window)
+        return server, server.start()
+
+    def _client(self, server, secret='secret', received=0):
+        client = seed.SeedClient({'host': '127.0.0.1', 'port': server.port,
+                                  'secret': secret})
+        client.received = received
+        return client
+
+    def _read_two_frames(self, server):
+        conn = socket.create_connection(('127.0.0.1', server.port))
+        greeting = seed._recv_exactly(conn, len(seed.PROTOCOL) +
+                                      seed.CHALLENGE_SIZE)
+        conn.sendall(seed._digest('secret', greeting[len(seed.PROTOCOL):]) +
+                     seed.OFFSET.pack(0))
+        self.assertEqual(seed.ACCEPTED, seed._recv_exactly(conn, 1))
+        for _ in range(2):
+            size = seed.FRAME.unpack(seed._recv_exactly(conn, 4))[0]
+            seed._recv_exactly(conn, size)
+        conn.close()
+
+    def test_stream(self):
+        server, thread = self._server()
+        self.assertRaises(seed.SeedError, list,
+                          self._client(server, secret='wrong').load(None,
+                                                                    None))
+        client = self._client(server)
+        self.assertEqual(DATA, b''.join(client.load('seed://', None)))
+        thread.wait()
+        self.assertEqual(100, client.received)
+        self.assertTrue(self.runner.exited)
+
+    def test_resume(self):
+        server, thread = self._server()
+        self._read_two_frames(server)
+        # The replica got only part of what was sent.
+        client = self._client(server, received=5)
+        self.assertEqual(DATA[5:], b''.join(client.load('seed://', None)))
+        thread.wait()
+
+    def test_resume_out_of_window(self):
+        server, thread = self._server(window=16)
+        self._read_two_frames(server)
+        client = self._client(server, received=5)
+        self.assertRaises(seed.SeedError, list, client.load('seed://', None))
+        thread.wait()
+        self.assertTrue(self.runner.exited)
+        self.assertEqual(0, len(server.buffer))
+
+    def test_backup_failing_at_end_of_stream(self):
+        self.runner = FakeRunner(error=Exception('FTWRL timed out'))
+        server, thread = self._server()
+        client = self._client(server)
+        chunks = []
+        with self.assertRaisesRegexp(seed.SeedError, 'failed'):
+            for chunk in client.load('seed://', None):
+                chunks.append(chunk)
+        thread.wait()
+        self.assertEqual(DATA, b''.join(chunks))
+        self.assertTrue(server.failed)
@@ -0,0 +1,114 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import ANY, Mock, patch
+
+from trove.guestagent.backup import backupagent
+from trove.guestagent.backup import throttle
+from trove.guestagent.strategies.backup import base
+from trove.tests.unittests import trove_testtools
+
+
+class FakeRunner(base.BackupRunner):
+    cmd = 'sudo dump %(filename)s'
+
+
+class ThrottleTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(ThrottleTest, self).setUp()
+        self.clock = [0]
+        time_patcher = patch.object(throttle.time, 'time',
+                                    side_effect=lambda: self.clock[0])
+        time_patcher.start()
+        self.addCleanup(time_patcher.stop)
+        sleep_patcher = patch.object(throttle.time, 'sleep')
+        self.mock_sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+        self.runner = Mock()
+        self.runner.read.return_value = b'x' * 100
+        self.runner.metadata.return_value = {'lsn': '54321'}
+        self.sampler = Mock(samples=0, last_duration=0.01)
+
+    def _sample(self, stream, latency, clock=None):
+        self.sampler.samples += 1
+        self.sampler.last_duration = latency
+        if clock is not None:
+            self.clock[0] = clock
+        stream.read(100)
+
+    def test_token_bucket(self):
+        bucket = throttle.TokenBucket(100)
+        self.assertEqual(0.5, bucket.consume(150))
+        self.clock[0] = 0.5
+        self.assertEqual(0.25, bucket.consume(25))
+        self.assertEqual(0, throttle.TokenBucket(0).consume(1000))
+        self.assertEqual(2, self.mock_sleep.call_count)
+
+    def test_backoff_and_recovery(self):
+        stream = throttle.ThrottledStream(self.runner, 1000,
+                                          sampler=self.sampler, min_rate=100)
+        self._sample(stream, 0.01)
+        self.assertEqual(1000, stream.bucket.rate)
+        for rate in (500, 250, 125, 100):
+            self._sample(stream, 0.05)
+            self.assertEqual(rate, stream.bucket.rate)
+        self._sample(stream, 0.01)
+        self.assertEqual(150, stream.bucket.rate)
+        self.assertEqual({'lsn': '54321',
+                          'throttle_rate_limit': 1000,
+                          'throttle_lowest_rate': 100,
+                          'throttle_backoffs': 4,
+                          'throttle_wait': ANY}, stream.metadata())
+        self.assertEqual(600, stream.bytes_read)
+
+    def test_backoff_without_limit(self):
+        stream = throttle.ThrottledStream(self.runner, 0,
+                                          sampler=self.sampler)
+        self._sample(stream, 0.01, clock=1)
+        self.assertEqual(0, stream.bucket.rate)
+        # 100 bytes were read in the last second.
+        self._sample(stream, 0.05, clock=2)
+        self.assertEqual(50, stream.bucket.rate)
+        # The backup now reads less than the limit.
+        self._sample(stream, 0.01, clock=12)
+        self.assertEqual(0, stream.bucket.rate)
+        self.assertEqual(50, stream.lowest_rate)
+
+    def test_throttle_follows_datastore_config(self):
+        agent = backupagent.BackupAgent()
+        self.assertIs(self.runner, agent._throttle(self.runner, None))
+        self.patch_conf_property('backup_adaptive_throttling', True,
+                                 section='mysql')
+        self.assertIs(self.runner, agent._throttle(self.runner, None))
+        stream = agent._throttle(self.runner, self.sampler)
+        self.assertIs(self.sampler, stream.sampler)
+        self.assertEqual(0, stream.rate_limit)
+
+    @patch.object(base.subprocess, 'Popen')
+    def test_runner_placement(self, mock_popen):
+        self.patch_datastore_manager('mysql')
+        runner = FakeRunner('12345')
+        self.assertEqual('', runner.placement_cmd)
+        conf = {'backup_cgroup': 'blkio:trove/backup',
+                'backup_ionice_class': 'best-effort',
+                'backup_ionice_priority': 7}
+        with patch.object(base.cfg, 'get_configuration_property',
+                          side_effect=conf.get):
+            runner._run()
+        mock_popen.assert_called_once_with(
+            "cgexec -g blkio:trove/backup ionice -c 2 -n 7 "
+            "sh -c 'sudo dump 12345'", shell=True, stdout=ANY, stderr=ANY,
+            preexec_fn=ANY)
@@ -221,25 +221,40 @@ class ClusterTest(trove_testtools.TestCase):
             [mock_ins_create.return_value.id] * 3)
         self.assertEqual(3, mock_ins_create.call_count)
 
+    def _member(self, id):
+        return DBInstance(InstanceTasks.NONE, id=id, name="member" + id,
+                          compute_instance_id="compute-" + id,
+                          task_id=InstanceTasks.NONE._code,
+                          task_description=InstanceTasks.NONE._db_text,
+                          volume_id="volume-" + id,
+                          datastore_version_id="1",
+                          cluster_id=self.cluster_id,
+                          type="member")
+
     @patch.object(DBInstance, 'find_all')
-    @patch.object(Cluster, 'get_guest')
+    @patch.object(task_api, 'load')
     @patch.object(DBCluster, 'update')
     @patch.object(inst_models.Instance, 'load')
-    @patch.object(inst_models.Instance, 'delete')
-    def test_shrink(self,
-                    mock_ins_delete, mock_ins_load, mock_update,
-                    mock_guest, mock_find_all):
+    def test_shrink(self, mock_ins_load, mock_update, mock_task_api,
+                    mock_find_all):
         mock_find_all.return_value.all.return_value = [
-            DBInstance(InstanceTasks.NONE, id="1", name="member1",
-                       compute_instance_id="compute-1",
-                       task_id=InstanceTasks.NONE._code,
-                       task_description=InstanceTasks.NONE._db_text,
-                       volume_id="volume-1",
-                       datastore_version_id="1",
-                       cluster_id=self.cluster_id,
-                       type="member")]
-        self.cluster.shrink(['id1'])
-        self.assertEqual(1, mock_ins_delete.call_count)
+            self._member("1"), self._member("2")]
+        mock_ins_load.return_value.id = "1"
+        self.cluster.shrink(['1'])
+        mock_task_api.return_value.shrink_cluster.assert_called_with(
+            self.cluster_id, ["1"])
+        mock_update.assert_called_with(
+            task_status=ClusterTasks.SHRINKING_CLUSTER)
+
+    @patch.object(DBInstance, 'find_all')
+    @patch.object(task_api, 'load')
+    @patch.object(inst_models.Instance, 'load')
+    def test_shrink_to_empty(self, mock_ins_load, mock_task_api,
+                             mock_find_all):
+        mock_find_all.return_value.all.return_value = [self._member("1")]
+        self.assertRaises(exception.ClusterShrinkMustNotLeaveClusterEmpty,
+                          self.cluster.shrink, ['1'])
+        self.assertFalse(mock_task_api.called)
 
     @patch('trove.cluster.models.LOG')
     def test_delete_bad_task_status(self, mock_logging):
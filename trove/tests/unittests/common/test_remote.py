@@ -418,6 +418,64 @@ class TestCreateNovaClient(trove_testtools.TestCase):
                          admin_client.client.management_url)
 
 
+class TestClientCache(trove_testtools.TestCase):
+    def setUp(self):
+        super(TestClientCache, self).setUp()
+        self.cache = remote.ClientCache()
+        self.create = MagicMock(side_effect=lambda: MagicMock())
+
+    def test_reuse(self):
+        client = self.cache.get(('compute', 'token'), self.create)
+        self.assertIs(client, self.cache.get(('compute', 'token'),
+                                             self.create))
+        self.assertIsNot(client, self.cache.get(('compute', 'other'),
+                                                self.create))
+        self.assertEqual({'size': 2, 'hits': 1, 'misses': 2,
+                          'evictions': 0}, self.cache.stats())
+
+    def test_disabled(self):
+        self.patch_conf_property('remote_client_cache_size', 0)
+        self.cache.get(('compute', 'token'), self.create)
+        self.cache.get(('compute', 'token'), self.create)
+        self.assertEqual(2, self.create.call_count)
+
+    def test_size_limit(self):
+        self.patch_conf_property('remote_client_cache_size', 2)
+        for token in ('a', 'b', 'a', 'c', 'b'):
+            self.cache.get(('compute', token), self.create)
+        # 'b' was the least recently used client when 'c' was added.
+        self.assertEqual(4, self.create.call_count)
+        self.assertEqual(2, self.cache.stats()['size'])
+
+    @patch.object(remote.time, 'time')
+    def test_ttl(self, mock_time):
+        self.patch_conf_property('remote_client_cache_ttl', 10)
+        mock_time.return_value = 100
+        self.cache.get(('compute', 'token'), self.create)
+        mock_time.return_value = 111
+        self.cache.get(('compute', 'token'), self.create)
+        self.assertEqual(2, self.create.call_count)
+        self.assertEqual(1, self.cache.stats()['evictions'])
+
+    def test_invalidate(self):
+        self.cache.get(('compute', 'token'), self.create)
+        self.cache.get(('volume', 'token'), self.create)
+        self.cache.get(('compute', 'other'), self.create)
+        self.cache.invalidate('token')
+        self.assertEqual(1, self.cache.stats()['size'])
+
+    def test_nova_clients_are_shared(self):
+        cfg.CONF.set_override('nova_compute_url', 'http://example.com/')
+        self.addCleanup(cfg.CONF.clear_override, 'nova_compute_url')
+        context = TroveContext(tenant='tenant', auth_token='token')
+        self.assertIs(remote.create_nova_client(context),
+                      remote.create_nova_client(context))
+        self.assertIsNot(
+            remote.create_nova_client(context),
+            remote.create_nova_client(TroveContext(tenant='tenant',
+                                                   auth_token='new')))
+
+
 class TestCreateSwiftClient(trove_testtools.TestCase):
     def setUp(self):
         super(TestCreateSwiftClient, self).setUp()
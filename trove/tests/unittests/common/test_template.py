@@ -11,7 +11,7 @@
 # limitations under the License.
 import re
 
-from mock import Mock
+from mock import Mock, patch
 
 from trove.common import template
 from trove.datastore.models import DatastoreVersion
@@ -27,6 +27,8 @@ class TemplateTest(trove_testtools.TestCase):
         self.template = self.env.get_template("mysql/config.template")
         self.flavor_dict = {'ram': 1024, 'name': 'small', 'id': '55'}
         self.server_id = "180b5ed1-3e57-4459-b7a3-2aeee4ac012a"
+        template._templates.clear()
+        template._default_configs.clear()
 
     def tearDown(self):
         super(TemplateTest, self).tearDown()
@@ -101,3 +103,38 @@ class TemplateTest(trove_testtools.TestCase):
                                                 self.flavor_dict,
                                                 self.server_id)
         self.assertTrue(self._find_in_template(config.render(), "relay_log"))
+
+    def _mysql_version(self):
+        datastore = Mock(spec=DatastoreVersion)
+        datastore.datastore_name = 'MySql'
+        datastore.name = 'mysql-5.6'
+        datastore.manager = 'mysql'
+        return datastore
+
+    def test_template_selection_is_cached(self):
+        datastore = self._mysql_version()
+        with patch.object(template.ENV, 'select_template',
+                          wraps=template.ENV.select_template) as mock_select:
+            for instance_id in ('a', 'b'):
+                template.SingleInstanceConfigTemplate(
+                    datastore, self.flavor_dict, instance_id).render()
+        self.assertEqual(1, mock_select.call_count)
+
+    def test_render_dict_is_cached_per_flavor(self):
+        datastore = self._mysql_version()
+        parser = Mock(wraps=template.SERVICE_PARSERS['mysql'])
+        with patch.dict(template.SERVICE_PARSERS, {'mysql': parser}):
+            configs = []
+            for instance_id, ram in (('a', 1024), ('b', 1024), ('c', 2048)):
+                config = template.SingleInstanceConfigTemplate(
+                    datastore, {'ram': ram}, instance_id)
+                configs.append((config, dict(config.render_dict())))
+        self.assertEqual(2, parser.call_count)
+        for config, values in configs:
+            self.assertEqual(config._calculate_unique_id(),
+                             values['server_id'])
+        self.assertNotEqual(configs[0][1]['query_cache_size'],
+                            configs[2][1]['query_cache_size'])
+        del configs[0][1]['server_id']
+        del configs[1][1]['server_id']
+        self.assertEqual(configs[0][1], configs[1][1])
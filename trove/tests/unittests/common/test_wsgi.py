@@ -13,7 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 #
+from mock import MagicMock, patch
 from testtools.matchers import Equals, Is, Not
+from trove.common import exception
 from trove.common import wsgi
 from trove.tests.unittests import trove_testtools
 import webob
@@ -40,3 +42,66 @@ class TestWsgi(trove_testtools.TestCase):
         self.assertThat(ctx.user, Equals(user_id))
         self.assertThat(ctx.auth_token, Equals(token))
         self.assertEqual(0, len(ctx.service_catalog))
+
+
+class TestControllerValidation(trove_testtools.TestCase):
+
+    class FakeController(wsgi.Controller):
+        schemas = {
+            'create': {
+                'type': 'object',
+                'required': ['name'],
+                'properties': {'name': {'type': 'string', 'minLength': 1}}
+            },
+            'action': {
+                'restart': {'type': 'object'},
+                'resize': {'volume': {'type': 'object'}}
+            }
+        }
+
+    def setUp(self):
+        super(TestControllerValidation, self).setUp()
+        self.controller = self.FakeController()
+
+    def test_validator_is_built_once(self):
+        schema = {'type': 'object'}
+        with patch.object(wsgi.jsonschema, 'Draft4Validator',
+                          wraps=wsgi.jsonschema.Draft4Validator) as mock_cls:
+            validator = self.controller.get_validator(schema)
+            self.assertIs(validator, self.controller.get_validator(schema))
+            self.assertIsNot(validator,
+                             self.controller.get_validator(dict(schema)))
+            self.assertEqual(2, mock_cls.call_count)
+
+    def test_build_validators(self):
+        self.controller.build_validators()
+        action = self.FakeController.schemas['action']
+        for schema in (self.FakeController.schemas['create'],
+                       action['restart'], action['resize']['volume']):
+            self.assertIs(schema, wsgi.Controller._validators[id(schema)][0])
+
+    def test_validate_request_error(self):
+        error = self.assertRaises(exception.BadRequest,
+                                  self.controller.validate_request,
+                                  'create', {'body': {'name': ''}})
+        self.assertIn("name '' is too short", error.message)
+
+    @patch.object(wsgi, 'fastjsonschema')
+    def test_fast_validation(self, mock_fastjsonschema):
+        self.patch_conf_property('api_fast_schema_validation', True)
+        mock_fastjsonschema.JsonSchemaException = ValueError
+        validator = wsgi.SchemaValidator({'type': 'object',
+                                          'required': ['name']})
+        compiled_schema = mock_fastjsonschema.compile.call_args[0][0]
+        self.assertEqual(wsgi.DRAFT4_SCHEMA, compiled_schema['$schema'])
+
+        validator.validator = MagicMock()
+        self.assertEqual([], validator.errors({'name': 'a'}))
+        self.assertFalse(validator.validator.iter_errors.called)
+
+        # Invalid bodies are described by jsonschema.
+        mock_fastjsonschema.compile.return_value.side_effect = ValueError
+        validator = wsgi.SchemaValidator({'type': 'object',
+                                          'required': ['name']})
+        self.assertEqual(["'name' is a required property"],
+                         [e.message for e in validator.errors({})])
@@ -198,3 +198,28 @@ class ConductorMethodTests(trove_testtools.TestCase):
                                     sent=past, name=new_name)
         bkup = self._get_backup(bkup_id)
         self.assertEqual(old_name, bkup.name)
+
+    # --- Tests for report_log_archive ---
+
+    @patch('trove.conductor.manager.LOG')
+    @patch('trove.conductor.manager.rpc.get_notifier')
+    def test_report_log_archive(self, mock_notifier, mock_logging):
+        self.cond_mgr.report_log_archive(None, self.instance_id,
+                                         'token expired')
+        mock_notifier.return_value.error.assert_called_once_with(
+            None, 'trove.instance.log_archive',
+            {'instance_id': self.instance_id, 'error': 'token expired'})
+
+    # --- Tests for report_metrics ---
+
+    @patch('trove.conductor.manager.rpc.get_notifier')
+    def test_report_metrics_older_timestamp_discarded(self, mock_notifier):
+        metrics = {'samples': 1, 'metrics': {}}
+        now = timeutils.utcnow_ts(microsecond=True)
+        self.cond_mgr.report_metrics(None, self.instance_id, metrics,
+                                     sent=now)
+        self.cond_mgr.report_metrics(None, self.instance_id, metrics,
+                                     sent=now - 60)
+        mock_notifier.return_value.info.assert_called_once_with(
+            None, 'trove.instance.metrics',
+            {'samples': 1, 'metrics': {}, 'instance_id': self.instance_id})
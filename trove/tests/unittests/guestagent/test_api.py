@@ -317,6 +317,21 @@ class ApiTest(trove_testtools.TestCase):
         self._verify_call('get_replication_snapshot', snapshot_info={},
                           replica_source_config=None)
 
+    def test_get_replication_snapshot_seed(self):
+        self.api.get_replication_snapshot({'seed': True})
+
+        self.api.client.prepare.assert_called_once_with(
+            version='1.1', timeout=mock.ANY)
+        self._verify_call('get_replication_snapshot',
+                          snapshot_info={'seed': True},
+                          replica_source_config=None)
+
+    def test_can_seed_replica(self):
+        self.api.client.can_send_version.return_value = False
+
+        self.assertFalse(self.api.can_seed_replica())
+        self.api.client.can_send_version.assert_called_once_with('1.1')
+
     def test_attach_replication_slave(self):
         # execute
         self.api.attach_replication_slave(REPLICATION_SNAPSHOT)
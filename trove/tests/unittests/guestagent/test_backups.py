@@ -28,10 +28,14 @@ from trove.guestagent.datastore.experimental.db2 import (
     service as db2_service)
 from trove.guestagent.strategies.backup import base as backupBase
 from trove.guestagent.strategies.backup.experimental import db2_impl
+from trove.guestagent.strategies.backup.experimental import (
+    postgresql_impl as pg_backup)
 from trove.guestagent.strategies.backup.experimental.postgresql_impl \
     import PgBaseBackupUtil
 from trove.guestagent.strategies.backup.mysql_impl import MySqlApp
 from trove.guestagent.strategies.restore import base as restoreBase
+from trove.guestagent.strategies.restore.experimental import (
+    postgresql_impl as pg_restore)
 from trove.guestagent.strategies.restore.mysql_impl import MySQLRestoreMixin
 from trove.tests.unittests import trove_testtools
 
@@ -47,6 +51,10 @@ BACKUP_SQLDUMP_CLS = ("trove.guestagent.strategies.backup."
                       "mysql_impl.MySQLDump")
 RESTORE_SQLDUMP_CLS = ("trove.guestagent.strategies.restore."
                        "mysql_impl.MySQLDump")
+BACKUP_PARALLELDUMP_CLS = ("trove.guestagent.strategies.backup."
+                           "mysql_impl.MySQLParallelDump")
+RESTORE_PARALLELDUMP_CLS = ("trove.guestagent.strategies.restore."
+                            "mysql_impl.MySQLParallelDump")
 BACKUP_CBBACKUP_CLS = ("trove.guestagent.strategies.backup."
                        "experimental.couchbase_impl.CbBackup")
 RESTORE_CBBACKUP_CLS = ("trove.guestagent.strategies.restore."
@@ -59,6 +67,8 @@ BACKUP_REDIS_CLS = ("trove.guestagent.strategies.backup."
                     "experimental.redis_impl.RedisBackup")
 RESTORE_REDIS_CLS = ("trove.guestagent.strategies.restore."
                      "experimental.redis_impl.RedisBackup")
+BACKUP_REDIS_SNAPSHOT_CLS = ("trove.guestagent.strategies.backup."
+                             "experimental.redis_impl.RedisSnapshotBackup")
 BACKUP_NODETOOLSNAPSHOT_CLS = ("trove.guestagent.strategies.backup."
                                "experimental.cassandra_impl.NodetoolSnapshot")
 RESTORE_NODETOOLSNAPSHOT_CLS = ("trove.guestagent.strategies.restore."
@@ -105,6 +115,8 @@ XTRA_INCR_PREPARE = ("sudo innobackupex"
                      " %(incr)s"
                      " 2>/tmp/innoprepare.log")
 SQLDUMP_RESTORE = "sudo mysql"
+PARALLELDUMP_BACKUP = "sudo tar -C /var/lib/mysql/paralleldump -cf - ."
+PARALLELDUMP_RESTORE = "sudo tar -C /var/lib/mysql/paralleldump -xf -"
 PREPARE = ("sudo innobackupex"
            " --defaults-file=/var/lib/mysql/data/backup-my.cnf"
            " --ibbackup=xtrabackup"
@@ -232,6 +244,30 @@ class GuestAgentBackupTest(trove_testtools.TestCase):
                          bkup.command)
         self.assertEqual("12345.gz.enc", bkup.manifest)
 
+    def test_backup_mysql_parallel_dump_command(self):
+        backupBase.BackupRunner.is_encrypted = False
+        RunnerClass = utils.import_class(BACKUP_PARALLELDUMP_CLS)
+        bkup = RunnerClass(12345, extra_opts="--less-locking")
+        self.assertEqual(PARALLELDUMP_BACKUP + PIPE + ZIP, bkup.command)
+        self.assertEqual("12345.tar.gz", bkup.manifest)
+        self.assertIn("--threads=4 --outputdir=/var/lib/mysql/paralleldump",
+                      bkup.dump_cmd)
+        self.assertIn("--less-locking", bkup.dump_cmd)
+
+    @patch.object(operating_system, 'create_directory')
+    @patch.object(operating_system, 'remove')
+    def test_backup_mysql_parallel_dump_failure_cleans_up(self, mock_remove,
+                                                          *args):
+        RunnerClass = utils.import_class(BACKUP_PARALLELDUMP_CLS)
+        bkup = RunnerClass(12345, extra_opts="")
+        self.exec_timeout_mock.side_effect = (
+            exception.ProcessExecutionError('Error'))
+        self.assertRaises(exception.ProcessExecutionError,
+                          bkup._run_pre_backup)
+        mock_remove.assert_called_with('/var/lib/mysql/paralleldump',
+                                       force=True, as_root=True)
+        self.assertEqual(2, mock_remove.call_count)
+
     def test_restore_decrypted_xtrabackup_command(self):
         restoreBase.RestoreRunner.is_encrypted = False
         RunnerClass = utils.import_class(RESTORE_XTRA_CLS)
@@ -307,6 +343,25 @@ class GuestAgentBackupTest(trove_testtools.TestCase):
         self.assertEqual(DECRYPT + PIPE + UNZIP + PIPE + SQLDUMP_RESTORE,
                          restr.restore_cmd)
 
+    @patch.object(operating_system, 'remove')
+    def test_restore_mysql_parallel_dump(self, mock_remove):
+        restoreBase.RestoreRunner.is_encrypted = False
+        RunnerClass = utils.import_class(RESTORE_PARALLELDUMP_CLS)
+        restr = RunnerClass(None, restore_location="/var/lib/mysql/data",
+                            location="filename", checksum="md5")
+        self.assertEqual(UNZIP + PIPE + PARALLELDUMP_RESTORE,
+                         restr.restore_cmd)
+        restr.post_restore()
+        self.exec_timeout_mock.assert_called_once_with(
+            'myloader', '--threads=4',
+            '--directory=/var/lib/mysql/paralleldump', '--overwrite-tables',
+            '--innodb-optimize-keys', run_as_root=True, root_helper='sudo',
+            timeout=ANY)
+        mock_remove.assert_called_once_with('/var/lib/mysql/paralleldump',
+                                            force=True, as_root=True)
+        self.patch_conf_property('logical_restore_defer_indexes', False)
+        self.assertNotIn('--innodb-optimize-keys', restr.load_cmd)
+
     def test_backup_encrypted_cbbackup_command(self):
         backupBase.BackupRunner.encrypt_key = CRYPTO_KEY
         RunnerClass = utils.import_class(BACKUP_CBBACKUP_CLS)
@@ -872,6 +927,70 @@ class RedisBackupTests(trove_testtools.TestCase):
             0, self.backup_runner_mocks['_run_post_backup'].call_count)
 
 
+class RedisSnapshotBackupTests(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(RedisSnapshotBackupTests, self).setUp()
+        self.conf_man_patch = patch.object(
+            configuration.ConfigurationManager, 'parse_configuration',
+            mock.Mock(return_value={'dir': '/var/lib/redis',
+                                    'dbfilename': 'dump.rdb'}))
+        self.conf_man_patch.start()
+        self.addCleanup(self.conf_man_patch.stop)
+        self.runner_class = utils.import_class(BACKUP_REDIS_SNAPSHOT_CLS)
+        self.snapshot = '/var/lib/redis/dump.rdb.snapshot'
+
+    def test_zipped_command_reads_snapshot(self):
+        with patch.multiple(self.runner_class, is_zipped=True,
+                            is_encrypted=True, encrypt_key=CRYPTO_KEY):
+            bkp = self.runner_class(12345)
+        self.assertEqual('sudo gzip -c ' + self.snapshot + PIPE + ENCRYPT,
+                         bkp.command)
+
+    def test_encrypted_command_reads_snapshot(self):
+        with patch.multiple(self.runner_class, is_zipped=False,
+                            is_encrypted=True, encrypt_key=CRYPTO_KEY):
+            bkp = self.runner_class(12345)
+        self.assertEqual('sudo ' + ENCRYPT + ' -in ' + self.snapshot,
+                         bkp.command)
+
+    @patch.object(operating_system, 'link')
+    @patch.object(operating_system, 'remove')
+    def test_pre_backup_links_snapshot(self, mock_remove, mock_link):
+        bkp = self.runner_class(12345)
+        with patch.object(bkp.app, 'admin') as mock_admin:
+            bkp._run_pre_backup()
+        mock_admin.background_save.assert_called_once_with()
+        mock_link.assert_called_once_with('/var/lib/redis/dump.rdb',
+                                          self.snapshot, as_root=True)
+
+    @patch.object(operating_system, 'copy')
+    @patch.object(operating_system, 'link',
+                  side_effect=exception.ProcessExecutionError('cross-device'))
+    @patch.object(operating_system, 'remove')
+    def test_pre_backup_reflink_fallback(self, mock_remove, _, mock_copy):
+        bkp = self.runner_class(12345)
+        with patch.object(bkp.app, 'admin'):
+            bkp._run_pre_backup()
+        mock_copy.assert_called_once_with(
+            '/var/lib/redis/dump.rdb', self.snapshot, recursive=False,
+            reflink=True, as_root=True)
+
+    @patch.object(operating_system, 'remove')
+    def test_uncompressed_snapshot_read_directly(self, mock_remove):
+        with patch.multiple(self.runner_class, is_zipped=False,
+                            is_encrypted=False):
+            bkp = self.runner_class(12345)
+        with patch.object(os, 'access', return_value=True), patch(
+                'six.moves.builtins.open', mock.mock_open(read_data=b'RDB')):
+            bkp._run()
+            self.assertEqual(b'RDB', bkp.read(1024))
+            self.assertIsNone(bkp.process)
+        bkp._run_post_backup()
+        mock_remove.assert_called_once_with(self.snapshot, force=True,
+                                            as_root=True)
+
+
 class RedisRestoreTests(trove_testtools.TestCase):
 
     def setUp(self):
@@ -971,6 +1090,45 @@ class PostgresqlBackupTests(trove_testtools.TestCase):
             logs = self.bkutil.log_files_since_last_backup()
             self.assertEqual(logs, [self.b2[2], self.b2[3]])
 
+    @patch.object(operating_system, 'chown')
+    @patch.object(operating_system, 'write_file')
+    @patch.object(operating_system, 'create_directory')
+    @patch.object(operating_system, 'remove')
+    @patch.object(utils, 'execute_with_timeout',
+                  return_value=('db1\npostgres\n', ''))
+    @patch.object(pg_backup.PgParallelDump, '_build_app',
+                  return_value=Mock(pgsql_owner='postgres'))
+    def test_parallel_dump_each_database(self, _, mock_execute,
+                                         mock_remove, mock_create_directory,
+                                         mock_write_file, *args):
+        dump_dir = pg_backup.PARALLEL_DUMP_DIR
+        bkup = pg_backup.PgParallelDump(12345)
+        bkup._run_pre_backup()
+        mock_execute.assert_any_call(
+            'sudo', '-u', 'postgres', 'pg_dump', '--format=directory',
+            '--jobs=4', '--file=%s/db0001' % dump_dir, 'postgres',
+            timeout=None)
+        mock_write_file.assert_called_once_with(
+            dump_dir + '/databases.json',
+            [['db0000', 'db1'], ['db0001', 'postgres']], codec=ANY,
+            as_root=True)
+        self.assertEqual(1, mock_remove.call_count)
+        self.assertEqual("12345.tar", bkup.filename)
+
+    @patch.object(pg_restore.PgParallelDump, '_build_app',
+                  return_value=Mock(pgsql_owner='postgres'))
+    def test_parallel_restore_cmd(self, _):
+        restr = pg_restore.PgParallelDump(None, location='filename',
+                                          checksum='md5')
+        self.assertEqual(
+            ['pg_restore', '--jobs=4', '--clean', '--if-exists',
+             '--dbname=postgres', '/dump/db0000'],
+            restr._restore_cmd('/dump/db0000', 'postgres', True))
+        self.assertEqual(
+            ['pg_restore', '--jobs=4', '--create', '--dbname=postgres',
+             '/dump/db0001'],
+            restr._restore_cmd('/dump/db0001', 'db1', False))
+
 
 class DB2BackupTests(trove_testtools.TestCase):
 
@@ -0,0 +1,111 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import inspect
+import re
+
+import eventlet
+
+from trove.common import exception
+from trove.guestagent import api
+from trove.guestagent import concurrency
+from trove.tests.unittests import trove_testtools
+
+
+class FakeManager(object):
+
+    target = 'target'
+
+    def __init__(self):
+        self.running = []
+
+    def create_backup(self, context, delay=0):
+        self.running.append('create_backup')
+        eventlet.sleep(delay)
+        self.running.remove('create_backup')
+
+    def guest_log_action(self, context, delay=0):
+        self.running.append('guest_log_action')
+        eventlet.sleep(delay)
+        self.running.remove('guest_log_action')
+
+    def rpc_ping(self, context):
+        return list(self.running)
+
+
+class LimitedEndpointTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(LimitedEndpointTest, self).setUp()
+        self.manager = FakeManager()
+        self.classes = {
+            concurrency.LONG_IO: concurrency.ConcurrencyClass(
+                concurrency.LONG_IO, 1, 1),
+            concurrency.ADMIN: concurrency.ConcurrencyClass(
+                concurrency.ADMIN, 1, 0),
+            concurrency.LIVENESS: concurrency.ConcurrencyClass(
+                concurrency.LIVENESS, 1, 0),
+        }
+        self.endpoint = concurrency.LimitedEndpoint(self.manager,
+                                                    self.classes)
+
+    def test_classify(self):
+        self.assertEqual(concurrency.LONG_IO,
+                         concurrency.classify('create_backup'))
+        self.assertEqual(concurrency.LIVENESS,
+                         concurrency.classify('rpc_ping'))
+        self.assertEqual(concurrency.ADMIN,
+                         concurrency.classify('list_users'))
+        self.assertEqual(concurrency.ADMIN,
+                         concurrency.classify('restart'))
+
+    def test_cast_methods(self):
+        casts = re.findall(r'self\._cast\(\s*"(\w+)"', inspect.getsource(api))
+        self.assertEqual(set(casts), concurrency.CAST_METHODS)
+
+    def test_attributes_are_not_wrapped(self):
+        self.assertEqual('target', self.endpoint.target)
+        self.assertRaises(AttributeError, getattr, self.endpoint, 'missing')
+
+    def test_liveness_runs_during_long_io(self):
+        backup = eventlet.spawn(self.endpoint.create_backup, None, 0.05)
+        eventlet.sleep(0)
+        self.assertEqual(['create_backup'], self.endpoint.rpc_ping(None))
+        backup.wait()
+
+    def test_queue_limit(self):
+        running = eventlet.spawn(self.endpoint.guest_log_action, None, 0.05)
+        eventlet.sleep(0)
+        waiting = eventlet.spawn(self.endpoint.guest_log_action, None)
+        eventlet.sleep(0)
+        self.assertEqual(1, self.classes[concurrency.LONG_IO].waiting)
+        self.assertRaises(exception.GuestAgentBusy,
+                          self.endpoint.guest_log_action, None)
+        running.wait()
+        waiting.wait()
+        self.assertEqual(0, self.classes[concurrency.LONG_IO].waiting)
+
+    def test_casts_are_queued_past_the_limit(self):
+        running = eventlet.spawn(self.endpoint.create_backup, None, 0.05)
+        eventlet.sleep(0)
+        waiting = eventlet.spawn(self.endpoint.create_backup, None)
+        eventlet.sleep(0)
+        queued = eventlet.spawn(self.endpoint.create_backup, None)
+        eventlet.sleep(0)
+        self.assertEqual(2, self.classes[concurrency.LONG_IO].waiting)
+        running.wait()
+        waiting.wait()
+        queued.wait()
+        self.assertEqual(0, self.classes[concurrency.LONG_IO].waiting)
@@ -0,0 +1,133 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+from mock import MagicMock, patch
+from six.moves import http_client
+
+from trove.common import exception
+from trove.guestagent.datastore.experimental.couchdb import (
+    service as couchdb_service)
+from trove.tests.unittests import trove_testtools
+
+
+class FakeCouchDB(object):
+    """Answers the requests of the client from a few documents."""
+
+    def __init__(self):
+        self.requests = []
+        self.docs = {
+            '/_all_dbs': ['_replicator', '_users', 'db1', 'db2'],
+            '/_users/_all_docs': {'rows': [
+                {'key': '_design/_auth'},
+                {'key': 'org.couchdb.user:alice'},
+                {'key': 'org.couchdb.user:bob'},
+                {'key': 'org.couchdb.user:carol'}]},
+            '/db1/_security': {'members': {'names': ['alice', 'bob'],
+                                           'roles': []}},
+            '/db2/_security': {},
+        }
+
+    def request(self, method, path, body=None, missing_ok=False):
+        self.requests.append((method, path))
+        if method == 'PUT':
+            self.docs[path] = body
+            return {'ok': True}
+        return json.loads(json.dumps(self.docs.get(path, {})))
+
+
+class CouchDBAdminTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(CouchDBAdminTest, self).setUp()
+        self.patch_datastore_manager('couchdb')
+        self.couchdb = FakeCouchDB()
+        client = couchdb_service.CouchDBClient('os_admin', 'password')
+        client.request = self.couchdb.request
+        client_patcher = patch.object(couchdb_service.CouchDBAdmin,
+                                      '_client', client)
+        self.addCleanup(client_patcher.stop)
+        client_patcher.start()
+        self.admin = couchdb_service.CouchDBAdmin()
+
+    def test_list_users(self):
+        users, next_marker = self.admin.list_users(limit=2)
+        self.assertEqual(['alice', 'bob'],
+                         [user['_name'] for user in users])
+        self.assertEqual('bob', next_marker)
+        self.assertEqual([{'_name': 'db1'}],
+                         [{'_name': db['_name']}
+                          for db in users[0]['_databases']])
+        # The security of every database is only read once.
+        self.assertEqual(1, self.couchdb.requests.count(
+            ('GET', '/db1/_security')))
+
+    def test_grant_access_keeps_the_other_members(self):
+        self.admin.grant_access('carol', ['db1'])
+        self.assertEqual(['alice', 'bob', 'carol'],
+                         self.couchdb.docs['/db1/_security']
+                         ['members']['names'])
+
+    def test_revoke_access(self):
+        self.admin.revoke_access('alice', 'db1')
+        self.assertEqual(['bob'], self.couchdb.docs['/db1/_security']
+                         ['members']['names'])
+
+    def test_revoke_access_of_non_member(self):
+        self.admin.revoke_access('carol', 'db2')
+        self.assertNotIn(('PUT', '/db2/_security'), self.couchdb.requests)
+
+
+class CouchDBClientTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(CouchDBClientTest, self).setUp()
+        self.client = couchdb_service.CouchDBClient('os_admin', 'password')
+
+    def _response(self, status=200, body=b'{"ok": true}'):
+        response = MagicMock(status=status)
+        response.read.return_value = body
+        return response
+
+    @patch.object(http_client, 'HTTPConnection')
+    def test_connection_is_kept_alive(self, mock_connection):
+        mock_connection.return_value.getresponse.return_value = (
+            self._response())
+        self.assertEqual({'ok': True}, self.client.get('/db1'))
+        self.client.put('/db1', {'a': 1})
+        self.assertEqual(1, mock_connection.call_count)
+
+    @patch.object(http_client, 'HTTPConnection')
+    def test_errors(self, mock_connection):
+        mock_connection.return_value.getresponse.return_value = (
+            self._response(404, b'{"error": "not_found"}'))
+        self.assertIsNone(self.client.get('/db1', missing_ok=True))
+        self.assertRaises(exception.GuestError, self.client.get, '/db1')
+
+    @patch.object(http_client, 'HTTPConnection')
+    def test_reconnect(self, mock_connection):
+        stale = MagicMock()
+        stale.request.side_effect = http_client.BadStatusLine('')
+        fresh = MagicMock()
+        fresh.getresponse.return_value = self._response()
+        mock_connection.return_value = fresh
+        self.client._idle.append(stale)
+        self.assertEqual({'ok': True}, self.client.get('/db1'))
+        stale.close.assert_called_once_with()
+
+    def test_path(self):
+        self.assertEqual('/_users/org.couchdb.user:a%2Fb',
+                         self.client.path('_users', 'org.couchdb.user:a/b'))
@@ -13,6 +13,7 @@
 #    under the License.
 
 import abc
+import collections
 import os
 import subprocess
 import tempfile
@@ -33,6 +34,7 @@ import sqlalchemy
 from trove.common import cfg
 from trove.common import context as trove_context
 from trove.common.db.mysql import models as mysql_models
+from trove.common.exception import BackupCreationError
 from trove.common.exception import BadRequest
 from trove.common.exception import GuestError
 from trove.common.exception import PollTimeOut
@@ -570,6 +572,36 @@ class MySqlAdminTest(trove_testtools.TestCase):
             self._assert_execute_call(access_grants_expected,
                                       mock_execute, call_idx=1)
 
+    def test_bulk_provision(self):
+        users = [dict(FAKE_USER[0]),
+                 {"_name": "existing", "_password": "password",
+                  "_host": "%", "_databases": []}]
+        grants = [{"_name": "random", "_host": "%",
+                   "_databases": [dict(FAKE_DB_2)]},
+                  {"_name": "nobody", "_host": "%", "_databases": []}]
+
+        def execute(t):
+            if 'mysql.user' in t.text:
+                return [{'User': 'existing', 'Host': '%'}]
+            if 'testDB2' in t.text:
+                raise sqlalchemy.exc.DBAPIError(t.text, {},
+                                                Exception('denied'))
+
+        with patch.object(self.mock_client, 'execute',
+                          side_effect=execute) as mock_execute:
+            results = self.mySqlAdmin.bulk_provision([dict(FAKE_DB)], users,
+                                                     grants)
+        self.assertEqual([{'name': 'testDB', 'error': None}],
+                         results['databases'])
+        self.assertEqual({'name': 'random', 'host': '%', 'error': None},
+                         results['users'][0])
+        self.assertIn('already exists', results['users'][1]['error'])
+        # The message of the statement error, without the statement.
+        self.assertEqual('denied', results['grants'][0]['error'])
+        self.assertIn('cannot be found', results['grants'][1]['error'])
+        # The user query, the database, the user and its grant, the grant.
+        self.assertEqual(5, mock_execute.call_count)
+
     @patch.object(mysql_common_service.BaseMySqlApp, 'get_auth_password',
                   Mock(return_value='some_password'))
     def test_list_databases(self):
@@ -2349,6 +2381,56 @@ class TestRedisApp(BaseAppTest.AppTestCase):
                                           run_as_root=True, root_helper='sudo')
 
 
+class TestRedisAdmin(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TestRedisAdmin, self).setUp()
+        with patch.object(rservice.redis, 'StrictRedis') as mock_redis:
+            self.admin = rservice.RedisAdmin()
+        self.client = mock_redis.return_value
+
+    def _info(self, last_save, in_progress=0, status='ok'):
+        return {'rdb_last_save_time': last_save,
+                'rdb_bgsave_in_progress': in_progress,
+                'rdb_last_bgsave_status': status}
+
+    @patch.object(rservice.time, 'sleep')
+    def test_background_save(self, mock_sleep):
+        self.client.info.side_effect = [
+            self._info(100, in_progress=1), self._info(100, in_progress=1),
+            self._info(105)]
+        self.admin.background_save()
+        self.client.bgsave.assert_called_once_with()
+        # The polling interval grows between the checks.
+        self.assertEqual([rservice.BGSAVE_POLL_MIN_INTERVAL,
+                          rservice.BGSAVE_POLL_MIN_INTERVAL * 2],
+                         [call[0][0] for call in mock_sleep.call_args_list])
+
+    @patch.object(rservice.time, 'sleep')
+    def test_background_save_in_progress(self, _):
+        self.client.bgsave.side_effect = rservice.redis.ResponseError(
+            "Background save already in progress")
+        self.client.info.side_effect = [self._info(100, in_progress=1),
+                                        self._info(105)]
+        self.admin.background_save()
+
+    @patch.object(rservice.time, 'sleep')
+    def test_background_save_in_same_second(self, mock_sleep):
+        # The save is over before the first poll, within the second of the
+        # previous save.
+        self.client.info.side_effect = [self._info(100)]
+        self.admin.background_save(timeout=0)
+        self.assertFalse(mock_sleep.called)
+
+    @patch.object(rservice.time, 'sleep')
+    def test_background_save_failed(self, _):
+        # A failed save does not update the time of the last save.
+        self.client.info.side_effect = [self._info(100, in_progress=1),
+                                        self._info(100, status='err')]
+        self.assertRaises(BackupCreationError,
+                          self.admin.background_save)
+
+
 class CassandraDBAppTest(BaseAppTest.AppTestCase):
 
     @patch.object(ImportOverrideStrategy, '_initialize_import_directory')
@@ -2723,6 +2805,30 @@ class VerticaAppTest(trove_testtools.TestCase):
         subprocess.Popen = self.Popen
         super(VerticaAppTest, self).tearDown()
 
+    def test_apply_config_in_one_session(self):
+        vertica_system.shell_execute.return_value = (
+            '', 'vsql:<stdin>:2: ERROR 2512: Unknown parameter BadParam\n')
+        config = collections.OrderedDict([('MaxClientSessions', 100),
+                                          ('BadParam', 1)])
+        with patch.object(self.app, 'read_config',
+                          return_value=self.test_config):
+            self.assertRaises(RuntimeError, self.app._apply_config, config)
+        self.assertEqual(1, vertica_system.shell_execute.call_count)
+        script = vertica_system.shell_execute.call_args[1]['process_input']
+        self.assertEqual(['MaxClientSessions = 100;', 'BadParam = 1;'],
+                         [line.split(' SET ')[1]
+                          for line in script.splitlines()])
+
+    def test_exec_vsql_batch_errors_by_line(self):
+        vertica_system.shell_execute.return_value = (
+            '', 'vsql:<stdin>:1: WARNING 4539: Received no response\n'
+                'vsql:<stdin>:3: ERROR 3117: Division by zero\n')
+        errors = vertica_system.exec_vsql_batch(
+            'password', ['SELECT 1', 'SELECT 2', 'SELECT 1/0'])
+        self.assertTrue(errors[0].is_warning())
+        self.assertIsNone(errors[1])
+        self.assertEqual(3117, errors[2].code)
+
     def test_enable_root_is_root_not_enabled(self):
         with patch.object(self.app, 'read_config',
                           return_value=self.test_config):
@@ -3304,6 +3410,18 @@ class DB2AppTest(trove_testtools.TestCase):
         apply_user_override.assert_called_once_with(overrides)
         apply_config.assert_called_once_with(overrides)
 
+    @patch.object(db2service, 'run_batch')
+    def test_apply_config_in_one_session(self, run_batch):
+        run_batch.return_value = [
+            db2service.ClpResult('', [], None),
+            db2service.ClpResult('', [], 'SQL0104N  An unexpected token')]
+        self.assertRaises(RuntimeError, self.db2App._apply_config,
+                          collections.OrderedDict([('DIAGSIZE', 50),
+                                                   ('BAD', 1)]))
+        run_batch.assert_called_once_with([
+            "update database manager configuration using DIAGSIZE 50",
+            "update database manager configuration using BAD 1"])
+
     @patch.object(ConfigurationManager, 'get_user_override')
     @patch.object(ConfigurationManager, 'remove_user_override')
     @patch.object(db2service.DB2App, '_reset_config')
@@ -3360,21 +3478,17 @@ class DB2AdminTest(trove_testtools.TestCase):
                              "Delete database queries are not the same")
 
     def test_create_users(self):
-        with patch.object(db2service, 'run_command', MagicMock(
-                          return_value=None)):
+        with patch.object(db2service, 'run_batch', MagicMock(
+                          return_value=[])):
             db2service.utils.execute_with_timeout = MagicMock(
                 return_value=None)
             self.db2Admin.create_user(FAKE_USER)
             self.assertTrue(db2service.utils.execute_with_timeout.called)
-            self.assertTrue(db2service.run_command.called)
-            args, _ = db2service.run_command.call_args_list[0]
-            expected = "db2 connect to testDB; " \
-                "db2 GRANT DBADM,CREATETAB,BINDADD,CONNECT,DATAACCESS " \
-                "ON DATABASE TO USER random; db2 connect reset"
-            self.assertEqual(
-                expected, args[0],
-                "Granting database access queries are not the same")
-            self.assertEqual(1, db2service.run_command.call_count)
+            db2service.run_batch.assert_called_once_with([
+                "connect to testDB",
+                "GRANT DBADM,CREATETAB,BINDADD,CONNECT,DATAACCESS "
+                "ON DATABASE TO USER random",
+                "connect reset"])
 
     def test_delete_users_with_db(self):
         with patch.object(db2service, 'run_command',
@@ -3423,34 +3537,73 @@ class DB2AdminTest(trove_testtools.TestCase):
     def test_list_users(self):
         databases = []
         databases.append(FAKE_DB)
-        with patch.object(db2service, 'run_command', MagicMock(
+        with patch.object(db2service, 'run_batch', MagicMock(
                           side_effect=ProcessExecutionError('Error'))):
             with patch.object(self.db2Admin, "list_databases",
                               MagicMock(return_value=(databases, None))):
                 self.db2Admin.list_users()
-                self.assertTrue(db2service.run_command.called)
-                args, _ = db2service.run_command.call_args_list[0]
-                expected = "db2 +o  connect to testDB; " \
-                    "db2 -x  select grantee, dataaccessauth " \
-                    "from sysibm.sysdbauth; db2 connect reset"
-            self.assertEqual(expected, args[0],
-                             "List database queries are not the same")
+                db2service.run_batch.assert_called_once_with([
+                    "connect to testDB",
+                    "select grantee, dataaccessauth from sysibm.sysdbauth",
+                    "connect reset"])
+
+    def test_list_users_in_one_session(self):
+        self.patch_datastore_manager('db2')
+        databases = [{"_name": "db1"}, {"_name": "db2"}]
+        output = ("connect to db1\n\n"
+                  "   Database Connection Information\n\n"
+                  "select grantee, dataaccessauth from sysibm.sysdbauth\n"
+                  "DB2INST1    Y\n"
+                  "RANDOM      Y\n"
+                  "PUBLIC      N\n\n"
+                  "connect reset\n"
+                  "DB20000I  The SQL command completed successfully.\n\n"
+                  "connect to db2\n"
+                  "SQL1013N  The database alias name or database name "
+                  "\"DB2\" could\n"
+                  "not be found.  SQLSTATE=42705\n\n"
+                  "select grantee, dataaccessauth from sysibm.sysdbauth\n"
+                  "SQL1024N  A database connection does not exist.  "
+                  "SQLSTATE=08003\n\n"
+                  "connect reset\n"
+                  "SQL1024N  A database connection does not exist.  "
+                  "SQLSTATE=08003\n")
+        with patch.object(db2service.utils, 'execute_with_timeout',
+                          return_value=(output, '')) as execute:
+            with patch.object(self.db2Admin, "list_databases",
+                              MagicMock(return_value=(databases, None))):
+                users, next_marker = self.db2Admin.list_users()
+        self.assertEqual(1, execute.call_count)
+        self.assertEqual(['RANDOM'], [user['_name'] for user in users])
+        self.assertEqual(['db1'], [db['_name']
+                                   for db in users[0]['_databases']])
 
     def test_get_user(self):
         databases = []
         databases.append(FAKE_DB)
-        with patch.object(db2service, 'run_command', MagicMock(
+        with patch.object(db2service, 'run_batch', MagicMock(
                           side_effect=ProcessExecutionError('Error'))):
             with patch.object(self.db2Admin, "list_databases",
                               MagicMock(return_value=(databases, None))):
                 self.db2Admin._get_user('random', None)
-                self.assertTrue(db2service.run_command.called)
-                args, _ = db2service.run_command.call_args_list[0]
-                expected = "db2 +o  connect to testDB; " \
-                    "db2 -x  select grantee, dataaccessauth " \
-                    "from sysibm.sysdbauth; db2 connect reset"
-                self.assertEqual(args[0], expected,
-                                 "Delete database queries are not the same")
+                db2service.run_batch.assert_called_once_with([
+                    "connect to testDB",
+                    "select grantee, dataaccessauth from sysibm.sysdbauth",
+                    "connect reset"])
+
+    def test_parse_batch_output(self):
+        results = db2service.parse_batch_output(
+            ["update database manager configuration using DIAGSIZE 50",
+             "update database manager configuration using BAD 1"],
+            "update database manager configuration using DIAGSIZE 50\n"
+            "DB20000I  The UPDATE DATABASE MANAGER CONFIGURATION command "
+            "completed\nsuccessfully.\n\n"
+            "update database manager configuration using BAD 1\n"
+            "SQL0104N  An unexpected token \"BAD\" was found.  "
+            "SQLSTATE=42601\n")
+        self.assertIsNone(results[0].error)
+        self.assertEqual([], results[0].output)
+        self.assertTrue(results[1].error.startswith('SQL0104N'))
 
 
 class PXCAppTest(trove_testtools.TestCase):
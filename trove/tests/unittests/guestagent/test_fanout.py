@@ -0,0 +1,85 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+from mock import Mock
+
+from trove.common import exception
+from trove.guestagent import fanout
+from trove.tests.unittests import trove_testtools
+
+
+class FakeGuest(object):
+
+    running = 0
+    most_running = 0
+
+    def __init__(self, instance_id):
+        self.instance_id = instance_id
+
+    def restart(self, delay=0):
+        FakeGuest.running += 1
+        FakeGuest.most_running = max(FakeGuest.most_running,
+                                     FakeGuest.running)
+        try:
+            eventlet.sleep(delay)
+        finally:
+            FakeGuest.running -= 1
+        return self.instance_id
+
+    def fail(self):
+        raise exception.GuestError(original_message='boom')
+
+
+class GuestFanoutTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(GuestFanoutTest, self).setUp()
+        FakeGuest.running = 0
+        FakeGuest.most_running = 0
+
+    def _run(self, calls, **kwargs):
+        return fanout.GuestFanout(Mock(), client_factory=FakeGuest,
+                                  **kwargs).run(calls)
+
+    def test_results_in_call_order(self):
+        results = self._run([('a', 'restart', {'delay': 0.02}),
+                             ('b', 'restart', None)])
+        self.assertEqual(['a', 'b'], [result.result for result in results])
+        self.assertEqual({}, results.errors)
+        results.raise_on_error()
+
+    def test_concurrency_limit(self):
+        self._run([(str(i), 'restart', {'delay': 0.01}) for i in range(6)],
+                  concurrency=2)
+        self.assertEqual(2, FakeGuest.most_running)
+
+    def test_errors_are_collected(self):
+        results = self._run([('a', 'fail', {}), ('b', 'restart', {})])
+        self.assertEqual(['a'], list(results.errors))
+        self.assertEqual('b', results[1].result)
+        self.assertRaises(exception.GuestError, results.raise_on_error)
+
+    def test_call_timeout(self):
+        results = self._run([('a', 'restart', {'delay': 1}),
+                             ('b', 'restart', {})], call_timeout=0.01)
+        self.assertIsInstance(results.errors['a'], exception.GuestTimeout)
+        self.assertFalse(results[1].failed)
+
+    def test_deadline(self):
+        results = self._run([('a', 'restart', {'delay': 0.05}),
+                             ('b', 'restart', {})],
+                            concurrency=1, deadline=0.01)
+        self.assertEqual(['a', 'b'], sorted(results.errors))
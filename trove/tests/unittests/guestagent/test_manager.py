@@ -16,6 +16,8 @@
 
 import getpass
 import os
+import shutil
+import tempfile
 
 from mock import ANY
 from mock import DEFAULT
@@ -29,6 +31,8 @@ from proboscis.asserts import assert_true
 
 from trove.common.context import TroveContext
 from trove.common import exception
+from trove.common import remote
+from trove.conductor import api as conductor_api
 from trove.guestagent.common import operating_system
 from trove.guestagent.datastore import manager
 from trove.guestagent import guest_log
@@ -516,3 +520,75 @@ class ManagerTest(trove_testtools.TestCase):
                 {'module': self.expected_module_details})
             assert_is_none(module_details)
             assert_equal(1, mock_rm.call_count)
+
+    def test_log_archive_action_needs_own_swift_credentials(self):
+        with patch.object(remote, 'create_swift_client',
+                          remote.swift_client):
+            self.assertRaises(exception.TroveError,
+                              self.manager.log_archive_action,
+                              self.context, True)
+
+    @patch.object(remote, 'create_swift_client')
+    @patch.object(operating_system, 'exists', return_value=True)
+    @patch.object(operating_system, 'read_file')
+    @patch.object(operating_system, 'write_file')
+    @patch.object(manager.eventlet, 'spawn')
+    def test_log_archive_state_survives_restart(self, mock_spawn,
+                                                mock_write, mock_read,
+                                                *args):
+        self.context.tenant = 'tenant-id'
+        with patch.object(self.manager, 'do_log_archive') as mock_archive:
+            self.manager.log_archive_action(self.context, True)
+            mock_archive.assert_called_once_with(self.context)
+        state = mock_write.call_args[0][1]
+        self.assertEqual({'enabled': True, 'tenant_id': 'tenant-id'}, state)
+
+        # The restarted guest agent reads the state back.
+        mock_read.return_value = state
+        restarted = MockManager()
+        restarted.archive_logs(self.context)
+        mock_spawn.assert_called_once_with(restarted._run_log_archive)
+
+    @patch.object(conductor_api.API, 'report_log_archive')
+    @patch('trove.guestagent.datastore.manager.LOG')
+    def test_failed_log_archive_pass_is_reported(self, mock_logging,
+                                                 mock_report):
+        self.manager._log_archive_state = {'enabled': True,
+                                           'tenant_id': 'tenant-id'}
+        with patch.object(self.manager, 'do_log_archive',
+                          side_effect=Exception('token expired')) as (
+                mock_archive):
+            self.manager._run_log_archive()
+        context = mock_archive.call_args[0][0]
+        self.assertEqual('tenant-id', context.tenant)
+        self.assertIsNone(context.auth_token)
+        mock_report.assert_called_once_with(ANY, 'token expired')
+
+
+class ModuleContentsCacheTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(ModuleContentsCacheTest, self).setUp()
+        self.module_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.module_dir)
+        self.fetch = Mock(return_value='Y29udGVudHM=')
+
+    def test_fetch_and_write_once(self):
+        manager_cls = module_manager.ModuleManager
+        contents_file = manager_cls.write_module_contents(
+            self.module_dir, None, 'md5-1', self.fetch)
+        with open(contents_file) as contents:
+            assert_equal('contents', contents.read())
+        manager_cls.write_module_contents(
+            self.module_dir, None, 'md5-1', self.fetch)
+        assert_equal(1, self.fetch.call_count)
+
+    def test_new_md5_is_written(self):
+        manager_cls = module_manager.ModuleManager
+        manager_cls.write_module_contents(
+            self.module_dir, 'b2xk', 'md5-1')
+        contents_file = manager_cls.write_module_contents(
+            self.module_dir, None, 'md5-2', self.fetch)
+        with open(contents_file) as contents:
+            assert_equal('contents', contents.read())
+        assert_equal(1, self.fetch.call_count)
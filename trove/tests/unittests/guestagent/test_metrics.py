@@ -0,0 +1,134 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import Mock, patch
+
+from trove.guestagent.datastore.experimental.cassandra import (
+    service as cass_service)
+from trove.guestagent.datastore.mysql_common import service as mysql_service
+from trove.guestagent import metrics
+from trove.tests.unittests import trove_testtools
+
+
+class FakeCollector(metrics.MetricsCollector):
+
+    counter_prefixes = ('queries',)
+
+    def __init__(self, samples):
+        self.samples = list(samples)
+
+    def collect(self):
+        sample = self.samples.pop(0)
+        if isinstance(sample, Exception):
+            raise sample
+        return sample
+
+
+class MetricsTest(trove_testtools.TestCase):
+
+    def _sampler(self, samples, size=10):
+        return metrics.MetricsSampler(FakeCollector(samples), size,
+                                      interval=10, max_overhead=0.05)
+
+    def test_flatten(self):
+        self.assertEqual(
+            {'a': 1.0, 'b.c': 2.5, 'd': 3.0},
+            metrics.flatten({'a': 1, 'b': {'c': 2.5, 'e': 'x'}, 'd': '3'}))
+        self.assertEqual({'a': 1.0}, metrics.flatten({'a': 1, 'd': '3'},
+                                                     parse_strings=False))
+
+    def test_ring_buffer_keeps_last_samples(self):
+        ring = metrics.RingBuffer(3)
+        for timestamp in range(5):
+            ring.append(timestamp, {'a': timestamp * 10})
+        ring.append(5, {'b': 1})
+        indexes = ring.window(0)
+        self.assertEqual([3, 4, 5], [ring.timestamps[i] for i in indexes])
+        self.assertEqual([(3, 30), (4, 40)], ring.values('a', indexes))
+        self.assertEqual([(5, 1)], ring.values('b', indexes))
+        self.assertEqual([4, 5], [ring.timestamps[i]
+                                  for i in ring.window(4)])
+
+    def test_aggregate(self):
+        sampler = self._sampler([{'queries': 100, 'threads': 4},
+                                 {'queries': 150, 'threads': 8},
+                                 # The datastore was restarted.
+                                 {'queries': 20, 'threads': 6}])
+        with patch.object(metrics.time, 'time',
+                          side_effect=[0, 0, 10, 10, 20, 20, 30]):
+            for _ in range(3):
+                sampler.sample()
+            aggregates = sampler.aggregate()
+        self.assertEqual(3, aggregates['samples'])
+        self.assertEqual({'delta': 70.0, 'rate': 3.5, 'last': 20.0},
+                         aggregates['metrics']['queries'])
+        self.assertEqual({'min': 4.0, 'max': 8.0, 'avg': 6.0, 'last': 6.0},
+                         aggregates['metrics']['threads'])
+        self.assertEqual(['threads'], list(
+            sampler.aggregate(names=['threads'])['metrics']))
+
+    def test_slow_samples_are_paid_back(self):
+        sampler = self._sampler([{'queries': 1}, {'queries': 2}])
+        sampler.started_at = 0
+        # The first collection takes 1.5s, three times the 0.5s allowed.
+        with patch.object(metrics.time, 'time',
+                          side_effect=[0, 1.5, 30, 30.1, 32]):
+            self.assertTrue(sampler.sample())
+            self.assertFalse(sampler.sample())
+            self.assertFalse(sampler.sample())
+            self.assertTrue(sampler.sample())
+            stats = sampler.stats()
+        self.assertEqual(2, stats['samples'])
+        self.assertEqual(2, stats['skipped'])
+        self.assertAlmostEqual(0.05, stats['overhead'])
+
+    def test_collection_errors_are_counted(self):
+        sampler = self._sampler([Exception('down'), {'queries': 1}])
+        self.assertFalse(sampler.sample())
+        self.assertTrue(sampler.sample())
+        self.assertEqual(1, sampler.errors)
+        self.assertEqual(1, sampler.aggregate()['samples'])
+
+    def test_mysql_counters(self):
+        collector = mysql_service.MySqlMetricsCollector(Mock())
+        self.assertTrue(collector.is_counter('Com_select'))
+        self.assertTrue(collector.is_counter('Opened_tables'))
+        self.assertFalse(collector.is_counter('Open_tables'))
+        self.assertFalse(collector.is_counter('Threads_running'))
+
+    def test_parse_cfstats(self):
+        out = ("Keyspace: ks\n"
+               "\tRead Count: 12\n"
+               "\tRead Latency: 0.25 ms.\n"
+               "\tPending Flushes: 0\n"
+               "\t\tTable: users\n"
+               "\t\tSSTable count: 3\n"
+               "\t\tSpace used (live): 4096\n"
+               "\t\tLocal read count: 12\n"
+               "\t\tLocal write latency: NaN ms\n"
+               "\t\tBloom filter false positives: 0\n"
+               "----------------\n"
+               "Keyspace: system\n"
+               "\tRead Count: 400\n")
+        collector = cass_service.CassandraMetricsCollector
+        self.assertEqual({'ks.read_count': 12.0,
+                          'ks.read_latency': 0.25,
+                          'ks.pending_flushes': 0.0,
+                          'ks.users.sstable_count': 3.0,
+                          'ks.users.space_used_live': 4096.0,
+                          'ks.users.local_read_count': 12.0},
+                         collector.parse_cfstats(out, ['system']))
+        self.assertTrue(collector(Mock()).is_counter(
+            'ks.users.local_read_count'))
@@ -103,7 +103,8 @@ class GuestAgentMongoDBManagerTest(DatastoreManagerTest):
         self._prepare_method(device_path=device_path)
 
         mocked_volume().unmount_device.assert_called_with(device_path)
-        mocked_volume().format.assert_any_call()
+        mocked_volume().format.assert_any_call(
+            migration_source=self.mount_point)
         mocked_volume().migrate_data.assert_called_with(self.mount_point)
         mocked_volume().mount.assert_called_with(self.mount_point)
 
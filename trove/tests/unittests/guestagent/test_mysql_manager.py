@@ -14,6 +14,7 @@
 
 import os
 
+from mock import ANY
 from mock import DEFAULT
 from mock import MagicMock
 from mock import patch
@@ -194,7 +195,8 @@ class GuestAgentManagerTest(DatastoreManagerTest):
         # entry point
         Manager().create_backup(self.context, 'backup_id_123')
         # assertions
-        backup_mock.assert_any_call(self.context, 'backup_id_123')
+        backup_mock.assert_any_call(self.context, 'backup_id_123',
+                                    sampler=ANY)
 
     def test_prepare_device_path_true(self):
         self._prepare_dynamic()
@@ -380,6 +382,25 @@ class GuestAgentManagerTest(DatastoreManagerTest):
             1, mock_replication.snapshot_for_replication.call_count)
         self.assertEqual(1, mock_replication.get_master_ref.call_count)
 
+    def test_get_replication_snapshot_seed(self):
+        dbaas.MySqlAppStatus.get = MagicMock(return_value=MagicMock())
+        seed_ref = {'id': 'seed_id', 'type': 'InnoBackupEx',
+                    'host': '10.0.0.1', 'port': 7780, 'secret': 'secret'}
+        mock_replication = MagicMock()
+        mock_replication.seed_for_replication = MagicMock(
+            return_value=(seed_ref, 123456789))
+        self.mock_rs_class.return_value = mock_replication
+        self.mock_gfvs_class.return_value = {'used': 1.0, 'total': 2.0}
+
+        replication_snapshot = self.manager.get_replication_snapshot(
+            self.context, {'seed': True}, None)
+
+        self.assertEqual(seed_ref, replication_snapshot['dataset']['seed'])
+        self.assertIsNone(replication_snapshot['dataset']['snapshot_id'])
+        self.assertEqual(123456789, replication_snapshot['log_position'])
+        self.assertEqual(
+            0, mock_replication.snapshot_for_replication.call_count)
+
     def test_attach_replication_slave_valid(self):
         mock_status = MagicMock()
         dbaas.MySqlAppStatus.get = MagicMock(return_value=mock_status)
@@ -715,3 +736,54 @@ class GuestAgentManagerTest(DatastoreManagerTest):
                               self.context, '/var/lib/mysql', app)
             app.status.set_status.assert_called_with(
                 rd_instance.ServiceStatuses.FAILED)
+
+    @patch.object(volume.DataMigration, '_rsync')
+    @patch.object(volume.VolumeDevice, '_check_device_exists')
+    @patch.object(volume.VolumeDevice, 'unmount_device')
+    @patch.object(volume.VolumeDevice, 'unmount')
+    @patch.object(volume.VolumeDevice, 'mount')
+    @patch.object(volume.utils, 'execute', return_value=('', ''))
+    @patch.object(operating_system, 'chown')
+    @patch.object(operating_system, 'remove')
+    @patch.object(operating_system, 'write_file')
+    @patch.object(operating_system, 'read_file')
+    @patch.object(operating_system, 'exists', return_value=True)
+    @patch('os.path.exists', return_value=True)
+    def test_prepare_resumes_data_migration(self, mock_path_exists,
+                                            mock_exists, mock_read_file,
+                                            *args):
+        # A previous prepare copied the first work unit.
+        mock_read_file.return_value = {
+            'source': '/var/lib/mysql/', 'target': '/mnt/volume/data',
+            'units': [100, 50], 'done': [0]}
+        mock_rsync = args[-1]
+        with patch.multiple(self.manager, _mysql_app=MagicMock(),
+                            _mysql_app_status=MagicMock(),
+                            _mysql_admin=MagicMock()):
+            with patch.multiple(volume.VolumeDevice, _format=DEFAULT,
+                                _check_format=DEFAULT) as mocks:
+                self.manager.do_prepare(
+                    self.context, None, None, '2048', None, '/dev/vdb',
+                    '/var/lib/mysql', None, None, None, None, None, None)
+        self.assertFalse(mocks['_format'].called)
+        copied = [c[0][0] for c in mock_rsync.call_args_list
+                  if c[0][0] == '--from0']
+        self.assertEqual(1, len(copied))
+        mock_rsync.assert_any_call(
+            '--from0',
+            '--files-from=/mnt/volume/.trove-migration/unit-0001.list',
+            '/var/lib/mysql/', '/mnt/volume/data')
+
+    @patch.object(volume.VolumeDevice, '_check_device_exists')
+    @patch.object(volume.VolumeDevice, 'unmount')
+    @patch.object(volume.utils, 'execute', return_value=('', ''))
+    @patch.object(operating_system, 'read_file')
+    @patch.object(operating_system, 'exists', return_value=True)
+    def test_format_other_migration_checkpoint(self, mock_exists,
+                                               mock_read_file, *args):
+        mock_read_file.return_value = {'source': '/var/lib/other/'}
+        with patch.multiple(volume.VolumeDevice, _format=DEFAULT,
+                            _check_format=DEFAULT) as mocks:
+            volume.VolumeDevice('/dev/vdb').format(
+                migration_source='/var/lib/mysql')
+        mocks['_format'].assert_called_once_with()
@@ -500,12 +500,41 @@ class TestOperatingSystem(trove_testtools.TestCase):
                               "Got unknown keyword args: {'_unknown_kw': 0}"),
             'source', 'destination', _unknown_kw=0)
 
+    def test_link(self):
+        self._assert_execute_call(
+            [['ln', 'source', 'destination']],
+            [{'run_as_root': True, 'root_helper': 'sudo'}],
+            operating_system.link, None, 'source', 'destination', as_root=True)
+
+        self._assert_execute_call(
+            [['ln', '-f', 'source', 'destination']],
+            [{}],
+            operating_system.link, None, 'source', 'destination', force=True)
+
+        self._assert_execute_call(
+            None, None,
+            operating_system.link,
+            ExpectedException(exception.UnprocessableEntity,
+                              "Missing source path."), '', 'destination')
+
+        self._assert_execute_call(
+            None, None,
+            operating_system.link,
+            ExpectedException(exception.UnprocessableEntity,
+                              "Missing destination path."), 'source', None)
+
     def test_copy(self):
         self._assert_execute_call(
             [['cp', '-R', 'source', 'destination']],
             [{'run_as_root': True, 'root_helper': 'sudo'}],
             operating_system.copy, None, 'source', 'destination', as_root=True)
 
+        self._assert_execute_call(
+            [['cp', '--reflink=auto', 'source', 'destination']],
+            [{'run_as_root': True, 'root_helper': 'sudo'}],
+            operating_system.copy, None, 'source', 'destination',
+            recursive=False, reflink=True, as_root=True)
+
         self._assert_execute_call(
             [['cp', '-f', '-p', 'source', 'destination']],
             [{'run_as_root': True, 'root_helper': 'sudo'}],
@@ -0,0 +1,192 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import MagicMock, Mock, patch
+import psycopg2
+import psycopg2.extensions
+
+from trove.guestagent.datastore.experimental.postgresql import pgsql_query
+from trove.guestagent.datastore.experimental.postgresql import (
+    service as pg_service)
+from trove.tests.unittests import trove_testtools
+
+
+class PgSqlAdminTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(PgSqlAdminTest, self).setUp()
+        self.patch_datastore_manager('postgresql')
+        user = Mock()
+        user.name = 'os_admin'
+        self.admin = pg_service.PgSqlAdmin(user)
+
+    def test_list_page_query(self):
+        query = pgsql_query.UserQuery.list_page(
+            ignore=['os_admin'], limit=2, marker='bob')
+        self.assertIn("usename != 'os_admin'", query)
+        self.assertIn("usename > %(marker)s ORDER BY usename LIMIT 3",
+                      query)
+        query = pgsql_query.DatabaseQuery.list_page(include_marker=True,
+                                                    marker='db')
+        self.assertIn("datname >= %(marker)s ORDER BY datname", query)
+        self.assertNotIn("LIMIT", query)
+
+    def test_list_users_groups_rows(self):
+        rows = [('alice', 'db1', 'UTF8', 'C'),
+                ('alice', 'db2', 'UTF8', 'C'),
+                ('bob', None, None, None),
+                ('carol', 'db1', 'UTF8', 'C')]
+        with patch.object(self.admin, 'query', return_value=rows) as query:
+            users, next_marker = self.admin.list_users(None, limit=2,
+                                                       marker='a')
+        self.assertEqual({'marker': 'a'}, query.call_args[1]['data_values'])
+        self.assertEqual(['alice', 'bob'], [user['_name'] for user in users])
+        self.assertEqual(['db1', 'db2'],
+                         [db['_name'] for db in users[0]['_databases']])
+        self.assertEqual([], users[1]['_databases'])
+        self.assertEqual('bob', next_marker)
+
+    def test_list_databases_last_page(self):
+        rows = [('db1', 'UTF8', 'C')]
+        with patch.object(self.admin, 'query', return_value=rows):
+            databases, next_marker = self.admin.list_databases(None,
+                                                               limit=1)
+        self.assertEqual(['db1'], [db['_name'] for db in databases])
+        self.assertIsNone(next_marker)
+
+    def test_create_users_in_one_transaction(self):
+        users = [{'_name': name, '_password': 'password',
+                  '_databases': [{'_name': 'db1'}]}
+                 for name in ('alice', 'bob')]
+        with patch.object(self.admin, 'psql_transaction') as transaction:
+            self.admin.create_user(None, users)
+        transaction.assert_called_once_with([
+            pgsql_query.UserQuery.create('alice', 'password', None),
+            pgsql_query.AccessQuery.grant(user='alice', database='db1'),
+            pgsql_query.UserQuery.create('bob', 'password', None),
+            pgsql_query.AccessQuery.grant(user='bob', database='db1')])
+
+    def test_bulk_provision(self):
+        users = [{'_name': name, '_password': 'password', '_databases': []}
+                 for name in ('', 'alice', 'bob')]
+        grants = [{'_name': 'alice', '_databases': [{'_name': 'db1'}]}]
+        error = psycopg2.ProgrammingError('role "bob" already exists')
+        with patch.object(self.admin, 'psql_each',
+                          side_effect=[[None], [None, error, None]]) as run:
+            results = self.admin.bulk_provision(
+                None, [{'_name': 'db1', '_character_set': 'UTF8',
+                        '_collate': 'C'}], users, grants)
+        self.assertEqual({'autocommit': True}, run.call_args_list[0][1])
+        # The valid users and the grants, in one transaction.
+        self.assertEqual(3, len(run.call_args_list[1][0][0]))
+        self.assertEqual([None], [r['error'] for r in results['databases']])
+        self.assertEqual(['', 'alice', 'bob'],
+                         [r['name'] for r in results['users']])
+        self.assertIsNotNone(results['users'][0]['error'])
+        self.assertIsNone(results['users'][1]['error'])
+        self.assertEqual('role "bob" already exists',
+                         results['users'][2]['error'])
+        self.assertEqual([None], [r['error'] for r in results['grants']])
+
+
+class PostgresConnectionTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(PostgresConnectionTest, self).setUp()
+        self.patch_datastore_manager('postgresql')
+        self.addCleanup(pg_service._pools.clear)
+        pg_service._pools.clear()
+        self.connection = pg_service.PostgresLocalhostConnection('os_admin')
+
+    def _connection(self, error=None):
+        connection = MagicMock(closed=0)
+        connection.get_transaction_status.return_value = (
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.connection = connection
+        cursor.fetchall.return_value = [(1,)]
+        if error:
+            cursor.execute.side_effect = error
+        return connection
+
+    @patch.object(psycopg2, 'connect')
+    def test_connections_are_reused(self, mock_connect):
+        mock_connect.return_value = self._connection()
+        self.connection.query('SELECT 1')
+        self.connection.query('SELECT 1')
+        self.assertEqual(1, mock_connect.call_count)
+
+    @patch.object(psycopg2, 'connect')
+    def test_reconnect_after_restart(self, mock_connect):
+        stale = self._connection()
+        fresh = self._connection()
+        mock_connect.side_effect = [stale, fresh]
+        self.connection.query('SELECT 1')
+        # The server is restarted while the connection is idle.
+        stale_cursor = stale.cursor.return_value.__enter__.return_value
+        stale_cursor.execute.side_effect = psycopg2.OperationalError()
+        self.assertEqual([(1,)], self.connection.query('SELECT 1'))
+        stale.close.assert_called_once_with()
+        self.assertEqual(2, mock_connect.call_count)
+
+    @patch.object(psycopg2, 'connect')
+    def test_new_connection_error_is_raised(self, mock_connect):
+        mock_connect.return_value = self._connection(
+            error=psycopg2.OperationalError())
+        self.assertRaises(psycopg2.OperationalError,
+                          self.connection.query, 'SELECT 1')
+
+    @patch.object(psycopg2, 'connect')
+    def test_execute_each_in_savepoints(self, mock_connect):
+        connection = self._connection()
+        cursor = connection.cursor.return_value.__enter__.return_value
+
+        def execute(statement, *args):
+            if statement == 'bad':
+                raise psycopg2.ProgrammingError('bad statement')
+        cursor.execute.side_effect = execute
+        mock_connect.return_value = connection
+        errors = self.connection.execute_each([['good'], ['good', 'bad']])
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], psycopg2.ProgrammingError)
+        self.assertEqual(
+            ['SAVEPOINT item;', 'good', 'RELEASE SAVEPOINT item;',
+             'SAVEPOINT item;', 'good', 'bad',
+             'ROLLBACK TO SAVEPOINT item;'],
+            [c[0][0] for c in cursor.execute.call_args_list])
+        self.assertFalse(connection.autocommit)
+
+    @patch.object(psycopg2, 'connect')
+    def test_execute_each_resumes_after_reconnect(self, mock_connect):
+        stale = self._connection()
+        fresh = self._connection()
+        mock_connect.side_effect = [stale, fresh]
+        self.connection.query('SELECT 1')
+        stale_cursor = stale.cursor.return_value.__enter__.return_value
+
+        def execute(statement, *args):
+            # The server is restarted after the first database is created.
+            if statement == 'CREATE DATABASE "db2";':
+                stale.closed = 2
+                raise psycopg2.OperationalError()
+        stale_cursor.execute.side_effect = execute
+        errors = self.connection.execute_each(
+            [['CREATE DATABASE "db1";'], ['CREATE DATABASE "db2";']],
+            autocommit=True)
+        self.assertEqual([None, None], errors)
+        fresh_cursor = fresh.cursor.return_value.__enter__.return_value
+        self.assertEqual(
+            ['CREATE DATABASE "db2";'],
+            [c[0][0] for c in fresh_cursor.execute.call_args_list])
@@ -12,8 +12,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from mock import DEFAULT, MagicMock, patch
+from mock import ANY, call, DEFAULT, MagicMock, patch
 
+from trove.common import exception
 from trove.guestagent import backup
 from trove.guestagent.common import configuration
 from trove.guestagent.common.configuration import ImportOverrideStrategy
@@ -25,6 +26,7 @@ from trove.guestagent.datastore.experimental.redis.manager import (
 from trove.guestagent.volume import VolumeDevice
 from trove.tests.unittests.guestagent.test_datastore_manager import \
     DatastoreManagerTest
+from trove.tests.unittests import trove_testtools
 
 
 class RedisGuestAgentManagerTest(DatastoreManagerTest):
@@ -180,7 +182,8 @@ class RedisGuestAgentManagerTest(DatastoreManagerTest):
     def test_create_backup(self, *mocks):
         backup.backup = MagicMock(return_value=None)
         RedisManager().create_backup(self.context, 'backup_id_123')
-        backup.backup.assert_any_call(self.context, 'backup_id_123')
+        backup.backup.assert_any_call(self.context, 'backup_id_123',
+                                      sampler=ANY)
 
     def test_backup_required_for_replication(self):
         mock_replication = MagicMock()
@@ -326,3 +329,83 @@ class RedisGuestAgentManagerTest(DatastoreManagerTest):
         self.manager._get_repl_info = MagicMock(return_value=repl_info)
         self.manager.wait_for_txn(self.context, expected_txn_id)
         self.manager._get_repl_info.assert_any_call()
+
+    def test_get_cluster_nodes(self):
+        self.manager._app.admin.cluster.return_value = (
+            'a1 10.0.0.1:6379@16379 myself,master - 0 0 1 connected '
+            '0-5460 5462 [5463->-b2]\n'
+            'b2 10.0.0.2:6379@16379 master - 0 0 2 connected\n')
+        nodes = self.manager.get_cluster_nodes(self.context)
+        self.assertEqual({'address': '10.0.0.1:6379',
+                          'flags': ['myself', 'master'],
+                          'slots': [[0, 5460], [5462, 5462]]}, nodes['a1'])
+        self.assertEqual([], nodes['b2']['slots'])
+        self.assertEqual(['10.0.0.1', '6379'],
+                         self.manager.get_node_ip(self.context))
+        self.assertIsNone(self.manager.get_node_id_for_removal(self.context))
+        self.manager._app.admin.cluster.assert_called_with('NODES')
+
+    def test_cluster_migrate_slots(self):
+        self.patch_conf_property('slot_migration_max_bandwidth', 0,
+                                 section='redis')
+        self.patch_conf_property('slot_migration_batch_size', 10,
+                                 section='redis')
+        admin = self.manager._app.admin
+        admin.migrate_slot_keys.return_value = 5
+        self.assertEqual(5, self.manager.cluster_migrate_slots(
+            self.context, [1, 2], 'b2', '10.0.0.2', '6379'))
+        admin.cluster_setslots.assert_called_once_with(
+            [1, 2], 'MIGRATING', 'b2')
+        admin.migrate_slot_keys.assert_called_once_with(
+            [1, 2], '10.0.0.2', '6379', 10, throttle=None)
+
+
+class RedisAdminClusterTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(RedisAdminClusterTest, self).setUp()
+        self.admin = redis_service.RedisAdmin()
+        self.client = MagicMock()
+        self.admin._RedisAdmin__client = self.client
+        self.pipeline = self.client.pipeline.return_value
+
+    def test_migrate_slot_keys(self):
+        # Slot 1 has three keys, slot 2 one; two keys are moved at a time.
+        self.pipeline.execute.side_effect = [
+            [['k1', 'k2'], ['k4']], ['OK', 'OK'],
+            [['k3']], ['OK']]
+        self.assertEqual(4, self.admin.migrate_slot_keys(
+            [1, 2], '10.0.0.2', '6379', 2))
+        self.pipeline.execute_command.assert_has_calls([
+            call('CLUSTER', 'GETKEYSINSLOT', 1, 2),
+            call('CLUSTER', 'GETKEYSINSLOT', 2, 2),
+            call('MIGRATE', '10.0.0.2', '6379', '', 0,
+                 redis_service.MIGRATE_TIMEOUT, 'KEYS', 'k1', 'k2'),
+            call('MIGRATE', '10.0.0.2', '6379', '', 0,
+                 redis_service.MIGRATE_TIMEOUT, 'KEYS', 'k4'),
+            call('CLUSTER', 'GETKEYSINSLOT', 1, 2),
+            call('MIGRATE', '10.0.0.2', '6379', '', 0,
+                 redis_service.MIGRATE_TIMEOUT, 'KEYS', 'k3')])
+
+    def test_execute_error_with_integer_args(self):
+        self.client.execute_command.side_effect = Exception('ASK')
+        error = self.assertRaises(exception.TroveError, self.admin.execute,
+                                  'CLUSTER', 'SETSLOT', 42, 'STABLE')
+        self.assertIn("'CLUSTER SETSLOT 42 STABLE'", str(error))
+
+    def test_migrate_slot_keys_throttled(self):
+        throttle = MagicMock()
+        self.pipeline.execute.side_effect = [
+            [['k1']], [100, None], ['OK']]
+        self.admin.migrate_slot_keys([1], '10.0.0.2', '6379', 2,
+                                     throttle=throttle)
+        throttle.consume.assert_called_once_with(100)
+
+    @patch.object(redis_service.time, 'sleep')
+    @patch.object(redis_service.time, 'time', side_effect=[0, 0, 0.5])
+    def test_bandwidth_throttle(self, mock_time, mock_sleep):
+        throttle = redis_service.BandwidthThrottle(1000)
+        throttle.consume(500)
+        mock_sleep.assert_called_once_with(0.5)
+        throttle.consume(500)
+        mock_sleep.assert_called_with(0.5)
@@ -39,6 +39,7 @@ class VolumeDeviceTest(trove_testtools.TestCase):
         super(VolumeDeviceTest, self).tearDown()
 
     def test_migrate_data(self):
+        self.patch_conf_property('volume_migration_workers', 1)
         with patch.multiple(self.volumeDevice,
                             mount=DEFAULT, unmount=DEFAULT) as mocks:
             self.volumeDevice.migrate_data('/')
@@ -53,6 +54,15 @@ class VolumeDeviceTest(trove_testtools.TestCase):
             ]
             self.mock_exec.assert_has_calls(calls)
 
+    @patch.object(volume.DataMigration, 'run')
+    def test_migrate_data_parallel(self, mock_run):
+        with patch.multiple(self.volumeDevice,
+                            mount=DEFAULT, unmount=DEFAULT) as mocks:
+            self.volumeDevice.migrate_data('/var/lib/mysql', 'data')
+            mock_run.assert_called_once_with()
+            self.assertEqual(1, mocks['unmount'].call_count)
+            self.assertFalse(self.mock_exec.called)
+
     def test__check_device_exists(self):
         self.volumeDevice._check_device_exists()
         self.assertEqual(1, self.mock_exec.call_count)
@@ -237,3 +247,78 @@ class VolumeMountPointTest(trove_testtools.TestCase):
                      run_as_root=True)
             ]
             self.mock_exec.assert_has_calls(calls)
+
+
+class DataMigrationTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(DataMigrationTest, self).setUp()
+        self.migration = volume.DataMigration('/src/', '/mnt/volume/data',
+                                              '/mnt/volume', 2)
+        self.exec_patcher = patch.object(utils, 'execute',
+                                         return_value=('', ''))
+        self.mock_exec = self.exec_patcher.start()
+        self.addCleanup(self.exec_patcher.stop)
+        for name in ('exists', 'read_file', 'write_file', 'remove',
+                     'create_directory'):
+            patcher = patch.object(operating_system, name)
+            setattr(self, 'mock_' + name, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.mock_exists.return_value = False
+
+    def _rsync_call(self, *args):
+        return call('rsync', '--safe-links', '--perms', '--owner', '--group',
+                    '--xattrs', '--sparse', *args, root_helper='sudo',
+                    run_as_root=True)
+
+    def _unit_call(self, index):
+        return self._rsync_call(
+            '--from0',
+            '--files-from=/mnt/volume/.trove-migration/unit-%04d.list'
+            % index, '/src/', '/mnt/volume/data')
+
+    def test_split_work_units(self):
+        files = [(10, 'a'), (7, 'b'), (5, 'c'), (4, 'd'), (1, 'e')]
+        self.assertEqual([(14, ['a', 'd']), (13, ['b', 'c', 'e'])],
+                         volume.split_work_units(files, 2))
+        self.assertEqual([(10, ['a'])],
+                         volume.split_work_units(files[:1], 8))
+
+    def test_run(self):
+        self.mock_exec.side_effect = [
+            ('100\tib_logfile0\x0050\tdb/t 1.ibd\x00', ''),
+            ('', ''), ('', ''), ('', '')]
+        self.migration.run()
+        self.mock_write_file.assert_any_call(
+            '/mnt/volume/.trove-migration/unit-0001.list', 'db/t 1.ibd',
+            as_root=True)
+        self.assertEqual([0, 1], sorted(self.migration.state['done']))
+        self.mock_exec.assert_has_calls([
+            self._rsync_call('--recursive', '--ignore-existing', '/src/',
+                             '/mnt/volume/data')])
+        self.assertEqual(4, self.mock_exec.call_count)
+        self.mock_remove.assert_called_with('/mnt/volume/.trove-migration',
+                                            force=True, as_root=True)
+
+    def test_run_resume(self):
+        self.mock_exists.return_value = True
+        self.mock_read_file.return_value = {
+            'source': '/src/', 'target': '/mnt/volume/data',
+            'units': [100, 50], 'done': [0]}
+        self.migration.run()
+        self.assertEqual(2, self.mock_exec.call_count)
+        self.mock_exec.assert_has_calls([self._unit_call(1)])
+        self.assertNotIn(self._unit_call(0), self.mock_exec.call_args_list)
+
+    def test_run_unit_fails(self):
+        self.mock_exists.return_value = True
+        self.mock_read_file.return_value = {
+            'source': '/src/', 'target': '/mnt/volume/data',
+            'units': [100, 50], 'done': [1]}
+        self.mock_exec.side_effect = exception.ProcessExecutionError
+        self.assertRaises(exception.ProcessExecutionError,
+                          self.migration.run)
+        self.assertEqual(volume.MIGRATION_UNIT_ATTEMPTS,
+                         self.mock_exec.call_count)
+        # The checkpoint is kept for the next attempt.
+        self.assertFalse(self.mock_remove.called)
@@ -15,10 +15,13 @@
 #
 import jsonschema
 from mock import Mock
+from mock import patch
 from testtools.matchers import Is, Equals
 from testtools.testcase import skip
 
 from trove.common import apischema
+from trove.common import exception
+from trove.instance import models
 from trove.instance.service import InstanceController
 from trove.tests.unittests import trove_testtools
 
@@ -129,6 +132,44 @@ class TestInstanceController(trove_testtools.TestCase):
                         Equals("'%s' does not match '%s'" %
                                (backup_id_ref, apischema.uuid['pattern'])))
 
+    def test_validate_create_complete_with_restore_point(self):
+        body = self.instance
+        body['instance']['restorePoint'] = {
+            "instanceRef": "d761edd8-0771-46ff-9743-688b9e297a3b",
+            "timestamp": "2016-05-04T10:20:30Z"
+        }
+        schema = self.controller.get_schema('create', body)
+        validator = jsonschema.Draft4Validator(schema)
+        self.assertTrue(validator.is_valid(body))
+
+    def test_restore_point_parse(self):
+        instance_id = 'd761edd8-0771-46ff-9743-688b9e297a3b'
+        self.assertEqual(
+            (None, 'backup-id'),
+            self.controller._restore_point_parse({'backupRef': 'backup-id'}))
+        self.assertEqual(
+            ({'position': 'mysql-bin.000042'}, 'backup-id'),
+            self.controller._restore_point_parse(
+                {'backupRef': 'backup-id', 'position': 'mysql-bin.000042'}))
+        self.assertEqual(
+            ({'timestamp': '2016-05-04T10:20:30Z',
+              'instance_id': instance_id}, None),
+            self.controller._restore_point_parse(
+                {'instanceRef': instance_id,
+                 'timestamp': '2016-05-04T10:20:30Z'}))
+
+    def test_restore_point_parse_incomplete(self):
+        self.assertRaises(exception.BadRequest,
+                          self.controller._restore_point_parse,
+                          {'timestamp': '2016-05-04T10:20:30Z'})
+        self.assertRaises(exception.BadRequest,
+                          self.controller._restore_point_parse,
+                          {'instanceRef': 'instance-id',
+                           'position': 'mysql-bin.000042'})
+        self.assertRaises(exception.BadRequest,
+                          self.controller._restore_point_parse,
+                          {'instanceRef': 'instance-id'})
+
     def test_validate_create_blankname(self):
         body = self.instance
         body['instance']['name'] = "     "
@@ -254,6 +295,39 @@ class TestInstanceController(trove_testtools.TestCase):
         errors = sorted(validator.iter_errors(body), key=lambda e: e.path)
         self.verify_errors(errors, ["'' is too short"], ["flavorRef"])
 
+    def test_validate_log_archive(self):
+        body = {"log_archive": {"enable": 1}}
+        schema = self.controller.get_schema('action', body)
+        validator = jsonschema.Draft4Validator(schema)
+        self.assertTrue(validator.is_valid(body))
+        self.assertFalse(validator.is_valid({"log_archive": {}}))
+
+    @patch.object(InstanceController, 'authorize_instance_action')
+    @patch.object(models.Instance, 'load')
+    def test_action_log_archive(self, mock_load, mock_authorize):
+        self.req.environ = {'trove.context': self.context}
+        instance = mock_load.return_value
+
+        result = self.controller.action(
+            self.req, {"log_archive": {"enable": 1}}, 'tenant', 'inst-id')
+
+        self.assertEqual(202, result.status)
+        mock_authorize.assert_called_once_with(
+            self.context, 'log_archive', instance)
+        instance.log_archive_action.assert_called_once_with(True)
+
+    @patch.object(models.Instance, 'validate_can_perform_action')
+    @patch.object(models.Instance, 'get_guest')
+    def test_instance_log_archive_action(self, mock_get_guest, *args):
+        instance = models.Instance.__new__(models.Instance)
+        instance.context = self.context
+        instance.db_info = Mock(id='inst-id')
+
+        instance.log_archive_action(False)
+
+        guest = mock_get_guest.return_value
+        guest.log_archive_action.assert_called_once_with(False)
+
     def _setup_modify_instance_mocks(self):
         instance = Mock()
         instance.detach_replica = Mock()
@@ -0,0 +1,117 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import Mock, patch
+
+from trove.common import exception
+from trove.instance import models
+from trove.instance import server_cache
+from trove.tests.unittests import trove_testtools
+
+
+def server(id, status='ACTIVE'):
+    return Mock(id=id, status=status)
+
+
+class ServerListCacheTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(ServerListCacheTest, self).setUp()
+        self.cache = server_cache.ServerListCache()
+        self.list_servers = Mock(return_value=[server('a'), server('b')])
+        self.patch_conf_property('server_list_cache_ttl', 5)
+        self.patch_conf_property('server_list_cache_full_refresh', 300)
+        time_patcher = patch.object(server_cache.time, 'time',
+                                    return_value=1000.0)
+        self.addCleanup(time_patcher.stop)
+        self.time = time_patcher.start()
+
+    def _ids(self, refresh=False, key=('tenant', 'region')):
+        servers = self.cache.get(key, self.list_servers, refresh=refresh)
+        return [s.id for s in servers]
+
+    def test_disabled(self):
+        self.patch_conf_property('server_list_cache_ttl', 0)
+        self._ids()
+        self._ids()
+        self.assertEqual(2, self.list_servers.call_count)
+
+    def test_fresh_list_is_reused(self):
+        self.assertEqual(['a', 'b'], self._ids())
+        self.time.return_value = 1004.0
+        self.assertEqual(['a', 'b'], self._ids())
+        self.list_servers.assert_called_once_with()
+
+    def test_keys_are_separate(self):
+        self._ids()
+        self._ids(key=(server_cache.ALL_TENANTS, 'region'))
+        self.assertEqual(2, self.list_servers.call_count)
+
+    def test_refresh_bypasses_the_cache(self):
+        self._ids()
+        self._ids(refresh=True)
+        self.assertEqual(2, self.list_servers.call_count)
+
+    @patch.object(server_cache.eventlet, 'spawn_n')
+    def test_stale_list_is_refreshed_in_background(self, mock_spawn):
+        self._ids()
+        self.time.return_value = 1006.0
+        self.assertEqual(['a', 'b'], self._ids())
+        self.assertEqual(1, mock_spawn.call_count)
+        self.list_servers.assert_called_once_with()
+
+    def test_changes_since(self):
+        self._ids()
+        self.list_servers.return_value = [server('a', 'DELETED'),
+                                          server('c')]
+        self.time.return_value = 1011.0
+        self.assertEqual(['b', 'c'], self._ids())
+        self.assertIn('changes-since', self.list_servers.call_args[1])
+
+    def test_full_refresh(self):
+        self._ids()
+        self.list_servers.return_value = [server('c')]
+        self.time.return_value = 1300.0
+        self.assertEqual(['c'], self._ids())
+        self.assertEqual({}, self.list_servers.call_args[1])
+
+    def test_unused_lists_are_evicted(self):
+        self._ids()
+        self.time.return_value = 1200.0
+        self._ids(key=('other', 'region'))
+        self.assertEqual(2, len(self.cache._lists))
+        self.time.return_value = 1400.0
+        self._ids(key=('other', 'region'))
+        self.assertEqual([('other', 'region')], list(self.cache._lists))
+
+
+class ServerListMatcherTest(trove_testtools.TestCase):
+
+    def test_missing_server_refreshes_the_list_once(self):
+        refresh_servers = Mock(return_value=[server('a'), server('c')])
+        find_server = models.create_server_list_matcher(
+            [server('a')], refresh_servers)
+        self.assertEqual('c', find_server('inst-c', 'c').id)
+        self.assertRaises(exception.ComputeInstanceNotFound,
+                          find_server, 'inst-d', 'd')
+        self.assertRaises(exception.ComputeInstanceNotFound,
+                          find_server, 'inst-e', 'e')
+        refresh_servers.assert_called_once_with()
+
+    def test_missing_server_without_refresh(self):
+        find_server = models.create_server_list_matcher([server('a')])
+        self.assertEqual('a', find_server('inst-a', 'a').id)
+        self.assertRaises(exception.ComputeInstanceNotFound,
+                          find_server, 'inst-b', 'b')
@@ -0,0 +1,95 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import hashlib
+
+from mock import Mock, patch
+from swiftclient.client import ClientException
+
+from trove.common import exception
+from trove.module import blobs
+from trove.module import views
+from trove.tests.unittests import trove_testtools
+
+CONTENTS = b'bW9kdWxlIGNvbnRlbnRz'
+MD5 = hashlib.md5(CONTENTS).hexdigest()
+
+
+class ModuleBlobsTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(ModuleBlobsTest, self).setUp()
+        self.client = Mock(url='http://swift/v1/AUTH_t')
+        self.client.head_object.side_effect = ClientException(
+            'missing', http_status=404)
+        patcher = patch.object(blobs, 'create_swift_client',
+                               return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_is_external(self):
+        self.assertFalse(blobs.is_external(CONTENTS))
+        self.patch_conf_property('module_storage_min_size', 10)
+        self.assertTrue(blobs.is_external(CONTENTS))
+        self.assertFalse(blobs.is_external('short'))
+
+    def test_store_uploads_once(self):
+        reference = blobs.store(Mock(), MD5, CONTENTS)
+        self.client.head_object.side_effect = None
+        blobs.store(Mock(), MD5, CONTENTS)
+        self.assertEqual(1, self.client.put_object.call_count)
+        self.assertEqual(MD5, reference['name'])
+        self.assertNotEqual(
+            CONTENTS, self.client.put_object.call_args[0][2])
+
+    def test_store_uploads_again_after_delete(self):
+        self.client.head_object.side_effect = None
+        blobs.store(Mock(), MD5, CONTENTS)
+        self.assertFalse(self.client.put_object.called)
+        # The object is deleted from the account.
+        self.client.head_object.side_effect = ClientException(
+            'missing', http_status=404)
+        blobs.store(Mock(), MD5, CONTENTS)
+        self.assertEqual(1, self.client.put_object.call_count)
+
+    def test_store_existing_object(self):
+        self.client.head_object.side_effect = None
+        blobs.store(Mock(), MD5, CONTENTS)
+        self.assertFalse(self.client.put_object.called)
+
+    def test_fetch_round_trip(self):
+        reference = blobs.store(Mock(), MD5, CONTENTS)
+        self.client.get_object.return_value = (
+            {}, self.client.put_object.call_args[0][2])
+        self.assertEqual(CONTENTS, blobs.fetch(Mock(), reference))
+
+    def test_fetch_corrupt(self):
+        reference = blobs.store(Mock(), MD5, CONTENTS)
+        reference['md5'] = 'other'
+        self.client.get_object.return_value = (
+            {}, self.client.put_object.call_args[0][2])
+        self.assertRaises(exception.TroveError, blobs.fetch, Mock(),
+                          reference)
+
+    @patch.object(views, 'DetailedModuleView')
+    def test_module_list_carries_reference(self, mock_view):
+        self.patch_conf_property('module_storage_min_size', 10)
+        mock_view.return_value.data.return_value = {
+            'module': {'name': 'big', 'contents': CONTENTS}}
+        module_list = views.convert_modules_to_list([Mock(md5=MD5)], Mock())
+        module = module_list[0]['module']
+        self.assertNotIn('contents', module)
+        self.assertEqual(MD5, module['contents_ref']['md5'])
@@ -19,6 +19,7 @@ from testtools.matchers import Is
 from trove.extensions.mysql.service import SchemaController
 from trove.extensions.mysql.service import UserAccessController
 from trove.extensions.mysql.service import UserController
+from trove.extensions.mysql import views
 from trove.tests.unittests import trove_testtools
 
 
@@ -304,6 +305,33 @@ class TestUserController(trove_testtools.TestCase):
         self.assertTrue(validator_with_host.is_valid(body_with_host))
         self.assertFalse(validator_none_host.is_valid(body_none_host))
 
+    def test_validate_provision(self):
+        body = {'databases': [{'name': 'db1'}],
+                'users': [{'name': 'joe', 'password': 'secret',
+                           'databases': [{'name': 'db1'}]}],
+                'grants': [{'name': 'ann', 'host': '%',
+                            'databases': [{'name': 'db1'}]}]}
+        schema = self.controller.get_schema('provision', body)
+        validator = jsonschema.Draft4Validator(schema)
+        self.assertTrue(validator.is_valid(body))
+        self.assertFalse(validator.is_valid({}))
+        self.assertFalse(validator.is_valid({'grants': [{'name': 'ann'}]}))
+        self.assertFalse(validator.is_valid({'user': []}))
+
+    def test_provision_view(self):
+        results = {'databases': [{'name': 'db1', 'error': None}],
+                   'users': [{'name': 'joe', 'host': '%',
+                              'error': 'A user with the name "joe" already '
+                                       'exists.'}],
+                   'grants': []}
+        self.assertEqual(
+            {'databases': [{'name': 'db1', 'status': 'ok'}],
+             'users': [{'name': 'joe', 'host': '%', 'status': 'failed',
+                        'error': 'A user with the name "joe" already '
+                                 'exists.'}],
+             'grants': []},
+            views.BulkProvisionView(results).data())
+
 
 class TestUserAccessController(trove_testtools.TestCase):
     def test_validate_update_db(self):
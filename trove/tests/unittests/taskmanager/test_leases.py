@@ -0,0 +1,180 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import Mock, patch
+from oslo_service import loopingcall
+
+from trove.common import exception
+from trove.instance.tasks import InstanceTasks
+from trove.taskmanager import leases
+from trove.tests.unittests import trove_testtools
+
+
+class FakeManager(object):
+
+    def __init__(self):
+        self.task_leases = leases.TaskLeases(self)
+        self.calls = []
+
+    @leases.leased_task('instance_id')
+    def resize_volume(self, context, instance_id, new_size):
+        self.calls.append((instance_id, new_size))
+
+
+def _lease(owner=None, attempts=0, resource_id='inst'):
+    return Mock(id='lease', method='resize_volume', resource_id=resource_id,
+                payload='{}', owner=owner, attempts=attempts)
+
+
+class LeasedTaskTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(LeasedTaskTest, self).setUp()
+        self.manager = FakeManager()
+        self.context = Mock()
+
+    def test_leases_disabled(self):
+        self.manager.resize_volume(self.context, 'inst', 10)
+        self.assertEqual([('inst', 10)], self.manager.calls)
+
+    @patch.object(leases.TaskLeases, 'start')
+    def test_leases_enabled(self, mock_start):
+        self.patch_conf_property('taskmanager_task_leases', True)
+        self.manager.resize_volume(self.context, 'inst', new_size=10)
+        mock_start.assert_called_once_with(
+            'resize_volume', 'inst', self.context,
+            {'instance_id': 'inst', 'new_size': 10})
+        self.assertEqual([], self.manager.calls)
+
+
+class TaskLeasesTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(TaskLeasesTest, self).setUp()
+        self.manager = FakeManager()
+        self.task_leases = self.manager.task_leases
+        self.context = Mock()
+        patcher = patch.object(leases.DBTaskLease, 'query')
+        self.mock_query = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(leases.DBTaskLease, 'create',
+                               return_value=_lease())
+        self.mock_create = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(leases.TaskLeases, '_dump', return_value='{}')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(leases.loopingcall, 'FixedIntervalLoopingCall')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(leases.greenthread, 'spawn_n')
+        self.mock_spawn_n = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _set_claimed(self, claimed):
+        self.mock_query.return_value.filter.return_value.update.\
+            return_value = claimed
+
+    def test_start_runs_claimed_task(self):
+        self._set_claimed(1)
+        self.task_leases.start('resize_volume', 'inst', self.context,
+                               {'instance_id': 'inst', 'new_size': 10})
+        self.assertEqual([('inst', 10)], self.manager.calls)
+        self.assertEqual(0, self.task_leases.running)
+        self.mock_query.return_value.filter_by.assert_called_with(
+            id='lease', owner=self.task_leases.owner)
+        self.assertTrue(
+            self.mock_query.return_value.filter_by.return_value.delete.called)
+
+    def test_start_at_capacity(self):
+        self.patch_conf_property('taskmanager_max_concurrent_tasks', 1)
+        self.task_leases.running = 1
+        self.task_leases.start('resize_volume', 'inst', self.context,
+                               {'instance_id': 'inst', 'new_size': 10})
+        self.assertEqual([], self.manager.calls)
+        self.assertEqual(1, self.task_leases.running)
+        self.assertFalse(self.mock_query.return_value.filter.called)
+
+    def test_lost_claim_frees_slot(self):
+        self._set_claimed(0)
+        self.assertFalse(self.task_leases._claim(_lease()))
+        self.assertEqual(0, self.task_leases.running)
+
+    def _take_over(self, lease):
+        (self.mock_query.return_value.filter.return_value.order_by.
+         return_value.limit.return_value.all.return_value) = [lease]
+        self._set_claimed(1)
+        with patch.object(leases.TaskLeases, '_load',
+                          return_value=(self.context, {})):
+            return self.task_leases.take_over()
+
+    @patch.object(leases.DBInstance, 'find_by')
+    def test_take_over_orphaned_task(self, mock_find_by):
+        mock_find_by.return_value.task_status = InstanceTasks.RESIZING
+        self.assertEqual(1, self._take_over(_lease(owner='dead:1')))
+        self.assertEqual(1, self.task_leases.running)
+        self.assertEqual('resize_volume', self.mock_spawn_n.call_args[0][2])
+
+    @patch.object(leases.DBInstance, 'find_by')
+    def test_take_over_finished_task(self, mock_find_by):
+        mock_find_by.return_value.task_status = InstanceTasks.NONE
+        self.assertEqual(0, self._take_over(_lease(owner='dead:1')))
+        self.assertEqual(0, self.task_leases.running)
+        self.assertFalse(self.mock_spawn_n.called)
+
+    @patch.object(leases.DBInstance, 'find_by',
+                  side_effect=exception.ModelNotFoundError)
+    def test_take_over_deleted_instance(self, _):
+        self.assertEqual(0, self._take_over(_lease(owner='dead:1')))
+
+    def test_take_over_queued_task(self):
+        self.assertEqual(1, self._take_over(_lease()))
+
+    def test_give_up(self):
+        self.patch_conf_property('taskmanager_task_max_attempts', 2)
+        self.assertEqual(0, self._take_over(_lease(owner='dead:1',
+                                                   attempts=2)))
+        self.mock_query.return_value.filter_by.assert_called_once_with(
+            id='lease', attempts=2)
+
+    def test_renew_lost_lease(self):
+        self.mock_query.return_value.filter_by.return_value.update.\
+            return_value = 0
+        self.assertRaises(loopingcall.LoopingCallDone,
+                          self.task_leases._renew, 'lease')
+
+    def test_claim_periodic(self):
+        self._set_claimed(1)
+        self.assertTrue(self.task_leases.claim_periodic('retention', 600))
+        self.assertFalse(self.mock_create.called)
+
+    def test_claim_periodic_held_by_another_worker(self):
+        self._set_claimed(0)
+        self.mock_query.return_value.filter_by.return_value.count.\
+            return_value = 1
+        self.assertFalse(self.task_leases.claim_periodic('retention', 600))
+        self.assertFalse(self.mock_create.called)
+
+    def test_claim_periodic_first_run(self):
+        self._set_claimed(0)
+        self.mock_query.return_value.filter_by.return_value.count.\
+            return_value = 0
+        self.assertTrue(self.task_leases.claim_periodic('retention', 600))
+        self.assertEqual('periodic:retention',
+                         self.mock_create.call_args[1]['id'])
+
+        self.mock_create.side_effect = exception.DBConstraintError(
+            model_name='DBTaskLease', error='duplicate')
+        self.assertFalse(self.task_leases.claim_periodic('retention', 600))
@@ -14,7 +14,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from mock import Mock, patch, PropertyMock
+from mock import ANY, Mock, patch, PropertyMock
 from proboscis.asserts import assert_equal
 
 from trove.backup.models import Backup
@@ -208,9 +208,43 @@ class TestManager(trove_testtools.TestCase):
                                          None, None)
         mock_tasks.get_replication_master_snapshot.assert_called_with(
             self.context, 'some-master-id', mock_flavor, 'temp-backup-id',
-            replica_number=1)
+            replica_number=1, replica_count=1)
         mock_backup_delete.assert_called_with(self.context, 'test-id')
 
+    @patch.object(Backup, 'delete')
+    @patch.object(models.BuiltInstanceTasks, 'load')
+    def test_create_replication_slaves_share_snapshot(self, mock_load,
+                                                      mock_backup_delete):
+        mock_snapshot = {'dataset': {'snapshot_id': 'test-id'}}
+        replicas = [Mock(), Mock(), Mock()]
+        for replica in replicas:
+            replica.get_replication_master_snapshot.return_value = (
+                mock_snapshot)
+            replica.wait_for_instance.side_effect = (
+                lambda *args: mock_backup_delete.assert_not_called())
+        mock_flavor = Mock()
+        with patch.object(models.FreshInstanceTasks, 'load',
+                          side_effect=replicas):
+            self.manager.create_instance(self.context, ['id1', 'id2', 'id3'],
+                                         Mock(), mock_flavor, Mock(), None,
+                                         None, 'mysql', 'mysql-server', 2,
+                                         None, None,
+                                         ['pw1', 'pw2', 'pw3'], None, Mock(),
+                                         'some-master-id', None, None,
+                                         None, None)
+        replicas[0].get_replication_master_snapshot.assert_called_once_with(
+            self.context, 'some-master-id', mock_flavor, None,
+            replica_number=1, replica_count=3)
+        replicas[2].get_replication_master_snapshot.assert_called_once_with(
+            self.context, 'some-master-id', mock_flavor, 'test-id',
+            replica_number=3, replica_count=3)
+        for replica in replicas:
+            self.assertEqual('test-id',
+                             replica.create_instance.call_args[0][7])
+            replica.wait_for_instance.assert_called_once_with(ANY,
+                                                              mock_flavor)
+        mock_backup_delete.assert_called_once_with(self.context, 'test-id')
+
     @patch.object(models.FreshInstanceTasks, 'load')
     @patch.object(Backup, 'delete')
     @patch.object(models.BuiltInstanceTasks, 'load')
@@ -255,7 +289,8 @@ class TestManager(trove_testtools.TestCase):
                                                       'password', None,
                                                       mock_override,
                                                       None, None, None, None,
-                                                      {'group': 'sg-id'})
+                                                      {'group': 'sg-id'},
+                                                      restore_point=None)
         mock_tasks.wait_for_instance.assert_called_with(36000, mock_flavor)
 
     def test_create_cluster(self):
@@ -18,7 +18,7 @@ import uuid
 from cinderclient import exceptions as cinder_exceptions
 import cinderclient.v2.client as cinderclient
 from cinderclient.v2 import volumes as cinderclient_volumes
-from mock import Mock, MagicMock, patch, PropertyMock, call
+from mock import ANY, Mock, MagicMock, patch, PropertyMock, call
 from novaclient import exceptions as nova_exceptions
 import novaclient.v2.flavors
 import novaclient.v2.servers
@@ -209,6 +209,7 @@ class FreshInstanceTasksTest(trove_testtools.TestCase):
             f.write(self.guestconfig_content)
         self.freshinstancetasks = taskmanager_models.FreshInstanceTasks(
             None, Mock(), None, None)
+        self.freshinstancetasks.db_info.compute_instance_id = None
         self.tm_sg_create_inst_patch = patch.object(
             trove.taskmanager.models.SecurityGroup, 'create_for_instance',
             Mock(return_value={'id': uuid.uuid4(), 'name': uuid.uuid4()}))
@@ -415,6 +416,9 @@ class FreshInstanceTasksTest(trove_testtools.TestCase):
             'mysql-image-id', None, None, 'mysql', 'mysql-server',
             2, Mock(), None, 'root_password', None, Mock(), None, None, None,
             None, None)
+        # The guest was prepared, the root password is still recorded.
+        mock_report_root_enabled = args[8]
+        mock_report_root_enabled.assert_called_once_with()
 
     @patch.object(BaseInstance, 'update_db')
     @patch.object(taskmanager_models.FreshInstanceTasks, '_create_dns_entry')
@@ -455,6 +459,22 @@ class FreshInstanceTasksTest(trove_testtools.TestCase):
             'mysql', mock_build_volume_info()['block_device'], None,
             None, mock_get_injected_files(), {'group': 'sg-id'})
 
+    @patch.object(backup_models.Backup, 'get_by_id')
+    def test_load_backup_info_with_restore_point(self, mock_get_by_id):
+        mock_get_by_id.return_value = Mock(
+            instance_id='source-id', location='swift://backup',
+            backup_type='InnoBackupEx', checksum='md5')
+        restore_point = {'timestamp': '2016-05-04T10:20:30Z'}
+        backup_info = self.freshinstancetasks._load_backup_info(
+            'backup-id', restore_point)
+        self.assertEqual({'id': 'backup-id', 'instance_id': 'source-id',
+                          'location': 'swift://backup',
+                          'type': 'InnoBackupEx', 'checksum': 'md5',
+                          'restore_point': restore_point}, backup_info)
+        self.assertNotIn('restore_point',
+                         self.freshinstancetasks._load_backup_info(
+                             'backup-id'))
+
     @patch.object(trove.guestagent.api.API, 'attach_replication_slave')
     @patch.object(rpc, 'get_client')
     @patch.object(DBInstance, 'get_by')
@@ -491,6 +511,79 @@ class FreshInstanceTasksTest(trove_testtools.TestCase):
             self.freshinstancetasks.attach_replication_slave,
             snapshot, mock_flavor)
 
+    @patch.object(taskmanager_models.FreshInstanceTasks,
+                  '_render_replica_config')
+    @patch.object(backup_models.Backup, 'get_last_completed',
+                  return_value=None)
+    @patch.object(backup_models.DBBackup, 'create',
+                  return_value=Mock(id='backup-id'))
+    @patch.object(taskmanager_models.BuiltInstanceTasks, 'load')
+    @patch('trove.taskmanager.models.LOG')
+    def test_replica_seed_falls_back_to_backup(self, mock_logging,
+                                               mock_load, *args):
+        self.task_models_conf_mock.get.return_value.replica_seeding = (
+            'direct')
+        master = mock_load.return_value
+        master.backup_required_for_replication.return_value = True
+        master.get_replication_snapshot.side_effect = [
+            Exception('Cannot listen'), {'dataset': {}}]
+
+        self.freshinstancetasks.get_replication_master_snapshot(
+            None, 'master-id', Mock())
+
+        calls = master.get_replication_snapshot.call_args_list
+        seed_info = calls[0][0][0]
+        self.assertTrue(seed_info['seed'])
+        self.assertIsNone(seed_info['id'])
+        backup_info = calls[1][0][0]
+        self.assertNotIn('seed', backup_info)
+        self.assertEqual('backup-id', backup_info['id'])
+
+    @patch.object(taskmanager_models.FreshInstanceTasks,
+                  '_render_replica_config')
+    @patch.object(backup_models.Backup, 'get_last_completed',
+                  return_value=None)
+    @patch.object(backup_models.DBBackup, 'create',
+                  return_value=Mock(id='backup-id'))
+    @patch.object(taskmanager_models.BuiltInstanceTasks, 'load')
+    def test_old_guest_is_not_asked_to_seed(self, mock_load, *args):
+        self.task_models_conf_mock.get.return_value.replica_seeding = (
+            'direct')
+        master = mock_load.return_value
+        master.backup_required_for_replication.return_value = True
+        master.guest.can_seed_replica.return_value = False
+        master.get_replication_snapshot.return_value = {'dataset': {}}
+
+        self.freshinstancetasks.get_replication_master_snapshot(
+            None, 'master-id', Mock())
+
+        master.get_replication_snapshot.assert_called_once_with(
+            ANY, flavor=master.flavor_id)
+        snapshot_info = master.get_replication_snapshot.call_args[0][0]
+        self.assertNotIn('seed', snapshot_info)
+        self.assertEqual('backup-id', snapshot_info['id'])
+
+    @patch.object(taskmanager_models.FreshInstanceTasks,
+                  '_render_replica_config')
+    @patch.object(backup_models.Backup, 'get_last_completed',
+                  return_value=None)
+    @patch.object(backup_models.DBBackup, 'create',
+                  return_value=Mock(id='backup-id'))
+    @patch.object(taskmanager_models.BuiltInstanceTasks, 'load')
+    def test_replica_batch_is_not_seeded_directly(self, mock_load, *args):
+        self.task_models_conf_mock.get.return_value.replica_seeding = (
+            'direct')
+        master = mock_load.return_value
+        master.backup_required_for_replication.return_value = True
+        master.get_replication_snapshot.return_value = {'dataset': {}}
+
+        self.freshinstancetasks.get_replication_master_snapshot(
+            None, 'master-id', Mock(), replica_count=3)
+
+        snapshot_info = master.get_replication_snapshot.call_args[0][0]
+        self.assertNotIn('seed', snapshot_info)
+        self.assertEqual('backup-id', snapshot_info['id'])
+
 
 class ResizeVolumeTest(trove_testtools.TestCase):
 
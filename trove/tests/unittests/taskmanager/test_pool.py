@@ -0,0 +1,186 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from datetime import timedelta
+
+from mock import MagicMock, Mock, patch
+
+from trove.common import exception
+from trove.common import timeutils
+from trove.instance import models as inst_models
+from trove.instance.models import GuestPoolMemberStatus
+from trove.taskmanager import pool
+from trove.tests.unittests import trove_testtools
+
+
+def _member(member_id, status, age=0):
+    created = timeutils.utcnow() - timedelta(seconds=age)
+    return Mock(id=member_id, instance_id='inst-' + member_id,
+                pool_id='pool', status=status, created=created,
+                updated=created)
+
+
+class GuestPoolManagerTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(GuestPoolManagerTest, self).setUp()
+        self.manager = pool.GuestPoolManager(Mock(tenant='service'))
+        self.pool = Mock(id='pool', size=2, idle_timeout=0, claimed=3,
+                         missed=1)
+        self.members = []
+        patcher = patch.object(pool.DBGuestPoolMember, 'find_all')
+        mock_find_all = patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_find_all.return_value.all.side_effect = lambda: self.members
+        for name in ('_build', '_reap', '_transition', '_check_building'):
+            patcher = patch.object(pool.GuestPoolManager, name)
+            setattr(self, 'mock' + name, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.mock_reap.return_value = 1
+        self.mock_transition.return_value = 1
+
+    def test_replenish(self):
+        self.members = [_member('a', GuestPoolMemberStatus.READY)]
+        stats = self.manager.maintain(self.pool)
+        self.mock_build.assert_called_once_with(self.pool)
+        self.assertEqual({'ready': 1, 'building': 1, 'started': 1,
+                          'reaped': 0},
+                         dict((key, stats[key]) for key in
+                              ('ready', 'building', 'started', 'reaped')))
+
+    def test_replenish_batch(self):
+        self.pool.size = 10
+        self.patch_conf_property('guest_pool_build_batch', 3)
+        stats = self.manager.maintain(self.pool)
+        self.assertEqual(3, self.mock_build.call_count)
+        self.assertEqual(3, stats['building'])
+
+    def test_building_member_becomes_ready(self):
+        self.members = [_member('a', GuestPoolMemberStatus.BUILDING),
+                        _member('b', GuestPoolMemberStatus.READY)]
+        self.mock_check_building.return_value = GuestPoolMemberStatus.READY
+        stats = self.manager.maintain(self.pool)
+        self.mock_transition.assert_called_once_with(
+            self.members[0], GuestPoolMemberStatus.READY)
+        self.assertEqual(2, stats['ready'])
+        self.assertFalse(self.mock_build.called)
+
+    def test_failed_or_late_builds_are_reaped(self):
+        self.members = [_member('a', GuestPoolMemberStatus.BUILDING),
+                        _member('b', GuestPoolMemberStatus.BUILDING,
+                                age=3600)]
+        self.mock_check_building.side_effect = [
+            None, GuestPoolMemberStatus.BUILDING]
+        stats = self.manager.maintain(self.pool)
+        self.assertEqual(2, stats['reaped'])
+        self.assertEqual(2, self.mock_build.call_count)
+
+    def test_idle_members_are_reaped(self):
+        self.pool.idle_timeout = 60
+        self.members = [_member('a', GuestPoolMemberStatus.READY, age=120),
+                        _member('b', GuestPoolMemberStatus.READY)]
+        stats = self.manager.maintain(self.pool)
+        self.mock_reap.assert_called_once_with(self.members[0], 'idle')
+        self.assertEqual(1, stats['ready'])
+        self.assertEqual(1, stats['started'])
+
+    def test_shrink(self):
+        self.pool.size = 1
+        self.members = [_member('a', GuestPoolMemberStatus.READY),
+                        _member('b', GuestPoolMemberStatus.READY, age=10)]
+        stats = self.manager.maintain(self.pool)
+        self.mock_reap.assert_called_once_with(self.members[1],
+                                               'pool shrunk')
+        self.assertEqual(1, stats['ready'])
+        self.assertFalse(self.mock_build.called)
+
+
+class GuestPoolClaimTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(GuestPoolClaimTest, self).setUp()
+        self.patch_conf_property('guest_pool_interval', 60)
+        self.context = Mock(tenant='tenant')
+        self.pool = Mock(id='pool')
+        patcher = patch.object(inst_models.GuestPool, 'find',
+                               return_value=self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(inst_models.GuestPool, 'count')
+        self.mock_count = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(inst_models.DBGuestPoolMember, 'query')
+        self.mock_query = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.members = [Mock(id='a', instance_id='inst-a'),
+                        Mock(id='b', instance_id='inst-b')]
+        (self.mock_query.return_value.filter_by.return_value.order_by.
+         return_value.limit.return_value.all.return_value) = self.members
+
+    def _claim(self):
+        return inst_models.GuestPool.claim(self.context, 'dsv', '7', 2,
+                                           None, name='new')
+
+    @patch.object(inst_models.DBInstance, 'find_by')
+    def test_claim(self, mock_find_by):
+        # The first member was taken by another worker.
+        self.mock_query.return_value.filter_by.return_value.delete.\
+            side_effect = [0, 1]
+        db_info = self._claim()
+        self.assertEqual(mock_find_by.return_value, db_info)
+        mock_find_by.assert_called_once_with(id='inst-b', deleted=False)
+        update_args = db_info.update.call_args[1]
+        self.assertEqual('tenant', update_args['tenant_id'])
+        self.assertEqual('new', update_args['name'])
+        self.mock_count.assert_called_once_with(self.pool, 'claimed')
+
+    def test_claim_empty_pool(self):
+        self.mock_query.return_value.filter_by.return_value.delete.\
+            return_value = 0
+        self.assertIsNone(self._claim())
+        self.mock_count.assert_called_once_with(self.pool, 'missed')
+
+    def test_claim_disabled(self):
+        self.patch_conf_property('guest_pool_interval', 0)
+        self.assertIsNone(self._claim())
+        self.assertFalse(self.mock_query.called)
+
+
+class GuestPoolsTest(trove_testtools.TestCase):
+
+    def test_update_negative_size(self):
+        self.assertRaises(exception.BadRequest, pool.GuestPools.update,
+                          'mysql', '5.7', '7', -1)
+
+    @patch.object(pool.DBGuestPool, 'find_by')
+    @patch.object(pool.DBGuestPoolMember, 'find_all')
+    def test_delete_pool_with_members(self, mock_find_all, mock_find_by):
+        mock_find_all.return_value.count.return_value = 1
+        self.assertRaises(exception.BadRequest, pool.GuestPools.delete,
+                          'pool')
+        self.assertFalse(mock_find_by.return_value.delete.called)
+
+    @patch.object(pool, 'create_guest_client')
+    @patch.object(pool.DBInstance, 'find_by')
+    def test_check_building(self, mock_find_by, mock_guest_client):
+        manager = pool.GuestPoolManager(MagicMock())
+        member = _member('a', GuestPoolMemberStatus.BUILDING)
+        mock_find_by.return_value.task_status.is_error = False
+        mock_guest_client.return_value.rpc_ping.side_effect = [
+            exception.GuestTimeout, None]
+        self.assertEqual(GuestPoolMemberStatus.BUILDING,
+                         manager._check_building(member))
+        self.assertEqual(GuestPoolMemberStatus.READY,
+                         manager._check_building(member))
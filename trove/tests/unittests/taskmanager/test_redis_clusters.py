@@ -0,0 +1,95 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import call, Mock
+
+from trove.common.strategies.cluster.experimental.redis import rebalance
+from trove.tests.unittests import trove_testtools
+
+
+class RedisRebalanceTest(trove_testtools.TestCase):
+
+    def _slot_map(self, node_ids):
+        return dict((node_id, list(range(first, last + 1)))
+                    for node_id, (first, last)
+                    in zip(node_ids, rebalance.slot_ranges(node_ids)))
+
+    def _apply(self, slot_map, moves):
+        slot_map = dict((node_id, set(slots))
+                        for node_id, slots in slot_map.items())
+        for source, target, slots in moves:
+            self.assertTrue(set(slots) <= slot_map[source])
+            slot_map[source] -= set(slots)
+            slot_map.setdefault(target, set()).update(slots)
+        return dict((node_id, len(slots))
+                    for node_id, slots in slot_map.items())
+
+    def test_slot_ranges(self):
+        self.assertEqual([[0, 5461], [5462, 10922], [10923, 16383]],
+                         rebalance.slot_ranges(['a', 'b', 'c']))
+
+    def test_grow_moves_slots_to_new_nodes(self):
+        slot_map = self._slot_map(['a', 'b', 'c'])
+        slot_map['d'] = []
+        moves = rebalance.plan_moves(slot_map, ['a', 'b', 'c', 'd'])
+        self.assertEqual(set(['d']), set(target for _, target, _ in moves))
+        self.assertEqual(4096, sum(len(slots) for _, _, slots in moves))
+        self.assertEqual({'a': 4096, 'b': 4096, 'c': 4096, 'd': 4096},
+                         self._apply(slot_map, moves))
+        # The highest slots are moved, the others stay contiguous.
+        self.assertEqual(list(range(5462 - 1366, 5462)),
+                         [move[2] for move in moves if move[0] == 'a'][0])
+
+    def test_shrink_empties_removed_nodes(self):
+        slot_map = self._slot_map(['a', 'b', 'c', 'd'])
+        moves = rebalance.plan_moves(slot_map, ['a', 'b', 'c'])
+        self.assertEqual(set(['d']), set(source for source, _, _ in moves))
+        counts = self._apply(slot_map, moves)
+        self.assertEqual(0, counts['d'])
+        self.assertEqual([5461, 5461, 5462],
+                         sorted(counts[node_id] for node_id in 'abc'))
+
+    def test_balanced_cluster_moves_nothing(self):
+        self.assertEqual([], rebalance.plan_moves(
+            self._slot_map(['a', 'b', 'c']), ['a', 'b', 'c']))
+
+    def test_to_slot_map(self):
+        nodes = {'a': {'flags': ['myself', 'master'],
+                       'slots': [[0, 2], [5, 5]]},
+                 'b': {'flags': ['slave'], 'slots': []},
+                 'c': {'flags': ['master'], 'slots': []}}
+        self.assertEqual({'a': [0, 1, 2, 5], 'c': []},
+                         rebalance.to_slot_map(nodes))
+
+    def test_slot_migration(self):
+        self.patch_conf_property('slot_migration_slots_per_call', 2,
+                                 section='redis')
+        source, target = Mock(), Mock()
+        source.cluster_migrate_slots.return_value = 10
+        migration = rebalance.SlotMigration(
+            'cluster', {'a': (source, '10.0.0.1', '6379'),
+                        'b': (target, '10.0.0.2', '6379')})
+        migration.run([('a', 'b', [1, 2, 3])])
+        target.cluster_import_slots.assert_has_calls(
+            [call([1, 2], 'a'), call([3], 'a')])
+        source.cluster_migrate_slots.assert_has_calls(
+            [call([1, 2], 'b', '10.0.0.2', '6379'),
+             call([3], 'b', '10.0.0.2', '6379')])
+        source.cluster_set_slots_node.assert_has_calls(
+            [call([1, 2], 'b'), call([3], 'b')])
+        target.cluster_set_slots_node.assert_has_calls(
+            [call([1, 2], 'b'), call([3], 'b')])
+        self.assertEqual(3, migration.slots_moved)
+        self.assertEqual(20, migration.keys_moved)
@@ -0,0 +1,78 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+
+from trove.common import exception
+from trove.taskmanager import steps
+from trove.tests.unittests import trove_testtools
+
+
+class StepGraphTest(trove_testtools.TestCase):
+
+    def setUp(self):
+        super(StepGraphTest, self).setUp()
+        self.events = []
+
+    def _step(self, name, delay=0, result=None, error=None):
+        def step(**results):
+            self.events.append(('start', name, results))
+            eventlet.sleep(delay)
+            self.events.append(('end', name))
+            if error:
+                raise error
+            return result
+        return step
+
+    def test_independent_steps_overlap(self):
+        graph = steps.StepGraph('test')
+        graph.add('a', self._step('a', delay=0.02, result=1))
+        graph.add('b', self._step('b', delay=0.02, result=2))
+        self.assertEqual({'a': 1, 'b': 2}, graph.run())
+        self.assertEqual(['start', 'start', 'end', 'end'],
+                         [event[0] for event in self.events])
+        self.assertEqual(['a', 'b'],
+                         sorted(timing.name for timing in graph.timings))
+
+    def test_required_results_are_passed(self):
+        graph = steps.StepGraph('test')
+        graph.add('a', self._step('a', delay=0.01, result=1))
+        graph.add('b', self._step('b', result=2))
+        graph.add('c', self._step('c', result=3), requires=['a', 'b'])
+        graph.run()
+        self.assertEqual(('start', 'c', {'a': 1, 'b': 2}), self.events[-2])
+
+    def test_unknown_required_step(self):
+        graph = steps.StepGraph('test')
+        self.assertRaises(exception.TroveError, graph.add, 'a',
+                          self._step('a'), requires=['b'])
+
+    def test_failure_stops_the_graph(self):
+        graph = steps.StepGraph('test')
+        graph.add('a', self._step('a', error=exception.TroveError('boom')))
+        graph.add('b', self._step('b', delay=0.01))
+        graph.add('c', self._step('c'), requires=['a'])
+        self.assertRaisesRegexp(exception.TroveError, 'boom', graph.run)
+        # The running step is waited for, the dependent one never starts.
+        self.assertIn(('end', 'b'), self.events)
+        self.assertNotIn('c', [event[1] for event in self.events])
+        errors = dict((timing.name, timing.error) for timing in graph.timings)
+        self.assertIsNone(errors['b'])
+        self.assertIsInstance(errors['a'], exception.TroveError)
+
+    def test_timeout_in_step_is_raised(self):
+        graph = steps.StepGraph('test')
+        graph.add('a', self._step('a', error=eventlet.Timeout()))
+        self.assertRaises(eventlet.Timeout, graph.run)